@@ -0,0 +1,140 @@
+"""
+Benchmark: streaming rule engine (src/alert_rules.py) vs re-querying history per rule.
+
+Replays one synthetic day of 1-minute obs_st rows through N rules.
+
+    python -m benchmarks.bench_alert_rules [--rules 100] [--minutes 1440]
+"""
+import argparse
+import sqlite3
+import time
+
+import numpy as np
+
+from src.alert_rules import RuleEngine, obs_st_metrics, parse_rules
+
+START_EPOCH = 1_700_000_000
+
+
+def synthetic_day(minutes: int) -> list[dict]:
+    rng = np.random.default_rng(11)
+    steps = np.arange(minutes)
+    temp = 4 + 6 * np.sin(steps / minutes * 2 * np.pi) + rng.normal(0, 0.2, minutes)
+    pressure = 1016 - steps * 6 / minutes + rng.normal(0, 0.1, minutes)
+    gust = rng.gamma(2.0, 2.5, minutes)
+    strikes = np.where(rng.random(minutes) < 0.03, rng.integers(1, 6, minutes), 0)
+    distance = np.where(strikes > 0, rng.uniform(1, 40, minutes), 0)
+    return [
+        {
+            "obs_epoch": START_EPOCH + int(step) * 60,
+            "air_temperature": float(temp[step]),
+            "station_pressure": float(pressure[step]),
+            "wind_gust": float(gust[step]),
+            "lightning_strike_count": int(strikes[step]),
+            "lightning_avg_dist": float(distance[step]),
+        }
+        for step in steps
+    ]
+
+
+def rule_specs(count: int) -> list[dict]:
+    specs = []
+    for index in range(count):
+        kind = index % 4
+        if kind == 0:
+            specs.append({"id": f"temp_{index}", "metric": "temp_f", "below": 20 + index % 15})
+        elif kind == 1:
+            specs.append({"id": f"gust_{index}", "metric": "wind_gust_mph", "above": 20 + index % 25})
+        elif kind == 2:
+            specs.append(
+                {
+                    "id": f"drop_{index}",
+                    "type": "rate",
+                    "metric": "pressure_mb",
+                    "window_minutes": (60, 180, 360)[index % 3],
+                    "below": -1 - index % 4,
+                }
+            )
+        else:
+            specs.append(
+                {
+                    "id": f"lightning_{index}",
+                    "type": "lightning",
+                    "within_km": (5, 10, 20)[index % 3],
+                    "window_minutes": 30,
+                    "min_strikes": 1 + index % 5,
+                }
+            )
+    return specs
+
+
+def run_engine(rows: list[dict], specs: list[dict]) -> tuple[float, int]:
+    engine = RuleEngine(parse_rules(specs)[0])
+    fired = 0
+    start = time.perf_counter()
+    for row in rows:
+        fired += len(engine.observe("obs_st", row["obs_epoch"], obs_st_metrics(row)))
+    return time.perf_counter() - start, fired
+
+
+def run_requery(rows: list[dict], specs: list[dict]) -> float:
+    """Baseline: insert each row, then query the history every rule needs."""
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        "CREATE TABLE obs_st (obs_epoch INTEGER PRIMARY KEY, air_temperature REAL, station_pressure REAL,"
+        " wind_gust REAL, lightning_strike_count INTEGER, lightning_avg_dist REAL)"
+    )
+    rules = parse_rules(specs)[0]
+    start = time.perf_counter()
+    for row in rows:
+        conn.execute(
+            "INSERT INTO obs_st VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                row["obs_epoch"],
+                row["air_temperature"],
+                row["station_pressure"],
+                row["wind_gust"],
+                row["lightning_strike_count"],
+                row["lightning_avg_dist"],
+            ),
+        )
+        now = row["obs_epoch"]
+        for rule in rules:
+            if rule["type"] == "rate":
+                conn.execute(
+                    "SELECT station_pressure FROM obs_st WHERE obs_epoch >= ? ORDER BY obs_epoch LIMIT 1",
+                    (now - rule["window"],),
+                ).fetchone()
+            elif rule["type"] == "lightning":
+                conn.execute(
+                    "SELECT SUM(lightning_strike_count) FROM obs_st WHERE obs_epoch >= ? AND lightning_avg_dist <= ?",
+                    (now - rule["window"], rule["within_km"]),
+                ).fetchone()
+            else:
+                conn.execute(
+                    "SELECT air_temperature, wind_gust FROM obs_st ORDER BY obs_epoch DESC LIMIT 1"
+                ).fetchone()
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rules", type=int, default=100)
+    parser.add_argument("--minutes", type=int, default=1440)
+    args = parser.parse_args()
+
+    rows = synthetic_day(args.minutes)
+    print(f"observations: {len(rows):,}")
+    for count in sorted({10, args.rules, args.rules * 10}):
+        seconds, fired = run_engine(rows, rule_specs(count))
+        per_obs = seconds / len(rows) * 1e6
+        print(f"engine    {count:5d} rules: {seconds * 1000:8.1f} ms  {per_obs:7.1f} us/obs  {per_obs / count:5.2f} us/rule  fired={fired}")
+    requery = run_requery(rows, rule_specs(args.rules))
+    engine_seconds, _ = run_engine(rows, rule_specs(args.rules))
+    print(f"re-query  {args.rules:5d} rules: {requery * 1000:8.1f} ms  {requery / len(rows) * 1e6:7.1f} us/obs")
+    print(f"speedup at {args.rules} rules: {requery / max(engine_seconds, 1e-9):.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
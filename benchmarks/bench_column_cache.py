@@ -0,0 +1,114 @@
+"""
+Benchmark: obs_st range loads via pd.read_sql_query vs the column cache (src/column_cache.py).
+
+    python -m benchmarks.bench_column_cache [--years 3] [--repeat 5] [--keep DIR]
+
+Builds a synthetic multi-year obs_st (one row per minute, as in
+bench_obs_layout), syncs the column cache and times loading two metrics for
+ranges ending at the newest row, plus the daily brief's one-day lookups of
+the same day in past years. Each load opens a fresh connection, and the cache is
+re-mapped every time, so both sides are warm-disk timings.
+"""
+import argparse
+import shutil
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_obs_layout import START_EPOCH, build_rowid_db
+from src import column_cache
+
+RANGES = {"1 day": 86_400, "30 days": 30 * 86_400, "1 year": 365 * 86_400}
+COLUMNS = ["air_temperature", "wind_gust"]
+YEAR = 365 * 86_400
+
+
+def best_of(repeat: int, fn) -> tuple[float, object]:
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def load_sql(path: Path, start: int, end: int) -> pd.DataFrame:
+    with sqlite3.connect(path) as conn:
+        return pd.read_sql_query(
+            f"SELECT obs_epoch, {', '.join(COLUMNS)} FROM obs_st "
+            "WHERE obs_epoch >= ? AND obs_epoch < ? ORDER BY obs_epoch",
+            conn,
+            params=(start, end),
+        )
+
+
+def load_cache(path: Path, cache_dir: Path, start: int, end: int) -> pd.DataFrame:
+    with sqlite3.connect(path) as conn:
+        return column_cache.read_frame(conn, "obs_st", COLUMNS, start, end, cache_dir=cache_dir)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--years", type=float, default=3.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", help="directory to keep the generated database and cache in")
+    args = parser.parse_args()
+
+    workdir = Path(args.keep) if args.keep else Path(tempfile.mkdtemp(prefix="bench_column_cache_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    db_path = workdir / "tempest.db"
+    cache_dir = workdir / "columns"
+    try:
+        db_path.unlink(missing_ok=True)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        started = time.perf_counter()
+        rows = build_rowid_db(db_path, args.years)
+        print(f"rows: {rows:,} ({args.years:g} years, built in {time.perf_counter() - started:.1f}s)")
+        started = time.perf_counter()
+        column_cache.run_sync(db_path, cache_dir, log=lambda message: None)
+        status = column_cache.cache_status(cache_dir)["obs_st"]
+        print(
+            f"initial sync: {status['segments']} segments, {status['bytes'] / 2**20:.0f} MiB "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        with sqlite3.connect(db_path) as conn:
+            conn.executemany(
+                "INSERT INTO obs_st (obs_epoch, device_id, air_temperature) VALUES (?, 1, 20.0)",
+                [(START_EPOCH + 60 * (rows + n),) for n in range(5)],
+            )
+        started = time.perf_counter()
+        column_cache.run_sync(db_path, cache_dir, log=lambda message: None)
+        print(f"incremental sync (5 new rows): {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        end = START_EPOCH + 60 * rows
+        print(f"{'load':22s} {'rows':>9s} {'sql ms':>9s} {'cache ms':>9s} {'speedup':>8s}")
+        for label, seconds in RANGES.items():
+            before, expected = best_of(args.repeat, lambda: load_sql(db_path, end - seconds, end))
+            after, result = best_of(args.repeat, lambda: load_cache(db_path, cache_dir, end - seconds, end))
+            assert len(expected) == len(result)
+            assert np.allclose(expected["air_temperature"], result["air_temperature"], atol=1e-4)
+            print(f"{label:22s} {len(result):9,d} {before * 1000:9.1f} {after * 1000:9.2f} {before / after:7.1f}x")
+
+        past_days = [(end - n * YEAR - 86_400, end - n * YEAR) for n in range(1, int(args.years))]
+        before, expected = best_of(
+            args.repeat, lambda: [load_sql(db_path, *day)["air_temperature"].max() for day in past_days]
+        )
+        after, result = best_of(
+            args.repeat, lambda: [load_cache(db_path, cache_dir, *day)["air_temperature"].max() for day in past_days]
+        )
+        assert np.allclose(expected, result, atol=1e-4)
+        label = f"same day, {len(past_days)} years"
+        print(f"{label:22s} {'':9s} {before * 1000:9.1f} {after * 1000:9.2f} {before / after:7.1f}x")
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,136 @@
+"""
+Benchmark: year-scale reads from SQLite vs the Parquet history store (src/history_store.py).
+
+    python -m benchmarks.bench_history_store [--years 3] [--repeat 5] [--keep DIR]
+
+Builds a synthetic multi-year obs_st (one row per minute, as in
+bench_obs_layout), exports it with history_store.run_export and times the
+long-range reads the history store is meant for: daily highs/lows over the
+newest year, the "same day in past years" lookups of the daily brief, and
+one year of a single column. SQLite reads use a fresh connection each time
+and Parquet reads open the files each time, so both are warm-disk timings.
+"""
+import argparse
+import shutil
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.bench_obs_layout import START_EPOCH, build_rowid_db
+from src import history_store
+
+YEAR = 365 * 86_400
+
+
+def best_of(repeat: int, fn) -> tuple[float, object]:
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def sqlite_frame(path: Path, sql: str, params: tuple) -> pd.DataFrame:
+    conn = sqlite3.connect(path)
+    try:
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+
+def daily_extremes(df: pd.DataFrame) -> pd.DataFrame:
+    days = df["obs_epoch"] // 86_400
+    return df.groupby(days)["air_temperature"].agg(["min", "max"])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--years", type=float, default=3.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", help="directory to keep the generated database and store in")
+    args = parser.parse_args()
+    if not history_store.available():
+        print("pyarrow is not installed (pip install pyarrow)")
+        return 1
+
+    workdir = Path(args.keep) if args.keep else Path(tempfile.mkdtemp(prefix="bench_history_store_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    db_path = workdir / "tempest.db"
+    history_dir = workdir / "history"
+    try:
+        db_path.unlink(missing_ok=True)
+        shutil.rmtree(history_dir, ignore_errors=True)
+        started = time.perf_counter()
+        rows = build_rowid_db(db_path, args.years)
+        print(f"rows: {rows:,} ({args.years:g} years, built in {time.perf_counter() - started:.1f}s)")
+        end = START_EPOCH + 60 * rows
+        started = time.perf_counter()
+        history_store.run_export(db_path, history_dir, now=end + 86_400, log=lambda message: None)
+        status = history_store.history_status(history_dir)["obs_st"]
+        print(
+            f"export: {status['files']} month files, {status['bytes'] / 2**20:.1f} MiB "
+            f"in {time.perf_counter() - started:.1f}s (database {db_path.stat().st_size / 2**20:.0f} MiB)"
+        )
+
+        year_start = end - YEAR
+        past_days = [(end - n * YEAR - 86_400, end - n * YEAR) for n in range(1, int(args.years))]
+        reads = {
+            "daily hi/lo, 1 year": (
+                lambda: daily_extremes(
+                    sqlite_frame(
+                        db_path,
+                        "SELECT obs_epoch, air_temperature FROM obs_st WHERE obs_epoch >= ? AND obs_epoch < ?",
+                        (year_start, end),
+                    )
+                ),
+                lambda: daily_extremes(
+                    history_store.read_history("obs_st", ["air_temperature"], year_start, end, history_dir)
+                ),
+            ),
+            "same day, past years": (
+                lambda: [
+                    sqlite_frame(
+                        db_path,
+                        "SELECT air_temperature FROM obs_st WHERE obs_epoch >= ? AND obs_epoch < ?",
+                        day,
+                    )["air_temperature"].max()
+                    for day in past_days
+                ],
+                lambda: [
+                    history_store.read_history("obs_st", ["air_temperature"], *day, history_dir)[
+                        "air_temperature"
+                    ].max()
+                    for day in past_days
+                ],
+            ),
+            "wind_gust, 1 year": (
+                lambda: sqlite_frame(
+                    db_path,
+                    "SELECT obs_epoch, wind_gust FROM obs_st WHERE obs_epoch >= ? AND obs_epoch < ?",
+                    (year_start, end),
+                ),
+                lambda: history_store.read_history("obs_st", ["wind_gust"], year_start, end, history_dir),
+            ),
+        }
+        print(f"{'read':24s} {'sqlite ms':>10s} {'parquet ms':>11s} {'speedup':>8s}")
+        for label, (from_sqlite, from_parquet) in reads.items():
+            before, expected = best_of(args.repeat, from_sqlite)
+            after, result = best_of(args.repeat, from_parquet)
+            if isinstance(expected, pd.DataFrame):
+                assert len(expected) == len(result)
+            else:
+                assert expected == result
+            print(f"{label:24s} {before * 1000:10.1f} {after * 1000:11.1f} {before / after:7.1f}x")
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,129 @@
+"""
+Benchmark: obs_st range reads in the rowid layout vs the clustered layout (src/obs_layout.py).
+
+    python -m benchmarks.bench_obs_layout [--years 3] [--repeat 5] [--keep DIR]
+
+Builds a synthetic multi-year obs_st (one row per minute, obs_raw_json
+included, as the collector writes it), copies it, clusters the copy and
+times 1-day, 7-day and 1-year reads ending at the newest row, both as
+fetched rows and as bucketed aggregates. Each read uses a fresh connection
+so the page cache does not carry over; the OS file cache still does, so the
+numbers are warm-disk timings.
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+os.environ.setdefault("TEMPEST_API_TOKEN", "benchmark")
+
+from src import collector  # noqa: E402
+from src.obs_layout import cluster_table, ensure_time_index  # noqa: E402
+
+DEVICE_ID = 475329
+START_EPOCH = 1_600_000_000
+RANGES = {"1 day": 86_400, "7 days": 7 * 86_400, "1 year": 365 * 86_400}
+CHART_COLUMNS = "obs_epoch, air_temperature, relative_humidity, station_pressure, wind_avg, wind_gust"
+
+
+def build_rowid_db(path: Path, years: float) -> int:
+    rows = int(years * 365 * 24 * 60)
+    rng = np.random.default_rng(7)
+    conn = sqlite3.connect(path)
+    conn.executescript(collector.BASE_SCHEMA_SQL)
+    ensure_time_index(conn, "obs_st")
+    chunk = 100_000
+    for offset in range(0, rows, chunk):
+        n = min(chunk, rows - offset)
+        epochs = START_EPOCH + 60 * np.arange(offset, offset + n)
+        temp = 12 + 10 * np.sin(epochs / 86_400 * 2 * np.pi) + rng.normal(0, 0.3, n)
+        batch = []
+        for epoch, t in zip(epochs.tolist(), temp.tolist()):
+            obs = [epoch, 0.4, 1.2, 2.3, 180, 3, 1012.5, round(t, 2), 55, 1000, 1.5, 120, 0.0, 0, 0, 0, 2.7, 1]
+            batch.append(collector.obs_st_row(DEVICE_ID, obs))
+        conn.executemany(collector.OBS_ST_INSERT_SQL, batch)
+        conn.commit()
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    return rows
+
+
+def time_read(path: Path, sql: str, params: tuple, repeat: int) -> tuple[float, int]:
+    timings = []
+    count = 0
+    for _ in range(repeat):
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA cache_size=-2000")
+        start = time.perf_counter()
+        count = len(conn.execute(sql, params).fetchall())
+        timings.append(time.perf_counter() - start)
+        conn.close()
+    return min(timings), count
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--years", type=float, default=3.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", help="directory to keep the generated databases in")
+    args = parser.parse_args()
+
+    workdir = Path(args.keep) if args.keep else Path(tempfile.mkdtemp(prefix="bench_obs_layout_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    rowid_db = workdir / "rowid.db"
+    clustered_db = workdir / "clustered.db"
+    try:
+        for path in (rowid_db, clustered_db):
+            path.unlink(missing_ok=True)
+        started = time.perf_counter()
+        rows = build_rowid_db(rowid_db, args.years)
+        print(f"rows: {rows:,} ({args.years:g} years, built in {time.perf_counter() - started:.1f}s)")
+        shutil.copyfile(rowid_db, clustered_db)
+        conn = sqlite3.connect(clustered_db)
+        cluster_table(conn, "obs_st", log=lambda message: print(f"  {message}"))
+        conn.execute("VACUUM")
+        conn.close()
+
+        end = START_EPOCH + 60 * (rows - 1)
+        queries = {
+            "time only": f"SELECT {CHART_COLUMNS} FROM obs_st WHERE obs_epoch >= ? AND obs_epoch <= ?",
+            "device + time": (
+                f"SELECT {CHART_COLUMNS} FROM obs_st WHERE device_id = {DEVICE_ID} AND obs_epoch >= ? AND obs_epoch <= ?"
+            ),
+            # Bucketed like query_planner.window_query_sql: no per-row Python cost.
+            "5-min buckets": (
+                "SELECT (obs_epoch / 300) * 300, AVG(air_temperature), MAX(wind_gust) FROM obs_st "
+                "WHERE obs_epoch >= ? AND obs_epoch <= ? GROUP BY 1"
+            ),
+        }
+        print(f"file size: rowid {rowid_db.stat().st_size / 2**20:.0f} MiB, "
+              f"clustered {clustered_db.stat().st_size / 2**20:.0f} MiB (incl. obs_st_raw)")
+        print(f"{'read':28s} {'rows':>9s} {'rowid ms':>10s} {'clustered ms':>13s} {'speedup':>8s}")
+        for label, sql in queries.items():
+            for range_label, seconds in RANGES.items():
+                params = (end - seconds, end)
+                before, count = time_read(rowid_db, sql, params, args.repeat)
+                after, clustered_count = time_read(clustered_db, sql, params, args.repeat)
+                assert count == clustered_count
+                print(
+                    f"{label + ', ' + range_label:28s} {count:9,d} {before * 1000:10.1f} {after * 1000:13.1f} "
+                    f"{before / after:7.1f}x"
+                )
+        with sqlite3.connect(clustered_db) as conn:
+            plan = conn.execute(f"EXPLAIN QUERY PLAN {queries['time only']}", (0, 1)).fetchall()
+        print("clustered time-only plan:", json.dumps([row[-1] for row in plan]))
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,87 @@
+"""
+Micro-benchmark: row-by-row chart payloads vs the column encoder in src/payloads.py.
+
+    python -m benchmarks.bench_payloads [--rows 100000] [--repeat 3]
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.payloads import column_points, column_series, dumps_payload
+
+
+def synthetic_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    times = pd.date_range("2024-01-01", periods=rows, freq="min", tz="UTC").tz_convert("America/Chicago")
+    temp = 60 + 15 * np.sin(np.arange(rows) / 720) + rng.normal(0, 0.5, rows)
+    temp[rng.integers(0, rows, rows // 100)] = np.nan
+    return pd.DataFrame(
+        {
+            "time": times,
+            "air_temperature_f": temp,
+            "wind_speed_mph": rng.gamma(2.0, 3.0, rows),
+            "aqi_pm25": rng.uniform(0, 150, rows),
+        }
+    )
+
+
+def legacy_series(df, time_col, value_col):
+    series = []
+    for _, row in df[[time_col, value_col]].dropna().iterrows():
+        series.append({"t": row[time_col].isoformat(), "v": float(row[value_col])})
+    return series
+
+
+def legacy_points(df, x_col, y_col):
+    return [
+        {"x": float(row[x_col]), "y": float(row[y_col])}
+        for _, row in df[[y_col, x_col]].dropna().iterrows()
+    ]
+
+
+def legacy_payload(df):
+    payload = {
+        "temp": legacy_series(df, "time", "air_temperature_f"),
+        "aqi_wind": legacy_points(df, "wind_speed_mph", "aqi_pm25"),
+    }
+    return json.dumps(payload)
+
+
+def column_payload(df):
+    payload = {
+        "temp": column_series(df, "time", "air_temperature_f"),
+        "aqi_wind": column_points(df, "wind_speed_mph", "aqi_pm25"),
+    }
+    return dumps_payload(payload)
+
+
+def best_of(fn, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings), len(out)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = synthetic_frame(args.rows)
+    legacy_sec, legacy_bytes = best_of(legacy_payload, df, args.repeat)
+    column_sec, column_bytes = best_of(column_payload, df, args.repeat)
+    print(f"rows: {args.rows:,}")
+    print(f"iterrows + json.dumps: {legacy_sec * 1000:9.1f} ms  {legacy_bytes / 1024:8.0f} KiB")
+    print(f"column encoder:        {column_sec * 1000:9.1f} ms  {column_bytes / 1024:8.0f} KiB")
+    print(f"speedup: {legacy_sec / max(column_sec, 1e-9):.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,10 +5,9 @@ import subprocess
 import time
 import re
 from datetime import datetime
-from contextlib import closing
-import requests
 from pathlib import Path
 import os
+from functools import partial
 from urllib.parse import urlencode
 
 import altair as alt
@@ -24,6 +23,7 @@ from src.pages import home as page_home
 from src.pages import trends as page_trends
 from src.pages import compare as page_compare
 from src.pages import data as page_data
+from src.pages import kiosk as page_kiosk
 from src.alerting import (
     build_freeze_alert_message,
     delete_alert_config,
@@ -36,15 +36,35 @@ from src.alerting import (
     send_email,
     send_verizon_sms,
 )
+from src.aqi import aqi_categories, aqi_category, aqi_color, pm25_aqi_series
+from src.column_cache import read_frame
+from src.current_conditions import read_current
 from src.config_store import (
-    connect as config_connect,
     get_bool,
     get_float,
     set_bool,
     set_float,
 )
 from src.forecast import parse_tempest_forecast
-from src.nws_alerts import fetch_active_alerts, fetch_hwo_text, format_alerts_html, format_hwo_html
+from src.external_data import (
+    cached_nws_alerts,
+    cached_nws_hwo,
+    cached_openmeteo,
+    cached_station_location,
+    cached_sun_times,
+    cached_tempest_forecast,
+)
+from src.nws_alerts import format_alerts_html, format_hwo_html
+from src.db_pool import get_pool
+from src.schema import ensure_schema
+from src.fan_out import fan_out
+from src.page_context import LazyContext
+from src.payloads import EMPTY_POINTS, EMPTY_SERIES, column_points, column_series, dumps_payload, format_column
+from src.raw_archive import archive_bytes, read_raw_events
+from src.raw_store import decompress_payload, raw_storage_bytes
+from src.query_planner import downsample_frame, plan_window, window_query_sql
+from src.rollups import RESOLUTIONS, rollup_table
+from src.window_cache import TailCache
 
 DB_PATH = os.getenv("TEMPEST_DB_PATH", "data/tempest.db")
 TEMPEST_STATION_ID = 475329
@@ -63,6 +83,7 @@ COLLECTOR_STALE_SECONDS = {
     "tempest_collector": 300,
 }
 COLLECTOR_ERROR_GRACE_SECONDS = 600
+COLLECTOR_WRITER_LAG_WARN_SECONDS = 10
 WATCHDOG_STALE_SECONDS = int(os.getenv("WATCHDOG_STALE_SECONDS", "600"))
 WATCHDOG_LOG_PATH = Path("logs/collector_watchdog.log")
 COLLECTOR_COLORS = {
@@ -102,6 +123,9 @@ GAUGE_COLORS = {
 }
 LOCAL_TZ = os.getenv("LOCAL_TZ", "America/New_York")
 CONTROL_REFRESH_SECONDS = int(os.getenv("CONTROL_REFRESH_SECONDS", os.getenv("AUTO_REFRESH_SECONDS", "120")))
+LIVE_REFRESH_SECONDS = int(os.getenv("LIVE_REFRESH_SECONDS", "15"))
+# Render budget for external lookups; slower ones show placeholders and finish in the background.
+EXTERNAL_FETCH_DEADLINE_SECONDS = float(os.getenv("EXTERNAL_FETCH_DEADLINE_SECONDS", "4"))
 FORECAST_REFRESH_MINUTES = int(os.getenv("FORECAST_REFRESH_MINUTES", "30"))
 FORECAST_UNITS = "imperial"
 FREEZE_WARNING_F = float(os.getenv("FREEZE_WARNING_F", "32"))
@@ -111,36 +135,86 @@ ALERTS_WORKER_ENABLED = os.getenv("ALERTS_WORKER_ENABLED", "false").lower() in (
 AQI_SMOKE_CLEAR_HOURS = int(os.getenv("AQI_SMOKE_CLEAR_HOURS", "6"))
 AQI_SMOKE_CLEAR_MAX = float(os.getenv("AQI_SMOKE_CLEAR_MAX", "50"))
 AQI_SMOKE_CLEAR_MIN_COUNT = int(os.getenv("AQI_SMOKE_CLEAR_MIN_COUNT", "6"))
+CHART_TARGET_POINTS = max(100, int(os.getenv("CHART_TARGET_POINTS", "1500")))
+# Shared per-process connections (thread-local readers, one serialized writer)
+DB_POOL = get_pool(DB_PATH)
 
-def resolve_table(candidates):
+@st.cache_resource(show_spinner=False)
+def migrate_schema(db_path: str) -> bool:
+    """Apply pending core migrations (src/schema.py) once per process."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cur = conn.cursor()
-        for name in candidates:
-            cur.execute(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
-                (name,),
-            )
-            if cur.fetchone():
-                return name
+        with DB_POOL.writer() as conn:
+            ensure_schema(conn)
+        return True
     except Exception:
-        pass
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
-    return None
+        return False
+
+
+# Cached so a rerun does not query sqlite_master once per table.
+@st.cache_data(ttl=60, show_spinner=False)
+def load_table_names(db_path: str) -> frozenset:
+    try:
+        rows = DB_POOL.reader().execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
+    except Exception:
+        return frozenset()
+    return frozenset(row[0] for row in rows)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def resolve_columns(table):
+    try:
+        return {row[1] for row in DB_POOL.reader().execute(f"PRAGMA table_info({table})").fetchall()}
+    except Exception:
+        return set()
 
+
+def resolve_table(candidates):
+    names = load_table_names(DB_PATH)
+    return next((name for name in candidates if name in names), None)
+
+
+migrate_schema(DB_PATH)
 AIRLINK_TABLE = resolve_table(["airlink_current_obs", "airlink_obs"])
 AIRLINK_RAW_TABLE = resolve_table(["airlink_raw_all", "airlink_raw"])
 RAW_EVENTS_TABLE = resolve_table(["raw_events"])
+RAW_PAYLOADS_TABLE = resolve_table(["raw_payloads"])
 HEARTBEAT_TABLE = resolve_table(["collector_heartbeat"])
 DAILY_BRIEF_TABLE = resolve_table(["daily_briefs"])
 AFD_HIGHLIGHTS_TABLE = resolve_table(["nws_afd_highlights"])
 ALERT_STATE_TABLE = resolve_table(["alert_state"])
 ALERT_CONFIG_TABLE = resolve_table(["alert_config"])
 APP_CONFIG_TABLE = resolve_table(["app_config"])
+# AQI persisted by the AirLink collector; older tables may not have it yet.
+AIRLINK_HAS_STORED_AQI = bool(AIRLINK_TABLE) and "aqi_pm25" in resolve_columns(AIRLINK_TABLE)
+ROLLUP_TABLES = {
+    source: {res: resolve_table([rollup_table(source, res)]) for res in RESOLUTIONS}
+    for source in ("obs_st", "airlink")
+}
+# Raw column -> aggregate used when the query planner buckets a long window
+TEMPEST_WINDOW_FIELDS = {
+    "air_temperature": "mean",
+    "relative_humidity": "mean",
+    "station_pressure": "mean",
+    "wind_avg": "mean",
+    "wind_gust": "max",
+    "wind_dir": "last",
+    "rain_accumulated": "last",
+    "lightning_strike_count": "sum",
+    "battery": "last",
+    "solar_radiation": "mean",
+    "uv": "max",
+}
+AIRLINK_WINDOW_FIELDS = {
+    "temp_f": "mean",
+    "hum": "mean",
+    "dew_point_f": "mean",
+    "heat_index_f": "mean",
+    "pm_1": "mean",
+    "pm_2p5": "mean",
+    "pm_10": "mean",
+    "pm_2p5_last_1_hour": "last",
+    "pm_2p5_nowcast": "last",
+}
 
 st.set_page_config(
     page_title="Tempest Air & Weather",
@@ -238,6 +312,10 @@ if query_page in valid_pages:
         del st.query_params["page"]
     except Exception:
         pass
+try:
+    kiosk_view = st.query_params.get("view") == "kiosk"
+except Exception:
+    kiosk_view = False
 
 # ------------------------
 # Theming
@@ -1141,12 +1219,18 @@ st.markdown(
 # ------------------------
 # Helpers
 # ------------------------
+def query_df(query, params=None):
+    return pd.read_sql_query(query, DB_POOL.reader(), params=params or {})
+
+
 @st.cache_data(ttl=60)
 def load_df(query, params=None):
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query(query, conn, params=params or {})
-    conn.close()
-    return df
+    return query_df(query, params)
+
+
+@st.cache_resource(show_spinner=False)
+def get_window_cache():
+    return TailCache()
 
 
 def epoch_to_dt(series):
@@ -1329,65 +1413,20 @@ def fmt_duration(seconds):
     return f"{hours}h {mins:02d}m"
 
 
-@st.cache_data(ttl=3600)
 def fetch_sun_times(lat, lon, date_str):
-    try:
-        resp = requests.get(
-            "https://api.sunrise-sunset.org/json",
-            params={"lat": lat, "lng": lon, "date": date_str, "formatted": 0},
-            timeout=6,
-        )
-        resp.raise_for_status()
-        payload = resp.json()
-        if not isinstance(payload, dict):
-            return None
-        return payload.get("results")
-    except Exception:
-        return None
+    return cached_sun_times(DB_PATH, lat, lon, date_str)
 
 
-@st.cache_data(ttl=3600)
 def fetch_station_location(token, station_id):
-    try:
-        resp = requests.get(
-            "https://swd.weatherflow.com/swd/rest/stations",
-            params={"token": token},
-            timeout=6,
-        )
-        resp.raise_for_status()
-        payload = resp.json()
-        stations = payload.get("stations", []) if isinstance(payload, dict) else []
-        for station in stations:
-            if station.get("station_id") == station_id:
-                lat = station.get("latitude") or station.get("station_latitude")
-                lon = station.get("longitude") or station.get("station_longitude") or station.get("lng")
-                return {
-                    "name": station.get("name") or "Tempest Station",
-                    "lat": lat,
-                    "lon": lon,
-                }
-        if stations:
-            station = stations[0]
-            lat = station.get("latitude") or station.get("station_latitude")
-            lon = station.get("longitude") or station.get("station_longitude") or station.get("lng")
-            return {
-                "name": station.get("name") or "Tempest Station",
-                "lat": lat,
-                "lon": lon,
-            }
-    except Exception:
-        return None
-    return None
+    return cached_station_location(DB_PATH, token, station_id)
 
 
-@st.cache_data(ttl=300)
 def fetch_nws_alerts_cached(lat, lon, tz_name):
-    return fetch_active_alerts(lat, lon, tz_name)
+    return cached_nws_alerts(DB_PATH, lat, lon, tz_name)
 
 
-@st.cache_data(ttl=900)
 def fetch_nws_hwo_cached(lat, lon):
-    return fetch_hwo_text(lat, lon)
+    return cached_nws_hwo(DB_PATH, lat, lon)
 
 
 def fmt_bytes(size_bytes):
@@ -1429,8 +1468,7 @@ def get_storage_stats():
     stats["assets_size"] = total_assets
 
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cur = conn.cursor()
+        cur = DB_POOL.reader().cursor()
         cur.execute("SELECT COUNT(1) FROM obs_st")
         stats["total_rows"] += int(cur.fetchone()[0])
         if AIRLINK_TABLE:
@@ -1446,7 +1484,19 @@ def get_storage_stats():
         if AIRLINK_TABLE:
             measurements |= set(measurement_cols(AIRLINK_TABLE, air_exclude))
         stats["measurements"] = len(measurements)
-        conn.close()
+    except Exception:
+        pass
+
+    # Raw capture footprint (raw_events + content-addressed raw_payloads)
+    try:
+        conn = DB_POOL.reader()
+        stats["raw_bytes"] = raw_storage_bytes(conn)
+        stats["archive_bytes"] = archive_bytes(conn)
+        row = conn.execute(
+            "SELECT value FROM app_config WHERE key = 'raw_compact_last_run'"
+        ).fetchone() if APP_CONFIG_TABLE else None
+        if row and row[0]:
+            stats["raw_compact_last_run"] = json.loads(row[0])
     except Exception:
         pass
 
@@ -1509,26 +1559,7 @@ def compute_wind_chill(temp_f, wind_mph):
     return 35.74 + (0.6215 * temp_f) - 35.75 * w_pow + 0.4275 * temp_f * w_pow
 
 
-def ensure_daily_briefs_table(conn: sqlite3.Connection):
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS daily_briefs (
-            date TEXT PRIMARY KEY,
-            generated_at TEXT,
-            tz TEXT,
-            headline TEXT,
-            bullets_json TEXT,
-            tomorrow_text TEXT,
-            model TEXT,
-            version TEXT
-        )
-        """
-    )
-    conn.commit()
-
-
 def load_daily_briefs(conn: sqlite3.Connection):
-    ensure_daily_briefs_table(conn)
     rows = conn.execute(
         "SELECT date, generated_at, headline, bullets_json, tomorrow_text FROM daily_briefs ORDER BY date DESC LIMIT 2"
     ).fetchall()
@@ -1550,7 +1581,6 @@ def load_daily_briefs(conn: sqlite3.Connection):
     return briefs
 
 
-@st.cache_data(ttl=FORECAST_REFRESH_MINUTES * 60)
 def fetch_tempest_forecast(token=None, station_id=None, lat=None, lon=None, api_key=None):
     """
     Fetch Tempest better_forecast.
@@ -1558,90 +1588,12 @@ def fetch_tempest_forecast(token=None, station_id=None, lat=None, lon=None, api_
     """
     if not token and not api_key:
         return None, "TEMPEST_API_TOKEN or TEMPEST_API_KEY not set"
-    base_url = "https://swd.weatherflow.com/swd/rest/better_forecast"
-    units = {
-        "units_temp": "f",
-        "units_wind": "mph",
-        "units_pressure": "inhg",
-        "units_precip": "in",
-        "units_distance": "mi",
-    }
-    params = {
-        "station_id": station_id,
-        **units,
-    }
-    if token:
-        params["token"] = token
-    if api_key and not token:
-        params["api_key"] = api_key
-    if lat is not None and lon is not None:
-        params["lat"] = lat
-        params["lon"] = lon
-    try:
-        resp = requests.get(base_url, params=params, timeout=10, headers={"accept": "application/json"})
-        resp.raise_for_status()
-        payload = resp.json()
-        status = payload.get("status") or {}
-        if status.get("status_code") not in (0, None):
-            if "lat" in params:
-                params.pop("lat", None)
-                params.pop("lon", None)
-                resp = requests.get(base_url, params=params, timeout=10, headers={"accept": "application/json"})
-                resp.raise_for_status()
-                payload = resp.json()
-                status = payload.get("status") or {}
-                if status.get("status_code") not in (0, None):
-                    return None, status.get("status_message") or "API returned error"
-            else:
-                return None, status.get("status_message") or "API returned error"
-        return payload, status.get("status_message") or "OK"
-    except Exception:
-        return None, "Request failed"
-
-
-@st.cache_data(ttl=FORECAST_REFRESH_MINUTES * 60)
-def fetch_openmeteo_forecast(lat, lon, tz_name):
-    """Fetch forecast from Open-Meteo (no key required)."""
-    if lat is None or lon is None:
-        return None, None, "lat/lon missing"
-    hourly_fields = [
-        "temperature_2m",
-        "apparent_temperature",
-        "precipitation_probability",
-        "precipitation",
-        "pressure_msl",
-        "relativehumidity_2m",
-        "windspeed_10m",
-        "windgusts_10m",
-    ]
-    daily_fields = [
-        "temperature_2m_max",
-        "temperature_2m_min",
-        "precipitation_probability_max",
-        "sunrise",
-        "sunset",
-    ]
-    params = {
-        "latitude": lat,
-        "longitude": lon,
-        "hourly": ",".join(hourly_fields),
-        "daily": ",".join(daily_fields),
-        "timezone": tz_name or "auto",
-        "forecast_days": 8,
-    }
-    params.update(
-        {
-            "windspeed_unit": "mph",
-            "temperature_unit": "fahrenheit",
-            "precipitation_unit": "inch",
-            "timeformat": "iso8601",
-        }
-    )
-    try:
-        resp = requests.get("https://api.open-meteo.com/v1/forecast", params=params, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-    except Exception:
+    return cached_tempest_forecast(DB_PATH, token, station_id, lat=lat, lon=lon, api_key=api_key)
+
+
+def parse_openmeteo_forecast(data, tz_name):
+    """Hourly and daily frames from a cached Open-Meteo payload (no key required)."""
+    if data is None:
         return None, None, "Open-Meteo request failed"
 
     hourly_raw = data.get("hourly")
@@ -1699,94 +1651,6 @@ def fetch_openmeteo_forecast(lat, lon, tz_name):
     return hourly_df, daily_df, "OK"
 
 
-def compute_pm25_aqi(pm_value):
-    # US EPA PM2.5 breakpoints (24h AQI)
-    breakpoints = [
-        (0.0, 12.0, 0, 50),
-        (12.1, 35.4, 51, 100),
-        (35.5, 55.4, 101, 150),
-        (55.5, 150.4, 151, 200),
-        (150.5, 250.4, 201, 300),
-        (250.5, 350.4, 301, 400),
-        (350.5, 500.4, 401, 500),
-    ]
-    pm = float(pm_value) if pm_value is not None else None
-    if pm is None or pd.isna(pm):
-        return None
-    # EPA guidance: truncate/round PM2.5 to 0.1 for AQI calculations.
-    pm = round(pm, 1)
-    for c_low, c_high, a_low, a_high in breakpoints:
-        if c_low <= pm <= c_high:
-            return (a_high - a_low) / (c_high - c_low) * (pm - c_low) + a_low
-    return 500.0
-
-
-def backfill_aqi_columns():
-    """Ensure AQI columns exist and are populated using corrected rounding."""
-    if not AIRLINK_TABLE:
-        return 0
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute(f"PRAGMA table_info({AIRLINK_TABLE})")
-    cols = {row[1] for row in cur.fetchall()}
-    desired = ["aqi_pm25", "aqi_pm25_last_1_hour", "aqi_pm25_nowcast"]
-    missing = [c for c in desired if c not in cols]
-    for col in missing:
-        cur.execute(f"ALTER TABLE {AIRLINK_TABLE} ADD COLUMN {col} REAL")
-    conn.commit()
-
-    where_clause = " OR ".join([f"{c} IS NULL" for c in desired])
-    query = f"""
-SELECT rowid, pm_2p5, pm_2p5_last_1_hour, pm_2p5_nowcast
-FROM {AIRLINK_TABLE}
-WHERE {where_clause}
-"""
-    df = pd.read_sql_query(query, conn)
-    if not df.empty:
-        df["aqi_pm25"] = df["pm_2p5"].apply(compute_pm25_aqi)
-        df["aqi_pm25_last_1_hour"] = df["pm_2p5_last_1_hour"].apply(compute_pm25_aqi)
-        df["aqi_pm25_nowcast"] = df["pm_2p5_nowcast"].apply(compute_pm25_aqi)
-        rows = list(
-            zip(
-                df["aqi_pm25"],
-                df["aqi_pm25_last_1_hour"],
-                df["aqi_pm25_nowcast"],
-                df["rowid"],
-            )
-        )
-        cur.executemany(
-            f"UPDATE {AIRLINK_TABLE} SET aqi_pm25=?, aqi_pm25_last_1_hour=?, aqi_pm25_nowcast=? WHERE rowid=?",
-            rows,
-        )
-        conn.commit()
-    conn.close()
-    return len(df)
-
-
-if "aqi_backfill_done" not in st.session_state:
-    try:
-        backfill_aqi_columns()
-    except Exception:
-        pass
-    st.session_state.aqi_backfill_done = True
-
-
-def aqi_category(aqi):
-    if aqi is None or pd.isna(aqi):
-        return "--"
-    if aqi <= 50:
-        return "Good"
-    if aqi <= 100:
-        return "Moderate"
-    if aqi <= 150:
-        return "Unhealthy for Sensitive Groups"
-    if aqi <= 200:
-        return "Unhealthy"
-    if aqi <= 300:
-        return "Very Unhealthy"
-    return "Hazardous"
-
-
 def aqi_badge_label(aqi):
     category = aqi_category(aqi)
     return {
@@ -1796,22 +1660,6 @@ def aqi_badge_label(aqi):
     }.get(category, category)
 
 
-def aqi_color(aqi):
-    if aqi is None or pd.isna(aqi):
-        return "#2d2f36"
-    if aqi <= 50:
-        return "#00e400"
-    if aqi <= 100:
-        return "#ffff00"
-    if aqi <= 150:
-        return "#ff7e00"
-    if aqi <= 200:
-        return "#ff0000"
-    if aqi <= 300:
-        return "#8f3f97"
-    return "#7e0023"
-
-
 def latest_ts_str(ts_epoch):
     if pd.isna(ts_epoch):
         return "--"
@@ -2257,12 +2105,12 @@ def seconds_since_epoch(epoch, now_ts):
     return (now_ts - pd.to_datetime(epoch, unit="s", utc=True)).total_seconds()
 
 
-def build_collector_statuses(now_ts):
+def build_collector_statuses(now_ts, loader=load_df):
     if not HEARTBEAT_TABLE:
         return []
-    hb_df = load_df(
+    hb_df = loader(
         f"""
-        SELECT name, last_ok_epoch, last_error_epoch, last_ok_message, last_error
+        SELECT *
         FROM {HEARTBEAT_TABLE}
         """
     )
@@ -2302,6 +2150,16 @@ def build_collector_statuses(now_ts):
         if ok_msg and not pd.isna(ok_msg):
             ok_text = f"{ok_text} - {short_text(ok_msg, 48)}"
 
+        queue_depth = row.get("queue_depth")
+        writer_lag = row.get("writer_lag_sec")
+        queue_dropped = row.get("queue_dropped")
+        if queue_depth is not None and not pd.isna(queue_depth) and queue_depth > 0:
+            ok_text = f"{ok_text} - queue {int(queue_depth)}"
+        if writer_lag is not None and not pd.isna(writer_lag) and writer_lag >= COLLECTOR_WRITER_LAG_WARN_SECONDS:
+            ok_text = f"{ok_text} - writer lag {writer_lag:.0f}s"
+        if queue_dropped is not None and not pd.isna(queue_dropped) and queue_dropped > 0:
+            ok_text = f"{ok_text} - dropped {int(queue_dropped)}"
+
         err_age = seconds_since_epoch(row["last_error_epoch"], now_ts)
         err_text = "Last error: --"
         error_recent = False
@@ -2361,7 +2219,16 @@ def flow_speed_from_load(events_per_hour, base=2.4):
     return max(1.0, base - min(per_min, 12) * 0.18)
 
 
-def recent_activity(table, epoch_col, cutoff_epoch, device_col=None, device_id=None, message_col=None, message_types=None):
+def recent_activity(
+    table,
+    epoch_col,
+    cutoff_epoch,
+    device_col=None,
+    device_id=None,
+    message_col=None,
+    message_types=None,
+    loader=load_df,
+):
     where = [f"{epoch_col} >= :cutoff"]
     params = {"cutoff": cutoff_epoch}
     if device_col and device_id is not None:
@@ -2373,7 +2240,7 @@ def recent_activity(table, epoch_col, cutoff_epoch, device_col=None, device_id=N
         params.update({f"mt{i}": m for i, m in enumerate(message_types)})
     where_clause = " AND ".join(where)
 
-    df = load_df(
+    df = loader(
         f"""
         SELECT
             COUNT(*) AS cnt,
@@ -2410,7 +2277,7 @@ def recent_activity(table, epoch_col, cutoff_epoch, device_col=None, device_id=N
         if fallback_where_clauses:
             final_where = "WHERE " + " AND ".join([clause.replace("WHERE ", "") for clause in fallback_where_clauses])
 
-        fallback_df = load_df(
+        fallback_df = loader(
             f"SELECT MAX({epoch_col}) AS last_epoch FROM {table} {final_where}",
             fallback_params,
         )
@@ -2427,6 +2294,7 @@ def render_ingest_banner(
     target=None,
     include_diagnostics=False,
     title="Station health",
+    hub_activity=None,
 ):
     if not sources:
         return
@@ -2547,9 +2415,8 @@ def render_ingest_banner(
     if title:
         target.markdown(f"<div class='section-title'>{title}</div>", unsafe_allow_html=True)
 
-    hub_uptime_text = fmt_duration(
-        (time.time() - hub_activity["last_epoch"]) if hub_activity.get("last_epoch") else None
-    )
+    hub_last_epoch = (hub_activity or {}).get("last_epoch")
+    hub_uptime_text = fmt_duration((time.time() - hub_last_epoch) if hub_last_epoch else None)
     target.markdown(
         f"""
 <div class="ingest-shell hero-glow">
@@ -2635,21 +2502,13 @@ def daily_extremes(df, time_col, value_cols):
 def aqi_zone_share(aqi_series):
     if aqi_series is None or aqi_series.empty:
         return pd.DataFrame(columns=["category", "share"])
-    cats = aqi_series.apply(aqi_category)
+    cats = pd.Series(aqi_categories(aqi_series), index=aqi_series.index)
     counts = cats.value_counts(normalize=True).rename_axis("category").reset_index(name="share")
     return counts
 
 
 def series_from_df(df, time_col, value_col):
-    if df is None or df.empty or time_col not in df or value_col not in df:
-        return []
-    series = []
-    for _, row in df[[time_col, value_col]].dropna().iterrows():
-        ts = row[time_col]
-        if pd.isna(ts):
-            continue
-        series.append({"t": ts.isoformat(), "v": float(row[value_col])})
-    return series
+    return column_series(df, time_col, value_col)
 
 
 def build_overview_payload(tempest_df, airlink_df):
@@ -2668,7 +2527,7 @@ def build_overview_payload(tempest_df, airlink_df):
 
 
 def build_comparison_payload(tempest_df, airlink_df):
-    payload = {"temp_today": [], "temp_yesterday": [], "aqi_wind": []}
+    payload = {"temp_today": dict(EMPTY_SERIES), "temp_yesterday": dict(EMPTY_SERIES), "aqi_wind": dict(EMPTY_POINTS)}
     if tempest_df is not None and not tempest_df.empty:
         df = tempest_df.copy()
         df["date"] = df["time"].dt.date
@@ -2685,11 +2544,7 @@ def build_comparison_payload(tempest_df, airlink_df):
                 on="time",
                 direction="nearest",
             )
-            if "aqi_pm25" in merged and "wind_speed_mph" in merged:
-                for _, row in merged[["aqi_pm25", "wind_speed_mph"]].dropna().iterrows():
-                    payload["aqi_wind"].append(
-                        {"x": float(row["wind_speed_mph"]), "y": float(row["aqi_pm25"])}
-                    )
+            payload["aqi_wind"] = column_points(merged, "wind_speed_mph", "aqi_pm25")
     return payload
 
 
@@ -2718,22 +2573,19 @@ def build_raw_table(tempest_df, airlink_df, limit=120):
     for col in cols:
         if col not in df:
             df[col] = pd.NA
-    rows = []
-    for _, row in df[cols].tail(limit).iterrows():
-        rows.append(
-            {
-                "time": row["time"].strftime("%Y-%m-%d %H:%M"),
-                "temp": None if pd.isna(row["air_temperature_f"]) else f"{row['air_temperature_f']:.1f}",
-                "feels": None if pd.isna(row["heat_index_f"]) else f"{row['heat_index_f']:.1f}",
-                "hum": None if pd.isna(row["relative_humidity"]) else f"{row['relative_humidity']:.0f}",
-                "press": None if pd.isna(row["pressure_inhg"]) else f"{row['pressure_inhg']:.2f}",
-                "wind": None if pd.isna(row["wind_speed_mph"]) else f"{row['wind_speed_mph']:.1f}",
-                "gust": None if pd.isna(row["wind_gust_mph"]) else f"{row['wind_gust_mph']:.1f}",
-                "rain": None if pd.isna(row["rain_mm"]) else f"{row['rain_mm']:.2f}",
-                "aqi": None if pd.isna(row.get("aqi_pm25", None)) else f"{row['aqi_pm25']:.0f}",
-            }
-        )
-    return rows
+    df = df[cols].tail(limit)
+    columns = {
+        "time": df["time"].dt.strftime("%Y-%m-%d %H:%M").tolist(),
+        "temp": format_column(df["air_temperature_f"], 1),
+        "feels": format_column(df["heat_index_f"], 1),
+        "hum": format_column(df["relative_humidity"], 0),
+        "press": format_column(df["pressure_inhg"], 2),
+        "wind": format_column(df["wind_speed_mph"], 1),
+        "gust": format_column(df["wind_gust_mph"], 1),
+        "rain": format_column(df["rain_mm"], 2),
+        "aqi": format_column(df["aqi_pm25"], 0),
+    }
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
 
 
 def fmt_value(value, fmt_str="{:.1f}", fallback="--"):
@@ -2765,7 +2617,7 @@ def hex_to_rgba(color, alpha):
 
 def render_grid_dashboard(tab_id, tiles_html, data_payload, height=900):
     grid_id = f"{tab_id}-grid"
-    data_json = json.dumps(data_payload)
+    data_json = dumps_payload(data_payload)
     return f"""
     <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/gridstack@11.1.2/dist/gridstack.min.css" />
     <style>
@@ -2895,7 +2747,18 @@ def render_grid_dashboard(tab_id, tiles_html, data_payload, height=900):
         const accent2Soft = cssVar("--accent-2-soft", "rgba(97,165,255,0.12)");
 
         function toSeries(series) {{
-          return (series || []).map((d) => d.v);
+          return (series && series.v) || [];
+        }}
+
+        function extent(values) {{
+          // Loop instead of Math.min(...values): spreading large arrays overflows the call stack.
+          let lo = Infinity;
+          let hi = -Infinity;
+          for (let i = 0; i < values.length; i++) {{
+            if (values[i] < lo) lo = values[i];
+            if (values[i] > hi) hi = values[i];
+          }}
+          return [lo, hi];
         }}
 
         function formatTimeShort(value) {{
@@ -2927,9 +2790,7 @@ def render_grid_dashboard(tab_id, tiles_html, data_payload, height=900):
           const seriesData = seriesList.map(toSeries).filter((s) => s.length);
           if (!seriesData.length) return;
           const maxLen = Math.max(...seriesData.map((s) => s.length));
-          const values = seriesData.flat();
-          const minV = Math.min(...values);
-          const maxV = Math.max(...values);
+          const [minV, maxV] = extent(seriesData.flat());
           const pad = 28;
           const w = width - pad * 2;
           const h = height - pad * 2;
@@ -2958,10 +2819,10 @@ def render_grid_dashboard(tab_id, tiles_html, data_payload, height=900):
           ctx.textAlign = "left";
           ctx.fillText(minV.toFixed(1), 6, pad + h);
           ctx.fillText(maxV.toFixed(1), 6, pad + 10);
-          const baseSeries = seriesList[0] || [];
-          if (baseSeries.length) {{
-            const start = formatTimeShort(baseSeries[0].t);
-            const end = formatTimeShort(baseSeries[baseSeries.length - 1].t);
+          const baseTimes = (seriesList[0] && seriesList[0].t) || [];
+          if (baseTimes.length) {{
+            const start = formatTimeShort(baseTimes[0]);
+            const end = formatTimeShort(baseTimes[baseTimes.length - 1]);
             ctx.textAlign = "left";
             ctx.fillText(start, pad, height - 6);
             ctx.textAlign = "right";
@@ -3002,20 +2863,18 @@ def render_grid_dashboard(tab_id, tiles_html, data_payload, height=900):
           if (!canvas) return;
           const {{ ctx, width, height }} = setupCanvas(canvas, 200, 160);
           ctx.clearRect(0, 0, width, height);
-          if (!points || !points.length) return;
-          const xs = points.map((p) => p.x);
-          const ys = points.map((p) => p.y);
-          const minX = Math.min(...xs);
-          const maxX = Math.max(...xs);
-          const minY = Math.min(...ys);
-          const maxY = Math.max(...ys);
+          const xs = (points && points.x) || [];
+          const ys = (points && points.y) || [];
+          if (!xs.length) return;
+          const [minX, maxX] = extent(xs);
+          const [minY, maxY] = extent(ys);
           const pad = 28;
           const w = width - pad * 2;
           const h = height - pad * 2;
           ctx.fillStyle = color || accentAlt;
-          points.forEach((p) => {{
-            const x = pad + w * (p.x - minX) / Math.max(1e-6, maxX - minX);
-            const y = pad + h - h * (p.y - minY) / Math.max(1e-6, maxY - minY);
+          xs.forEach((px, i) => {{
+            const x = pad + w * (px - minX) / Math.max(1e-6, maxX - minX);
+            const y = pad + h - h * (ys[i] - minY) / Math.max(1e-6, maxY - minY);
             ctx.beginPath();
             ctx.arc(x, y, 3, 0, Math.PI * 2);
             ctx.fill();
@@ -3139,6 +2998,26 @@ if CONTROL_REFRESH_SECONDS > 0:
         key="controls_autorefresh",
     )
 
+
+def live_fragment(func):
+    """
+    Fragment that reruns on its own every LIVE_REFRESH_SECONDS.
+
+    Live tiles refresh through these instead of a full script rerun; charts,
+    forecasts and tables only update on interaction or the slower
+    CONTROL_REFRESH_SECONDS rerun.
+    """
+    run_every = LIVE_REFRESH_SECONDS if LIVE_REFRESH_SECONDS > 0 else None
+    return st.fragment(run_every=run_every)(func)
+
+
+# The kiosk view only needs current_conditions; stop before any window,
+# forecast or external data is loaded.
+if kiosk_view:
+    page_kiosk.render(DB_POOL.reader, live_fragment, LOCAL_TZ)
+    st.stop()
+
+
 if "timeframe" not in st.session_state:
     st.session_state.timeframe = "24h"
 if "custom_range" not in st.session_state:
@@ -3146,9 +3025,9 @@ if "custom_range" not in st.session_state:
     st.session_state.custom_range = (today - pd.Timedelta(days=1), today)
 if "aqi_smoke_event_enabled" not in st.session_state:
     try:
-        with config_connect(DB_PATH) as conn:
-            st.session_state.aqi_smoke_event_enabled = bool(get_bool(conn, "aqi_smoke_event_enabled") or False)
-            st.session_state.aqi_smoke_event_started_at = get_float(conn, "aqi_smoke_event_started_at") or 0.0
+        conn = DB_POOL.reader()
+        st.session_state.aqi_smoke_event_enabled = bool(get_bool(conn, "aqi_smoke_event_enabled") or False)
+        st.session_state.aqi_smoke_event_started_at = get_float(conn, "aqi_smoke_event_started_at") or 0.0
     except Exception:
         st.session_state.aqi_smoke_event_enabled = False
         st.session_state.aqi_smoke_event_started_at = 0.0
@@ -3193,7 +3072,7 @@ def render_filters_ui():
         st.caption("Smoke event active. AQI stays visible; brief de-emphasizes AQI.")
     if st.session_state._aqi_smoke_event_saved != st.session_state.aqi_smoke_event_enabled:
         try:
-            with config_connect(DB_PATH) as conn:
+            with DB_POOL.writer() as conn:
                 set_bool(conn, "aqi_smoke_event_enabled", st.session_state.aqi_smoke_event_enabled)
                 if st.session_state.aqi_smoke_event_enabled and st.session_state.aqi_smoke_event_started_at <= 0:
                     st.session_state.aqi_smoke_event_started_at = time.time()
@@ -3683,10 +3562,10 @@ override_enabled = False
 lat_override = None
 lon_override = None
 try:
-    with closing(config_connect(DB_PATH)) as conn:
-        override_enabled = bool(get_bool(conn, "override_location_enabled") or False)
-        lat_override = get_float(conn, "station_lat_override")
-        lon_override = get_float(conn, "station_lon_override")
+    conn = DB_POOL.reader()
+    override_enabled = bool(get_bool(conn, "override_location_enabled") or False)
+    lat_override = get_float(conn, "station_lat_override")
+    lon_override = get_float(conn, "station_lon_override")
 except Exception:
     override_enabled = False
 
@@ -3701,7 +3580,17 @@ if not st.session_state.location_config_loaded:
 
 tempest_token = os.getenv("TEMPEST_API_TOKEN")
 token_present = bool(tempest_token)
-auto_location = fetch_station_location(tempest_token, TEMPEST_STATION_ID) if tempest_token else None
+# External lookups share one deadline per render; see src/fan_out.py.
+external_deadline = time.perf_counter() + EXTERNAL_FETCH_DEADLINE_SECONDS
+external_fetch_timings = {}
+auto_location = None
+if tempest_token:
+    fetched, timings = fan_out(
+        {"Station location": partial(fetch_station_location, tempest_token, TEMPEST_STATION_ID)},
+        EXTERNAL_FETCH_DEADLINE_SECONDS,
+    )
+    auto_location = fetched["Station location"]
+    external_fetch_timings.update(timings)
 auto_has_coords = auto_location and auto_location.get("lat") is not None and auto_location.get("lon") is not None
 if auto_has_coords and not st.session_state.override_location_enabled:
     st.session_state.station_lat = float(auto_location["lat"])
@@ -3753,7 +3642,7 @@ if filters_visible:
 
         if st.button("Save location"):
             try:
-                with closing(config_connect(DB_PATH)) as conn:
+                with DB_POOL.writer() as conn:
                     set_bool(conn, "override_location_enabled", override_location)
                     set_float(conn, "station_lat_override", station_lat)
                     set_float(conn, "station_lon_override", station_lon)
@@ -3779,17 +3668,28 @@ nws_alerts = []
 nws_alerts_html = None
 nws_hwo = None
 nws_hwo_html = None
+sun_times = None
+lat_for_forecast = st.session_state.get("station_lat")
+lon_for_forecast = st.session_state.get("station_lon")
+fetched = {}
+if lat_for_forecast is not None and lon_for_forecast is not None:
+    sun_date = pd.Timestamp.now(tz="UTC").tz_convert(LOCAL_TZ).date().isoformat()
+    fetched, timings = fan_out(
+        {
+            "Open-Meteo": partial(cached_openmeteo, DB_PATH, lat_for_forecast, lon_for_forecast, LOCAL_TZ),
+            "NWS alerts": partial(fetch_nws_alerts_cached, lat_for_forecast, lon_for_forecast, LOCAL_TZ),
+            "NWS outlook": partial(fetch_nws_hwo_cached, lat_for_forecast, lon_for_forecast),
+            "Sun times": partial(fetch_sun_times, lat_for_forecast, lon_for_forecast, sun_date),
+        },
+        external_deadline - time.perf_counter(),
+        fallbacks={"NWS alerts": []},
+    )
+    external_fetch_timings.update(timings)
 try:
-    lat_for_forecast = st.session_state.get("station_lat")
-    lon_for_forecast = st.session_state.get("station_lon")
     api_key = os.getenv("TEMPEST_API_KEY")
     # Prefer Open-Meteo (no key), fallback to Tempest credentials when present.
     if lat_for_forecast is not None and lon_for_forecast is not None:
-        om_hourly, om_daily, om_status = fetch_openmeteo_forecast(
-            lat_for_forecast,
-            lon_for_forecast,
-            LOCAL_TZ,
-        )
+        om_hourly, om_daily, om_status = parse_openmeteo_forecast(fetched.get("Open-Meteo"), LOCAL_TZ)
         if om_hourly is not None or om_daily is not None:
             forecast_hourly = om_hourly
             forecast_daily = om_daily
@@ -3801,13 +3701,22 @@ try:
                 forecast_updated = pd.Timestamp.utcnow()
     # If no Open-Meteo data, try Tempest.
     if (forecast_hourly is None and forecast_daily is None) and (tempest_token or api_key):
-        payload, forecast_status = fetch_tempest_forecast(
-            tempest_token,
-            TEMPEST_STATION_ID,
-            lat=lat_for_forecast,
-            lon=lon_for_forecast,
-            api_key=api_key,
+        tempest_fetched, timings = fan_out(
+            {
+                "Tempest forecast": partial(
+                    fetch_tempest_forecast,
+                    tempest_token,
+                    TEMPEST_STATION_ID,
+                    lat=lat_for_forecast,
+                    lon=lon_for_forecast,
+                    api_key=api_key,
+                )
+            },
+            external_deadline - time.perf_counter(),
+            fallbacks={"Tempest forecast": (None, "Forecast still loading")},
         )
+        external_fetch_timings.update(timings)
+        payload, forecast_status = tempest_fetched["Tempest forecast"]
         if payload:
             hourly_df, daily_df, forecast_tz = parse_tempest_forecast(payload, LOCAL_TZ)
             forecast_hourly = hourly_df
@@ -3822,11 +3731,12 @@ except Exception as exc:
     forecast_daily = None
     forecast_status = f"Request failed: {exc}"
 
-if lat_for_forecast is not None and lon_for_forecast is not None:
-    nws_alerts = fetch_nws_alerts_cached(lat_for_forecast, lon_for_forecast, LOCAL_TZ)
+if fetched:
+    nws_alerts = fetched["NWS alerts"] or []
     nws_alerts_html = format_alerts_html(nws_alerts, LOCAL_TZ)
-    nws_hwo = fetch_nws_hwo_cached(lat_for_forecast, lon_for_forecast)
+    nws_hwo = fetched["NWS outlook"]
     nws_hwo_html = format_hwo_html(nws_hwo, LOCAL_TZ)
+    sun_times = fetched["Sun times"]
 NWS_USER_AGENT = os.getenv("NWS_USER_AGENT", "")
 
 saved_alert_config, _ = load_alert_config(DB_PATH)
@@ -3934,15 +3844,21 @@ render_alert_overrides_sync()
 # Data load and transforms
 # ------------------------
 now_ts = pd.Timestamp.utcnow()
-recent_cutoff_epoch = int((now_ts - pd.Timedelta(hours=1)).timestamp())
-hub_recent_cutoff_epoch = int((now_ts - pd.Timedelta(hours=24)).timestamp())
 
 tempest_until_clause = "AND obs_epoch <= :until" if until_epoch is not None else ""
 airlink_until_clause = "AND ts <= :until" if until_epoch is not None else ""
 
-tempest = load_df(
-    f"""
-    SELECT
+window_params = {"since": since_epoch, **({"until": until_epoch} if until_epoch is not None else {})}
+window_end_epoch = until_epoch if until_epoch is not None else int(now_ts.timestamp())
+window_span_seconds = window_end_epoch - since_epoch
+
+
+def plan_source_window(source):
+    available = [res for res, table in ROLLUP_TABLES[source].items() if table]
+    return plan_window(source, window_span_seconds, CHART_TARGET_POINTS, available)
+
+
+TEMPEST_COLUMNS_SQL = """
         obs_epoch,
         air_temperature,
         relative_humidity,
@@ -3955,18 +3871,152 @@ tempest = load_df(
         battery,
         solar_radiation,
         uv
-    FROM obs_st
-    WHERE obs_epoch >= :since
-    {tempest_until_clause}
-    ORDER BY obs_epoch
-    """,
-    {"since": since_epoch, **({"until": until_epoch} if until_epoch is not None else {})},
-)
+"""
 
-if AIRLINK_TABLE:
-    airlink = load_df(
+
+def load_planned_window(source, plan, fields, raw_table, time_col, columns_sql, params, loader=load_df):
+    """Bucketed window per the query planner; empty when raw rows already fit the chart."""
+    if plan["mode"] == "raw":
+        return pd.DataFrame()
+    until = "until" in params
+    df = loader(window_query_sql(source, plan, fields, until=until), params)
+    if df.empty and plan["resolution"]:
+        # Rollups not backfilled yet: bucket the raw rows instead.
+        df = loader(window_query_sql(source, {**plan, "resolution": None}, fields, until=until), params)
+    if df.empty or until:
+        return df
+    # Live windows end with the newest raw row so "current" tiles stay exact.
+    latest = loader(
+        f"""
+        SELECT {columns_sql}
+        FROM {raw_table}
+        WHERE {time_col} > :after
+        ORDER BY {time_col} DESC
+        LIMIT 1
+        """,
+        {"after": int(df[time_col].iloc[-1])},
+    )
+    if latest.empty:
+        return df
+    return pd.concat([df, latest], ignore_index=True)
+
+
+def load_source_window(source, plan, fields, raw_table, time_col, columns_sql, params, loader=load_df):
+    df = load_planned_window(source, plan, fields, raw_table, time_col, columns_sql, params, loader)
+    if not df.empty:
+        return df
+    until_clause = f"AND {time_col} <= :until" if "until" in params else ""
+    return loader(
         f"""
         SELECT
+            {columns_sql}
+        FROM {raw_table}
+        WHERE {time_col} >= :since
+        {until_clause}
+        ORDER BY {time_col}
+        """,
+        params,
+    )
+
+
+def transform_tempest(df):
+    df["time"] = epoch_to_dt(df["obs_epoch"])
+    df["air_temperature_f"] = c_to_f(df["air_temperature"])
+    df["heat_index_f"] = compute_heat_index(
+        df["air_temperature_f"],
+        df["relative_humidity"],
+    )
+    df["pressure_inhg"] = hpa_to_inhg(df["station_pressure"])
+    df["wind_speed_mph"] = mps_to_mph(df["wind_avg"])
+    if "wind_gust" in df:
+        df["wind_gust_mph"] = mps_to_mph(df["wind_gust"])
+    if "rain_accumulated" in df:
+        df["rain_mm"] = df["rain_accumulated"].astype(float)
+    if "wind_dir" in df:
+        df["wind_dir_deg"] = df["wind_dir"].astype(float)
+    return df
+
+
+def transform_airlink(df):
+    df["time"] = epoch_to_dt(df["ts"])
+    # The collector stores AQI at ingest; only bucketed windows and legacy rows
+    # without it are computed here.
+    if "aqi_pm25" not in df:
+        df["aqi_pm25"] = pm25_aqi_series(df["pm_2p5"])
+    else:
+        df["aqi_pm25"] = pd.to_numeric(df["aqi_pm25"], errors="coerce")
+        missing_aqi = df["aqi_pm25"].isna() & df["pm_2p5"].notna()
+        if missing_aqi.any():
+            df.loc[missing_aqi, "aqi_pm25"] = pm25_aqi_series(df.loc[missing_aqi, "pm_2p5"])
+    return df
+
+
+HISTORY_DAY_SOURCES = {
+    "tempest": ("obs_st", "obs_epoch", ["air_temperature", "relative_humidity", "station_pressure", "wind_avg"]),
+    "airlink": ("airlink_current_obs", "ts", ["pm_2p5", "aqi_pm25"]),
+}
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_history_day(source, day):
+    """One local day outside the chart window, e.g. the same day last year."""
+    table, time_col, columns = HISTORY_DAY_SOURCES[source]
+    start = pd.Timestamp(day).tz_localize(LOCAL_TZ)
+    start_epoch = int(start.timestamp())
+    end_epoch = int((start + pd.DateOffset(days=1)).timestamp())
+    # The column cache when it is built, else an indexed one-day read; the
+    # Parquet history store only pays off for long ranges.
+    df = read_frame(DB_POOL.reader(), table, columns, start_epoch, end_epoch)
+    if df is None:
+        df = query_df(
+            f"SELECT {time_col}, {', '.join(columns)} FROM {table} "
+            f"WHERE {time_col} >= ? AND {time_col} < ? ORDER BY {time_col}",
+            (start_epoch, end_epoch),
+        )
+    else:
+        df = df.astype({column: "float64" for column in columns})
+    if df.empty:
+        return df
+    return transform_tempest(df) if source == "tempest" else transform_airlink(df)
+
+
+def load_window(source, plan, fields, raw_table, time_col, columns_sql, transform):
+    """
+    Transformed window frame. Live windows go through the shared tail cache,
+    so a rerun only reads rows newer than the cached ones; fixed ranges use load_df.
+    """
+    if until_epoch is not None:
+        df = load_source_window(source, plan, fields, raw_table, time_col, columns_sql, window_params)
+        return transform(df) if not df.empty else df
+
+    def fetch(start_epoch):
+        return load_source_window(
+            source, plan, fields, raw_table, time_col, columns_sql, {"since": start_epoch}, loader=query_df
+        )
+
+    return get_window_cache().get(
+        (raw_table, st.session_state.timeframe),
+        since_epoch,
+        fetch,
+        transform,
+        time_col,
+        bucket_seconds=plan["bucket_seconds"] if plan["mode"] == "bucket" else 1,
+        plan=(plan["mode"], plan["bucket_seconds"], plan["resolution"]),
+    )
+
+
+RAW_WINDOW_PLAN = {"mode": "raw", "bucket_seconds": 0, "resolution": None}
+tempest = load_window(
+    "obs_st",
+    plan_source_window("obs_st"),
+    TEMPEST_WINDOW_FIELDS,
+    "obs_st",
+    "obs_epoch",
+    TEMPEST_COLUMNS_SQL,
+    transform_tempest,
+)
+
+AIRLINK_COLUMNS_SQL = """
             did,
             ts,
             lsid,
@@ -3999,17 +4049,26 @@ if AIRLINK_TABLE:
             pct_pm_data_last_1_hour,
             pct_pm_data_last_3_hours,
             pct_pm_data_last_24_hours
-        FROM {AIRLINK_TABLE}
-        WHERE ts >= :since
-        {airlink_until_clause}
-        ORDER BY ts
-        """,
-        {"since": since_epoch, **({"until": until_epoch} if until_epoch is not None else {})},
+"""
+if AIRLINK_HAS_STORED_AQI:
+    AIRLINK_COLUMNS_SQL += """,
+            aqi_pm25
+"""
+
+if AIRLINK_TABLE:
+    airlink = load_window(
+        "airlink",
+        plan_source_window("airlink") if AIRLINK_TABLE == "airlink_current_obs" else RAW_WINDOW_PLAN,
+        AIRLINK_WINDOW_FIELDS,
+        AIRLINK_TABLE,
+        "ts",
+        AIRLINK_COLUMNS_SQL,
+        transform_airlink,
     )
 else:
     airlink = pd.DataFrame()
 
-# Tempest transforms
+# Tempest summaries
 tempest_latest = None
 tempest_temp_delta = None
 tempest_hum_delta = None
@@ -4020,21 +4079,6 @@ rain_total_mm = None
 lightning_48h = 0
 
 if not tempest.empty:
-    tempest["time"] = epoch_to_dt(tempest["obs_epoch"])
-    tempest["air_temperature_f"] = c_to_f(tempest["air_temperature"])
-    tempest["heat_index_f"] = compute_heat_index(
-        tempest["air_temperature_f"],
-        tempest["relative_humidity"],
-    )
-    tempest["pressure_inhg"] = hpa_to_inhg(tempest["station_pressure"])
-    tempest["wind_speed_mph"] = mps_to_mph(tempest["wind_avg"])
-    if "wind_gust" in tempest:
-        tempest["wind_gust_mph"] = mps_to_mph(tempest["wind_gust"])
-    if "rain_accumulated" in tempest:
-        tempest["rain_mm"] = tempest["rain_accumulated"].astype(float)
-    if "wind_dir" in tempest:
-        tempest["wind_dir_deg"] = tempest["wind_dir"].astype(float)
-
     tempest_latest = tempest.iloc[-1]
     tempest_temp_delta = delta_over_window(tempest["air_temperature_f"])
     tempest_hum_delta = delta_over_window(tempest["relative_humidity"])
@@ -4054,12 +4098,10 @@ if not tempest.empty:
         cutoff = (now_ts - pd.Timedelta(hours=48)).timestamp()
         lightning_48h = int(tempest.loc[tempest["obs_epoch"] >= cutoff, "lightning_strike_count"].sum())
 
-# AirLink transforms
+# AirLink summaries
 airlink_latest = None
 aqi_share_df = pd.DataFrame()
 if not airlink.empty:
-    airlink["time"] = epoch_to_dt(airlink["ts"])
-    airlink["aqi_pm25"] = airlink["pm_2p5"].apply(compute_pm25_aqi)
     airlink_latest = airlink.iloc[-1]
     aqi_share_df = aqi_zone_share(airlink["aqi_pm25"])
 
@@ -4069,7 +4111,7 @@ if smoke_event_active and smoke_event_started_at <= 0:
     smoke_event_started_at = time.time()
     st.session_state.aqi_smoke_event_started_at = smoke_event_started_at
     try:
-        with config_connect(DB_PATH) as conn:
+        with DB_POOL.writer() as conn:
             set_float(conn, "aqi_smoke_event_started_at", smoke_event_started_at)
         st.session_state._aqi_smoke_event_started_at_saved = smoke_event_started_at
     except Exception:
@@ -4093,7 +4135,7 @@ if smoke_event_active and not airlink.empty:
                 st.session_state.aqi_smoke_event_enabled = False
                 st.session_state.aqi_smoke_event_started_at = 0.0
                 try:
-                    with config_connect(DB_PATH) as conn:
+                    with DB_POOL.writer() as conn:
                         set_bool(conn, "aqi_smoke_event_enabled", False)
                         set_float(conn, "aqi_smoke_event_started_at", 0.0)
                     st.session_state._aqi_smoke_event_saved = False
@@ -4163,15 +4205,8 @@ if not tempest.empty:
 now_local = pd.Timestamp.now(tz="UTC").tz_convert(LOCAL_TZ)
 st.session_state.latest_temp_for_alerts = current_temp
 st.session_state.latest_now_local = now_local
-sun_times = None
 sunrise_local = None
 sunset_local = None
-if st.session_state.station_lat is not None and st.session_state.station_lon is not None:
-    sun_times = fetch_sun_times(
-        st.session_state.station_lat,
-        st.session_state.station_lon,
-        now_local.date().isoformat(),
-    )
 if sun_times:
     sunrise_local = pd.to_datetime(sun_times.get("sunrise"), utc=True).tz_convert(LOCAL_TZ)
     sunset_local = pd.to_datetime(sun_times.get("sunset"), utc=True).tz_convert(LOCAL_TZ)
@@ -4215,99 +4250,248 @@ def metric_text(value, fmt_str="{:.1f}", suffix=""):
 sun_chip_text = "--"
 if sunrise_local and sunset_local:
     sun_chip_text = f"{fmt_time(sunrise_local)} to {fmt_time(sunset_local)}"
-wind_dir_text = current_wind_dir if current_wind_dir is not None else "--"
-aqi_chip_html = (
-    f'<div class="metric-chip"><span class="chip-icon">AQ</span>'
-    f"<span>{metric_text(current_aqi, '{:.0f}')}</span></div>"
-)
 
-header_html = f"""
+
+def build_header_html(temp_f, aqi, wind_mph, pressure_inhg, sun_text):
+    aqi_chip_html = (
+        f'<div class="metric-chip"><span class="chip-icon">AQ</span>'
+        f"<span>{metric_text(aqi, '{:.0f}')}</span></div>"
+    )
+    return f"""
   <div class="header-row">
     <div class="header-title">Tempest</div>
-    <div class="metric-chip"><span class="chip-icon">T</span><span>{metric_text(current_temp, "{:.1f}", "F")}</span></div>
+    <div class="metric-chip"><span class="chip-icon">T</span><span>{metric_text(temp_f, "{:.1f}", "F")}</span></div>
   {aqi_chip_html}
-    <div class="metric-chip"><span class="chip-icon">W</span><span>{metric_text(current_wind, "{:.1f}", " mph")}</span></div>
-    <div class="metric-chip"><span class="chip-icon">P</span><span>{metric_text(current_pressure, "{:.2f}", " inHg")}</span></div>
-    <div class="metric-chip"><span class="chip-icon">Sun</span><span>{sun_chip_text}</span></div>
+    <div class="metric-chip"><span class="chip-icon">W</span><span>{metric_text(wind_mph, "{:.1f}", " mph")}</span></div>
+    <div class="metric-chip"><span class="chip-icon">P</span><span>{metric_text(pressure_inhg, "{:.2f}", " inHg")}</span></div>
+    <div class="metric-chip"><span class="chip-icon">Sun</span><span>{sun_text}</span></div>
   </div>
 """
-render_header_strip(header_html)
 
-# Ingest health
-ingest_sources = []
-if AIRLINK_TABLE:
-    airlink_activity = recent_activity(AIRLINK_TABLE, "ts", recent_cutoff_epoch)
-else:
-    airlink_activity = {"count": 0, "last_epoch": None}
-station_activity = recent_activity("obs_st", "obs_epoch", recent_cutoff_epoch, "device_id", TEMPEST_STATION_ID)
-hub_activity = recent_activity(
-    "raw_events",
-    "received_at_epoch",
-    hub_recent_cutoff_epoch,
-    message_col="message_type",
-    message_types=["connection_opened", "ack"],
-)
 
-for label, activity, colors in [
-    ("AirLink", airlink_activity, (THEME_COLORS["accent"], THEME_COLORS["accent2"])),
-    ("Tempest Station", station_activity, (THEME_COLORS["accent2"], THEME_COLORS["accent3"])),
-    ("Tempest Hub", hub_activity, (THEME_COLORS["accent3"], THEME_COLORS["accent"])),
-]:
-    latency_minutes = minutes_since_epoch(activity["last_epoch"], now_ts)
-    if label == "Tempest Hub":
-        health = ingest_health(latency_minutes, fresh=60, stale=24 * 60)
+def row_float(row, column):
+    if row is None or column not in row or pd.isna(row[column]):
+        return None
+    return float(row[column])
+
+
+# Live-row column -> current_conditions column.
+TEMPEST_CURRENT_FIELDS = {
+    "obs_epoch": "obs_epoch",
+    "air_temperature": "temp_c",
+    "air_temperature_f": "temp_f",
+    "heat_index_f": "heat_index_f",
+    "relative_humidity": "humidity",
+    "pressure_inhg": "pressure_inhg",
+    "wind_speed_mph": "wind_avg_mph",
+    "wind_gust_mph": "wind_gust_mph",
+    "wind_dir_deg": "wind_dir_deg",
+    "rain_mm": "rain_mm",
+    "uv": "uv",
+    "solar_radiation": "solar_radiation",
+    "battery": "battery",
+}
+AIRLINK_CURRENT_FIELDS = {
+    "ts": "obs_epoch",
+    "temp_f": "temp_f",
+    "hum": "humidity",
+    "dew_point_f": "dew_point_f",
+    "heat_index_f": "heat_index_f",
+    "pm_2p5": "pm_2p5",
+    "aqi_pm25": "aqi",
+}
+
+
+def current_row(conn, source, fields, epoch_col):
+    current = read_current(conn, source)
+    if current is None:
+        return None
+    row = pd.Series({name: current.get(column) for name, column in fields.items()}, dtype=object)
+    row["time"] = pd.Timestamp(row[epoch_col], unit="s", tz="UTC").tz_convert(LOCAL_TZ)
+    return row
+
+
+def load_live_latest():
+    """
+    Newest Tempest and AirLink rows, read uncached for the live fragments.
+    Uses the collectors' current_conditions rows (a primary-key lookup) and
+    falls back to the newest raw rows on databases the collectors have not
+    migrated yet.
+    """
+    tempest_row = None
+    airlink_row = None
+    try:
+        conn = DB_POOL.reader()
+        tempest_row = current_row(conn, "tempest", TEMPEST_CURRENT_FIELDS, "obs_epoch")
+        airlink_row = current_row(conn, "airlink", AIRLINK_CURRENT_FIELDS, "ts")
+    except Exception:
+        pass
+    if tempest_row is not None and airlink_row is not None:
+        return tempest_row, airlink_row
+    try:
+        if tempest_row is None:
+            df = query_df(f"SELECT {TEMPEST_COLUMNS_SQL} FROM obs_st ORDER BY obs_epoch DESC LIMIT 1")
+            if not df.empty:
+                tempest_row = transform_tempest(df).iloc[-1]
+    except Exception:
+        tempest_row = None
+    if AIRLINK_TABLE and airlink_row is None:
+        try:
+            df = query_df(f"SELECT {AIRLINK_COLUMNS_SQL} FROM {AIRLINK_TABLE} ORDER BY ts DESC LIMIT 1")
+            if not df.empty:
+                airlink_row = transform_airlink(df).iloc[-1]
+        except Exception:
+            airlink_row = None
+    return tempest_row, airlink_row
+
+
+@live_fragment
+def render_live_header(sun_text):
+    live_tempest, live_airlink = load_live_latest()
+    render_header_strip(
+        build_header_html(
+            row_float(live_tempest, "air_temperature_f"),
+            row_float(live_airlink, "aqi_pm25"),
+            row_float(live_tempest, "wind_speed_mph"),
+            row_float(live_tempest, "pressure_inhg"),
+            sun_text,
+        )
+    )
+
+
+render_live_header(sun_chip_text)
+
+# Ingest health
+def collect_ingest_health(now_ts, loader=load_df):
+    recent_cutoff = int((now_ts - pd.Timedelta(hours=1)).timestamp())
+    hub_recent_cutoff = int((now_ts - pd.Timedelta(hours=24)).timestamp())
+    ingest_sources = []
+    if AIRLINK_TABLE:
+        airlink_activity = recent_activity(AIRLINK_TABLE, "ts", recent_cutoff, loader=loader)
     else:
-        health = ingest_health(latency_minutes)
-    fill = max(0.08, min(1.0, health))
-    event_rate = activity["count"] or 0
-    load_text = f"{event_rate} evt/hr" if event_rate > 0 else ("standby" if label == "Tempest Hub" else "0 evt/hr")
-    latency_text = latency_label(latency_minutes) if event_rate > 0 else ("Standby" if label == "Tempest Hub" else latency_label(latency_minutes))
-    ingest_sources.append({
-        "name": label,
-        "latency_text": latency_text,
-        "latency_minutes": latency_minutes,
-        "load_text": load_text,
-        "last_seen": latest_ts_str(activity["last_epoch"]),
-        "fill": fill,
-        "pulse_speed": flow_speed_from_load(event_rate),
-        "colors": colors,
-        "recent_count": event_rate,
-    })
-
-latency_values = [
-    s["latency_minutes"]
-    for s in ingest_sources
-    if s["latency_minutes"] is not None and s["name"] != "Tempest Hub"
-]
-avg_latency_minutes = sum(latency_values) / len(latency_values) if latency_values else None
-avg_latency_text = latency_label(avg_latency_minutes) if avg_latency_minutes is not None else None
-total_recent = sum(s["recent_count"] for s in ingest_sources if s["recent_count"] is not None)
-
-collector_statuses = build_collector_statuses(now_ts)
+        airlink_activity = {"count": 0, "last_epoch": None}
+    station_activity = recent_activity(
+        "obs_st", "obs_epoch", recent_cutoff, "device_id", TEMPEST_STATION_ID, loader=loader
+    )
+    hub_activity = recent_activity(
+        "raw_events",
+        "received_at_epoch",
+        hub_recent_cutoff,
+        message_col="message_type",
+        message_types=["connection_opened", "ack"],
+        loader=loader,
+    )
+
+    for label, activity, colors in [
+        ("AirLink", airlink_activity, (THEME_COLORS["accent"], THEME_COLORS["accent2"])),
+        ("Tempest Station", station_activity, (THEME_COLORS["accent2"], THEME_COLORS["accent3"])),
+        ("Tempest Hub", hub_activity, (THEME_COLORS["accent3"], THEME_COLORS["accent"])),
+    ]:
+        latency_minutes = minutes_since_epoch(activity["last_epoch"], now_ts)
+        if label == "Tempest Hub":
+            health = ingest_health(latency_minutes, fresh=60, stale=24 * 60)
+        else:
+            health = ingest_health(latency_minutes)
+        fill = max(0.08, min(1.0, health))
+        event_rate = activity["count"] or 0
+        load_text = f"{event_rate} evt/hr" if event_rate > 0 else ("standby" if label == "Tempest Hub" else "0 evt/hr")
+        latency_text = latency_label(latency_minutes) if event_rate > 0 else ("Standby" if label == "Tempest Hub" else latency_label(latency_minutes))
+        ingest_sources.append({
+            "name": label,
+            "latency_text": latency_text,
+            "latency_minutes": latency_minutes,
+            "load_text": load_text,
+            "last_seen": latest_ts_str(activity["last_epoch"]),
+            "fill": fill,
+            "pulse_speed": flow_speed_from_load(event_rate),
+            "colors": colors,
+            "recent_count": event_rate,
+        })
+
+    latency_values = [
+        s["latency_minutes"]
+        for s in ingest_sources
+        if s["latency_minutes"] is not None and s["name"] != "Tempest Hub"
+    ]
+    avg_latency_minutes = sum(latency_values) / len(latency_values) if latency_values else None
+    avg_latency_text = latency_label(avg_latency_minutes) if avg_latency_minutes is not None else None
+    total_recent = sum(s["recent_count"] for s in ingest_sources if s["recent_count"] is not None)
+
+    collector_statuses = build_collector_statuses(now_ts, loader=loader)
+    return {
+        "ingest_sources": ingest_sources,
+        "avg_latency_text": avg_latency_text,
+        "total_recent": total_recent,
+        "collector_statuses": collector_statuses,
+        "hub_activity": hub_activity,
+    }
+
+
+@live_fragment
+def render_live_station_health():
+    live_tempest, live_airlink = load_live_latest()
+    health = collect_ingest_health(pd.Timestamp.now(tz="UTC"), loader=query_df)
+    with st.expander("Station health", expanded=False):
+        render_ingest_banner(
+            health["ingest_sources"],
+            health["total_recent"],
+            avg_latency_text=health["avg_latency_text"],
+            collector_statuses=health["collector_statuses"],
+            target=st,
+            include_diagnostics=False,
+            title="",
+            hub_activity=health["hub_activity"],
+        )
+    last_updated_html = """<div class="card status-card">
+  <div class="section-title">Last updated</div>
+  <div class="status-line"><span>Tempest</span><span>{tempest}</span></div>
+  <div class="status-line"><span>AirLink</span><span>{airlink}</span></div>
+  <div class="status-line"><span>Hub</span><span>{hub}</span></div>
+</div>""".format(
+        tempest=latest_ts_str(live_tempest.obs_epoch) if live_tempest is not None else "--",
+        airlink=latest_ts_str(live_airlink.ts) if live_airlink is not None else "--",
+        hub=latest_ts_str(health["hub_activity"].get("last_epoch")),
+    )
+    st.markdown(last_updated_html, unsafe_allow_html=True)
 
+
+@live_fragment
+def render_live_freeze_banner():
+    live_tempest, _ = load_live_latest()
+    banner_html = build_freeze_banner(
+        row_float(live_tempest, "air_temperature_f"),
+        pd.Timestamp.now(tz="UTC").tz_convert(LOCAL_TZ),
+        alert_state=load_alert_state(DB_PATH),
+    )
+    if banner_html:
+        st.markdown(banner_html, unsafe_allow_html=True)
+
+
+# Page-specific data below is built lazily, only when the current page reads it.
 # Forecast charts
-forecast_chart = forecast_hourly_chart(forecast_hourly) if forecast_hourly is not None else None
-forecast_outlook = None
-if forecast_daily is not None and not forecast_daily.empty:
+def build_forecast_outlook():
+    if forecast_daily is None or forecast_daily.empty:
+        return None
     outlook_df = forecast_daily[["day_start_local", "air_temp_high", "air_temp_low"]].rename(
         columns={"day_start_local": "time", "air_temp_high": "High", "air_temp_low": "Low"}
     )
     outlook_long = outlook_df.melt(id_vars=["time"], var_name="metric", value_name="value")
-    forecast_outlook = clean_chart(outlook_long, height=220, title=None)
+    return clean_chart(outlook_long, height=220, title=None)
+
 
 # Daily brief
-brief_rows = []
-try:
-    with sqlite3.connect(DB_PATH) as conn:
-        brief_rows = load_daily_briefs(conn)
-except Exception:
-    brief_rows = []
+def build_brief_context():
+    try:
+        brief_rows = load_daily_briefs(DB_POOL.reader())
+    except Exception:
+        brief_rows = []
+    brief_today = brief_rows[0] if brief_rows else None
+    brief_yesterday = brief_rows[1] if len(brief_rows) > 1 else None
+    brief_updated = iso_to_local_str(brief_today.get("generated_at")) if brief_today else None
+    if brief_updated == "--":
+        brief_updated = None
+    return {"today": brief_today, "yesterday": brief_yesterday, "updated": brief_updated}
 
-brief_today = brief_rows[0] if brief_rows else None
-brief_yesterday = brief_rows[1] if len(brief_rows) > 1 else None
-brief_updated = iso_to_local_str(brief_today.get("generated_at")) if brief_today else None
-if brief_updated == "--":
-    brief_updated = None
 
 rain_total_in = rain_total_mm / 25.4 if rain_total_mm is not None else None
 include_feels = st.session_state.get("show_feels", True)
@@ -4381,73 +4565,63 @@ metrics_ctx.extend(
     ]
 )
 
-trend_series = {}
-if not tempest.empty:
-    temp_df = tempest[["time", "air_temperature_f"]].rename(columns={"air_temperature_f": "value"})
-    temp_df["metric"] = "Temperature"
-    trend_series["Temperature"] = temp_df
-
-    if include_feels:
-        feels_df = tempest[["time", "heat_index_f"]].rename(columns={"heat_index_f": "value"})
-        feels_df["metric"] = "Feels Like"
-        trend_series["Feels Like"] = feels_df
-
-    wind_df = tempest[["time", "wind_speed_mph"]].rename(columns={"wind_speed_mph": "value"})
-    wind_df["metric"] = "Wind"
-    trend_series["Wind"] = wind_df
-
-    if "wind_gust_mph" in tempest:
-        gust_df = tempest[["time", "wind_gust_mph"]].rename(columns={"wind_gust_mph": "value"})
-        gust_df["metric"] = "Gust"
-        trend_series["Gust"] = gust_df
-
-    pressure_df = tempest[["time", "pressure_inhg"]].rename(columns={"pressure_inhg": "value"})
-    pressure_df["metric"] = "Pressure"
-    trend_series["Pressure"] = pressure_df
-
-    humidity_df = tempest[["time", "relative_humidity"]].rename(columns={"relative_humidity": "value"})
-    humidity_df["metric"] = "Humidity"
-    trend_series["Humidity"] = humidity_df
+def build_trend_series():
+    trend_series = {}
+    if not tempest.empty:
+        temp_df = tempest[["time", "air_temperature_f"]].rename(columns={"air_temperature_f": "value"})
+        temp_df["metric"] = "Temperature"
+        trend_series["Temperature"] = temp_df
+
+        if include_feels:
+            feels_df = tempest[["time", "heat_index_f"]].rename(columns={"heat_index_f": "value"})
+            feels_df["metric"] = "Feels Like"
+            trend_series["Feels Like"] = feels_df
+
+        wind_df = tempest[["time", "wind_speed_mph"]].rename(columns={"wind_speed_mph": "value"})
+        wind_df["metric"] = "Wind"
+        trend_series["Wind"] = wind_df
+
+        if "wind_gust_mph" in tempest:
+            gust_df = tempest[["time", "wind_gust_mph"]].rename(columns={"wind_gust_mph": "value"})
+            gust_df["metric"] = "Gust"
+            trend_series["Gust"] = gust_df
+
+        pressure_df = tempest[["time", "pressure_inhg"]].rename(columns={"pressure_inhg": "value"})
+        pressure_df["metric"] = "Pressure"
+        trend_series["Pressure"] = pressure_df
+
+        humidity_df = tempest[["time", "relative_humidity"]].rename(columns={"relative_humidity": "value"})
+        humidity_df["metric"] = "Humidity"
+        trend_series["Humidity"] = humidity_df
+
+    if include_aqi and not airlink.empty:
+        aqi_df = airlink[["time", "aqi_pm25"]].rename(columns={"aqi_pm25": "value"})
+        aqi_df["metric"] = "AQI"
+        trend_series["AQI"] = aqi_df
+
+    # Final pass: LTTB keeps peaks when a series still exceeds the chart budget.
+    return {
+        name: downsample_frame(df, "time", "value", CHART_TARGET_POINTS)
+        for name, df in trend_series.items()
+    }
 
-if include_aqi and not airlink.empty:
-    aqi_df = airlink[["time", "aqi_pm25"]].rename(columns={"aqi_pm25": "value"})
-    aqi_df["metric"] = "AQI"
-    trend_series["AQI"] = aqi_df
 
 trend_defaults = ["Temperature", "Wind"]
 if include_aqi:
     trend_defaults.insert(1, "AQI")
 
-raw_tables = []
-raw_limit = 200
-afd_updated = None
 
-raw_tempest = load_df(
-    f"""
-    SELECT *
-    FROM obs_st
-    WHERE obs_epoch >= :since
-    {tempest_until_clause}
-    ORDER BY obs_epoch DESC
-    LIMIT :limit
-    """,
-    {
-        "since": since_epoch,
-        "limit": raw_limit,
-        **({"until": until_epoch} if until_epoch is not None else {}),
-    },
-)
-if not raw_tempest.empty:
-    raw_tables.append({"title": "Tempest Station", "df": raw_tempest})
+def build_raw_tables():
+    raw_tables = []
+    raw_limit = 200
 
-if AIRLINK_TABLE:
-    airlink_obs_raw = load_df(
+    raw_tempest = load_df(
         f"""
         SELECT *
-        FROM {AIRLINK_TABLE}
-        WHERE ts >= :since
-        {airlink_until_clause}
-        ORDER BY ts DESC
+        FROM obs_st
+        WHERE obs_epoch >= :since
+        {tempest_until_clause}
+        ORDER BY obs_epoch DESC
         LIMIT :limit
         """,
         {
@@ -4456,178 +4630,257 @@ if AIRLINK_TABLE:
             **({"until": until_epoch} if until_epoch is not None else {}),
         },
     )
-    if not airlink_obs_raw.empty:
-        raw_tables.append({"title": "AirLink", "df": airlink_obs_raw})
+    if not raw_tempest.empty:
+        raw_tables.append({"title": "Tempest Station", "df": raw_tempest})
 
-if DAILY_BRIEF_TABLE:
-    daily_briefs_df = load_df(
-        """
-        SELECT date, generated_at, tz, headline, bullets_json, tomorrow_text, model, version
-        FROM daily_briefs
-        ORDER BY generated_at DESC
-        LIMIT :limit
-        """,
-        {"limit": raw_limit},
-    )
-    if not daily_briefs_df.empty:
-        daily_briefs_df = daily_briefs_df.copy()
-        daily_briefs_df["generated_at"] = daily_briefs_df["generated_at"].apply(iso_to_local_str)
-        daily_briefs_df["bullets"] = daily_briefs_df["bullets_json"].apply(json_list_to_text)
-        daily_briefs_df.drop(columns=["bullets_json"], inplace=True)
-        raw_tables.append({"title": "Daily Briefs", "df": daily_briefs_df})
-
-if AFD_HIGHLIGHTS_TABLE:
+    if AIRLINK_TABLE:
+        airlink_obs_raw = load_df(
+            f"""
+            SELECT *
+            FROM {AIRLINK_TABLE}
+            WHERE ts >= :since
+            {airlink_until_clause}
+            ORDER BY ts DESC
+            LIMIT :limit
+            """,
+            {
+                "since": since_epoch,
+                "limit": raw_limit,
+                **({"until": until_epoch} if until_epoch is not None else {}),
+            },
+        )
+        if not airlink_obs_raw.empty:
+            raw_tables.append({"title": "AirLink", "df": airlink_obs_raw})
+
+    if DAILY_BRIEF_TABLE:
+        daily_briefs_df = load_df(
+            """
+            SELECT date, generated_at, tz, headline, bullets_json, tomorrow_text, model, version
+            FROM daily_briefs
+            ORDER BY generated_at DESC
+            LIMIT :limit
+            """,
+            {"limit": raw_limit},
+        )
+        if not daily_briefs_df.empty:
+            daily_briefs_df = daily_briefs_df.copy()
+            daily_briefs_df["generated_at"] = daily_briefs_df["generated_at"].apply(iso_to_local_str)
+            daily_briefs_df["bullets"] = daily_briefs_df["bullets_json"].apply(json_list_to_text)
+            daily_briefs_df.drop(columns=["bullets_json"], inplace=True)
+            raw_tables.append({"title": "Daily Briefs", "df": daily_briefs_df})
+
+    if AFD_HIGHLIGHTS_TABLE:
+        afd_df = load_df(
+            """
+            SELECT product_id, issued, cwa, headline, highlights_json, text, created_at
+            FROM nws_afd_highlights
+            ORDER BY issued DESC
+            LIMIT :limit
+            """,
+            {"limit": raw_limit},
+        )
+        if not afd_df.empty:
+            afd_df = afd_df.copy()
+            afd_df["issued"] = afd_df["issued"].apply(iso_to_local_str)
+            afd_df["created_at"] = afd_df["created_at"].apply(iso_to_local_str)
+            afd_df["highlights"] = afd_df["highlights_json"].apply(json_list_to_text)
+            afd_df["text_preview"] = afd_df["text"].apply(lambda value: short_text(value, 220))
+            afd_df.drop(columns=["highlights_json", "text"], inplace=True)
+            raw_tables.append({"title": "NWS AFD Highlights", "df": afd_df})
+
+    if ALERT_CONFIG_TABLE:
+        alert_config_df = load_df(
+            """
+            SELECT key, value, updated_at
+            FROM alert_config
+            ORDER BY updated_at DESC
+            LIMIT :limit
+            """,
+            {"limit": raw_limit},
+        )
+        if not alert_config_df.empty:
+            alert_config_df = alert_config_df.copy()
+            alert_config_df["updated_local"] = epoch_to_dt(
+                pd.to_numeric(alert_config_df["updated_at"], errors="coerce")
+            ).dt.strftime("%Y-%m-%d %I:%M %p").str.lstrip("0")
+            raw_tables.append({"title": "Alert Config", "df": alert_config_df})
+
+    if ALERT_STATE_TABLE:
+        alert_state_df = load_df(
+            """
+            SELECT key, value, updated_at
+            FROM alert_state
+            ORDER BY updated_at DESC
+            LIMIT :limit
+            """,
+            {"limit": raw_limit},
+        )
+        if not alert_state_df.empty:
+            alert_state_df = alert_state_df.copy()
+            alert_state_df["updated_local"] = epoch_to_dt(
+                pd.to_numeric(alert_state_df["updated_at"], errors="coerce")
+            ).dt.strftime("%Y-%m-%d %I:%M %p").str.lstrip("0")
+            raw_tables.append({"title": "Alert State", "df": alert_state_df})
+
+    if APP_CONFIG_TABLE:
+        app_config_df = load_df(
+            """
+            SELECT key, value
+            FROM app_config
+            ORDER BY key
+            """,
+        )
+        if not app_config_df.empty:
+            raw_tables.append({"title": "App Config", "df": app_config_df})
+
+    if HEARTBEAT_TABLE:
+        heartbeat_df = load_df(
+            """
+            SELECT *
+            FROM collector_heartbeat
+            ORDER BY name
+            """,
+        )
+        if not heartbeat_df.empty:
+            heartbeat_df = heartbeat_df.copy()
+            heartbeat_df["last_ok_local"] = epoch_to_dt(
+                pd.to_numeric(heartbeat_df["last_ok_epoch"], errors="coerce")
+            ).dt.strftime("%Y-%m-%d %I:%M %p").str.lstrip("0")
+            heartbeat_df["last_error_local"] = epoch_to_dt(
+                pd.to_numeric(heartbeat_df["last_error_epoch"], errors="coerce")
+            ).dt.strftime("%Y-%m-%d %I:%M %p").str.lstrip("0")
+            raw_tables.append({"title": "Collector Heartbeat", "df": heartbeat_df})
+
+    if RAW_EVENTS_TABLE:
+        if RAW_PAYLOADS_TABLE:
+            raw_events_query = """
+            SELECT r.*, p.codec AS payload_codec, p.payload_blob AS payload_blob
+            FROM raw_events r
+            LEFT JOIN raw_payloads p
+              ON r.payload_text IS NULL AND p.payload_hash = r.payload_hash
+            ORDER BY r.received_at_epoch DESC
+            LIMIT :limit
+            """
+        else:
+            raw_events_query = """
+            SELECT *
+            FROM raw_events
+            ORDER BY received_at_epoch DESC
+            LIMIT :limit
+            """
+        if until_epoch is not None:
+            # Fixed (historical) range: include rows archived to monthly shards.
+            try:
+                archived = read_raw_events(
+                    DB_POOL.reader(), "raw_events", since_epoch, until_epoch + 1, limit=raw_limit, newest_first=True
+                )
+            except Exception:
+                archived = []
+            raw_events_df = pd.DataFrame(archived)
+        else:
+            raw_events_df = load_df(raw_events_query, {"limit": raw_limit})
+        if not raw_events_df.empty:
+            raw_events_df = raw_events_df.copy()
+            raw_events_df["received_at"] = epoch_to_dt(
+                pd.to_numeric(raw_events_df["received_at_epoch"], errors="coerce")
+            ).dt.strftime("%Y-%m-%d %I:%M %p").str.lstrip("0")
+            payload_series = None
+            if "payload_text" in raw_events_df:
+                payload_series = raw_events_df["payload_text"]
+            elif "payload_json" in raw_events_df:
+                payload_series = raw_events_df["payload_json"]
+            if payload_series is not None and "payload_blob" in raw_events_df:
+                # Compact rows keep their text in raw_payloads; decode only the rows shown.
+                compact_mask = payload_series.isna() & raw_events_df["payload_blob"].notna()
+                if compact_mask.any():
+                    payload_series = payload_series.copy()
+                    payload_series[compact_mask] = [
+                        decompress_payload(codec, blob)
+                        for codec, blob in zip(
+                            raw_events_df.loc[compact_mask, "payload_codec"],
+                            raw_events_df.loc[compact_mask, "payload_blob"],
+                        )
+                    ]
+            if payload_series is not None:
+                raw_events_df["payload_preview"] = payload_series.apply(lambda value: short_text(value, 200))
+            drop_cols = [
+                col
+                for col in ("payload_text", "payload_json", "payload_codec", "payload_blob")
+                if col in raw_events_df.columns
+            ]
+            if drop_cols:
+                raw_events_df.drop(columns=drop_cols, inplace=True)
+            raw_tables.append({"title": "Raw Events", "df": raw_events_df})
+    return raw_tables
+
+
+def latest_afd_update():
+    if not AFD_HIGHLIGHTS_TABLE:
+        return None
     afd_df = load_df(
         """
-        SELECT product_id, issued, cwa, headline, highlights_json, text, created_at
+        SELECT issued, created_at
         FROM nws_afd_highlights
         ORDER BY issued DESC
-        LIMIT :limit
-        """,
-        {"limit": raw_limit},
-    )
-    if not afd_df.empty:
-        afd_df = afd_df.copy()
-        afd_df["issued"] = afd_df["issued"].apply(iso_to_local_str)
-        afd_df["created_at"] = afd_df["created_at"].apply(iso_to_local_str)
-        afd_df["highlights"] = afd_df["highlights_json"].apply(json_list_to_text)
-        afd_df["text_preview"] = afd_df["text"].apply(lambda value: short_text(value, 220))
-        afd_df.drop(columns=["highlights_json", "text"], inplace=True)
-        raw_tables.append({"title": "NWS AFD Highlights", "df": afd_df})
-        candidate = afd_df.iloc[0].get("issued") or afd_df.iloc[0].get("created_at")
-        if candidate and candidate != "--":
-            afd_updated = candidate
-
-if ALERT_CONFIG_TABLE:
-    alert_config_df = load_df(
-        """
-        SELECT key, value, updated_at
-        FROM alert_config
-        ORDER BY updated_at DESC
-        LIMIT :limit
-        """,
-        {"limit": raw_limit},
-    )
-    if not alert_config_df.empty:
-        alert_config_df = alert_config_df.copy()
-        alert_config_df["updated_local"] = epoch_to_dt(
-            pd.to_numeric(alert_config_df["updated_at"], errors="coerce")
-        ).dt.strftime("%Y-%m-%d %I:%M %p").str.lstrip("0")
-        raw_tables.append({"title": "Alert Config", "df": alert_config_df})
-
-if ALERT_STATE_TABLE:
-    alert_state_df = load_df(
-        """
-        SELECT key, value, updated_at
-        FROM alert_state
-        ORDER BY updated_at DESC
-        LIMIT :limit
-        """,
-        {"limit": raw_limit},
-    )
-    if not alert_state_df.empty:
-        alert_state_df = alert_state_df.copy()
-        alert_state_df["updated_local"] = epoch_to_dt(
-            pd.to_numeric(alert_state_df["updated_at"], errors="coerce")
-        ).dt.strftime("%Y-%m-%d %I:%M %p").str.lstrip("0")
-        raw_tables.append({"title": "Alert State", "df": alert_state_df})
-
-if APP_CONFIG_TABLE:
-    app_config_df = load_df(
+        LIMIT 1
         """
-        SELECT key, value
-        FROM app_config
-        ORDER BY key
-        """,
     )
-    if not app_config_df.empty:
-        raw_tables.append({"title": "App Config", "df": app_config_df})
+    if afd_df.empty:
+        return None
+    candidate = iso_to_local_str(afd_df.iloc[0]["issued"]) or iso_to_local_str(afd_df.iloc[0]["created_at"])
+    return candidate if candidate and candidate != "--" else None
 
-if HEARTBEAT_TABLE:
-    heartbeat_df = load_df(
-        """
-        SELECT name, last_ok_epoch, last_error_epoch, last_ok_message, last_error
-        FROM collector_heartbeat
-        ORDER BY name
-        """,
-    )
-    if not heartbeat_df.empty:
-        heartbeat_df = heartbeat_df.copy()
-        heartbeat_df["last_ok_local"] = epoch_to_dt(
-            pd.to_numeric(heartbeat_df["last_ok_epoch"], errors="coerce")
-        ).dt.strftime("%Y-%m-%d %I:%M %p").str.lstrip("0")
-        heartbeat_df["last_error_local"] = epoch_to_dt(
-            pd.to_numeric(heartbeat_df["last_error_epoch"], errors="coerce")
-        ).dt.strftime("%Y-%m-%d %I:%M %p").str.lstrip("0")
-        raw_tables.append({"title": "Collector Heartbeat", "df": heartbeat_df})
-
-if RAW_EVENTS_TABLE:
-    raw_events_df = load_df(
-        """
-        SELECT *
-        FROM raw_events
-        ORDER BY received_at_epoch DESC
-        LIMIT :limit
-        """,
-        {"limit": raw_limit},
-    )
-    if not raw_events_df.empty:
-        raw_events_df = raw_events_df.copy()
-        raw_events_df["received_at"] = epoch_to_dt(
-            pd.to_numeric(raw_events_df["received_at_epoch"], errors="coerce")
-        ).dt.strftime("%Y-%m-%d %I:%M %p").str.lstrip("0")
-        payload_series = None
-        if "payload_text" in raw_events_df:
-            payload_series = raw_events_df["payload_text"]
-        elif "payload_json" in raw_events_df:
-            payload_series = raw_events_df["payload_json"]
-        if payload_series is not None:
-            raw_events_df["payload_preview"] = payload_series.apply(lambda value: short_text(value, 200))
-        drop_cols = [col for col in ("payload_text", "payload_json") if col in raw_events_df.columns]
-        if drop_cols:
-            raw_events_df.drop(columns=drop_cols, inplace=True)
-        raw_tables.append({"title": "Raw Events", "df": raw_events_df})
-
-last_updated = {
-    "Tempest": latest_ts_str(tempest_latest.obs_epoch) if tempest_latest is not None else "--",
-    "AirLink": latest_ts_str(airlink_latest.ts) if airlink_latest is not None else "--",
-    "Hub": latest_ts_str(hub_activity.get("last_epoch")) if hub_activity else "--",
-}
 
-page_ctx = {
-    "forecast_chart": forecast_chart,
-    "forecast_outlook": forecast_outlook,
-    "forecast_hourly": forecast_hourly,
-    "forecast_daily": forecast_daily,
-    "forecast_source": forecast_source,
-    "forecast_status": forecast_status,
-    "forecast_updated": forecast_updated,
-    "chart_renderer": clean_chart,
-    "tz_name": LOCAL_TZ,
-    "station_lat": lat_for_forecast,
-    "station_lon": lon_for_forecast,
-    "metrics": metrics_ctx,
-    "brief_today": brief_today,
-    "brief_yesterday": brief_yesterday,
-    "brief_updated": brief_updated,
-    "trend_series": trend_series,
-    "trend_defaults": trend_defaults,
-    "tempest": tempest,
-    "airlink": airlink,
-    "raw_tables": raw_tables,
-    "health": {
-        "ingest_sources": ingest_sources,
-        "avg_latency_text": avg_latency_text,
-        "total_recent": total_recent,
-        "collector_statuses": collector_statuses,
-    },
-    "alerts_html": alert_banner_html,
-    "last_updated": last_updated,
-    "afd_updated": afd_updated,
-    "aqi_smoke_event_enabled": smoke_event_active,
-    "aqi_window_avg": aqi_window_avg,
-    "aqi_smoke_adjusted_avg": aqi_smoke_adjusted_avg,
-}
+def build_last_updated():
+    hub_activity = page_ctx["health"].get("hub_activity")
+    return {
+        "Tempest": latest_ts_str(tempest_latest.obs_epoch) if tempest_latest is not None else "--",
+        "AirLink": latest_ts_str(airlink_latest.ts) if airlink_latest is not None else "--",
+        "Hub": latest_ts_str(hub_activity.get("last_epoch")) if hub_activity else "--",
+    }
+
+
+page_ctx = LazyContext(
+    {
+        "forecast_hourly": forecast_hourly,
+        "forecast_daily": forecast_daily,
+        "forecast_source": forecast_source,
+        "forecast_status": forecast_status,
+        "forecast_updated": forecast_updated,
+        "chart_renderer": clean_chart,
+        "tz_name": LOCAL_TZ,
+        "station_lat": lat_for_forecast,
+        "station_lon": lon_for_forecast,
+        "metrics": metrics_ctx,
+        "trend_defaults": trend_defaults,
+        "tempest": tempest,
+        "airlink": airlink,
+        "history_day": load_history_day,
+        "alerts_html": alert_banner_html,
+        "format_bytes": fmt_bytes,
+        "aqi_smoke_event_enabled": smoke_event_active,
+        "aqi_window_avg": aqi_window_avg,
+        "aqi_smoke_adjusted_avg": aqi_smoke_adjusted_avg,
+    }
+)
+page_ctx.lazy(
+    "forecast_chart",
+    lambda: forecast_hourly_chart(forecast_hourly) if forecast_hourly is not None else None,
+)
+page_ctx.lazy("forecast_outlook", build_forecast_outlook)
+page_ctx.lazy("brief", build_brief_context)
+page_ctx.lazy("brief_today", lambda: page_ctx["brief"]["today"])
+page_ctx.lazy("brief_yesterday", lambda: page_ctx["brief"]["yesterday"])
+page_ctx.lazy("brief_updated", lambda: page_ctx["brief"]["updated"])
+page_ctx.lazy("trend_series", build_trend_series)
+page_ctx.lazy("raw_tables", build_raw_tables)
+page_ctx.lazy("afd_updated", latest_afd_update)
+page_ctx.lazy("health", lambda: collect_ingest_health(now_ts))
+page_ctx.lazy("last_updated", build_last_updated)
+page_ctx.lazy("storage_stats", get_storage_stats)
+page_ctx.lazy("db_pool_stats", DB_POOL.stats)
+page_ctx.lazy("window_cache_stats", lambda: get_window_cache().stats())
+page_ctx.lazy("external_fetches", lambda: dict(external_fetch_timings))
 
 page = st.session_state.page
 if page == "home":
@@ -4636,8 +4889,7 @@ if page == "home":
         page_home.render(page_ctx)
     with right_col:
         right_col.markdown("<div class='right-rail'>", unsafe_allow_html=True)
-        if alert_banner_html:
-            right_col.markdown(alert_banner_html, unsafe_allow_html=True)
+        render_live_freeze_banner()
         if smoke_event_active:
             observed_text = metric_text(aqi_window_avg, "{:.0f}") if aqi_window_avg is not None else "--"
             adjusted_text = metric_text(aqi_smoke_adjusted_avg, "{:.0f}") if aqi_smoke_adjusted_avg is not None else "--"
@@ -4697,27 +4949,7 @@ if page == "home":
             right_col.markdown("</div>", unsafe_allow_html=True)
         else:
             right_col.info("No current metrics available.")
-        with right_col.expander("Station health", expanded=False):
-            render_ingest_banner(
-                ingest_sources,
-                total_recent,
-                avg_latency_text=avg_latency_text,
-                collector_statuses=collector_statuses,
-                target=st,
-                include_diagnostics=False,
-                title="",
-            )
-        last_updated_html = """<div class="card status-card">
-  <div class="section-title">Last updated</div>
-  <div class="status-line"><span>Tempest</span><span>{tempest}</span></div>
-  <div class="status-line"><span>AirLink</span><span>{airlink}</span></div>
-  <div class="status-line"><span>Hub</span><span>{hub}</span></div>
-</div>""".format(
-            tempest=last_updated["Tempest"],
-            airlink=last_updated["AirLink"],
-            hub=last_updated["Hub"],
-        )
-        right_col.markdown(last_updated_html, unsafe_allow_html=True)
+        render_live_station_health()
         right_col.markdown("</div>", unsafe_allow_html=True)
 elif page == "trends":
     page_trends.render(page_ctx)
@@ -2,7 +2,9 @@ param(
     [string]$NssmPath = "nssm.exe",
     [string]$RepoPath = "",
     [string]$PythonExe = "",
-    [int]$Port = 8501
+    [int]$Port = 8501,
+    # Host all background jobs in one TempestWeatherScheduler service instead of one service per worker.
+    [switch]$Scheduler
 )
 
 if (-not $RepoPath) {
@@ -39,10 +41,14 @@ $uiService = "TempestWeatherUI"
 $alertService = "TempestWeatherAlerts"
 $briefService = "TempestWeatherDailyBrief"
 $emailService = "TempestWeatherDailyEmail"
+$prefetchService = "TempestWeatherPrefetch"
+$schedulerService = "TempestWeatherScheduler"
 $uiArgs = "-m streamlit run dashboard.py --server.headless true --server.port $Port --server.address 0.0.0.0"
 $alertArgs = "-m src.alerts_worker"
 $briefArgs = "-m src.daily_brief_worker"
 $emailArgs = "-m src.daily_email_worker"
+$prefetchArgs = "-m src.prefetch_worker"
+$schedulerArgs = "-m src.scheduler"
 
 $additionalEnvNames = @(
     "SMTP_USERNAME",
@@ -80,7 +86,11 @@ $additionalEnvNames = @(
     "TEMPEST_STATION_ID",
     "AQI_SMOKE_CLEAR_HOURS",
     "AQI_SMOKE_CLEAR_MAX",
-    "AQI_SMOKE_CLEAR_MIN_COUNT"
+    "AQI_SMOKE_CLEAR_MIN_COUNT",
+    "FORECAST_REFRESH_MINUTES",
+    "PREFETCH_INTERVAL_SECONDS",
+    "SCHEDULER_JOBS",
+    "WATCHDOG_INTERVAL_SECONDS"
 )
 $sharedEnvLines = @()
 foreach ($envName in $additionalEnvNames) {
@@ -99,6 +109,10 @@ $briefOut = Join-Path $RepoPath "logs\\daily_brief_service.log"
 $briefErr = Join-Path $RepoPath "logs\\daily_brief_service_error.log"
 $emailOut = Join-Path $RepoPath "logs\\daily_email_service.log"
 $emailErr = Join-Path $RepoPath "logs\\daily_email_service_error.log"
+$prefetchOut = Join-Path $RepoPath "logs\\prefetch_service.log"
+$prefetchErr = Join-Path $RepoPath "logs\\prefetch_service_error.log"
+$schedulerOut = Join-Path $RepoPath "logs\\scheduler_service.log"
+$schedulerErr = Join-Path $RepoPath "logs\\scheduler_service_error.log"
 
 & $nssm install $uiService $PythonExe $uiArgs
 & $nssm set $uiService Application $PythonExe
@@ -114,42 +128,71 @@ if ($sharedEnvBlock) {
 & $nssm set $uiService AppEnvironmentExtra $uiEnvBlock
 & $nssm set $uiService Start SERVICE_AUTO_START
 
-& $nssm install $alertService $PythonExe $alertArgs
-& $nssm set $alertService Application $PythonExe
-& $nssm set $alertService AppParameters $alertArgs
-& $nssm set $alertService AppDirectory $RepoPath
-& $nssm set $alertService AppStdout $alertOut
-& $nssm set $alertService AppStderr $alertErr
-if ($sharedEnvBlock) {
-    & $nssm set $alertService AppEnvironmentExtra $sharedEnvBlock
-}
-& $nssm set $alertService Start SERVICE_AUTO_START
+if ($Scheduler) {
+    & $nssm install $schedulerService $PythonExe $schedulerArgs
+    & $nssm set $schedulerService Application $PythonExe
+    & $nssm set $schedulerService AppParameters $schedulerArgs
+    & $nssm set $schedulerService AppDirectory $RepoPath
+    & $nssm set $schedulerService AppStdout $schedulerOut
+    & $nssm set $schedulerService AppStderr $schedulerErr
+    if ($sharedEnvBlock) {
+        & $nssm set $schedulerService AppEnvironmentExtra $sharedEnvBlock
+    }
+    & $nssm set $schedulerService Start SERVICE_AUTO_START
+} else {
+    & $nssm install $alertService $PythonExe $alertArgs
+    & $nssm set $alertService Application $PythonExe
+    & $nssm set $alertService AppParameters $alertArgs
+    & $nssm set $alertService AppDirectory $RepoPath
+    & $nssm set $alertService AppStdout $alertOut
+    & $nssm set $alertService AppStderr $alertErr
+    if ($sharedEnvBlock) {
+        & $nssm set $alertService AppEnvironmentExtra $sharedEnvBlock
+    }
+    & $nssm set $alertService Start SERVICE_AUTO_START
 
-& $nssm install $briefService $PythonExe $briefArgs
-& $nssm set $briefService Application $PythonExe
-& $nssm set $briefService AppParameters $briefArgs
-& $nssm set $briefService AppDirectory $RepoPath
-& $nssm set $briefService AppStdout $briefOut
-& $nssm set $briefService AppStderr $briefErr
-if ($sharedEnvBlock) {
-    & $nssm set $briefService AppEnvironmentExtra $sharedEnvBlock
-}
-& $nssm set $briefService Start SERVICE_AUTO_START
+    & $nssm install $briefService $PythonExe $briefArgs
+    & $nssm set $briefService Application $PythonExe
+    & $nssm set $briefService AppParameters $briefArgs
+    & $nssm set $briefService AppDirectory $RepoPath
+    & $nssm set $briefService AppStdout $briefOut
+    & $nssm set $briefService AppStderr $briefErr
+    if ($sharedEnvBlock) {
+        & $nssm set $briefService AppEnvironmentExtra $sharedEnvBlock
+    }
+    & $nssm set $briefService Start SERVICE_AUTO_START
 
-& $nssm install $emailService $PythonExe $emailArgs
-& $nssm set $emailService Application $PythonExe
-& $nssm set $emailService AppParameters $emailArgs
-& $nssm set $emailService AppDirectory $RepoPath
-& $nssm set $emailService AppStdout $emailOut
-& $nssm set $emailService AppStderr $emailErr
-if ($sharedEnvBlock) {
-    & $nssm set $emailService AppEnvironmentExtra $sharedEnvBlock
+    & $nssm install $emailService $PythonExe $emailArgs
+    & $nssm set $emailService Application $PythonExe
+    & $nssm set $emailService AppParameters $emailArgs
+    & $nssm set $emailService AppDirectory $RepoPath
+    & $nssm set $emailService AppStdout $emailOut
+    & $nssm set $emailService AppStderr $emailErr
+    if ($sharedEnvBlock) {
+        & $nssm set $emailService AppEnvironmentExtra $sharedEnvBlock
+    }
+    & $nssm set $emailService Start SERVICE_AUTO_START
+
+    & $nssm install $prefetchService $PythonExe $prefetchArgs
+    & $nssm set $prefetchService Application $PythonExe
+    & $nssm set $prefetchService AppParameters $prefetchArgs
+    & $nssm set $prefetchService AppDirectory $RepoPath
+    & $nssm set $prefetchService AppStdout $prefetchOut
+    & $nssm set $prefetchService AppStderr $prefetchErr
+    if ($sharedEnvBlock) {
+        & $nssm set $prefetchService AppEnvironmentExtra $sharedEnvBlock
+    }
+    & $nssm set $prefetchService Start SERVICE_AUTO_START
 }
-& $nssm set $emailService Start SERVICE_AUTO_START
 
 & $nssm start $uiService
-& $nssm start $alertService
-& $nssm start $briefService
-& $nssm start $emailService
-
-Write-Host "Services installed and started: $uiService, $alertService, $briefService, $emailService"
+if ($Scheduler) {
+    & $nssm start $schedulerService
+    Write-Host "Services installed and started: $uiService, $schedulerService"
+} else {
+    & $nssm start $alertService
+    & $nssm start $briefService
+    & $nssm start $emailService
+    & $nssm start $prefetchService
+    Write-Host "Services installed and started: $uiService, $alertService, $briefService, $emailService, $prefetchService"
+}
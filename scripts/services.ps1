@@ -1,7 +1,7 @@
 param(
     [ValidateSet("status", "start", "stop", "restart", "install", "uninstall", "logs", "env")]
     [string]$Action = "status",
-    [ValidateSet("all", "ui", "alerts", "brief", "email")]
+    [ValidateSet("all", "ui", "alerts", "brief", "email", "prefetch", "scheduler")]
     [string]$Target = "all",
     [string]$NssmPath = "nssm.exe",
     [int]$LogLines = 120
@@ -37,12 +37,17 @@ $services = @(
     @{ Name = "TempestWeatherUI"; Key = "ui" },
     @{ Name = "TempestWeatherAlerts"; Key = "alerts" },
     @{ Name = "TempestWeatherDailyBrief"; Key = "brief" },
-    @{ Name = "TempestWeatherDailyEmail"; Key = "email" }
+    @{ Name = "TempestWeatherDailyEmail"; Key = "email" },
+    @{ Name = "TempestWeatherPrefetch"; Key = "prefetch" },
+    @{ Name = "TempestWeatherScheduler"; Key = "scheduler" }
 )
 
 function Get-TargetServices {
     param([string]$target)
-    if ($target -eq "all") { return $services }
+    if ($target -eq "all") {
+        # Installs use either the per-worker services or TempestWeatherScheduler.
+        return $services | Where-Object { Get-Service -Name $_.Name -ErrorAction SilentlyContinue }
+    }
     return $services | Where-Object { $_.Key -eq $target }
 }
 
@@ -108,6 +113,14 @@ function Invoke-Logs {
         Show-Log (Join-Path $repoRoot "logs\\daily_email_service.log") "Daily email log"
         Show-Log (Join-Path $repoRoot "logs\\daily_email_service_error.log") "Daily email error"
     }
+    if ($Target -eq "all" -or $Target -eq "prefetch") {
+        Show-Log (Join-Path $repoRoot "logs\\prefetch_worker.log") "Prefetch worker log"
+        Show-Log (Join-Path $repoRoot "logs\\prefetch_service_error.log") "Prefetch service error"
+    }
+    if ($Target -eq "all" -or $Target -eq "scheduler") {
+        Show-Log (Join-Path $repoRoot "logs\\scheduler.log") "Scheduler log"
+        Show-Log (Join-Path $repoRoot "logs\\scheduler_service_error.log") "Scheduler service error"
+    }
 }
 
 function Get-EnvNames {
@@ -16,15 +16,21 @@ $uiService = "TempestWeatherUI"
 $alertService = "TempestWeatherAlerts"
 $briefService = "TempestWeatherDailyBrief"
 $emailService = "TempestWeatherDailyEmail"
+$prefetchService = "TempestWeatherPrefetch"
+$schedulerService = "TempestWeatherScheduler"
 
 & $nssm stop $uiService
 & $nssm stop $alertService
 & $nssm stop $briefService
 & $nssm stop $emailService
+& $nssm stop $prefetchService
+& $nssm stop $schedulerService
 
 & $nssm remove $uiService confirm
 & $nssm remove $alertService confirm
 & $nssm remove $briefService confirm
 & $nssm remove $emailService confirm
+& $nssm remove $prefetchService confirm
+& $nssm remove $schedulerService confirm
 
-Write-Host "Services removed: $uiService, $alertService, $briefService, $emailService"
+Write-Host "Services removed: $uiService, $alertService, $briefService, $emailService, $prefetchService, $schedulerService"
@@ -1,3 +1,4 @@
+import argparse
 import os
 import time
 import json
@@ -9,6 +10,16 @@ from datetime import datetime
 
 import requests
 
+from src import schema
+from src.aqi import aqi_categories, aqi_category, pm25_aqi, pm25_aqi_array
+from src.config_store import get_config, set_config
+from src.current_conditions import (
+    airlink_conditions,
+    seed_current_conditions,
+    upsert_current,
+)
+from src.rollups import refresh_rollups
+
 ROOT = Path(__file__).resolve().parents[1]
 DB_PATH = Path(os.getenv("TEMPEST_DB_PATH", str(ROOT / "data" / "tempest.db")))
 if not DB_PATH.is_absolute():
@@ -27,6 +38,18 @@ AIRLINK_RAW_TABLE = "airlink_raw_all"
 HEARTBEAT_TABLE = "collector_heartbeat"
 HEARTBEAT_NAME = "airlink_collector"
 
+# AQI columns stored alongside each observation: column -> PM2.5 source column.
+# aqi_category follows aqi_pm25.
+AQI_COLUMNS = {
+    "aqi_pm25": "pm_2p5",
+    "aqi_pm25_last_1_hour": "pm_2p5_last_1_hour",
+    "aqi_pm25_nowcast": "pm_2p5_nowcast",
+}
+AQI_BACKFILL_CHUNK_ROWS = 5000
+# app_config key set once a backfill has covered every stored row. Later rows
+# get their AQI at insert, so startup skips the scan after that.
+AQI_BACKFILL_DONE_KEY = "airlink_aqi_backfill_done"
+
 
 def log(msg: str):
     LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
@@ -107,107 +130,88 @@ def backfill_airlink_raw_all(conn: sqlite3.Connection) -> None:
     )
 
 
-def ensure_schema() -> None:
-    with db() as conn:
-        migrate_legacy_airlink_obs(conn)
-        conn.executescript(
+def ensure_aqi_columns(conn: sqlite3.Connection) -> None:
+    cols = table_columns(conn, AIRLINK_OBS_TABLE)
+    for col in AQI_COLUMNS:
+        if col not in cols:
+            conn.execute(f"ALTER TABLE {AIRLINK_OBS_TABLE} ADD COLUMN {col} REAL")
+    if "aqi_category" not in cols:
+        conn.execute(f"ALTER TABLE {AIRLINK_OBS_TABLE} ADD COLUMN aqi_category TEXT")
+
+
+def nan_to_none(values) -> list:
+    return [None if value != value else float(value) for value in values]
+
+
+def aqi_values(pm_2p5, pm_2p5_last_1_hour, pm_2p5_nowcast) -> tuple:
+    """(aqi_pm25, aqi_pm25_last_1_hour, aqi_pm25_nowcast, aqi_category) for one observation."""
+    aqi = pm25_aqi(pm_2p5)
+    category = aqi_category(aqi) if aqi is not None else None
+    return aqi, pm25_aqi(pm_2p5_last_1_hour), pm25_aqi(pm_2p5_nowcast), category
+
+
+def backfill_aqi(
+    conn: sqlite3.Connection,
+    chunk_rows: int = AQI_BACKFILL_CHUNK_ROWS,
+    log=log,
+) -> int:
+    """
+    Fill AQI columns on rows stored before they were computed at ingest.
+
+    Walks the (did, ts) primary key in chunks and commits each one, so it can
+    be interrupted and rerun; rows that already have their AQI are skipped.
+    Completion is recorded under AQI_BACKFILL_DONE_KEY.
+    """
+    needs_aqi = " OR ".join(
+        [f"({aqi} IS NULL AND {pm} IS NOT NULL)" for aqi, pm in AQI_COLUMNS.items()]
+        + ["(aqi_category IS NULL AND pm_2p5 IS NOT NULL)"]
+    )
+    cursor = ("", -1)
+    updated = 0
+    while True:
+        rows = conn.execute(
+            f"""
+            SELECT did, ts, pm_2p5, pm_2p5_last_1_hour, pm_2p5_nowcast
+            FROM {AIRLINK_OBS_TABLE}
+            WHERE (did, ts) > (?, ?) AND ({needs_aqi})
+            ORDER BY did, ts
+            LIMIT ?
+            """,
+            (*cursor, chunk_rows),
+        ).fetchall()
+        if not rows:
+            break
+        dids, tss, pm, pm_1h, pm_nowcast = zip(*rows)
+        aqi = pm25_aqi_array(pm)
+        categories = [None if value != value else name for value, name in zip(aqi, aqi_categories(aqi))]
+        conn.executemany(
             f"""
-CREATE TABLE IF NOT EXISTS airlink_raw (
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  received_at_epoch INTEGER NOT NULL,
-  host TEXT NOT NULL,
-  did TEXT,
-  ts INTEGER,
-  lsid INTEGER,
-  payload_json TEXT NOT NULL,
-  payload_hash TEXT NOT NULL UNIQUE
-);
-
-CREATE INDEX IF NOT EXISTS idx_airlink_raw_received
-  ON airlink_raw(received_at_epoch);
-
-CREATE INDEX IF NOT EXISTS idx_airlink_raw_ts
-  ON airlink_raw(ts);
-
-CREATE TABLE IF NOT EXISTS {AIRLINK_RAW_TABLE} (
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  received_at_epoch INTEGER NOT NULL,
-  host TEXT NOT NULL,
-  did TEXT,
-  ts INTEGER,
-  lsid INTEGER,
-  payload_json TEXT NOT NULL,
-  payload_hash TEXT NOT NULL
-);
-
-CREATE INDEX IF NOT EXISTS idx_airlink_raw_all_received
-  ON {AIRLINK_RAW_TABLE}(received_at_epoch);
-
-CREATE INDEX IF NOT EXISTS idx_airlink_raw_all_ts
-  ON {AIRLINK_RAW_TABLE}(ts);
-
-CREATE TABLE IF NOT EXISTS {AIRLINK_OBS_TABLE} (
-  did TEXT NOT NULL,
-  ts INTEGER NOT NULL,
-
-  lsid INTEGER,
-  data_structure_type INTEGER,
-  last_report_time INTEGER,
-
-  temp_f REAL,
-  hum REAL,
-  dew_point_f REAL,
-  wet_bulb_f REAL,
-  heat_index_f REAL,
-
-  pm_1 REAL,
-  pm_2p5 REAL,
-  pm_10 REAL,
-
-  pm_1_last REAL,
-  pm_2p5_last REAL,
-  pm_10_last REAL,
-
-  pm_1_last_1_hour REAL,
-  pm_2p5_last_1_hour REAL,
-  pm_10_last_1_hour REAL,
-
-  pm_1_last_3_hours REAL,
-  pm_2p5_last_3_hours REAL,
-  pm_10_last_3_hours REAL,
-
-  pm_1_last_24_hours REAL,
-  pm_2p5_last_24_hours REAL,
-  pm_10_last_24_hours REAL,
-
-  pm_1_nowcast REAL,
-  pm_2p5_nowcast REAL,
-  pm_10_nowcast REAL,
-
-  pct_pm_data_nowcast REAL,
-  pct_pm_data_last_1_hour REAL,
-  pct_pm_data_last_3_hours REAL,
-  pct_pm_data_last_24_hours REAL,
-
-  PRIMARY KEY (did, ts)
-);
-
-CREATE INDEX IF NOT EXISTS idx_airlink_current_obs_ts
-  ON {AIRLINK_OBS_TABLE}(ts);
-
-CREATE TABLE IF NOT EXISTS {HEARTBEAT_TABLE} (
-  name TEXT PRIMARY KEY,
-  last_ok_epoch INTEGER,
-  last_error_epoch INTEGER,
-  last_ok_message TEXT,
-  last_error TEXT
-);
-
-CREATE INDEX IF NOT EXISTS idx_collector_heartbeat_last_ok
-  ON {HEARTBEAT_TABLE}(last_ok_epoch);
-"""
+            UPDATE {AIRLINK_OBS_TABLE}
+            SET aqi_pm25=?, aqi_pm25_last_1_hour=?, aqi_pm25_nowcast=?, aqi_category=?
+            WHERE did=? AND ts=?
+            """,
+            zip(
+                nan_to_none(aqi),
+                nan_to_none(pm25_aqi_array(pm_1h)),
+                nan_to_none(pm25_aqi_array(pm_nowcast)),
+                categories,
+                dids,
+                tss,
+            ),
         )
-        backfill_airlink_raw_all(conn)
+        conn.commit()
+        updated += len(rows)
+        cursor = (dids[-1], tss[-1])
+        log(f"AQI backfill: {updated} rows through did={cursor[0]} ts={cursor[1]}")
+    set_config(conn, AQI_BACKFILL_DONE_KEY, int(time.time()))
+    return updated
+
+
+def ensure_schema() -> None:
+    with db() as conn:
+        # Versioned migrations (src/schema.py); the heartbeat table is part of core.
+        schema.ensure_schema(conn, ("core", "airlink"), log=log)
+        seed_current_conditions(conn, "airlink")
         conn.commit()
 
 
@@ -258,6 +262,13 @@ def run():
         return
 
     log(f"DB ready at: {DB_PATH}")
+    try:
+        with db() as conn:
+            filled = backfill_aqi(conn) if get_config(conn, AQI_BACKFILL_DONE_KEY) is None else 0
+        if filled:
+            log(f"AQI backfill complete: {filled} rows")
+    except Exception as e:
+        log(f"AQI backfill failed: {repr(e)}")
     log(f"Polling AirLink URL={URL} every {POLL_SEC}s")
 
     session = requests.Session()
@@ -281,6 +292,11 @@ def run():
 
             conds = data.get("conditions") or []
             c0 = conds[0] if conds else {}
+            aqi = aqi_values(
+                to_float(c0.get("pm_2p5")),
+                to_float(c0.get("pm_2p5_last_1_hour")),
+                to_float(c0.get("pm_2p5_nowcast")),
+            )
 
             with db() as conn:
                 # raw payload (append-only)
@@ -315,8 +331,9 @@ def run():
                       pm_1_last_24_hours, pm_2p5_last_24_hours, pm_10_last_24_hours,
                       pm_1_nowcast, pm_2p5_nowcast, pm_10_nowcast,
                       pct_pm_data_nowcast, pct_pm_data_last_1_hour,
-                      pct_pm_data_last_3_hours, pct_pm_data_last_24_hours
-                    ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+                      pct_pm_data_last_3_hours, pct_pm_data_last_24_hours,
+                      aqi_pm25, aqi_pm25_last_1_hour, aqi_pm25_nowcast, aqi_category
+                    ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
                     """,
                     (
                         did,
@@ -351,11 +368,37 @@ def run():
                         to_float(c0.get("pct_pm_data_last_1_hour")),
                         to_float(c0.get("pct_pm_data_last_3_hours")),
                         to_float(c0.get("pct_pm_data_last_24_hours")),
+                        *aqi,
                     ),
                 )
+                if did:
+                    upsert_current(
+                        conn,
+                        airlink_conditions(
+                            {
+                                "did": did,
+                                "ts": ts,
+                                "temp_f": to_float(c0.get("temp")),
+                                "hum": to_float(c0.get("hum")),
+                                "dew_point_f": to_float(c0.get("dew_point")),
+                                "heat_index_f": to_float(c0.get("heat_index")),
+                                "pm_2p5": to_float(c0.get("pm_2p5")),
+                                "aqi_pm25": aqi[0],
+                                "aqi_category": aqi[3],
+                            }
+                        ),
+                    )
                 heartbeat_ok(conn, received_at, f"poll ok did={did}")
                 conn.commit()
 
+                if did:
+                    try:
+                        refresh_rollups(conn, "airlink", ts, ts)
+                        conn.commit()
+                    except Exception as e:
+                        conn.rollback()
+                        log(f"Rollup refresh failed: {repr(e)}")
+
             log(
                 f"Stored {AIRLINK_OBS_TABLE} did={did} ts={ts} "
                 f"pm2.5={c0.get('pm_2p5')} temp_f={c0.get('temp')} hum={c0.get('hum')}"
@@ -375,5 +418,20 @@ def run():
             time.sleep(RETRY_SEC)
 
 
-if __name__ == "__main__":
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Poll the AirLink and store observations.")
+    parser.add_argument("--backfill-aqi", action="store_true", help="Fill missing AQI columns and exit")
+    parser.add_argument("--chunk-rows", type=int, default=AQI_BACKFILL_CHUNK_ROWS)
+    args = parser.parse_args()
+    if args.backfill_aqi:
+        ensure_schema()
+        with db() as conn:
+            filled = backfill_aqi(conn, chunk_rows=max(1, args.chunk_rows))
+        log(f"AQI backfill complete: {filled} rows")
+        return 0
     run()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,201 @@
+"""
+Durable outbox for alert email and SMS.
+
+Alert paths enqueue messages and record their own state right away; the
+alerts worker then delivers everything due over one authenticated SMTP
+session, retrying failures with exponential backoff. Delivered rows keep
+their latency (sent_at - created_at) for diagnostics.
+"""
+
+import os
+import smtplib
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+
+from src.alerting import build_email_message, get_email_config, get_verizon_sms_address, open_smtp_session
+from src.schema import ensure_schema
+
+ALERT_OUTBOX_TABLE = "alert_outbox"
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_RETRY_BASE_SECONDS = float(os.getenv("OUTBOX_RETRY_BASE_SECONDS", "30"))
+OUTBOX_RETRY_MAX_SECONDS = float(os.getenv("OUTBOX_RETRY_MAX_SECONDS", "3600"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+SMS_SUBJECT = "Tempest Alert"
+
+
+def _session_lost(exc: Exception) -> bool:
+    # SMTPException subclasses OSError; only disconnects and socket errors end the session.
+    return isinstance(exc, smtplib.SMTPServerDisconnected) or not isinstance(exc, smtplib.SMTPException)
+
+
+def enqueue(
+    db_path: str | Path,
+    channel: str,
+    to_address: str,
+    subject: str,
+    body: str,
+    dedupe_key: str | None = None,
+) -> bool:
+    """Queue one message; returns False when dedupe_key was already queued."""
+    now = time.time()
+    with closing(sqlite3.connect(db_path)) as conn:
+        ensure_schema(conn)
+        cursor = conn.execute(
+            f"""
+            INSERT OR IGNORE INTO {ALERT_OUTBOX_TABLE}
+              (channel, to_address, subject, body, dedupe_key, created_at, next_attempt_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (channel, to_address, subject or "", body, dedupe_key, now, now),
+        )
+        conn.commit()
+        return cursor.rowcount == 1
+
+
+def enqueue_alert(
+    db_path: str | Path,
+    subject: str,
+    body: str,
+    email_to: str | None = None,
+    sms_to: str | None = None,
+    sms_body: str | None = None,
+    dedupe_key: str | None = None,
+) -> int:
+    """Queue the email and/or Verizon SMS for one alert; returns messages queued."""
+    queued = 0
+    if email_to:
+        key = f"{dedupe_key}:email" if dedupe_key else None
+        queued += enqueue(db_path, "email", email_to, subject, body, key)
+    sms_address = get_verizon_sms_address(sms_to) if sms_to else None
+    if sms_address:
+        key = f"{dedupe_key}:sms" if dedupe_key else None
+        queued += enqueue(db_path, "sms", sms_address, SMS_SUBJECT, (sms_body or body)[:240], key)
+    return queued
+
+
+def already_queued(db_path: str | Path, dedupe_key: str) -> bool:
+    """True when enqueue_alert() already accepted a message under dedupe_key."""
+    with closing(sqlite3.connect(db_path)) as conn:
+        ensure_schema(conn)
+        row = conn.execute(
+            f"SELECT 1 FROM {ALERT_OUTBOX_TABLE} WHERE dedupe_key IN (?, ?) LIMIT 1",
+            (f"{dedupe_key}:email", f"{dedupe_key}:sms"),
+        ).fetchone()
+    return row is not None
+
+
+def retry_delay(attempts: int) -> float:
+    return min(OUTBOX_RETRY_MAX_SECONDS, OUTBOX_RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1))
+
+
+def _mark_failed(conn: sqlite3.Connection, row_id: int, attempts: int, error: str, now: float) -> None:
+    attempts += 1
+    status = "failed" if attempts >= OUTBOX_MAX_ATTEMPTS else "pending"
+    conn.execute(
+        f"""
+        UPDATE {ALERT_OUTBOX_TABLE}
+        SET attempts = ?, status = ?, next_attempt_at = ?, last_error = ?
+        WHERE id = ?
+        """,
+        (attempts, status, now + retry_delay(attempts), error[:500], row_id),
+    )
+
+
+def deliver_pending(db_path: str | Path, config: dict | None = None, now: float | None = None) -> dict:
+    """
+    Send every due message over a single SMTP session.
+
+    A dropped session is reopened once; if that fails too, the rest of the
+    batch is left as-is for the next pass.
+
+    Returns counts {"sent", "retry", "failed"} plus "max_latency" seconds for
+    this pass. config defaults to get_email_config().
+    """
+    now = time.time() if now is None else now
+    result = {"sent": 0, "retry": 0, "failed": 0, "max_latency": None}
+    with closing(sqlite3.connect(db_path)) as conn:
+        ensure_schema(conn)
+        rows = conn.execute(
+            f"""
+            SELECT id, to_address, subject, body, attempts, created_at
+            FROM {ALERT_OUTBOX_TABLE}
+            WHERE status = 'pending' AND next_attempt_at <= ?
+            ORDER BY id
+            LIMIT ?
+            """,
+            (now, OUTBOX_BATCH_SIZE),
+        ).fetchall()
+        if not rows:
+            return result
+        error = None
+        if config is None:
+            config, error = get_email_config(return_error=True)
+        server = None
+        if config:
+            try:
+                server = open_smtp_session(config)
+            except Exception as exc:
+                error = str(exc) or exc.__class__.__name__
+        reconnected = False
+        try:
+            for row_id, to_address, subject, body, attempts, created_at in rows:
+                if server is None:
+                    _mark_failed(conn, row_id, attempts, error or "Email configuration missing.", now)
+                    result["failed" if attempts + 1 >= OUTBOX_MAX_ATTEMPTS else "retry"] += 1
+                    continue
+                message = build_email_message(subject, body, config["from_address"], to_address)
+                try:
+                    server.send_message(message)
+                except Exception as exc:
+                    error = str(exc) or exc.__class__.__name__
+                    _mark_failed(conn, row_id, attempts, error, now)
+                    result["failed" if attempts + 1 >= OUTBOX_MAX_ATTEMPTS else "retry"] += 1
+                    if _session_lost(exc):
+                        server.close()
+                        server = None
+                        # Reconnect once; otherwise leave the rest of the batch untouched
+                        # for the next pass instead of charging each row an attempt.
+                        if reconnected:
+                            break
+                        reconnected = True
+                        try:
+                            server = open_smtp_session(config)
+                        except Exception:
+                            break
+                    continue
+                sent_at = time.time()
+                latency = max(0.0, sent_at - created_at)
+                conn.execute(
+                    f"""
+                    UPDATE {ALERT_OUTBOX_TABLE}
+                    SET status = 'sent', attempts = ?, sent_at = ?, latency_seconds = ?, last_error = NULL
+                    WHERE id = ?
+                    """,
+                    (attempts + 1, sent_at, latency, row_id),
+                )
+                conn.commit()
+                result["sent"] += 1
+                result["max_latency"] = max(latency, result["max_latency"] or 0.0)
+            conn.commit()
+        finally:
+            if server is not None:
+                try:
+                    server.quit()
+                except Exception:
+                    server.close()
+    return result
+
+
+def next_attempt_at(db_path: str | Path) -> float | None:
+    """Earliest time a pending message is due, or None when the outbox is empty."""
+    try:
+        with closing(sqlite3.connect(db_path)) as conn:
+            ensure_schema(conn)
+            row = conn.execute(
+                f"SELECT MIN(next_attempt_at) FROM {ALERT_OUTBOX_TABLE} WHERE status = 'pending'"
+            ).fetchone()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
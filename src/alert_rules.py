@@ -0,0 +1,262 @@
+"""
+Streaming alert rules evaluated against live observations.
+
+Rules are declared as JSON in alert_config["alert_rules"], e.g.
+
+    [
+      {"id": "gusty", "type": "threshold", "metric": "wind_gust_mph", "above": 35, "clear": 25},
+      {"id": "pressure_drop", "type": "rate", "metric": "pressure_mb", "window_minutes": 180, "below": -4},
+      {"id": "lightning_close", "type": "lightning", "within_km": 10, "window_minutes": 30},
+      {"id": "aqi_change", "type": "change", "metric": "aqi_category"}
+    ]
+
+RuleEngine keeps all history it needs in memory. Rolling windows are shared
+by every rule on the same metric and length and updated in amortized O(1) per
+observation, so each rule costs a constant-time comparison no matter how much
+history its window spans, and adding rules never adds history queries.
+"""
+
+import json
+import math
+from collections import deque
+
+RULE_TYPES = ("threshold", "rate", "lightning", "change")
+DEFAULT_COOLDOWN_MINUTES = 60
+# A rate rule needs samples spanning at least this share of its window.
+MIN_WINDOW_COVERAGE = 0.9
+
+ALERT_RULES_CONFIG_KEY = "alert_rules"
+OBS_ST_RULE_COLUMNS = (
+    "obs_epoch",
+    "air_temperature",
+    "relative_humidity",
+    "station_pressure",
+    "wind_avg",
+    "wind_gust",
+    "rain_accumulated",
+    "lightning_avg_dist",
+    "lightning_strike_count",
+)
+
+
+def _number(value) -> float | None:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) else number
+
+
+def obs_st_metrics(row: dict) -> dict:
+    """Rule metrics from an obs_st row (SI columns plus common US units)."""
+    temp_c = _number(row.get("air_temperature"))
+    wind_avg = _number(row.get("wind_avg"))
+    wind_gust = _number(row.get("wind_gust"))
+    pressure = _number(row.get("station_pressure"))
+    return {
+        "air_temperature": temp_c,
+        "temp_f": temp_c * 9 / 5 + 32 if temp_c is not None else None,
+        "relative_humidity": _number(row.get("relative_humidity")),
+        "pressure_mb": pressure,
+        "pressure_inhg": pressure * 0.0295299830714 if pressure is not None else None,
+        "wind_avg_mph": wind_avg * 2.2369362921 if wind_avg is not None else None,
+        "wind_gust_mph": wind_gust * 2.2369362921 if wind_gust is not None else None,
+        "rain_mm": _number(row.get("rain_accumulated")),
+        "lightning_avg_dist": _number(row.get("lightning_avg_dist")),
+        "lightning_strike_count": _number(row.get("lightning_strike_count")),
+    }
+
+
+def airlink_metrics(row: dict) -> dict:
+    return {"aqi": _number(row.get("aqi_pm25")), "aqi_category": row.get("aqi_category") or None}
+
+
+class RollingWindow:
+    """Time-bounded samples with a running sum; push is amortized O(1)."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.samples: deque[tuple[int, float]] = deque()
+        self.total = 0.0
+
+    def push(self, epoch: int, value: float) -> None:
+        self.samples.append((epoch, value))
+        self.total += value
+        cutoff = epoch - self.seconds
+        while self.samples[0][0] < cutoff:
+            _, old_value = self.samples.popleft()
+            self.total -= old_value
+
+    def delta(self) -> float | None:
+        if len(self.samples) < 2:
+            return None
+        first_epoch, first_value = self.samples[0]
+        last_epoch, last_value = self.samples[-1]
+        if last_epoch - first_epoch < self.seconds * MIN_WINDOW_COVERAGE:
+            return None
+        return last_value - first_value
+
+
+def _lightning_metric(within_km: float) -> str:
+    return f"lightning_strikes_within_{within_km:g}km"
+
+
+def parse_rules(raw) -> tuple[list[dict], list[str]]:
+    """Validate rule declarations (JSON text or a list); returns (rules, errors)."""
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw) if raw.strip() else []
+        except ValueError as exc:
+            return [], [f"alert_rules is not valid JSON ({exc})"]
+    if not isinstance(raw, list):
+        return [], ["alert_rules must be a list"]
+    rules, errors, seen = [], [], set()
+    for index, spec in enumerate(raw):
+        if not isinstance(spec, dict):
+            errors.append(f"rule {index}: not an object")
+            continue
+        rule_id = str(spec.get("id") or f"rule_{index}")
+        rule_type = spec.get("type", "threshold")
+        if rule_id in seen:
+            errors.append(f"{rule_id}: duplicate id")
+            continue
+        if rule_type not in RULE_TYPES:
+            errors.append(f"{rule_id}: unknown type {rule_type!r}")
+            continue
+        rule = {
+            "id": rule_id,
+            "type": rule_type,
+            "title": spec.get("title") or rule_id.replace("_", " ").title(),
+            "cooldown": float(spec.get("cooldown_minutes", DEFAULT_COOLDOWN_MINUTES)) * 60,
+            "above": _number(spec.get("above")),
+            "below": _number(spec.get("below")),
+        }
+        if rule_type == "lightning":
+            within_km = _number(spec.get("within_km")) or 10.0
+            rule["within_km"] = within_km
+            rule["metric"] = _lightning_metric(within_km)
+            rule["window"] = float(spec.get("window_minutes", 30)) * 60
+            rule["above"] = (_number(spec.get("min_strikes")) or 1) - 0.5
+        else:
+            rule["metric"] = spec.get("metric")
+            if not rule["metric"]:
+                errors.append(f"{rule_id}: metric is required")
+                continue
+        if rule_type == "rate":
+            window_minutes = _number(spec.get("window_minutes"))
+            if not window_minutes or window_minutes <= 0:
+                errors.append(f"{rule_id}: window_minutes is required")
+                continue
+            rule["window"] = window_minutes * 60
+        if rule_type in ("threshold", "rate") and rule["above"] is None and rule["below"] is None:
+            errors.append(f"{rule_id}: needs above or below")
+            continue
+        clear = _number(spec.get("clear"))
+        rule["clear"] = clear if clear is not None else (rule["above"] if rule["above"] is not None else rule["below"])
+        seen.add(rule_id)
+        rules.append(rule)
+    return rules, errors
+
+
+class RuleEngine:
+    def __init__(self, rules: list[dict]):
+        self.rules = rules
+        self.windows: dict[tuple[str, float], RollingWindow] = {}
+        self.rules_by_metric: dict[str, list[dict]] = {}
+        self.lightning_kms = sorted({rule["within_km"] for rule in rules if rule["type"] == "lightning"})
+        self.state = {rule["id"]: {"active": False, "last_fired": None, "previous": None} for rule in rules}
+        self.last_epoch: dict[str, int] = {}
+        for rule in rules:
+            if "window" in rule:
+                key = (rule["metric"], rule["window"])
+                rule["window_key"] = key
+                self.windows.setdefault(key, RollingWindow(rule["window"]))
+            self.rules_by_metric.setdefault(rule["metric"], []).append(rule)
+        self.windows_by_metric: dict[str, list[RollingWindow]] = {}
+        for (metric, _), window in self.windows.items():
+            self.windows_by_metric.setdefault(metric, []).append(window)
+
+    @property
+    def max_window_seconds(self) -> float:
+        return max((window.seconds for window in self.windows.values()), default=0.0)
+
+    def uses(self, *metrics: str) -> bool:
+        return any(metric in self.rules_by_metric for metric in metrics)
+
+    def _with_lightning(self, metrics: dict) -> dict:
+        if not self.lightning_kms:
+            return metrics
+        strikes = metrics.get("lightning_strike_count")
+        distance = metrics.get("lightning_avg_dist")
+        metrics = dict(metrics)
+        for within_km in self.lightning_kms:
+            close = strikes if strikes and distance is not None and distance <= within_km else 0.0
+            metrics[_lightning_metric(within_km)] = close if strikes is not None else None
+        return metrics
+
+    def observe(self, source: str, epoch: int, metrics: dict) -> list[dict]:
+        """
+        Feed one observation; returns the alerts it triggers.
+
+        Observations at or before the last epoch seen from the same source are
+        ignored, so callers may re-send overlapping rows.
+        """
+        if epoch <= self.last_epoch.get(source, -1):
+            return []
+        self.last_epoch[source] = epoch
+        metrics = self._with_lightning(metrics)
+        fired = []
+        for metric, value in metrics.items():
+            rules = self.rules_by_metric.get(metric)
+            if rules is None or value is None:
+                continue
+            for window in self.windows_by_metric.get(metric, ()):
+                window.push(epoch, value)
+            for rule in rules:
+                alert = self._evaluate(rule, epoch, value)
+                if alert:
+                    fired.append(alert)
+        return fired
+
+    def _evaluate(self, rule: dict, epoch: int, value) -> dict | None:
+        state = self.state[rule["id"]]
+        rule_type = rule["type"]
+        if rule_type == "change":
+            previous, state["previous"] = state["previous"], value
+            triggered = previous is not None and value != previous
+            observed = value
+        else:
+            if rule_type == "threshold":
+                observed = value
+            elif rule_type == "rate":
+                observed = self.windows[rule["window_key"]].delta()
+            else:
+                observed = self.windows[rule["window_key"]].total
+            if observed is None:
+                return None
+            if state["active"]:
+                # Hysteresis: stay active until the value is back past "clear".
+                if rule["above"] is not None:
+                    state["active"] = observed >= rule["clear"]
+                else:
+                    state["active"] = observed <= rule["clear"]
+                return None
+            triggered = (rule["above"] is not None and observed > rule["above"]) or (
+                rule["below"] is not None and observed < rule["below"]
+            )
+            state["active"] = triggered
+        if not triggered:
+            return None
+        last_fired = state["last_fired"]
+        if last_fired is not None and epoch - last_fired < rule["cooldown"]:
+            return None
+        state["last_fired"] = epoch
+        if rule_type == "change":
+            message = f"{rule['metric']} changed from {previous} to {value}"
+        elif rule_type == "rate":
+            message = f"{rule['metric']} changed {observed:+.2f} in {rule['window'] / 60:g} min"
+        elif rule_type == "lightning":
+            message = f"{observed:g} lightning strike(s) within {rule['within_km']:g} km in {rule['window'] / 60:g} min"
+        else:
+            message = f"{rule['metric']} is {observed:.1f}"
+        return {"rule_id": rule["id"], "title": rule["title"], "message": message, "epoch": epoch, "value": observed}
@@ -6,6 +6,8 @@ import sqlite3
 from datetime import datetime, timezone
 from email.message import EmailMessage
 
+from src.schema import ensure_schema
+
 ALERT_STATE_TABLE = "alert_state"
 ALERT_CONFIG_TABLE = "alert_config"
 DEFAULT_SMTP_HOST = "smtp.gmail.com"
@@ -98,23 +100,9 @@ def _load_smtp_credentials() -> None:
         os.environ["SMTP_PASSWORD"] = password
 
 
-def ensure_alert_state_table(db_path: str) -> None:
-    with sqlite3.connect(db_path) as conn:
-        conn.execute(
-            f"""
-            CREATE TABLE IF NOT EXISTS {ALERT_STATE_TABLE} (
-                key TEXT PRIMARY KEY,
-                value TEXT NOT NULL,
-                updated_at INTEGER NOT NULL
-            )
-            """
-        )
-        conn.commit()
-
-
 def load_alert_state(db_path: str) -> dict:
-    ensure_alert_state_table(db_path)
     with sqlite3.connect(db_path) as conn:
+        ensure_schema(conn)
         rows = conn.execute(f"SELECT key, value FROM {ALERT_STATE_TABLE}").fetchall()
     state = {}
     for key, value in rows:
@@ -135,9 +123,9 @@ def load_alert_state(db_path: str) -> dict:
 def save_alert_state(db_path: str, updates: dict) -> None:
     if not updates:
         return
-    ensure_alert_state_table(db_path)
     now_epoch = _now_epoch()
     with sqlite3.connect(db_path) as conn:
+        ensure_schema(conn)
         for key, value in updates.items():
             if isinstance(value, bool):
                 stored_value = "1" if value else "0"
@@ -155,23 +143,9 @@ def save_alert_state(db_path: str, updates: dict) -> None:
         conn.commit()
 
 
-def ensure_alert_config_table(db_path: str) -> None:
-    with sqlite3.connect(db_path) as conn:
-        conn.execute(
-            f"""
-            CREATE TABLE IF NOT EXISTS {ALERT_CONFIG_TABLE} (
-                key TEXT PRIMARY KEY,
-                value TEXT NOT NULL,
-                updated_at INTEGER NOT NULL
-            )
-            """
-        )
-        conn.commit()
-
-
 def load_alert_config(db_path: str) -> tuple[dict, int | None]:
-    ensure_alert_config_table(db_path)
     with sqlite3.connect(db_path) as conn:
+        ensure_schema(conn)
         rows = conn.execute(
             f"SELECT key, value, updated_at FROM {ALERT_CONFIG_TABLE}"
         ).fetchall()
@@ -187,11 +161,11 @@ def load_alert_config(db_path: str) -> tuple[dict, int | None]:
 def save_alert_config(db_path: str, updates: dict) -> tuple[list[str], list[str]]:
     if not updates:
         return [], []
-    ensure_alert_config_table(db_path)
     now_epoch = _now_epoch()
     saved_keys = []
     cleared_keys = []
     with sqlite3.connect(db_path) as conn:
+        ensure_schema(conn)
         for key, value in updates.items():
             clean_value = _clean_str(value)
             if clean_value:
@@ -216,8 +190,8 @@ def save_alert_config(db_path: str, updates: dict) -> tuple[list[str], list[str]
 def delete_alert_config(db_path: str, keys: list[str]) -> None:
     if not keys:
         return
-    ensure_alert_config_table(db_path)
     with sqlite3.connect(db_path) as conn:
+        ensure_schema(conn)
         for key in keys:
             conn.execute(
                 f"DELETE FROM {ALERT_CONFIG_TABLE} WHERE key = ?",
@@ -302,26 +276,41 @@ def send_email(
     if not recipient:
         message = "Recipient missing (alert recipient email or ALERT_EMAIL_TO)."
         return (False, message) if return_error else False
+    message = build_email_message(subject, body, config["from_address"], recipient)
+    try:
+        with open_smtp_session(config) as server:
+            server.send_message(message)
+        return (True, None) if return_error else True
+    except Exception as exc:
+        return (False, str(exc)) if return_error else False
+
+
+def build_email_message(subject: str, body: str, from_address: str, to_address: str) -> EmailMessage:
     message = EmailMessage()
     message["Subject"] = subject or ""
-    message["From"] = config["from_address"]
-    message["To"] = recipient
+    message["From"] = from_address
+    message["To"] = to_address
     message.set_content(body)
+    return message
+
+
+def open_smtp_session(config: dict) -> smtplib.SMTP:
+    """Connected, TLS-upgraded and logged-in SMTP client; use as a context manager."""
+    if config["use_ssl"]:
+        server = smtplib.SMTP_SSL(config["host"], config["port"], timeout=10)
+    else:
+        server = smtplib.SMTP(config["host"], config["port"], timeout=10)
     try:
-        if config["use_ssl"]:
-            server = smtplib.SMTP_SSL(config["host"], config["port"], timeout=10)
-        else:
-            server = smtplib.SMTP(config["host"], config["port"], timeout=10)
-        with server:
+        server.ehlo()
+        if not config["use_ssl"] and config["use_tls"]:
+            server.starttls()
             server.ehlo()
-            if not config["use_ssl"] and config["use_tls"]:
-                server.starttls()
-                server.ehlo()
+        if config.get("username"):
             server.login(config["username"], config["password"])
-            server.send_message(message)
-        return (True, None) if return_error else True
-    except Exception as exc:
-        return (False, str(exc)) if return_error else False
+    except Exception:
+        server.close()
+        raise
+    return server
 
 
 def get_verizon_sms_address(raw_number: str | None) -> str | None:
@@ -383,6 +372,7 @@ def determine_freeze_alerts(temp_f: float, state: dict, now_epoch: int | None =
             alerts.append({
                 "title": "Deep Freeze Advisory",
                 "state_updates": {"deep_freeze_sent": True, "freeze_sent": True},
+                "started_at": deep_freeze_started_at or now_epoch,
             })
     elif temp_f <= float(os.getenv("FREEZE_WARNING_F", "32")):
         if not freeze_started_at:
@@ -393,6 +383,7 @@ def determine_freeze_alerts(temp_f: float, state: dict, now_epoch: int | None =
             alerts.append({
                 "title": "Freeze Warning",
                 "state_updates": {"freeze_sent": True},
+                "started_at": freeze_started_at or now_epoch,
             })
     return alerts, reset_updates
 
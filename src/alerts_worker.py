@@ -1,25 +1,41 @@
 import os
 import sqlite3
 import sys
+import threading
 import time
 from datetime import datetime, timezone
 from pathlib import Path
 from zoneinfo import ZoneInfo
 
-import requests
-
+from src.alert_rules import (
+    ALERT_RULES_CONFIG_KEY,
+    OBS_ST_RULE_COLUMNS,
+    RuleEngine,
+    airlink_metrics,
+    obs_st_metrics,
+    parse_rules,
+)
 from src.alerting import (
     build_freeze_alert_message,
     determine_freeze_alerts,
+    load_alert_config,
     load_alert_state,
     resolve_alert_recipients,
     save_alert_state,
-    send_email,
-    send_verizon_sms,
 )
-from src.config_store import connect as config_connect
-from src.config_store import get_bool, get_float
-from src.nws_alerts import fetch_active_alerts, fetch_hwo_text, summarize_alerts, summarize_hwo
+from src.alert_outbox import (
+    OUTBOX_MAX_ATTEMPTS,
+    already_queued,
+    deliver_pending,
+    enqueue_alert,
+    next_attempt_at,
+)
+from src.change_feed import wait_for_change
+from src.current_conditions import current_or_latest
+from src.external_data import cached_nws_alerts, cached_nws_hwo
+from src.location import resolve_location as shared_resolve_location
+from src.nws_alerts import summarize_alerts, summarize_hwo
+from src.schema import ensure_schema
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 LOG_PATH = PROJECT_ROOT / "logs" / "alerts_worker.log"
@@ -58,41 +74,24 @@ def table_exists(conn: sqlite3.Connection, name: str) -> bool:
 
 
 def latest_temp_c(conn: sqlite3.Connection) -> tuple[int | None, float | None]:
-    row = conn.execute(
-        "SELECT obs_epoch, air_temperature FROM obs_st ORDER BY obs_epoch DESC LIMIT 1"
-    ).fetchone()
-    if not row:
-        return None, None
-    epoch, temp_c = row
-    if epoch is None or temp_c is None:
+    current = current_or_latest(conn, "tempest")
+    if not current or current["temp_c"] is None:
         return None, None
-    return int(epoch), float(temp_c)
+    return int(current["obs_epoch"]), float(current["temp_c"])
 
 
 def c_to_f(temp_c: float) -> float:
     return (temp_c * 9 / 5) + 32
 
 
-def ensure_nws_alert_table(conn: sqlite3.Connection) -> None:
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS nws_alert_log (
-            alert_id TEXT PRIMARY KEY,
-            sent_at INTEGER NOT NULL
-        )
-        """
-    )
-    conn.commit()
-
-
 def load_sent_nws_alert_ids(conn: sqlite3.Connection) -> set[str]:
-    ensure_nws_alert_table(conn)
+    ensure_schema(conn)
     rows = conn.execute("SELECT alert_id FROM nws_alert_log").fetchall()
     return {row[0] for row in rows if row and row[0]}
 
 
 def record_nws_alerts(conn: sqlite3.Connection, alert_ids: list[str]) -> None:
-    ensure_nws_alert_table(conn)
+    ensure_schema(conn)
     now_epoch = int(datetime.now(timezone.utc).timestamp())
     for alert_id in alert_ids:
         if alert_id:
@@ -103,26 +102,14 @@ def record_nws_alerts(conn: sqlite3.Connection, alert_ids: list[str]) -> None:
     conn.commit()
 
 
-def ensure_nws_hwo_table(conn: sqlite3.Connection) -> None:
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS nws_hwo_log (
-            product_id TEXT PRIMARY KEY,
-            sent_at INTEGER NOT NULL
-        )
-        """
-    )
-    conn.commit()
-
-
 def load_sent_nws_hwo_ids(conn: sqlite3.Connection) -> set[str]:
-    ensure_nws_hwo_table(conn)
+    ensure_schema(conn)
     rows = conn.execute("SELECT product_id FROM nws_hwo_log").fetchall()
     return {row[0] for row in rows if row and row[0]}
 
 
 def record_nws_hwo(conn: sqlite3.Connection, product_id: str) -> None:
-    ensure_nws_hwo_table(conn)
+    ensure_schema(conn)
     now_epoch = int(datetime.now(timezone.utc).timestamp())
     conn.execute(
         "INSERT OR REPLACE INTO nws_hwo_log (product_id, sent_at) VALUES (?, ?)",
@@ -131,58 +118,11 @@ def record_nws_hwo(conn: sqlite3.Connection, product_id: str) -> None:
     conn.commit()
 
 
-def fetch_station_location(token: str | None, station_id: int):
-    if not token:
-        return None
-    try:
-        resp = requests.get(
-            "https://swd.weatherflow.com/swd/rest/stations",
-            params={"token": token},
-            timeout=8,
-        )
-        resp.raise_for_status()
-        payload = resp.json()
-        stations = payload.get("stations", []) if isinstance(payload, dict) else []
-        for station in stations:
-            if station.get("station_id") == station_id:
-                lat = station.get("latitude") or station.get("station_latitude")
-                lon = station.get("longitude") or station.get("station_longitude") or station.get("lng")
-                return {"name": station.get("name") or "Tempest Station", "lat": lat, "lon": lon}
-        if stations:
-            station = stations[0]
-            lat = station.get("latitude") or station.get("station_latitude")
-            lon = station.get("longitude") or station.get("station_longitude") or station.get("lng")
-            return {"name": station.get("name") or "Tempest Station", "lat": lat, "lon": lon}
-    except Exception:
-        return None
-    return None
-
-
 def resolve_location(db_path: Path) -> tuple[float | None, float | None]:
-    try:
-        with config_connect(db_path) as conn:
-            override_enabled = bool(get_bool(conn, "override_location_enabled") or False)
-            lat_override = get_float(conn, "station_lat_override")
-            lon_override = get_float(conn, "station_lon_override")
-            if override_enabled and lat_override is not None and lon_override is not None:
-                return lat_override, lon_override
-    except Exception:
-        pass
-    try:
-        with config_connect(db_path) as conn:
-            lat_override = get_float(conn, "station_lat_override")
-            lon_override = get_float(conn, "station_lon_override")
-            if lat_override is not None and lon_override is not None:
-                return lat_override, lon_override
-    except Exception:
-        pass
-    station = fetch_station_location(TEMPEST_API_TOKEN, TEMPEST_STATION_ID)
-    if station and station.get("lat") is not None and station.get("lon") is not None:
-        return float(station["lat"]), float(station["lon"])
-    return None, None
+    return shared_resolve_location(db_path)
 
 
-def run_once(db_path: Path) -> None:
+def check_freeze(db_path: Path) -> None:
     if not db_path.exists():
         log(f"ERROR: DB missing at {db_path}.")
         return
@@ -213,40 +153,28 @@ def run_once(db_path: Path) -> None:
                     temp_value = float(temp_f)
                     message_body = build_freeze_alert_message(alert["title"], temp_value, now_local)
                     subject = f"{alert['title']} - Tempest {temp_value:.1f} F"
-                    email_sent = False
-                    sms_sent = False
-                    if email_to:
-                        email_sent, email_error = send_email(
-                            subject,
-                            message_body,
-                            to_address=email_to,
-                            return_error=True,
-                        )
-                        if not email_sent:
-                            log(f"WARN: Email send failed ({email_error}).")
-                    if sms_to:
-                        sms_sent, sms_error = send_verizon_sms(
-                            message_body,
-                            sms_number=sms_to,
-                            return_error=True,
-                        )
-                        if not sms_sent:
-                            log(f"WARN: SMS send failed ({sms_error}).")
-                    if email_sent or sms_sent:
+                    # One message per threshold crossing, even if the state save below is lost
+                    # (restart) or a second worker sees the same reading.
+                    dedupe_key = f"freeze:{alert['title']}:{alert['started_at']}"
+                    # The outbox retries delivery, so the alert counts as sent once queued.
+                    queued = enqueue_alert(db_path, subject, message_body, email_to, sms_to, dedupe_key=dedupe_key)
+                    if queued or already_queued(db_path, dedupe_key):
                         save_alert_state(str(db_path), alert["state_updates"])
-                        log(f"ALERT: {alert['title']} sent.")
+                        log(f"ALERT: {alert['title']} queued.")
                     else:
-                        log(f"WARN: {alert['title']} not sent.")
+                        log(f"WARN: {alert['title']} not queued.")
         else:
             log(f"OK: Tempest {temp_f:.1f} F - no freeze alerts.")
 
+
+def check_nws(db_path: Path) -> None:
     if NWS_ALERTS_ENABLED or NWS_HWO_NOTIFY:
         lat, lon = resolve_location(db_path)
         if lat is None or lon is None:
             log("WARN: NWS checks skipped (no location).")
         else:
             if NWS_ALERTS_ENABLED:
-                alerts = fetch_active_alerts(lat, lon, LOCAL_TZ)
+                alerts = cached_nws_alerts(db_path, lat, lon, LOCAL_TZ)
                 if not alerts:
                     log("OK: No active NWS alerts.")
                 else:
@@ -263,34 +191,26 @@ def run_once(db_path: Path) -> None:
                             summary_lines = summarize_alerts(new_alerts, LOCAL_TZ, max_items=4)
                             message_body = "NWS Alerts:\n" + "\n".join(f"- {line}" for line in summary_lines)
                             subject = f"NWS Alerts ({len(new_alerts)})"
-                            email_sent = False
-                            sms_sent = False
-                            if email_to:
-                                email_sent, email_error = send_email(
-                                    subject,
-                                    message_body,
-                                    to_address=email_to,
-                                    return_error=True,
-                                )
-                                if not email_sent:
-                                    log(f"WARN: NWS email send failed ({email_error}).")
-                            if sms_to and summary_lines:
-                                sms_body = "NWS Alerts: " + " ".join(summary_lines[:2])
-                                sms_sent, sms_error = send_verizon_sms(
-                                    sms_body,
-                                    sms_number=sms_to,
-                                    return_error=True,
-                                )
-                                if not sms_sent:
-                                    log(f"WARN: NWS SMS send failed ({sms_error}).")
-                            if email_sent or sms_sent:
+                            alert_ids = [a.get("id") for a in new_alerts if a.get("id")]
+                            dedupe_key = "nws:" + ",".join(sorted(alert_ids)) if alert_ids else None
+                            queued = enqueue_alert(
+                                db_path,
+                                subject,
+                                message_body,
+                                email_to,
+                                sms_to if summary_lines else None,
+                                sms_body="NWS Alerts: " + " ".join(summary_lines[:2]),
+                                dedupe_key=dedupe_key,
+                            )
+                            # A pass that died after queueing still records the ids.
+                            if queued or (dedupe_key and already_queued(db_path, dedupe_key)):
                                 with sqlite3.connect(db_path) as conn:
-                                    record_nws_alerts(conn, [a.get("id") for a in new_alerts if a.get("id")])
-                                log(f"ALERT: Sent {len(new_alerts)} NWS alert(s).")
+                                    record_nws_alerts(conn, alert_ids)
+                                log(f"ALERT: Queued {len(new_alerts)} NWS alert(s).")
                             else:
-                                log("WARN: NWS alerts not sent.")
+                                log("WARN: NWS alerts not queued.")
             if NWS_HWO_NOTIFY:
-                hwo = fetch_hwo_text(lat, lon)
+                hwo = cached_nws_hwo(db_path, lat, lon)
                 if not hwo:
                     log("OK: No NWS outlook available.")
                 else:
@@ -311,33 +231,175 @@ def run_once(db_path: Path) -> None:
                             else:
                                 subject = f"NWS Outlook: {headline}"
                                 message_body = f"{headline}\n\n{summary}"
-                                email_sent = False
-                                sms_sent = False
-                                if email_to:
-                                    email_sent, email_error = send_email(
-                                        subject,
-                                        message_body,
-                                        to_address=email_to,
-                                        return_error=True,
-                                    )
-                                    if not email_sent:
-                                        log(f"WARN: NWS outlook email failed ({email_error}).")
-                                if sms_to:
-                                    sms_body = f"NWS Outlook: {headline}. {summary}"
-                                    sms_body = sms_body[:240]
-                                    sms_sent, sms_error = send_verizon_sms(
-                                        sms_body,
-                                        sms_number=sms_to,
-                                        return_error=True,
-                                    )
-                                    if not sms_sent:
-                                        log(f"WARN: NWS outlook SMS failed ({sms_error}).")
-                                if email_sent or sms_sent:
+                                dedupe_key = f"hwo:{product_id}"
+                                queued = enqueue_alert(
+                                    db_path,
+                                    subject,
+                                    message_body,
+                                    email_to,
+                                    sms_to,
+                                    sms_body=f"NWS Outlook: {headline}. {summary}",
+                                    dedupe_key=dedupe_key,
+                                )
+                                if queued or already_queued(db_path, dedupe_key):
                                     with sqlite3.connect(db_path) as conn:
                                         record_nws_hwo(conn, product_id)
-                                    log("ALERT: Sent NWS outlook.")
+                                    log("ALERT: Queued NWS outlook.")
                                 else:
-                                    log("WARN: NWS outlook not sent.")
+                                    log("WARN: NWS outlook not queued.")
+
+
+def feed_rule_engine(engine: RuleEngine, conn: sqlite3.Connection, since_epoch: int, until_epoch: int | None = None) -> list[dict]:
+    """Push obs_st rows in (since_epoch, until_epoch) and the latest AirLink reading through engine."""
+    sql = f"SELECT {', '.join(OBS_ST_RULE_COLUMNS)} FROM obs_st WHERE obs_epoch > ?"
+    params = [since_epoch]
+    if until_epoch is not None:
+        sql += " AND obs_epoch < ?"
+        params.append(until_epoch)
+    fired = []
+    for row in conn.execute(sql + " ORDER BY obs_epoch", params).fetchall():
+        record = dict(zip(OBS_ST_RULE_COLUMNS, row))
+        fired.extend(engine.observe("obs_st", int(record["obs_epoch"]), obs_st_metrics(record)))
+    if engine.uses("aqi", "aqi_category"):
+        try:
+            current = current_or_latest(conn, "airlink")
+        except sqlite3.Error:
+            current = None
+        if current:
+            metrics = airlink_metrics({"aqi_pm25": current["aqi"], "aqi_category": current["aqi_category"]})
+            fired.extend(engine.observe("airlink", int(current["obs_epoch"]), metrics))
+    return fired
+
+
+def load_rule_engine(db_path: Path) -> tuple[RuleEngine | None, int | None]:
+    """
+    Build the engine from alert_config and warm its windows from recent history
+    (all but the newest observation), so a restart neither re-sends alerts for
+    conditions that were already active nor waits hours to fill a rate window.
+    """
+    config, updated_at = load_alert_config(str(db_path))
+    rules, errors = parse_rules(config.get(ALERT_RULES_CONFIG_KEY, ""))
+    for error in errors:
+        log(f"WARN: Alert rule skipped: {error}.")
+    if not rules:
+        return None, updated_at
+    engine = RuleEngine(rules)
+    with sqlite3.connect(db_path) as conn:
+        if table_exists(conn, "obs_st"):
+            latest_epoch, _ = latest_temp_c(conn)
+            if latest_epoch is not None:
+                since = latest_epoch - int(engine.max_window_seconds) - 60
+                feed_rule_engine(engine, conn, since, until_epoch=latest_epoch)
+    log(f"Loaded {len(rules)} alert rule(s).")
+    return engine, updated_at
+
+
+def queue_rule_alert(db_path: Path, alert: dict) -> bool:
+    email_to, sms_to = resolve_alert_recipients(str(db_path))
+    if not email_to and not sms_to:
+        log(f"WARN: {alert['title']} triggered but no recipients configured.")
+        return False
+    message_body = f"{alert['title']}: {alert['message']}."
+    dedupe_key = f"rule:{alert['rule_id']}:{alert['epoch']}"
+    return enqueue_alert(db_path, alert["title"], message_body, email_to, sms_to, dedupe_key=dedupe_key) > 0
+
+
+def check_rules(db_path: Path, engine: RuleEngine | None) -> None:
+    if engine is None or not db_path.exists():
+        return
+    since = engine.last_epoch.get("obs_st")
+    if since is None:
+        since = int(time.time() - engine.max_window_seconds - 60)
+    with sqlite3.connect(db_path) as conn:
+        if not table_exists(conn, "obs_st"):
+            return
+        fired = feed_rule_engine(engine, conn, since)
+    for alert in fired:
+        if queue_rule_alert(db_path, alert):
+            log(f"ALERT: {alert['title']} queued ({alert['message']}).")
+        else:
+            log(f"WARN: {alert['title']} not queued.")
+
+
+def deliver_outbox(db_path: Path) -> None:
+    result = deliver_pending(db_path)
+    if result["sent"]:
+        log(f"OK: Delivered {result['sent']} message(s) (max latency {result['max_latency']:.1f}s).")
+    if result["retry"]:
+        log(f"WARN: {result['retry']} message(s) will be retried.")
+    if result["failed"]:
+        log(f"ERROR: {result['failed']} message(s) gave up after {OUTBOX_MAX_ATTEMPTS} attempts.")
+
+
+def run_once(db_path: Path) -> None:
+    check_freeze(db_path)
+    engine, _ = load_rule_engine(db_path) if db_path.exists() else (None, None)
+    check_rules(db_path, engine)
+    check_nws(db_path)
+    if db_path.exists():
+        deliver_outbox(db_path)
+
+
+def open_watch_connection(db_path: Path) -> sqlite3.Connection | None:
+    if not db_path.exists():
+        return None
+    try:
+        return sqlite3.connect(f"{db_path.as_uri()}?mode=ro", uri=True)
+    except sqlite3.Error:
+        return None
+
+
+def serve(db_path: Path, stop: threading.Event | None = None) -> None:
+    """Event-driven alert loop; runs until stop is set (forever when None)."""
+    stop = stop or threading.Event()
+    watch_conn = None
+    last_seq = None
+    next_nws_at = 0.0
+    engine, rules_updated_at = (None, None)
+    rules_loaded = False
+    while not stop.is_set():
+        try:
+            if watch_conn is None:
+                watch_conn = open_watch_connection(db_path)
+            if watch_conn is None:
+                # No database yet: fall back to the plain interval.
+                check_freeze(db_path)
+                stop.wait(max(5, ALERT_WORKER_INTERVAL_SECONDS))
+                continue
+            if not rules_loaded:
+                engine, rules_updated_at = load_rule_engine(db_path)
+                rules_loaded = True
+            # Sleep until the collector commits a new obs_st row, the NWS check is due
+            # or a queued message is due for (re)delivery.
+            timeout = next_nws_at - time.monotonic()
+            outbox_due = next_attempt_at(db_path)
+            if outbox_due is not None:
+                timeout = min(timeout, outbox_due - time.time())
+            seq = wait_for_change(watch_conn, "obs_st", last_seq, timeout)
+            changed = seq != last_seq
+            if changed:
+                last_seq = seq
+                check_freeze(db_path)
+                check_rules(db_path, engine)
+            if time.monotonic() >= next_nws_at:
+                next_nws_at = time.monotonic() + max(5, ALERT_WORKER_INTERVAL_SECONDS)
+                if seq == 0 and not changed:
+                    # Collector predates the change feed; keep polling on the interval.
+                    check_freeze(db_path)
+                    check_rules(db_path, engine)
+                if load_alert_config(str(db_path))[1] != rules_updated_at:
+                    engine, rules_updated_at = load_rule_engine(db_path)
+                check_nws(db_path)
+            deliver_outbox(db_path)
+        except Exception as exc:
+            log(f"ERROR: worker exception ({exc}).")
+            rules_loaded = False
+            if watch_conn is not None:
+                watch_conn.close()
+                watch_conn = None
+            stop.wait(5)
+    if watch_conn is not None:
+        watch_conn.close()
 
 
 def main() -> int:
@@ -346,13 +408,12 @@ def main() -> int:
     if run_once_flag:
         run_once(db_path)
         return 0
-    log(f"Starting alerts worker (interval={ALERT_WORKER_INTERVAL_SECONDS}s).")
-    while True:
-        try:
-            run_once(db_path)
-        except Exception as exc:
-            log(f"ERROR: worker exception ({exc}).")
-        time.sleep(max(5, ALERT_WORKER_INTERVAL_SECONDS))
+    log(
+        f"Starting alerts worker (freeze checks on new obs_st rows, "
+        f"NWS interval={ALERT_WORKER_INTERVAL_SECONDS}s)."
+    )
+    serve(db_path)
+    return 0
 
 
 if __name__ == "__main__":
@@ -0,0 +1,124 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+# US EPA PM2.5 breakpoints (24h AQI): (c_low, c_high, aqi_low, aqi_high)
+PM25_BREAKPOINTS = [
+    (0.0, 12.0, 0, 50),
+    (12.1, 35.4, 51, 100),
+    (35.5, 55.4, 101, 150),
+    (55.5, 150.4, 151, 200),
+    (150.5, 250.4, 201, 300),
+    (250.5, 350.4, 301, 400),
+    (350.5, 500.4, 401, 500),
+]
+# Concentrations outside every breakpoint (negative or above the table) report the cap.
+AQI_CAP = 500.0
+
+# (upper AQI bound, category, color); the last row catches everything above 300.
+AQI_CATEGORIES = [
+    (50, "Good", "#00e400"),
+    (100, "Moderate", "#ffff00"),
+    (150, "Unhealthy for Sensitive Groups", "#ff7e00"),
+    (200, "Unhealthy", "#ff0000"),
+    (300, "Very Unhealthy", "#8f3f97"),
+    (math.inf, "Hazardous", "#7e0023"),
+]
+MISSING_CATEGORY = "--"
+MISSING_COLOR = "#2d2f36"
+
+_C_LOW = np.array([bp[0] for bp in PM25_BREAKPOINTS])
+_C_HIGH = np.array([bp[1] for bp in PM25_BREAKPOINTS])
+_A_LOW = np.array([bp[2] for bp in PM25_BREAKPOINTS], dtype="float64")
+_A_HIGH = np.array([bp[3] for bp in PM25_BREAKPOINTS], dtype="float64")
+_CATEGORY_BOUNDS = np.array([row[0] for row in AQI_CATEGORIES[:-1]], dtype="float64")
+_CATEGORY_NAMES = np.array([row[1] for row in AQI_CATEGORIES] + [MISSING_CATEGORY], dtype=object)
+_CATEGORY_COLORS = np.array([row[2] for row in AQI_CATEGORIES] + [MISSING_COLOR], dtype=object)
+_ROUND_ONE = np.frompyfunc(lambda value: round(value, 1), 1, 1)
+
+
+def pm25_aqi(pm_value):
+    """AQI for one PM2.5 concentration (ug/m3), or None when missing."""
+    pm = float(pm_value) if pm_value is not None else None
+    if pm is None or pd.isna(pm):
+        return None
+    # EPA guidance: truncate/round PM2.5 to 0.1 for AQI calculations.
+    pm = round(pm, 1)
+    for c_low, c_high, a_low, a_high in PM25_BREAKPOINTS:
+        if c_low <= pm <= c_high:
+            return (a_high - a_low) / (c_high - c_low) * (pm - c_low) + a_low
+    return AQI_CAP
+
+
+def _round_tenths(pm: np.ndarray) -> np.ndarray:
+    """
+    round(pm, 1) for every element, matching Python's correctly rounded result.
+
+    np.round scales by 10 first, which can land on the other side of a .x5 tie;
+    the few values near a tie are re-rounded with the scalar builtin.
+    """
+    rounded = np.round(pm, 1)
+    scaled = pm * 10.0
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_tie.any():
+        rounded[near_tie] = _ROUND_ONE(pm[near_tie]).astype("float64")
+    return rounded
+
+
+def pm25_aqi_array(values) -> np.ndarray:
+    """Vectorized pm25_aqi: float64 array with NaN where the input is missing."""
+    pm = pd.to_numeric(pd.Series(values, dtype="object"), errors="coerce").to_numpy(dtype="float64")
+    out = np.full(pm.shape, np.nan)
+    valid = ~np.isnan(pm)
+    if not valid.any():
+        return out
+    pm_valid = _round_tenths(pm[valid])
+    idx = np.searchsorted(_C_HIGH, pm_valid, side="left")
+    in_table = idx < len(PM25_BREAKPOINTS)
+    idx = np.minimum(idx, len(PM25_BREAKPOINTS) - 1)
+    c_low = _C_LOW[idx]
+    in_table &= pm_valid >= c_low
+    # Same operation order as the scalar formula so results are bit-identical.
+    aqi = (_A_HIGH[idx] - _A_LOW[idx]) / (_C_HIGH[idx] - c_low) * (pm_valid - c_low) + _A_LOW[idx]
+    out[valid] = np.where(in_table, aqi, AQI_CAP)
+    return out
+
+
+def pm25_aqi_series(series: pd.Series) -> pd.Series:
+    return pd.Series(pm25_aqi_array(series.to_numpy()), index=series.index, dtype="float64")
+
+
+def _category_index(values) -> np.ndarray:
+    aqi = pd.to_numeric(pd.Series(values, dtype="object"), errors="coerce").to_numpy(dtype="float64")
+    idx = np.searchsorted(_CATEGORY_BOUNDS, aqi, side="left")
+    idx[np.isnan(aqi)] = len(AQI_CATEGORIES)
+    return idx
+
+
+def aqi_categories(values) -> np.ndarray:
+    """Vectorized aqi_category (object array of names, "--" for missing)."""
+    return _CATEGORY_NAMES[_category_index(values)]
+
+
+def aqi_colors(values) -> np.ndarray:
+    """Vectorized aqi_color (object array of hex colors)."""
+    return _CATEGORY_COLORS[_category_index(values)]
+
+
+def aqi_category(aqi):
+    if aqi is None or pd.isna(aqi):
+        return MISSING_CATEGORY
+    for upper, name, _ in AQI_CATEGORIES:
+        if aqi <= upper:
+            return name
+    return AQI_CATEGORIES[-1][1]
+
+
+def aqi_color(aqi):
+    if aqi is None or pd.isna(aqi):
+        return MISSING_COLOR
+    for upper, _, color in AQI_CATEGORIES:
+        if aqi <= upper:
+            return color
+    return AQI_CATEGORIES[-1][2]
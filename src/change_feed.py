@@ -0,0 +1,84 @@
+"""
+Cheap cross-process change notification through the database.
+
+Writers bump a per-topic sequence in the same transaction as their rows.
+Readers keep one connection open and poll `PRAGMA data_version`, which only
+changes when another connection commits and costs no table read, so waiting
+for new observations is nearly free and wakes within one poll interval.
+"""
+
+import os
+import sqlite3
+import time
+
+CHANGE_FEED_TABLE = "change_feed"
+CHANGE_POLL_SECONDS = float(os.getenv("CHANGE_POLL_SECONDS", "0.25"))
+
+
+def ensure_change_feed_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {CHANGE_FEED_TABLE} (
+            topic TEXT PRIMARY KEY,
+            seq INTEGER NOT NULL,
+            updated_at REAL
+        )
+        """
+    )
+
+
+def bump(conn: sqlite3.Connection, topic: str) -> None:
+    """
+    Advance topic's sequence; call inside the writer's transaction, before commit.
+
+    The table comes from the core migrations (src/schema.py) the writers run
+    at startup, so the hot path does no DDL.
+    """
+    conn.execute(
+        f"""
+        INSERT INTO {CHANGE_FEED_TABLE} (topic, seq, updated_at) VALUES (?, 1, ?)
+        ON CONFLICT(topic) DO UPDATE SET seq = seq + 1, updated_at = excluded.updated_at
+        """,
+        (topic, time.time()),
+    )
+
+
+def current_seq(conn: sqlite3.Connection, topic: str) -> int:
+    try:
+        row = conn.execute(f"SELECT seq FROM {CHANGE_FEED_TABLE} WHERE topic = ?", (topic,)).fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return int(row[0]) if row else 0
+
+
+def data_version(conn: sqlite3.Connection) -> int:
+    return int(conn.execute("PRAGMA data_version").fetchone()[0])
+
+
+def wait_for_change(
+    conn: sqlite3.Connection,
+    topic: str,
+    last_seq: int | None,
+    timeout: float,
+    poll_seconds: float = CHANGE_POLL_SECONDS,
+) -> int:
+    """
+    Block until topic's sequence differs from last_seq or timeout elapses.
+
+    Returns the current sequence (equal to last_seq on timeout). conn must
+    not be used for writes by the caller: data_version only reports commits
+    made through other connections.
+    """
+    seq = current_seq(conn, topic)
+    deadline = time.monotonic() + max(0.0, timeout)
+    version = data_version(conn)
+    while seq == last_seq:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        time.sleep(min(poll_seconds, remaining))
+        latest = data_version(conn)
+        if latest != version:
+            version = latest
+            seq = current_seq(conn, topic)
+    return seq
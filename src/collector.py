@@ -1,14 +1,33 @@
 ﻿import json
 import os
+import queue
 import sqlite3
+import threading
 import time
 import traceback
-import hashlib
 from pathlib import Path
 
 import websocket
 from websocket._exceptions import WebSocketTimeoutException
 
+from src.change_feed import bump as bump_change_feed
+from src.current_conditions import (
+    seed_current_conditions,
+    tempest_conditions,
+    upsert_current,
+)
+from src.obs_layout import OBS_ST_RAW_TABLE, ensure_obs_st_raw_table
+from src.raw_store import (
+    COMPACT_PAYLOAD_JSON,
+    compact_enabled,
+    compact_existing_rows,
+    payload_fingerprint,
+    payload_row,
+    store_payload_rows,
+)
+from src.rollups import refresh_rollups
+from src.schema import BASE_SCHEMA_SQL, ensure_schema  # noqa: F401 (BASE_SCHEMA_SQL is re-exported)
+
 # =====================
 # Configuration
 # =====================
@@ -26,6 +45,18 @@ COMMIT_EVERY_N_MESSAGES = 25
 COMMIT_EVERY_SECONDS = 5
 HEARTBEAT_INTERVAL_SEC = 30
 
+# Receive -> writer queue. "block" applies backpressure to the socket (lossless);
+# "drop" discards new frames while the queue is full and counts them.
+QUEUE_MAX = max(100, int(os.getenv("TEMPEST_QUEUE_MAX", "10000")))
+QUEUE_POLICY = os.getenv("TEMPEST_QUEUE_POLICY", "block").strip().lower()
+if QUEUE_POLICY not in ("block", "drop"):
+    QUEUE_POLICY = "block"
+WRITER_POLL_SEC = 0.5
+
+# Compact raw storage: text stored once, compressed, in raw_payloads (opt-in)
+RAW_COMPACT = compact_enabled()
+WRITER_JOIN_TIMEOUT_SEC = 30
+
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 DB_PATH = Path(os.getenv("TEMPEST_DB_PATH", str(PROJECT_ROOT / "data" / "tempest.db")))
 if not DB_PATH.is_absolute():
@@ -54,64 +85,6 @@ def log(msg: str) -> None:
 # =====================
 # Database schema + migrations
 # =====================
-BASE_SCHEMA_SQL = """
-CREATE TABLE IF NOT EXISTS raw_events (
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  received_at_epoch INTEGER NOT NULL,
-  device_id INTEGER,
-  message_type TEXT,
-  payload_json TEXT NOT NULL
-);
-
-CREATE INDEX IF NOT EXISTS idx_raw_events_received_at
-  ON raw_events(received_at_epoch);
-
-CREATE INDEX IF NOT EXISTS idx_raw_events_device_type
-  ON raw_events(device_id, message_type);
-
-CREATE TABLE IF NOT EXISTS obs_st (
-  obs_epoch INTEGER NOT NULL,
-  device_id INTEGER NOT NULL,
-
-  wind_lull REAL,
-  wind_avg REAL,
-  wind_gust REAL,
-  wind_dir INTEGER,
-
-  wind_interval INTEGER,
-  station_pressure REAL,
-  air_temperature REAL,
-  relative_humidity INTEGER,
-  illuminance REAL,
-  uv REAL,
-  solar_radiation REAL,
-  rain_accumulated REAL,
-  precip_type INTEGER,
-  lightning_avg_dist REAL,
-  lightning_strike_count INTEGER,
-  battery REAL,
-  report_interval INTEGER,
-
-  obs_raw_json TEXT,
-
-  PRIMARY KEY (obs_epoch, device_id)
-);
-
-CREATE INDEX IF NOT EXISTS idx_obs_st_epoch
-  ON obs_st(obs_epoch);
-
-CREATE TABLE IF NOT EXISTS collector_heartbeat (
-  name TEXT PRIMARY KEY,
-  last_ok_epoch INTEGER,
-  last_error_epoch INTEGER,
-  last_ok_message TEXT,
-  last_error TEXT
-);
-
-CREATE INDEX IF NOT EXISTS idx_collector_heartbeat_last_ok
-  ON collector_heartbeat(last_ok_epoch);
-"""
-
 def db_connect() -> sqlite3.Connection:
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
     conn = sqlite3.connect(DB_PATH, timeout=15)
@@ -121,10 +94,7 @@ def db_connect() -> sqlite3.Connection:
     conn.execute("PRAGMA synchronous=NORMAL;")
     conn.execute("PRAGMA busy_timeout=5000;")
 
-    # Base schema (for first run)
-    conn.executescript(BASE_SCHEMA_SQL)
-
-    # Automatic migrations (bulletproof raw log)
+    # Versioned migrations (src/schema.py); no DDL once the database is current
     migrate(conn)
 
     return conn
@@ -133,30 +103,21 @@ def column_exists(conn: sqlite3.Connection, table: str, column: str) -> bool:
     rows = conn.execute(f"PRAGMA table_info({table})").fetchall()
     return any(r[1] == column for r in rows)
 
+def obs_st_clustered(conn: sqlite3.Connection) -> bool:
+    """True when obs_st uses the clustered layout, with obs_raw_json in obs_st_raw."""
+    return not column_exists(conn, "obs_st", "obs_raw_json")
+
 def migrate(conn: sqlite3.Connection) -> None:
-    # Step 1: raw text preservation
-    if not column_exists(conn, "raw_events", "payload_text"):
-        conn.execute("ALTER TABLE raw_events ADD COLUMN payload_text TEXT;")
-        log("Migration: added raw_events.payload_text")
-
-    # Step 2: payload hash (idempotency / dedupe)
-    if not column_exists(conn, "raw_events", "payload_hash"):
-        conn.execute("ALTER TABLE raw_events ADD COLUMN payload_hash TEXT;")
-        log("Migration: added raw_events.payload_hash")
-
-    # Make payload_json nullable in practice:
-    # Old schema had NOT NULL; we keep writing it when available.
-    # For malformed messages we store payload_text + hash and set payload_json to '{}'
-    # to satisfy old constraint. (No destructive migration.)
-
-    # Allow duplicate payloads with different epochs; keep a non-unique index for lookup.
-    conn.execute("DROP INDEX IF EXISTS idx_raw_events_payload_hash;")
-    conn.execute(
-        "CREATE INDEX IF NOT EXISTS idx_raw_events_payload_hash "
-        "ON raw_events(payload_hash);"
-    )
+    ensure_schema(conn, log=log)
+    if obs_st_clustered(conn):
+        ensure_obs_st_raw_table(conn)
+    if seed_current_conditions(conn, "tempest"):
+        log("Migration: seeded current_conditions from obs_st")
     conn.commit()
 
+    if RAW_COMPACT:
+        compact_existing_rows(conn, log=log)
+
 # =====================
 # Heartbeats
 # =====================
@@ -185,11 +146,88 @@ def heartbeat_error(conn: sqlite3.Connection, epoch: int, message: str) -> None:
         (HEARTBEAT_NAME, epoch, message),
     )
 
+def heartbeat_queue_stats(
+    conn: sqlite3.Connection,
+    queue_depth: int,
+    queue_dropped: int,
+    writer_lag_sec: float,
+) -> None:
+    conn.execute(
+        f"""
+        UPDATE {HEARTBEAT_TABLE}
+        SET queue_depth=?, queue_dropped=?, writer_lag_sec=?
+        WHERE name=?
+        """,
+        (queue_depth, queue_dropped, round(writer_lag_sec, 3), HEARTBEAT_NAME),
+    )
+
 # =====================
 # Inserts
 # =====================
-def payload_fingerprint(payload_text: str) -> str:
-    return hashlib.sha256(payload_text.encode("utf-8", errors="replace")).hexdigest()
+RAW_EVENTS_INSERT_SQL = """
+INSERT INTO raw_events(
+  received_at_epoch, device_id, message_type, payload_json, payload_text, payload_hash
+) VALUES (?,?,?,?,?,?)
+"""
+
+# obs_st_row() tuple order
+OBS_ST_COLUMNS = (
+    "obs_epoch", "device_id",
+    "wind_lull", "wind_avg", "wind_gust", "wind_dir",
+    "wind_interval", "station_pressure", "air_temperature",
+    "relative_humidity", "illuminance", "uv", "solar_radiation",
+    "rain_accumulated", "precip_type",
+    "lightning_avg_dist", "lightning_strike_count",
+    "battery", "report_interval", "obs_raw_json",
+)
+
+OBS_ST_INSERT_SQL = """
+INSERT OR IGNORE INTO obs_st (
+  obs_epoch, device_id,
+  wind_lull, wind_avg, wind_gust, wind_dir,
+  wind_interval, station_pressure, air_temperature,
+  relative_humidity, illuminance, uv, solar_radiation,
+  rain_accumulated, precip_type,
+  lightning_avg_dist, lightning_strike_count,
+  battery, report_interval, obs_raw_json
+) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+"""
+
+# Clustered layout (src/obs_layout.py): obs_raw_json lives in obs_st_raw.
+OBS_ST_CLUSTERED_INSERT_SQL = f"""
+INSERT OR IGNORE INTO obs_st ({", ".join(OBS_ST_COLUMNS[:-1])})
+VALUES ({",".join("?" for _ in OBS_ST_COLUMNS[:-1])})
+"""
+OBS_ST_RAW_INSERT_SQL = f"""
+INSERT OR IGNORE INTO {OBS_ST_RAW_TABLE} (obs_epoch, device_id, obs_raw_json) VALUES (?,?,?)
+"""
+
+def raw_event_row(
+    received_at: int,
+    device_id,
+    msg_type: str,
+    payload_text: str,
+    payload_json: str,
+    payload_hash: str | None = None,
+) -> tuple:
+    if payload_hash is None:
+        payload_hash = payload_fingerprint(payload_text)
+    return (received_at, device_id, msg_type, payload_json, payload_text, payload_hash)
+
+def obs_st_row(device_id: int, obs_row: list, include_raw_json: bool = True):
+    if not obs_row or len(obs_row) < 18:
+        return None
+    raw_json = json.dumps(obs_row, separators=(",", ":")) if include_raw_json else None
+    return (
+        int(obs_row[0]), int(device_id),
+        obs_row[1], obs_row[2], obs_row[3], obs_row[4],
+        obs_row[5], obs_row[6], obs_row[7],
+        obs_row[8], obs_row[9], obs_row[10], obs_row[11],
+        obs_row[12], obs_row[13],
+        obs_row[14], obs_row[15],
+        obs_row[16], obs_row[17],
+        raw_json
+    )
 
 def insert_raw_lossless(
     conn: sqlite3.Connection,
@@ -199,44 +237,136 @@ def insert_raw_lossless(
     payload_text: str,
     payload_json: str
 ) -> None:
-    phash = payload_fingerprint(payload_text)
-
     conn.execute(
-        """
-        INSERT INTO raw_events(
-          received_at_epoch, device_id, message_type, payload_json, payload_text, payload_hash
-        ) VALUES (?,?,?,?,?,?)
-        """,
-        (received_at, device_id, msg_type, payload_json, payload_text, phash)
+        RAW_EVENTS_INSERT_SQL,
+        raw_event_row(received_at, device_id, msg_type, payload_text, payload_json),
     )
 
+def upsert_current_obs(conn: sqlite3.Connection, obs_rows: list) -> None:
+    """Move each device's current_conditions row to its newest buffered obs."""
+    newest = {}
+    for row in obs_rows:
+        if row[1] not in newest or row[0] > newest[row[1]][0]:
+            newest[row[1]] = row
+    for row in newest.values():
+        upsert_current(conn, tempest_conditions(dict(zip(OBS_ST_COLUMNS, row))))
+
+def write_obs_rows(conn: sqlite3.Connection, obs_rows: list, clustered: bool | None = None) -> None:
+    """Insert obs_st_row() tuples in obs_st's layout; pass `clustered` to skip looking it up."""
+    if clustered is None:
+        clustered = obs_st_clustered(conn)
+    if not clustered:
+        conn.executemany(OBS_ST_INSERT_SQL, obs_rows)
+        return
+    conn.executemany(OBS_ST_CLUSTERED_INSERT_SQL, [row[:-1] for row in obs_rows])
+    raw_rows = [(row[0], row[1], row[-1]) for row in obs_rows if row[-1] is not None]
+    if raw_rows:
+        conn.executemany(OBS_ST_RAW_INSERT_SQL, raw_rows)
+
 def insert_obs_st(conn: sqlite3.Connection, device_id: int, obs_row: list) -> None:
-    if not obs_row or len(obs_row) < 18:
+    row = obs_st_row(device_id, obs_row)
+    if row is None:
         return
+    write_obs_rows(conn, [row])
+    upsert_current_obs(conn, [row])
+
+class IngestBuffer:
+    """
+    In-memory staging area for parsed rows.
+
+    Rows are only discarded after the transaction that wrote them commits, so a
+    failed flush (locked DB, disk error) keeps everything for the next attempt.
+    """
+
+    def __init__(self, compact: bool | None = None) -> None:
+        self.compact = RAW_COMPACT if compact is None else compact
+        self.raw_rows = []
+        self.obs_rows = []
+        self.payload_rows = {}
+        # obs_st layout, looked up on the first flush. Layout migrations
+        # (src/obs_layout.py) run with the collector stopped.
+        self.clustered = None
+
+    def __len__(self) -> int:
+        return len(self.raw_rows)
+
+    def add_message(self, received_at: int, payload_text: str) -> None:
+        # Lossless raw capture: store raw text always
+        # Parse if possible, but never drop the message if parsing fails
+        device_id = None
+        msg_type = None
+        payload_json_str = "{}"
 
-    conn.execute(
-        """
-        INSERT OR IGNORE INTO obs_st (
-          obs_epoch, device_id,
-          wind_lull, wind_avg, wind_gust, wind_dir,
-          wind_interval, station_pressure, air_temperature,
-          relative_humidity, illuminance, uv, solar_radiation,
-          rain_accumulated, precip_type,
-          lightning_avg_dist, lightning_strike_count,
-          battery, report_interval, obs_raw_json
-        ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
-        """,
-        (
-            int(obs_row[0]), int(device_id),
-            obs_row[1], obs_row[2], obs_row[3], obs_row[4],
-            obs_row[5], obs_row[6], obs_row[7],
-            obs_row[8], obs_row[9], obs_row[10], obs_row[11],
-            obs_row[12], obs_row[13],
-            obs_row[14], obs_row[15],
-            obs_row[16], obs_row[17],
-            json.dumps(obs_row, separators=(",", ":"))
+        try:
+            data = json.loads(payload_text)
+            msg_type = data.get("type")
+            device_id = data.get("device_id")
+            payload_json_str = json.dumps(data, separators=(",", ":"))
+
+            # Parse obs_st to structured table (optional cache)
+            if msg_type == "obs_st" and "obs" in data and data["obs"]:
+                row = obs_st_row(device_id, data["obs"][0], include_raw_json=not self.compact)
+                if row is not None:
+                    self.obs_rows.append(row)
+                    log(f"Buffered obs_st at obs_epoch={row[0]} (device_id={device_id})")
+
+        except Exception:
+            # Keep msg_type/device_id as None; payload_json_str stays "{}"
+            log("Warning: JSON parse failed for a message; stored losslessly as text")
+
+        if not self.compact:
+            self.raw_rows.append(raw_event_row(received_at, device_id, msg_type, payload_text, payload_json_str))
+            return
+
+        # Compact mode: the text is stored once per hash; payload_json is
+        # derived on read (see src.raw_store.derive_payload_json).
+        payload_hash = payload_fingerprint(payload_text)
+        if payload_hash not in self.payload_rows:
+            self.payload_rows[payload_hash] = payload_row(payload_hash, payload_text)
+        self.raw_rows.append(
+            raw_event_row(received_at, device_id, msg_type, None, COMPACT_PAYLOAD_JSON, payload_hash)
         )
-    )
+
+    def flush(self, conn: sqlite3.Connection) -> int:
+        """Write buffered rows with executemany and commit; returns rows flushed."""
+        flushed = len(self.raw_rows)
+        obs_epochs = [row[0] for row in self.obs_rows]
+        try:
+            if self.payload_rows:
+                store_payload_rows(conn, self.payload_rows.values())
+            if self.obs_rows:
+                if self.clustered is None:
+                    self.clustered = obs_st_clustered(conn)
+                write_obs_rows(conn, self.obs_rows, self.clustered)
+                upsert_current_obs(conn, self.obs_rows)
+                # Wakes the alerts worker (src/change_feed.py) in the same commit.
+                bump_change_feed(conn, "obs_st")
+            if self.raw_rows:
+                conn.executemany(RAW_EVENTS_INSERT_SQL, self.raw_rows)
+            conn.commit()
+        except BaseException:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            raise
+        self.raw_rows = []
+        self.obs_rows = []
+        self.payload_rows = {}
+
+        if obs_epochs:
+            # Rollups are derived data: a failure here must not undo the raw
+            # commit above. `python -m src.rollups --backfill` heals gaps.
+            try:
+                refresh_rollups(conn, "obs_st", min(obs_epochs), max(obs_epochs))
+                conn.commit()
+            except Exception as e:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+                log(f"Rollup refresh failed: {repr(e)}")
+        return flushed
 
 # =====================
 # Startup sanity checks
@@ -245,6 +375,7 @@ def startup_report(conn: sqlite3.Connection) -> None:
     log(f"DB ready at: {DB_PATH}")
     log(f"Listening device_ids={DEVICE_IDS}")
     log(f"WS_URL host=ws.weatherflow.com (token present={bool(TOKEN)})")
+    log(f"Raw storage mode: {'compact' if RAW_COMPACT else 'text'}")
 
     # last obs seen (helps confirm continuity after restarts)
     try:
@@ -270,20 +401,171 @@ def connect_and_listen(ws: websocket.WebSocket) -> None:
 
     log("WebSocket connected; listen_start sent for all devices")
 
+# =====================
+# Writer thread
+# =====================
+class IngestStats:
+    """Counters shared between the receive loop and the writer thread."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.dropped = 0
+        self.writer_lag_sec = 0.0
+        self.connected = False
+
+    def record_drop(self) -> int:
+        with self._lock:
+            self.dropped += 1
+            return self.dropped
+
+    def record_lag(self, lag_sec: float) -> None:
+        with self._lock:
+            self.writer_lag_sec = max(0.0, lag_sec)
+
+    def snapshot(self):
+        with self._lock:
+            return self.dropped, self.writer_lag_sec
+
+
+def enqueue_frame(frames: queue.Queue, stats: IngestStats, received_at: int, payload_text: str) -> bool:
+    item = ("frame", received_at, payload_text)
+    if QUEUE_POLICY == "drop":
+        try:
+            frames.put_nowait(item)
+            return True
+        except queue.Full:
+            dropped = stats.record_drop()
+            if dropped == 1 or dropped % 100 == 0:
+                log(f"Warning: ingest queue full ({frames.maxsize}); dropped {dropped} frames so far")
+            return False
+    # Backpressure: stop reading the socket until the writer catches up.
+    frames.put(item)
+    return True
+
+
+class IngestWriter(threading.Thread):
+    """
+    Drains the frame queue into SQLite on the commit boundaries.
+
+    Owns its own connection so a busy_timeout wait never blocks ws.recv().
+    Control items ("ok", "error", "flush", "stop") share the queue so they are
+    applied in order with the frames around them.
+    """
+
+    def __init__(self, frames: queue.Queue, stats: IngestStats, connect=None) -> None:
+        super().__init__(name="tempest-writer", daemon=True)
+        self.frames = frames
+        self.stats = stats
+        self.connect = connect or db_connect
+
+    def flush(self, conn: sqlite3.Connection, buffer: IngestBuffer) -> bool:
+        oldest = buffer.raw_rows[0][0] if buffer.raw_rows else None
+        try:
+            buffer.flush(conn)
+        except Exception as e:
+            log(f"Flush failed ({len(buffer)} messages kept for retry): {repr(e)}")
+            return False
+        if oldest is not None:
+            self.stats.record_lag(time.time() - oldest)
+        return True
+
+    def write_heartbeat(self, conn: sqlite3.Connection, epoch: int, message: str) -> None:
+        dropped, lag = self.stats.snapshot()
+        heartbeat_ok(conn, epoch, message)
+        heartbeat_queue_stats(conn, self.frames.qsize(), dropped, lag)
+
+    def open_connection(self) -> sqlite3.Connection:
+        delay = RECONNECT_BASE_SEC
+        while True:
+            try:
+                return self.connect()
+            except Exception as e:
+                log(f"Writer could not open DB: {repr(e)}; retrying in {delay}s")
+                time.sleep(delay)
+                delay = min(RECONNECT_MAX_SEC, delay * 2)
+
+    def run(self) -> None:
+        conn = self.open_connection()
+        buffer = IngestBuffer()
+        last_commit = time.time()
+        last_heartbeat = last_commit
+        frames_since_heartbeat = 0
+        stopping = False
+
+        while True:
+            force_flush = False
+            try:
+                item = self.frames.get(timeout=WRITER_POLL_SEC)
+            except queue.Empty:
+                item = None
+
+            try:
+                if item is not None:
+                    kind = item[0]
+                    if kind == "frame":
+                        buffer.add_message(item[1], item[2])
+                        frames_since_heartbeat += 1
+                    elif kind == "ok":
+                        self.write_heartbeat(conn, item[1], item[2])
+                        last_heartbeat = time.time()
+                        force_flush = True
+                    elif kind == "error":
+                        heartbeat_error(conn, item[1], item[2])
+                        force_flush = True
+                    elif kind == "flush":
+                        force_flush = True
+                    elif kind == "stop":
+                        stopping = True
+                        force_flush = True
+
+                now = time.time()
+                heartbeat_due = (now - last_heartbeat) >= HEARTBEAT_INTERVAL_SEC
+                if heartbeat_due and self.stats.connected:
+                    self.write_heartbeat(conn, int(now), "ingesting" if frames_since_heartbeat else "connected idle")
+                    frames_since_heartbeat = 0
+                if heartbeat_due:
+                    last_heartbeat = now
+
+                commit_due = (
+                    len(buffer) >= COMMIT_EVERY_N_MESSAGES
+                    or (len(buffer) > 0 and (now - last_commit) >= COMMIT_EVERY_SECONDS)
+                )
+                if force_flush or commit_due or heartbeat_due:
+                    if self.flush(conn, buffer):
+                        last_commit = now
+            except Exception as e:
+                log(f"Writer error: {repr(e)}")
+                traceback.print_exc()
+
+            if stopping:
+                break
+
+        if buffer and not self.flush(conn, buffer):
+            log(f"Writer stopped with {len(buffer)} unflushed messages")
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def stop(self, timeout: float = WRITER_JOIN_TIMEOUT_SEC) -> None:
+        self.frames.put(("stop", int(time.time()), None))
+        self.join(timeout)
+
+
 def run():
     conn = db_connect()
     startup_report(conn)
+    heartbeat_ok(conn, int(time.time()), "startup ok")
+    conn.commit()
+    conn.close()
 
-    reconnect_delay = RECONNECT_BASE_SEC
+    frames = queue.Queue(maxsize=QUEUE_MAX)
+    stats = IngestStats()
+    writer = IngestWriter(frames, stats)
+    writer.start()
+    log(f"Writer thread started (queue max={QUEUE_MAX}, policy={QUEUE_POLICY})")
 
-    pending = 0
-    last_commit = time.time()
-    last_heartbeat = 0.0
-    startup_epoch = int(time.time())
-    heartbeat_ok(conn, startup_epoch, "startup ok")
-    conn.commit()
-    last_commit = time.time()
-    last_heartbeat = last_commit
+    reconnect_delay = RECONNECT_BASE_SEC
 
     while True:
         ws = None
@@ -293,94 +575,33 @@ def run():
 
             # reset backoff after successful connect
             reconnect_delay = RECONNECT_BASE_SEC
-            connect_epoch = int(time.time())
-            heartbeat_ok(conn, connect_epoch, "ws connected")
-            conn.commit()
-            last_commit = time.time()
-            last_heartbeat = last_commit
+            stats.connected = True
+            frames.put(("ok", int(time.time()), "ws connected"))
 
             while True:
                 try:
+                    # The receive loop only reads and timestamps; the writer
+                    # thread does all parsing and SQLite work.
                     payload_text = ws.recv()  # may timeout
-                    received_at = int(time.time())
-
-                    # Lossless raw capture: store raw text always
-                    # Parse if possible, but never drop the message if parsing fails
-                    device_id = None
-                    msg_type = None
-                    payload_json_str = "{}"
-
-                    try:
-                        data = json.loads(payload_text)
-                        msg_type = data.get("type")
-                        device_id = data.get("device_id")
-                        payload_json_str = json.dumps(data, separators=(",", ":"))
-
-                        # Parse obs_st to structured table (optional cache)
-                        if msg_type == "obs_st" and "obs" in data and data["obs"]:
-                            insert_obs_st(conn, device_id, data["obs"][0])
-                            log(f"Stored obs_st at obs_epoch={data['obs'][0][0]} (device_id={device_id})")
-
-                    except Exception:
-                        # Keep msg_type/device_id as None; payload_json_str stays "{}"
-                        log("Warning: JSON parse failed for a message; stored losslessly as text")
-
-                    insert_raw_lossless(conn, received_at, device_id, msg_type, payload_text, payload_json_str)
-                    pending += 1
-
-                    now = time.time()
-                    heartbeat_due = (now - last_heartbeat) >= HEARTBEAT_INTERVAL_SEC
-                    if heartbeat_due:
-                        heartbeat_ok(conn, int(now), "ingesting")
-                    if pending >= COMMIT_EVERY_N_MESSAGES or (now - last_commit) >= COMMIT_EVERY_SECONDS or heartbeat_due:
-                        conn.commit()
-                        pending = 0
-                        last_commit = now
-                        if heartbeat_due:
-                            last_heartbeat = now
-
+                    enqueue_frame(frames, stats, int(time.time()), payload_text)
                 except WebSocketTimeoutException:
                     # Normal: no message yet, keep looping
-                    # Also gives us a chance to flush pending commits on quiet links.
-                    now = time.time()
-                    heartbeat_due = (now - last_heartbeat) >= HEARTBEAT_INTERVAL_SEC
-                    if heartbeat_due:
-                        heartbeat_ok(conn, int(now), "connected idle")
-                    if (pending > 0 and (now - last_commit) >= COMMIT_EVERY_SECONDS) or heartbeat_due:
-                        conn.commit()
-                        pending = 0
-                        last_commit = now
-                        if heartbeat_due:
-                            last_heartbeat = now
                     continue
 
         except KeyboardInterrupt:
             log("Shutdown requested (KeyboardInterrupt). Flushing and exiting.")
-            try:
-                conn.commit()
-            except Exception:
-                pass
+            stats.connected = False
+            writer.stop()
             break
 
         except Exception as e:
             log(f"Connection error: {repr(e)}")
             traceback.print_exc()
-            try:
-                heartbeat_error(conn, int(time.time()), repr(e))
-                conn.commit()
-                pending = 0
-                last_commit = time.time()
-                last_heartbeat = last_commit
-            except Exception:
-                pass
+            stats.connected = False
 
-            # flush any pending work
-            try:
-                conn.commit()
-                pending = 0
-                last_commit = time.time()
-            except Exception:
-                pass
+            # flush any pending work before we back off
+            frames.put(("error", int(time.time()), repr(e)))
+            frames.put(("flush", int(time.time()), None))
 
             # exponential backoff
             log(f"Reconnecting in {reconnect_delay}s")
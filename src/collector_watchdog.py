@@ -78,8 +78,14 @@ def fetch_heartbeat(conn: sqlite3.Connection, name: str) -> dict | None:
     }
 
 
-def latest_epoch(conn: sqlite3.Connection, table: str, col: str) -> int | None:
-    row = conn.execute(f"SELECT MAX({col}) FROM {table}").fetchone()
+def latest_epoch(conn: sqlite3.Connection, table: str, col: str, since: int | None = None) -> int | None:
+    row = None
+    if since is not None:
+        # A bounded range is an index seek in either obs table layout; the
+        # unbounded MAX below scans a clustered (device, time) key.
+        row = conn.execute(f"SELECT MAX({col}) FROM {table} WHERE {col} >= ?", (since,)).fetchone()
+    if not row or row[0] is None:
+        row = conn.execute(f"SELECT MAX({col}) FROM {table}").fetchone()
     if not row or row[0] is None:
         return None
     try:
@@ -103,7 +109,7 @@ def check_heartbeat(conn: sqlite3.Connection, name: str, label: str, stale_sec:
 def check_data(conn: sqlite3.Connection, table: str | None, col: str, label: str, stale_sec: int) -> tuple[bool, str]:
     if not table:
         return False, f"{label}: table missing"
-    last_epoch = latest_epoch(conn, table, col)
+    last_epoch = latest_epoch(conn, table, col, since=int(time.time()) - stale_sec)
     data_age = age_seconds(last_epoch)
     if data_age is None:
         return False, f"{label}: no data"
@@ -112,12 +118,12 @@ def check_data(conn: sqlite3.Connection, table: str | None, col: str, label: str
     return True, f"{label}: ok ({format_age(data_age)} ago)"
 
 
-def main() -> int:
-    if not DB_PATH.exists():
+def run_once(db_path: Path = DB_PATH) -> int:
+    if not db_path.exists():
         log("ERROR: DB missing, run collectors first.")
         return 1
 
-    with sqlite3.connect(DB_PATH) as conn:
+    with sqlite3.connect(db_path) as conn:
         if not table_exists(conn, HEARTBEAT_TABLE):
             log("ERROR: collector_heartbeat table missing, update collectors first.")
             return 1
@@ -150,5 +156,9 @@ def main() -> int:
     return 2
 
 
+def main() -> int:
+    return run_once(DB_PATH)
+
+
 if __name__ == "__main__":
     sys.exit(main())
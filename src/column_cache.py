@@ -0,0 +1,400 @@
+"""
+Memory-mapped column cache for obs_st and airlink_current_obs.
+
+    python -m src.column_cache --sync [--rebuild]
+    python -m src.column_cache --status
+
+Each table is split into UTC-month segments. A segment is a directory with one
+flat little-endian array per column (the time column as int64, metrics as
+float32 with NaN for NULL) and segment.json with the row count and time
+range:
+
+    COLUMN_CACHE_DIR/obs_st/2024-01/obs_epoch.bin
+    COLUMN_CACHE_DIR/obs_st/2024-01/air_temperature.bin
+    COLUMN_CACHE_DIR/obs_st/2024-01/segment.json
+
+Rows are sorted by time, so read_frame() finds a range with np.searchsorted
+on the memory-mapped time column and slices views of the others, with no SQL
+row conversion. Rows newer than the last sync come from SQLite.
+
+sync_table() (the column_cache scheduler job) keeps segments in step with
+SQLite, the source of truth. For each month it compares the row count and
+epoch sum of the rows the segment holds with SQLite's. If they match, newer
+rows are appended; otherwise the segment is stale (a backfill or delete
+landed inside it) and is rebuilt. Values replaced in place under the same
+timestamp are not detected; --rebuild rewrites everything.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+COLUMN_CACHE_ENABLED = os.getenv("COLUMN_CACHE_ENABLED", "").lower() in ("1", "true", "yes", "on")
+SEGMENT_META = "segment.json"
+STATE_NAME = "_state.json"
+TIME_DTYPE = np.dtype("<i8")
+VALUE_DTYPE = np.dtype("<f4")
+
+CACHE_TABLES = {
+    "obs_st": {
+        "time_col": "obs_epoch",
+        "columns": (
+            "air_temperature",
+            "relative_humidity",
+            "station_pressure",
+            "wind_lull",
+            "wind_avg",
+            "wind_gust",
+            "wind_dir",
+            "rain_accumulated",
+            "illuminance",
+            "uv",
+            "solar_radiation",
+            "lightning_avg_dist",
+            "lightning_strike_count",
+            "battery",
+        ),
+    },
+    "airlink_current_obs": {
+        "time_col": "ts",
+        "columns": (
+            "temp_f",
+            "hum",
+            "dew_point_f",
+            "heat_index_f",
+            "pm_1",
+            "pm_2p5",
+            "pm_10",
+            "pm_2p5_nowcast",
+            "aqi_pm25",
+        ),
+    },
+}
+
+
+def resolve_db_path() -> Path:
+    raw_path = os.getenv("TEMPEST_DB_PATH")
+    if raw_path:
+        path = Path(raw_path)
+        return path if path.is_absolute() else PROJECT_ROOT / path
+    return PROJECT_ROOT / "data" / "tempest.db"
+
+
+def resolve_cache_dir(db_path: str | Path | None = None) -> Path:
+    """COLUMN_CACHE_DIR, or a columns/ directory next to the database."""
+    raw_dir = os.getenv("COLUMN_CACHE_DIR")
+    if raw_dir:
+        path = Path(raw_dir)
+        return path if path.is_absolute() else PROJECT_ROOT / path
+    return Path(db_path or resolve_db_path()).parent / "columns"
+
+
+def connection_db_path(conn: sqlite3.Connection) -> Path | None:
+    for _, name, filename in conn.execute("PRAGMA database_list").fetchall():
+        if name == "main" and filename:
+            return Path(filename)
+    return None
+
+
+def month_bounds(epoch: int) -> tuple[int, int]:
+    day = datetime.fromtimestamp(epoch, timezone.utc)
+    start = datetime(day.year, day.month, 1, tzinfo=timezone.utc)
+    end = datetime(day.year + day.month // 12, day.month % 12 + 1, 1, tzinfo=timezone.utc)
+    return int(start.timestamp()), int(end.timestamp())
+
+
+def segment_dir(cache_dir: Path, table: str, month_start: int) -> Path:
+    return cache_dir / table / datetime.fromtimestamp(month_start, timezone.utc).strftime("%Y-%m")
+
+
+def _read_json(path: Path) -> dict | None:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+
+
+def _write_json(path: Path, payload: dict) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    tmp.replace(path)
+
+
+def load_state(cache_dir: Path, table: str) -> dict | None:
+    return _read_json(cache_dir / table / STATE_NAME)
+
+
+def _fingerprint(conn: sqlite3.Connection, table: str, start: int, last_epoch: int) -> tuple[int, int]:
+    time_col = CACHE_TABLES[table]["time_col"]
+    count, total = conn.execute(
+        f"SELECT COUNT(*), TOTAL({time_col}) FROM {table} WHERE {time_col} >= ? AND {time_col} <= ?",
+        (start, last_epoch),
+    ).fetchone()
+    return int(count), int(total)
+
+
+def _fetch_arrays(conn: sqlite3.Connection, table: str, after: int, before: int, inclusive: bool) -> dict:
+    spec = CACHE_TABLES[table]
+    time_col = spec["time_col"]
+    df = pd.read_sql_query(
+        f"SELECT {time_col}, {', '.join(spec['columns'])} FROM {table} "
+        f"WHERE {time_col} {'>=' if inclusive else '>'} ? AND {time_col} < ? ORDER BY {time_col}",
+        conn,
+        params=(after, before),
+    )
+    arrays = {time_col: df[time_col].to_numpy(dtype=TIME_DTYPE)}
+    for column in spec["columns"]:
+        arrays[column] = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=VALUE_DTYPE, na_value=np.nan)
+    return arrays
+
+
+def _segment_meta(table: str, arrays: dict, rows: int, epoch_sum: int) -> dict:
+    spec = CACHE_TABLES[table]
+    times = arrays[spec["time_col"]]
+    return {
+        "table": table,
+        "columns": [spec["time_col"], *spec["columns"]],
+        "rows": rows,
+        "epoch_sum": epoch_sum,
+        "min_epoch": int(times[0]),
+        "max_epoch": int(times[-1]),
+        "updated_at": int(time.time()),
+    }
+
+
+def write_segment(path: Path, table: str, arrays: dict) -> None:
+    """Write a whole segment into a staging directory, then swap it in."""
+    staging = path.with_name(path.name + ".tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    for column, values in arrays.items():
+        values.tofile(staging / f"{column}.bin")
+    times = arrays[CACHE_TABLES[table]["time_col"]]
+    _write_json(staging / SEGMENT_META, _segment_meta(table, arrays, len(times), int(times.sum())))
+    retired = path.with_name(path.name + ".old")
+    shutil.rmtree(retired, ignore_errors=True)
+    if path.exists():
+        path.rename(retired)
+    staging.rename(path)
+    shutil.rmtree(retired, ignore_errors=True)
+
+
+def append_segment(path: Path, table: str, meta: dict, arrays: dict) -> None:
+    """Append rows; segment.json is rewritten last, so a crash leaves ignored tail bytes."""
+    rows = meta["rows"]
+    for column, values in arrays.items():
+        dtype = TIME_DTYPE if column == CACHE_TABLES[table]["time_col"] else VALUE_DTYPE
+        with (path / f"{column}.bin").open("r+b") as file:
+            # Drop bytes a previous interrupted append left behind.
+            file.truncate(rows * dtype.itemsize)
+            file.seek(0, os.SEEK_END)
+            values.tofile(file)
+    times = arrays[CACHE_TABLES[table]["time_col"]]
+    updated = _segment_meta(table, arrays, rows + len(times), meta["epoch_sum"] + int(times.sum()))
+    updated["min_epoch"] = meta["min_epoch"]
+    _write_json(path / SEGMENT_META, updated)
+
+
+def sync_table(conn: sqlite3.Connection, table: str, cache_dir: Path, rebuild: bool = False, log=print) -> dict:
+    """Bring every month segment of table up to date; returns appended/rebuilt counts."""
+    spec = CACHE_TABLES[table]
+    time_col = spec["time_col"]
+    stats = {"appended": 0, "rebuilt": 0}
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone():
+        return stats
+    first, last = conn.execute(f"SELECT MIN({time_col}), MAX({time_col}) FROM {table}").fetchone()
+    if first is None:
+        return stats
+    if rebuild:
+        shutil.rmtree(cache_dir / table, ignore_errors=True)
+    columns = [time_col, *spec["columns"]]
+    start, end = month_bounds(first)
+    while start <= last:
+        path = segment_dir(cache_dir, table, start)
+        meta = _read_json(path / SEGMENT_META)
+        try:
+            if meta and meta["columns"] == columns:
+                if _fingerprint(conn, table, start, meta["max_epoch"]) == (meta["rows"], meta["epoch_sum"]):
+                    arrays = _fetch_arrays(conn, table, meta["max_epoch"], end, inclusive=False)
+                    if len(arrays[time_col]):
+                        append_segment(path, table, meta, arrays)
+                        stats["appended"] += len(arrays[time_col])
+                    start, end = end, month_bounds(end)[1]
+                    continue
+                log(f"Column cache: {table} {path.name} is stale; rebuilding")
+            arrays = _fetch_arrays(conn, table, start, end, inclusive=True)
+            if len(arrays[time_col]):
+                write_segment(path, table, arrays)
+                stats["rebuilt"] += 1
+            elif path.exists():
+                shutil.rmtree(path)
+        except OSError as exc:
+            # On Windows a reader's memory map blocks the swap; the next run retries.
+            log(f"WARN: column cache {table} {path.name} not updated ({exc})")
+        start, end = end, month_bounds(end)[1]
+    # Months SQLite no longer has rows for (deleted or pruned).
+    first_month, last_month = segment_dir(cache_dir, table, first).name, segment_dir(cache_dir, table, last).name
+    for path in (cache_dir / table).glob(f"*/{SEGMENT_META}"):
+        if not first_month <= path.parent.name <= last_month:
+            shutil.rmtree(path.parent, ignore_errors=True)
+    (cache_dir / table).mkdir(parents=True, exist_ok=True)
+    _write_json(cache_dir / table / STATE_NAME, {"through_epoch": int(last), "synced_at": int(time.time())})
+    return stats
+
+
+def run_sync(db_path: str | Path, cache_dir: Path | None = None, rebuild: bool = False, log=print) -> dict:
+    cache_dir = cache_dir or resolve_cache_dir(db_path)
+    started = time.time()
+    results = {}
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        conn.execute("PRAGMA busy_timeout=30000")
+        for table in CACHE_TABLES:
+            results[table] = sync_table(conn, table, cache_dir, rebuild=rebuild, log=log)
+    finally:
+        conn.close()
+    if rebuild or any(stats["rebuilt"] for stats in results.values()):
+        log(f"Column cache synced in {time.time() - started:.1f}s: {results}")
+    return results
+
+
+def _segment_arrays(path: Path, meta: dict, columns: list[str]) -> dict:
+    arrays = {}
+    for column in columns:
+        dtype = TIME_DTYPE if column == meta["columns"][0] else VALUE_DTYPE
+        arrays[column] = np.memmap(path / f"{column}.bin", dtype=dtype, mode="r", shape=(meta["rows"],))
+    return arrays
+
+
+def read_columns(
+    table: str,
+    columns: list[str],
+    start_epoch: int,
+    end_epoch: int,
+    cache_dir: Path,
+) -> dict[str, np.ndarray] | None:
+    """
+    Arrays for start_epoch <= time < end_epoch from the cached segments, time
+    column first. Views into the memory map when the range sits in one month.
+    None when the table has never been synced.
+    """
+    if table not in CACHE_TABLES or load_state(cache_dir, table) is None:
+        return None
+    time_col = CACHE_TABLES[table]["time_col"]
+    wanted = [time_col] + [column for column in columns if column != time_col]
+    unknown = [column for column in wanted[1:] if column not in CACHE_TABLES[table]["columns"]]
+    if unknown:
+        raise ValueError(f"{table} column cache has no column(s) {', '.join(unknown)}")
+
+    pieces = []
+    start, end = month_bounds(start_epoch)
+    while start < end_epoch:
+        path = segment_dir(cache_dir, table, start)
+        meta = _read_json(path / SEGMENT_META)
+        if meta:
+            arrays = _segment_arrays(path, meta, wanted)
+            times = arrays[time_col]
+            lo = int(np.searchsorted(times, start_epoch, side="left"))
+            hi = int(np.searchsorted(times, end_epoch, side="left"))
+            if hi > lo:
+                pieces.append({column: values[lo:hi] for column, values in arrays.items()})
+        start, end = end, month_bounds(end)[1]
+    if len(pieces) == 1:
+        return pieces[0]
+    if not pieces:
+        return {
+            column: np.empty(0, dtype=TIME_DTYPE if column == time_col else VALUE_DTYPE) for column in wanted
+        }
+    return {column: np.concatenate([piece[column] for piece in pieces]) for column in wanted}
+
+
+def read_frame(
+    conn: sqlite3.Connection,
+    table: str,
+    columns: list[str],
+    start_epoch: int,
+    end_epoch: int,
+    cache_dir: Path | None = None,
+) -> pd.DataFrame | None:
+    """
+    DataFrame of the time column and columns for start_epoch <= time < end_epoch.
+
+    Cached rows come from the column cache; rows newer than the last sync are
+    read from SQLite. None when the cache is not built, so the caller can
+    run its own query.
+    """
+    if cache_dir is None:
+        cache_dir = resolve_cache_dir(connection_db_path(conn))
+    state = load_state(cache_dir, table)
+    if state is None:
+        return None
+    arrays = read_columns(table, columns, start_epoch, min(end_epoch, state["through_epoch"] + 1), cache_dir)
+    if arrays is None:
+        return None
+    df = pd.DataFrame(arrays, copy=False)
+    if end_epoch > state["through_epoch"] + 1:
+        time_col = CACHE_TABLES[table]["time_col"]
+        tail = pd.read_sql_query(
+            f"SELECT {', '.join(df.columns)} FROM {table} WHERE {time_col} > ? AND {time_col} >= ? "
+            f"AND {time_col} < ? ORDER BY {time_col}",
+            conn,
+            params=(state["through_epoch"], start_epoch, end_epoch),
+        )
+        if not tail.empty:
+            df = pd.concat([df, tail.astype(df.dtypes.to_dict())], ignore_index=True) if len(df) else tail
+    return df
+
+
+def cache_status(cache_dir: Path) -> dict[str, dict]:
+    status = {}
+    for table in CACHE_TABLES:
+        metas = [_read_json(path) for path in sorted((cache_dir / table).glob(f"*/{SEGMENT_META}"))]
+        metas = [meta for meta in metas if meta]
+        files = list((cache_dir / table).glob("*/*.bin"))
+        status[table] = {
+            "segments": len(metas),
+            "rows": sum(meta["rows"] for meta in metas),
+            "bytes": sum(path.stat().st_size for path in files),
+            "through_epoch": (load_state(cache_dir, table) or {}).get("through_epoch"),
+        }
+    return status
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Maintain the memory-mapped column cache.")
+    parser.add_argument("--sync", action="store_true", help="append new rows and rebuild stale segments")
+    parser.add_argument("--rebuild", action="store_true", help="with --sync, rewrite every segment")
+    parser.add_argument("--status", action="store_true", help="show segment counts and sizes (the default)")
+    args = parser.parse_args()
+
+    db_path = resolve_db_path()
+    if not db_path.exists():
+        print(f"DB not found: {db_path}")
+        return 1
+    cache_dir = resolve_cache_dir(db_path)
+    if args.sync:
+        run_sync(db_path, cache_dir, rebuild=args.rebuild)
+    if args.status or args.sync:
+        for table, entry in cache_status(cache_dir).items():
+            through = entry["through_epoch"]
+            when = datetime.fromtimestamp(through, timezone.utc).strftime("%Y-%m-%d %H:%M") if through else "never"
+            print(
+                f"{table:20s} {entry['segments']} segment(s)  {entry['rows']:,} rows  "
+                f"{entry['bytes'] / 2**20:.1f} MiB  through {when} UTC"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,8 @@ import sqlite3
 from pathlib import Path
 from typing import Any
 
+from src.schema import ensure_schema
+
 APP_CONFIG_TABLE = "app_config"
 
 
@@ -20,19 +22,8 @@ def connect(db_path: str | Path) -> sqlite3.Connection:
     return conn
 
 
-def _ensure_table(conn: sqlite3.Connection) -> None:
-    conn.execute(
-        f"""
-        CREATE TABLE IF NOT EXISTS {APP_CONFIG_TABLE} (
-            key TEXT PRIMARY KEY,
-            value TEXT NOT NULL
-        )
-        """
-    )
-
-
 def get_config(conn: sqlite3.Connection, key: str) -> str | None:
-    _ensure_table(conn)
+    ensure_schema(conn)
     row = conn.execute(
         f"SELECT value FROM {APP_CONFIG_TABLE} WHERE key = ?",
         (key,),
@@ -41,7 +32,7 @@ def get_config(conn: sqlite3.Connection, key: str) -> str | None:
 
 
 def set_config(conn: sqlite3.Connection, key: str, value: Any) -> None:
-    _ensure_table(conn)
+    ensure_schema(conn)
     conn.execute(
         f"""
         INSERT INTO {APP_CONFIG_TABLE} (key, value)
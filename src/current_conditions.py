@@ -0,0 +1,242 @@
+"""
+Latest reading per device, maintained by the collectors.
+
+The Tempest and AirLink collectors upsert one row per device in the same
+transaction as each observation, with display units already derived, so the
+dashboard header, the workers and the kiosk view read current conditions
+with a primary-key lookup instead of digging the newest row out of obs_st or
+airlink_current_obs. Rows only move forward: an older observation arriving
+late never replaces a newer one.
+"""
+
+import math
+import sqlite3
+import time
+
+from src.aqi import aqi_category, pm25_aqi
+
+CURRENT_CONDITIONS_TABLE = "current_conditions"
+CURRENT_COLUMNS = (
+    "source",
+    "device_id",
+    "obs_epoch",
+    "updated_at",
+    "temp_c",
+    "temp_f",
+    "humidity",
+    "dew_point_f",
+    "heat_index_f",
+    "pressure_mb",
+    "pressure_inhg",
+    "wind_avg_mph",
+    "wind_gust_mph",
+    "wind_dir_deg",
+    "rain_mm",
+    "uv",
+    "solar_radiation",
+    "lightning_strike_count",
+    "lightning_avg_dist",
+    "battery",
+    "pm_2p5",
+    "aqi",
+    "aqi_category",
+)
+# Source table and time column each current_conditions source mirrors.
+SOURCE_TABLES = {"tempest": ("obs_st", "obs_epoch"), "airlink": ("airlink_current_obs", "ts")}
+
+MPS_TO_MPH = 2.2369362921
+MB_TO_INHG = 0.0295299830714
+
+_UPSERT_SQL = f"""
+INSERT INTO {CURRENT_CONDITIONS_TABLE} ({", ".join(CURRENT_COLUMNS)})
+VALUES ({", ".join("?" for _ in CURRENT_COLUMNS)})
+ON CONFLICT(source, device_id) DO UPDATE SET
+  {", ".join(f"{column}=excluded.{column}" for column in CURRENT_COLUMNS[2:])}
+WHERE excluded.obs_epoch >= {CURRENT_CONDITIONS_TABLE}.obs_epoch
+"""
+
+
+def ensure_current_conditions_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {CURRENT_CONDITIONS_TABLE} (
+            source TEXT NOT NULL,
+            device_id TEXT NOT NULL,
+            obs_epoch INTEGER NOT NULL,
+            updated_at REAL,
+            temp_c REAL,
+            temp_f REAL,
+            humidity REAL,
+            dew_point_f REAL,
+            heat_index_f REAL,
+            pressure_mb REAL,
+            pressure_inhg REAL,
+            wind_avg_mph REAL,
+            wind_gust_mph REAL,
+            wind_dir_deg REAL,
+            rain_mm REAL,
+            uv REAL,
+            solar_radiation REAL,
+            lightning_strike_count INTEGER,
+            lightning_avg_dist REAL,
+            battery REAL,
+            pm_2p5 REAL,
+            aqi REAL,
+            aqi_category TEXT,
+            PRIMARY KEY (source, device_id)
+        )
+        """
+    )
+
+
+def _number(value) -> float | None:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) else number
+
+
+def _scaled(value, factor: float) -> float | None:
+    return value * factor if value is not None else None
+
+
+def heat_index_f(temp_f: float | None, humidity: float | None) -> float | None:
+    """NOAA heat index (same formula as the dashboard's compute_heat_index)."""
+    if temp_f is None or humidity is None:
+        return temp_f
+    t, r = temp_f, humidity
+    hi = 0.5 * (t + 61.0 + ((t - 68.0) * 1.2) + (r * 0.094))
+    if t >= 80 and r >= 40:
+        hi = (
+            -42.379
+            + 2.04901523 * t
+            + 10.14333127 * r
+            - 0.22475541 * t * r
+            - 6.83783e-3 * t * t
+            - 5.481717e-2 * r * r
+            + 1.22874e-3 * t * t * r
+            + 8.5282e-4 * t * r * r
+            - 1.99e-6 * t * t * r * r
+        )
+    if r < 13 and 80 <= t <= 112:
+        hi -= ((13 - r) / 4) * ((17 - abs(t - 95)) / 17)
+    if r > 85 and 80 <= t <= 87:
+        hi += ((r - 85) / 10) * ((87 - t) / 5)
+    return hi
+
+
+def dew_point_f(temp_c: float | None, humidity: float | None) -> float | None:
+    """Magnus-formula dew point."""
+    if temp_c is None or not humidity or humidity <= 0:
+        return None
+    gamma = math.log(humidity / 100) + (17.62 * temp_c) / (243.12 + temp_c)
+    return (243.12 * gamma / (17.62 - gamma)) * 9 / 5 + 32
+
+
+def tempest_conditions(obs: dict) -> dict:
+    """current_conditions values from an obs_st row (column name -> value)."""
+    temp_c = _number(obs.get("air_temperature"))
+    humidity = _number(obs.get("relative_humidity"))
+    pressure = _number(obs.get("station_pressure"))
+    temp_f = temp_c * 9 / 5 + 32 if temp_c is not None else None
+    strikes = _number(obs.get("lightning_strike_count"))
+    return {
+        "source": "tempest",
+        "device_id": str(obs.get("device_id")),
+        "obs_epoch": int(obs["obs_epoch"]),
+        "temp_c": temp_c,
+        "temp_f": temp_f,
+        "humidity": humidity,
+        "dew_point_f": dew_point_f(temp_c, humidity),
+        "heat_index_f": heat_index_f(temp_f, humidity),
+        "pressure_mb": pressure,
+        "pressure_inhg": _scaled(pressure, MB_TO_INHG),
+        "wind_avg_mph": _scaled(_number(obs.get("wind_avg")), MPS_TO_MPH),
+        "wind_gust_mph": _scaled(_number(obs.get("wind_gust")), MPS_TO_MPH),
+        "wind_dir_deg": _number(obs.get("wind_dir")),
+        "rain_mm": _number(obs.get("rain_accumulated")),
+        "uv": _number(obs.get("uv")),
+        "solar_radiation": _number(obs.get("solar_radiation")),
+        "lightning_strike_count": int(strikes) if strikes is not None else None,
+        "lightning_avg_dist": _number(obs.get("lightning_avg_dist")),
+        "battery": _number(obs.get("battery")),
+    }
+
+
+def airlink_conditions(obs: dict) -> dict:
+    """current_conditions values from an airlink_current_obs row."""
+    temp_f = _number(obs.get("temp_f"))
+    pm_2p5 = _number(obs.get("pm_2p5"))
+    aqi = _number(obs.get("aqi_pm25"))
+    if aqi is None:
+        aqi = pm25_aqi(pm_2p5)
+    return {
+        "source": "airlink",
+        "device_id": str(obs.get("did")),
+        "obs_epoch": int(obs["ts"]),
+        "temp_c": (temp_f - 32) * 5 / 9 if temp_f is not None else None,
+        "temp_f": temp_f,
+        "humidity": _number(obs.get("hum")),
+        "dew_point_f": _number(obs.get("dew_point_f")),
+        "heat_index_f": _number(obs.get("heat_index_f")),
+        "pm_2p5": pm_2p5,
+        "aqi": aqi,
+        "aqi_category": obs.get("aqi_category") or (aqi_category(aqi) if aqi is not None else None),
+    }
+
+
+def upsert_current(conn: sqlite3.Connection, values: dict) -> None:
+    """Replace the device's row unless it already holds a newer observation; no commit."""
+    values = dict(values, updated_at=time.time())
+    conn.execute(_UPSERT_SQL, [values.get(column) for column in CURRENT_COLUMNS])
+
+
+def read_current(conn: sqlite3.Connection, source: str) -> dict | None:
+    """Newest current_conditions row for source, or None (also when the table is missing)."""
+    try:
+        cursor = conn.execute(
+            f"SELECT * FROM {CURRENT_CONDITIONS_TABLE} WHERE source = ? ORDER BY obs_epoch DESC LIMIT 1",
+            (source,),
+        )
+        row = cursor.fetchone()
+    except sqlite3.OperationalError:
+        return None
+    if row is None:
+        return None
+    return dict(zip([column[0] for column in cursor.description], row))
+
+
+def latest_source_row(conn: sqlite3.Connection, source: str) -> dict | None:
+    """Newest raw row for source, for databases the collectors have not seeded yet."""
+    table, time_col = SOURCE_TABLES[source]
+    try:
+        cursor = conn.execute(f"SELECT * FROM {table} ORDER BY {time_col} DESC LIMIT 1")
+        row = cursor.fetchone()
+    except sqlite3.OperationalError:
+        return None
+    if row is None:
+        return None
+    return dict(zip([column[0] for column in cursor.description], row))
+
+
+def current_or_latest(conn: sqlite3.Connection, source: str) -> dict | None:
+    """read_current, falling back to deriving the values from the newest raw row."""
+    current = read_current(conn, source)
+    if current is not None:
+        return current
+    row = latest_source_row(conn, source)
+    if row is None:
+        return None
+    return tempest_conditions(row) if source == "tempest" else airlink_conditions(row)
+
+
+def seed_current_conditions(conn: sqlite3.Connection, source: str) -> bool:
+    """Populate source's row from the newest raw row when it has none; no commit."""
+    if read_current(conn, source) is not None:
+        return False
+    row = latest_source_row(conn, source)
+    if row is None:
+        return False
+    upsert_current(conn, tempest_conditions(row) if source == "tempest" else airlink_conditions(row))
+    return True
@@ -6,18 +6,22 @@ from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 
 import pandas as pd
-import requests
 
+from src.aqi import aqi_category, pm25_aqi_series
+from src.column_cache import read_frame
 from src.config_store import connect as config_connect
-from src.config_store import get_bool, get_float
+from src.config_store import get_bool
+from src.external_data import cached_nws_alerts, cached_nws_hwo
+from src.http_cache import http_session
+from src.location import resolve_location as shared_resolve_location
 from src.nws_alerts import (
-    fetch_active_alerts,
     fetch_afd_text,
-    fetch_hwo_text,
     summarize_afd,
     summarize_alerts,
     summarize_hwo,
 )
+from src.nws_client import get_client as get_nws_client
+from src.schema import ensure_schema
 
 DB_PATH = os.getenv("TEMPEST_DB_PATH", "data/tempest.db")
 LOCAL_TZ = os.getenv("LOCAL_TZ", "America/New_York")
@@ -29,46 +33,11 @@ TEMPEST_API_TOKEN = os.getenv("TEMPEST_API_TOKEN")
 TEMPEST_STATION_ID = int(os.getenv("TEMPEST_STATION_ID", "475329"))
 
 
-def ensure_table(conn: sqlite3.Connection):
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS daily_briefs (
-            date TEXT PRIMARY KEY,
-            generated_at TEXT,
-            tz TEXT,
-            headline TEXT,
-            bullets_json TEXT,
-            tomorrow_text TEXT,
-            model TEXT,
-            version TEXT
-        )
-        """
-    )
-    conn.commit()
-
-
-def ensure_afd_table(conn: sqlite3.Connection):
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS nws_afd_highlights (
-            product_id TEXT PRIMARY KEY,
-            issued TEXT,
-            cwa TEXT,
-            headline TEXT,
-            highlights_json TEXT,
-            text TEXT,
-            created_at TEXT
-        )
-        """
-    )
-    conn.commit()
-
-
 def save_afd_highlights(conn: sqlite3.Connection, afd: dict, highlights: list[str] | None):
     product_id = afd.get("id")
     if not product_id:
         return
-    ensure_afd_table(conn)
+    ensure_schema(conn)
     conn.execute(
         """
         INSERT INTO nws_afd_highlights (
@@ -136,63 +105,8 @@ def load_aqi(conn: sqlite3.Connection, since_epoch: int):
     return df
 
 
-def fetch_station_location(token: str | None, station_id: int):
-    if not token:
-        return None
-    try:
-        resp = requests.get(
-            "https://swd.weatherflow.com/swd/rest/stations",
-            params={"token": token},
-            timeout=8,
-        )
-        resp.raise_for_status()
-        payload = resp.json()
-        stations = payload.get("stations", []) if isinstance(payload, dict) else []
-        for station in stations:
-            if station.get("station_id") == station_id:
-                lat = station.get("latitude") or station.get("station_latitude")
-                lon = station.get("longitude") or station.get("station_longitude") or station.get("lng")
-                return {"name": station.get("name") or "Tempest Station", "lat": lat, "lon": lon}
-        if stations:
-            station = stations[0]
-            lat = station.get("latitude") or station.get("station_latitude")
-            lon = station.get("longitude") or station.get("station_longitude") or station.get("lng")
-            return {"name": station.get("name") or "Tempest Station", "lat": lat, "lon": lon}
-    except Exception:
-        return None
-    return None
-
-
 def resolve_location() -> tuple[float | None, float | None]:
-    try:
-        with config_connect(DB_PATH) as conn:
-            override_enabled = bool(get_bool(conn, "override_location_enabled") or False)
-            lat_override = get_float(conn, "station_lat_override")
-            lon_override = get_float(conn, "station_lon_override")
-            if override_enabled and lat_override is not None and lon_override is not None:
-                return lat_override, lon_override
-    except Exception:
-        pass
-
-    if DAILY_BRIEF_LAT and DAILY_BRIEF_LON:
-        try:
-            return float(DAILY_BRIEF_LAT), float(DAILY_BRIEF_LON)
-        except (TypeError, ValueError):
-            pass
-
-    try:
-        with config_connect(DB_PATH) as conn:
-            lat_override = get_float(conn, "station_lat_override")
-            lon_override = get_float(conn, "station_lon_override")
-            if lat_override is not None and lon_override is not None:
-                return lat_override, lon_override
-    except Exception:
-        pass
-
-    station = fetch_station_location(TEMPEST_API_TOKEN, TEMPEST_STATION_ID)
-    if station and station.get("lat") is not None and station.get("lon") is not None:
-        return float(station["lat"]), float(station["lon"])
-    return None, None
+    return shared_resolve_location(DB_PATH, fallback=(DAILY_BRIEF_LAT, DAILY_BRIEF_LON))
 
 
 def compute_history_line(conn: sqlite3.Connection, tz_name: str, years_back: int = 5) -> str | None:
@@ -212,15 +126,17 @@ def compute_history_line(conn: sqlite3.Connection, tz_name: str, years_back: int
         end_local = start_local + timedelta(days=1)
         start_epoch = int(start_local.timestamp())
         end_epoch = int(end_local.timestamp())
-        df = pd.read_sql_query(
-            """
-            SELECT air_temperature
-            FROM obs_st
-            WHERE obs_epoch >= ? AND obs_epoch < ?
-            """,
-            conn,
-            params=(start_epoch, end_epoch),
-        )
+        df = read_frame(conn, "obs_st", ["air_temperature"], start_epoch, end_epoch)
+        if df is None:
+            df = pd.read_sql_query(
+                """
+                SELECT air_temperature
+                FROM obs_st
+                WHERE obs_epoch >= ? AND obs_epoch < ?
+                """,
+                conn,
+                params=(start_epoch, end_epoch),
+            )
         if df.empty:
             continue
         temps = pd.to_numeric(df["air_temperature"], errors="coerce").dropna()
@@ -300,7 +216,7 @@ def compute_history_line_openmeteo(lat: float, lon: float, tz_name: str, years_b
             "timezone": tz_name,
         }
         try:
-            resp = requests.get("https://archive-api.open-meteo.com/v1/archive", params=params, timeout=10)
+            resp = http_session().get("https://archive-api.open-meteo.com/v1/archive", params=params, timeout=10)
             resp.raise_for_status()
             payload = resp.json()
             daily = payload.get("daily") or {}
@@ -355,7 +271,10 @@ def build_prompt(
                 f"Pressure range {obs['pressure_inhg'].min():.2f} to {obs['pressure_inhg'].max():.2f} inHg."
             )
     if not aqi.empty:
-        lines.append(f"AQI (PM2.5) max {aqi['pm_2p5'].max():.0f}, avg {aqi['pm_2p5'].mean():.0f}.")
+        aqi_values = pm25_aqi_series(aqi["pm_2p5"])
+        lines.append(
+            f"AQI (PM2.5) max {aqi_values.max():.0f} ({aqi_category(aqi_values.max())}), avg {aqi_values.mean():.0f}."
+        )
     if history_line:
         lines.append(f"History: {history_line}")
     if alert_lines:
@@ -410,7 +329,7 @@ def call_openai(prompt: str):
 
 
 def save_brief(conn: sqlite3.Connection, date_str: str, tz: str, brief: dict):
-    ensure_table(conn)
+    ensure_schema(conn)
     conn.execute(
         """
         INSERT INTO daily_briefs (date, generated_at, tz, headline, bullets_json, tomorrow_text, model, version)
@@ -444,7 +363,7 @@ def run_once():
     start = now - timedelta(hours=24)
     since_epoch = int(start.timestamp())
     with sqlite3.connect(DB_PATH) as conn:
-        ensure_table(conn)
+        ensure_schema(conn)
         obs = load_obs(conn, since_epoch)
         aqi = load_aqi(conn, since_epoch)
         smoke_event_active = False
@@ -465,10 +384,10 @@ def run_once():
             history_line = compute_history_line_meteostat(lat, lon, tz)
             if not history_line:
                 history_line = compute_history_line_openmeteo(lat, lon, tz)
-            alerts = fetch_active_alerts(lat, lon, tz)
+            alerts = cached_nws_alerts(DB_PATH, lat, lon, tz)
             alert_lines = summarize_alerts(alerts, tz, max_items=2)
-            hwo_summary = summarize_hwo(fetch_hwo_text(lat, lon))
-            afd = fetch_afd_text(lat, lon)
+            hwo_summary = summarize_hwo(cached_nws_hwo(DB_PATH, lat, lon))
+            afd = fetch_afd_text(lat, lon, get_nws_client(DB_PATH))
             afd_highlights = summarize_afd(afd, max_items=3)
             if afd and afd.get("issued"):
                 afd_issued = format_nws_time(afd.get("issued"), tz)
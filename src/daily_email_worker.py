@@ -6,12 +6,13 @@ from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 
 import pandas as pd
-import requests
 
 from src.alerting import send_email
-from src.config_store import connect as config_connect
-from src.config_store import get_bool, get_float
-from src.nws_alerts import fetch_active_alerts, fetch_hwo_text, summarize_alerts, summarize_hwo
+from src.current_conditions import current_or_latest
+from src.external_data import cached_nws_alerts, cached_nws_hwo, cached_openmeteo
+from src.location import resolve_location as shared_resolve_location
+from src.nws_alerts import summarize_alerts, summarize_hwo
+from src.schema import ensure_schema
 
 DB_PATH = os.getenv("TEMPEST_DB_PATH", "data/tempest.db")
 LOCAL_TZ = os.getenv("LOCAL_TZ", "America/New_York")
@@ -32,22 +33,8 @@ def _tzinfo() -> ZoneInfo:
         return ZoneInfo("UTC")
 
 
-def ensure_email_log_table(conn: sqlite3.Connection) -> None:
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS daily_email_log (
-            date TEXT PRIMARY KEY,
-            sent_at TEXT,
-            status TEXT,
-            error TEXT
-        )
-        """
-    )
-    conn.commit()
-
-
 def load_last_sent_date(conn: sqlite3.Connection) -> str | None:
-    ensure_email_log_table(conn)
+    ensure_schema(conn)
     row = conn.execute(
         "SELECT date FROM daily_email_log ORDER BY sent_at DESC LIMIT 1"
     ).fetchone()
@@ -55,7 +42,7 @@ def load_last_sent_date(conn: sqlite3.Connection) -> str | None:
 
 
 def record_send(conn: sqlite3.Connection, date_str: str, status: str, error: str | None = None) -> None:
-    ensure_email_log_table(conn)
+    ensure_schema(conn)
     conn.execute(
         """
         INSERT INTO daily_email_log (date, sent_at, status, error)
@@ -75,128 +62,22 @@ def record_send(conn: sqlite3.Connection, date_str: str, status: str, error: str
     conn.commit()
 
 
-def fetch_station_location(token: str | None, station_id: int):
-    if not token:
-        return None
-    try:
-        resp = requests.get(
-            "https://swd.weatherflow.com/swd/rest/stations",
-            params={"token": token},
-            timeout=8,
-        )
-        resp.raise_for_status()
-        payload = resp.json()
-        stations = payload.get("stations", []) if isinstance(payload, dict) else []
-        for station in stations:
-            if station.get("station_id") == station_id:
-                lat = station.get("latitude") or station.get("station_latitude")
-                lon = station.get("longitude") or station.get("station_longitude") or station.get("lng")
-                return {"name": station.get("name") or "Tempest Station", "lat": lat, "lon": lon}
-        if stations:
-            station = stations[0]
-            lat = station.get("latitude") or station.get("station_latitude")
-            lon = station.get("longitude") or station.get("station_longitude") or station.get("lng")
-            return {"name": station.get("name") or "Tempest Station", "lat": lat, "lon": lon}
-    except Exception:
-        return None
-    return None
-
-
 def resolve_location() -> tuple[float | None, float | None]:
-    try:
-        with config_connect(DB_PATH) as conn:
-            override_enabled = bool(get_bool(conn, "override_location_enabled") or False)
-            lat_override = get_float(conn, "station_lat_override")
-            lon_override = get_float(conn, "station_lon_override")
-            if override_enabled and lat_override is not None and lon_override is not None:
-                return lat_override, lon_override
-    except Exception:
-        pass
-
-    if DAILY_EMAIL_LAT and DAILY_EMAIL_LON:
-        try:
-            return float(DAILY_EMAIL_LAT), float(DAILY_EMAIL_LON)
-        except (TypeError, ValueError):
-            pass
-
-    try:
-        with config_connect(DB_PATH) as conn:
-            lat_override = get_float(conn, "station_lat_override")
-            lon_override = get_float(conn, "station_lon_override")
-            if lat_override is not None and lon_override is not None:
-                return lat_override, lon_override
-    except Exception:
-        pass
-
-    station = fetch_station_location(TEMPEST_API_TOKEN, TEMPEST_STATION_ID)
-    if station and station.get("lat") is not None and station.get("lon") is not None:
-        return float(station["lat"]), float(station["lon"])
-    return None, None
+    return shared_resolve_location(DB_PATH, fallback=(DAILY_EMAIL_LAT, DAILY_EMAIL_LON))
 
 
 def fetch_current_conditions(conn: sqlite3.Connection):
-    query = """
-        SELECT obs_epoch, air_temperature, wind_avg, station_pressure, relative_humidity, rain_accumulated
-        FROM obs_st
-        ORDER BY obs_epoch DESC
-        LIMIT 1
-    """
-    try:
-        row = conn.execute(query).fetchone()
-    except sqlite3.OperationalError:
-        row = conn.execute(
-            """
-            SELECT obs_epoch, air_temperature, wind_avg, station_pressure
-            FROM obs_st
-            ORDER BY obs_epoch DESC
-            LIMIT 1
-            """
-        ).fetchone()
-    if not row:
-        return None
-    keys = ["obs_epoch", "air_temperature", "wind_avg", "station_pressure", "relative_humidity", "rain_accumulated"]
-    data = dict(zip(keys, row + (None,) * (len(keys) - len(row))))
-    return data
+    return current_or_latest(conn, "tempest")
 
 
 def fetch_aqi(conn: sqlite3.Connection):
-    try:
-        row = conn.execute(
-            """
-            SELECT ts, pm_2p5
-            FROM airlink_current_obs
-            ORDER BY ts DESC
-            LIMIT 1
-            """
-        ).fetchone()
-    except sqlite3.OperationalError:
-        return None
-    if not row:
-        return None
-    return {"ts": row[0], "pm_2p5": row[1]}
+    return current_or_latest(conn, "airlink")
 
 
 def fetch_openmeteo_forecast(lat: float, lon: float, tz_name: str):
-    params = {
-        "latitude": lat,
-        "longitude": lon,
-        "hourly": [
-            "temperature_2m",
-            "precipitation",
-            "windspeed_10m",
-            "windgusts_10m",
-            "weathercode",
-        ],
-        "temperature_unit": "fahrenheit",
-        "windspeed_unit": "mph",
-        "precipitation_unit": "inch",
-        "timezone": tz_name,
-        "forecast_days": 3,
-    }
-    resp = requests.get("https://api.open-meteo.com/v1/forecast", params=params, timeout=12)
-    resp.raise_for_status()
-    payload = resp.json()
-    hourly = payload.get("hourly") or {}
+    # Shares the dashboard's cached Open-Meteo payload (8 days, same units).
+    payload = cached_openmeteo(DB_PATH, lat, lon, tz_name)
+    hourly = (payload or {}).get("hourly") or {}
     if not hourly or "time" not in hourly:
         return None
     df = pd.DataFrame(hourly)
@@ -302,13 +183,10 @@ def build_email_body(conn: sqlite3.Connection) -> str:
     lines = [f"Tempest Daily Brief - {now_text}", ""]
     lines.append("Current conditions")
     if current:
-        temp_c = current.get("air_temperature")
-        wind_ms = current.get("wind_avg")
-        pressure_mb = current.get("station_pressure")
-        temp_f = (temp_c * 9 / 5 + 32) if temp_c is not None else None
-        wind_mph = (wind_ms * 2.23694) if wind_ms is not None else None
-        pressure_inhg = (pressure_mb * 0.02953) if pressure_mb is not None else None
-        humidity = current.get("relative_humidity")
+        temp_f = current.get("temp_f")
+        wind_mph = current.get("wind_avg_mph")
+        pressure_inhg = current.get("pressure_inhg")
+        humidity = current.get("humidity")
         if temp_f is not None:
             lines.append(f"- Temp: {temp_f:.1f} F")
         if wind_mph is not None:
@@ -320,8 +198,8 @@ def build_email_body(conn: sqlite3.Connection) -> str:
     else:
         lines.append("- No recent observations available.")
 
-    if aqi and aqi.get("pm_2p5") is not None:
-        lines.append(f"- PM2.5: {aqi['pm_2p5']:.0f}")
+    if aqi and aqi.get("pm_2p5") is not None and aqi.get("aqi") is not None:
+        lines.append(f"- PM2.5: {aqi['pm_2p5']:.0f} (AQI {aqi['aqi']:.0f}, {aqi['aqi_category']})")
 
     lines.append("")
     lines.append("Daily brief (AI)")
@@ -345,9 +223,9 @@ def build_email_body(conn: sqlite3.Connection) -> str:
 
     if lat is not None and lon is not None:
         tz_name = tz.key if hasattr(tz, "key") else LOCAL_TZ
-        alerts = fetch_active_alerts(lat, lon, tz_name)
+        alerts = cached_nws_alerts(DB_PATH, lat, lon, tz_name)
         alert_lines = summarize_alerts(alerts, tz_name, max_items=3)
-        hwo_summary = summarize_hwo(fetch_hwo_text(lat, lon))
+        hwo_summary = summarize_hwo(cached_nws_hwo(DB_PATH, lat, lon))
         if alert_lines or hwo_summary:
             lines.append("")
             lines.append("NWS Outlooks & Alerts")
@@ -375,35 +253,36 @@ def next_run_time(now_local: datetime) -> datetime:
     return target
 
 
-def main():
+def send_if_due() -> bool:
+    """Send today's email once the send time has passed; returns False when not due or already sent."""
     tz = _tzinfo()
-    while True:
-        now_local = datetime.now(tz)
-        today = now_local.date().isoformat()
+    now_local = datetime.now(tz)
+    with sqlite3.connect(DB_PATH) as conn:
+        last_sent = load_last_sent_date(conn)
+    if last_sent == now_local.date().isoformat():
+        return False
+    target_today = now_local.replace(hour=EMAIL_HOUR, minute=EMAIL_MINUTE, second=0, microsecond=0)
+    if now_local < target_today:
+        return False
+    try:
+        ok, error = send_daily_email()
+        status = "sent" if ok else "error"
+        sent_date = datetime.now(tz).date().isoformat()
         with sqlite3.connect(DB_PATH) as conn:
-            last_sent = load_last_sent_date(conn)
-
-        if last_sent == today:
-            sleep_for = max(60, int((next_run_time(now_local) - now_local).total_seconds()))
-            time.sleep(sleep_for)
-            continue
+            record_send(conn, sent_date, status, error)
+    except Exception as exc:
+        sent_date = datetime.now(tz).date().isoformat()
+        with sqlite3.connect(DB_PATH) as conn:
+            record_send(conn, sent_date, "error", str(exc))
+    return True
 
-        target_today = now_local.replace(hour=EMAIL_HOUR, minute=EMAIL_MINUTE, second=0, microsecond=0)
-        if now_local < target_today:
-            wait_seconds = (target_today - now_local).total_seconds()
-            time.sleep(wait_seconds)
 
-        try:
-            ok, error = send_daily_email()
-            status = "sent" if ok else "error"
-            sent_date = datetime.now(tz).date().isoformat()
-            with sqlite3.connect(DB_PATH) as conn:
-                record_send(conn, sent_date, status, error)
-        except Exception as exc:
-            sent_date = datetime.now(tz).date().isoformat()
-            with sqlite3.connect(DB_PATH) as conn:
-                record_send(conn, sent_date, "error", str(exc))
-        time.sleep(30)
+def main():
+    tz = _tzinfo()
+    while True:
+        send_if_due()
+        now_local = datetime.now(tz)
+        time.sleep(max(30, int((next_run_time(now_local) - now_local).total_seconds())))
 
 
 if __name__ == "__main__":
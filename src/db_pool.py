@@ -0,0 +1,141 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+try:
+    import streamlit as st
+except Exception:  # pragma: no cover - workers run without streamlit
+    st = None
+
+# Reader tuning; the dashboard only reads, so a large mmap window and page
+# cache let repeated window queries skip most syscalls.
+READ_MMAP_BYTES = int(float(os.getenv("TEMPEST_SQLITE_MMAP_MB", "256")) * 1024 * 1024)
+READ_CACHE_KIB = int(float(os.getenv("TEMPEST_SQLITE_CACHE_MB", "64")) * 1024)
+BUSY_TIMEOUT_MS = 5000
+
+
+def resolve_db_path(db_path: str | Path) -> Path:
+    db_file = Path(db_path)
+    if not db_file.is_absolute():
+        db_file = Path.cwd() / db_file
+    return db_file
+
+
+class ConnectionPool:
+    """
+    Per-process SQLite connections for the dashboard.
+
+    Each thread gets one long-lived read-only connection (``mode=ro`` URI);
+    writes share a single connection guarded by a lock so config saves from
+    concurrent sessions never interleave.
+    """
+
+    def __init__(self, db_path: str | Path):
+        self.db_path = resolve_db_path(db_path)
+        self._lock = threading.Lock()
+        self._writer_lock = threading.RLock()
+        self._readers: dict[threading.Thread, sqlite3.Connection] = {}
+        self._writer = None
+        self._stats = {
+            "readers_opened": 0,
+            "readers_closed": 0,
+            "reader_checkouts": 0,
+            "writer_opened": 0,
+            "writer_checkouts": 0,
+        }
+
+    def _open_reader(self) -> sqlite3.Connection:
+        try:
+            conn = sqlite3.connect(
+                f"{self.db_path.as_uri()}?mode=ro",
+                uri=True,
+                check_same_thread=False,
+            )
+        except sqlite3.OperationalError:
+            # Read-only opens can fail on a fresh WAL database without its -shm
+            # file; fall back to a normal connection that refuses writes.
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA query_only=ON;")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS};")
+        conn.execute(f"PRAGMA mmap_size={READ_MMAP_BYTES};")
+        conn.execute(f"PRAGMA cache_size=-{READ_CACHE_KIB};")
+        conn.execute("PRAGMA temp_store=MEMORY;")
+        return conn
+
+    def _prune_readers(self) -> None:
+        # Streamlit runs each rerun on a fresh script thread; drop their connections.
+        for thread in [t for t in self._readers if not t.is_alive()]:
+            try:
+                self._readers.pop(thread).close()
+            except Exception:
+                pass
+            self._stats["readers_closed"] += 1
+
+    def reader(self) -> sqlite3.Connection:
+        """Read-only connection owned by the calling thread."""
+        thread = threading.current_thread()
+        with self._lock:
+            conn = self._readers.get(thread)
+            if conn is None:
+                self._prune_readers()
+                conn = self._open_reader()
+                self._readers[thread] = conn
+                self._stats["readers_opened"] += 1
+            self._stats["reader_checkouts"] += 1
+        return conn
+
+    @contextmanager
+    def writer(self):
+        """Serialized read/write connection; rolls back if the block raises."""
+        with self._writer_lock:
+            if self._writer is None:
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(self.db_path, timeout=15, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL;")
+                conn.execute("PRAGMA synchronous=NORMAL;")
+                conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS};")
+                self._writer = conn
+                with self._lock:
+                    self._stats["writer_opened"] += 1
+            with self._lock:
+                self._stats["writer_checkouts"] += 1
+            try:
+                yield self._writer
+                self._writer.commit()
+            except BaseException:
+                self._writer.rollback()
+                raise
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._prune_readers()
+            return {
+                **self._stats,
+                "readers_open": len(self._readers),
+                "writer_open": self._writer is not None,
+            }
+
+    def close(self) -> None:
+        with self._writer_lock, self._lock:
+            for conn in self._readers.values():
+                conn.close()
+            self._stats["readers_closed"] += len(self._readers)
+            self._readers.clear()
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+
+def _build_pool(db_path: str) -> ConnectionPool:
+    return ConnectionPool(db_path)
+
+
+# One pool per database path per process: st.cache_resource under Streamlit
+# (shared by every session), a plain memo elsewhere.
+if st is not None:
+    get_pool = st.cache_resource(show_spinner=False)(_build_pool)
+else:  # pragma: no cover
+    get_pool = lru_cache(maxsize=None)(_build_pool)
@@ -0,0 +1,235 @@
+"""
+External HTTP data shared by the dashboard and the workers.
+
+Every endpoint goes through the SQLite http_cache (src/http_cache.py) with
+stale-while-revalidate reads; src/prefetch_worker.py keeps the entries warm
+so render paths and workers rarely wait on the network.
+"""
+
+import os
+from pathlib import Path
+
+from src.http_cache import cache_key, cached_json, http_session, last_error
+from src.nws_alerts import fetch_active_alerts, fetch_hwo_text
+from src.nws_client import get_client
+
+STATION_LOCATION_TTL_SECONDS = int(os.getenv("PREFETCH_STATION_TTL_SECONDS", "86400"))
+SUN_TIMES_TTL_SECONDS = int(os.getenv("PREFETCH_SUN_TTL_SECONDS", "21600"))
+FORECAST_TTL_SECONDS = int(os.getenv("FORECAST_REFRESH_MINUTES", "30")) * 60
+NWS_ALERTS_TTL_SECONDS = int(os.getenv("PREFETCH_NWS_ALERTS_TTL_SECONDS", "120"))
+NWS_HWO_TTL_SECONDS = int(os.getenv("PREFETCH_NWS_HWO_TTL_SECONDS", "900"))
+# Forecasts older than this are dropped rather than shown.
+FORECAST_MAX_STALE_SECONDS = 6 * 3600
+
+OPENMETEO_HOURLY_FIELDS = [
+    "temperature_2m",
+    "apparent_temperature",
+    "precipitation_probability",
+    "precipitation",
+    "pressure_msl",
+    "relativehumidity_2m",
+    "windspeed_10m",
+    "windgusts_10m",
+]
+OPENMETEO_DAILY_FIELDS = [
+    "temperature_2m_max",
+    "temperature_2m_min",
+    "precipitation_probability_max",
+    "sunrise",
+    "sunset",
+]
+
+
+def _station_summary(station: dict) -> dict:
+    lat = station.get("latitude") or station.get("station_latitude")
+    lon = station.get("longitude") or station.get("station_longitude") or station.get("lng")
+    return {"name": station.get("name") or "Tempest Station", "lat": lat, "lon": lon}
+
+
+def fetch_station_location(token: str | None, station_id: int, timeout: float = 8) -> dict | None:
+    if not token:
+        return None
+    try:
+        resp = http_session().get(
+            "https://swd.weatherflow.com/swd/rest/stations",
+            params={"token": token},
+            timeout=timeout,
+        )
+        resp.raise_for_status()
+        payload = resp.json()
+    except Exception:
+        return None
+    stations = payload.get("stations", []) if isinstance(payload, dict) else []
+    for station in stations:
+        if station.get("station_id") == station_id:
+            return _station_summary(station)
+    if stations:
+        return _station_summary(stations[0])
+    return None
+
+
+def fetch_sun_times(lat: float, lon: float, date_str: str) -> dict | None:
+    try:
+        resp = http_session().get(
+            "https://api.sunrise-sunset.org/json",
+            params={"lat": lat, "lng": lon, "date": date_str, "formatted": 0},
+            timeout=6,
+        )
+        resp.raise_for_status()
+        payload = resp.json()
+    except Exception:
+        return None
+    if not isinstance(payload, dict):
+        return None
+    return payload.get("results")
+
+
+def fetch_openmeteo_json(lat: float, lon: float, tz_name: str) -> dict | None:
+    params = {
+        "latitude": lat,
+        "longitude": lon,
+        "hourly": ",".join(OPENMETEO_HOURLY_FIELDS),
+        "daily": ",".join(OPENMETEO_DAILY_FIELDS),
+        "timezone": tz_name or "auto",
+        "forecast_days": 8,
+        "windspeed_unit": "mph",
+        "temperature_unit": "fahrenheit",
+        "precipitation_unit": "inch",
+        "timeformat": "iso8601",
+    }
+    resp = http_session().get("https://api.open-meteo.com/v1/forecast", params=params, timeout=10)
+    resp.raise_for_status()
+    data = resp.json()
+    return data if isinstance(data, dict) else None
+
+
+def fetch_tempest_forecast_json(token=None, station_id=None, lat=None, lon=None, api_key=None) -> dict:
+    """
+    Tempest better_forecast payload; raises with the API status message on errors.
+    If lat/lon are rejected, retries with the station location.
+    """
+    base_url = "https://swd.weatherflow.com/swd/rest/better_forecast"
+    params = {
+        "station_id": station_id,
+        "units_temp": "f",
+        "units_wind": "mph",
+        "units_pressure": "inhg",
+        "units_precip": "in",
+        "units_distance": "mi",
+    }
+    if token:
+        params["token"] = token
+    if api_key and not token:
+        params["api_key"] = api_key
+    if lat is not None and lon is not None:
+        params["lat"] = lat
+        params["lon"] = lon
+    headers = {"accept": "application/json"}
+    resp = http_session().get(base_url, params=params, timeout=10, headers=headers)
+    resp.raise_for_status()
+    payload = resp.json()
+    status = payload.get("status") or {}
+    if status.get("status_code") not in (0, None) and "lat" in params:
+        params.pop("lat", None)
+        params.pop("lon", None)
+        resp = http_session().get(base_url, params=params, timeout=10, headers=headers)
+        resp.raise_for_status()
+        payload = resp.json()
+        status = payload.get("status") or {}
+    if status.get("status_code") not in (0, None):
+        raise RuntimeError(status.get("status_message") or "API returned error")
+    return payload
+
+
+# Cached accessors. Keys only carry non-secret arguments.
+
+def station_location_key(station_id: int) -> str:
+    return cache_key("tempest_station", station_id=station_id)
+
+
+def cached_station_location(db_path: str | Path, token: str | None, station_id: int) -> dict | None:
+    if not token:
+        return None
+    return cached_json(
+        db_path,
+        station_location_key(station_id),
+        STATION_LOCATION_TTL_SECONDS,
+        lambda: fetch_station_location(token, station_id),
+    )
+
+
+def sun_times_key(lat: float, lon: float, date_str: str) -> str:
+    return cache_key("sun_times", lat=float(lat), lon=float(lon), date=date_str)
+
+
+def cached_sun_times(db_path: str | Path, lat: float, lon: float, date_str: str) -> dict | None:
+    return cached_json(
+        db_path,
+        sun_times_key(lat, lon, date_str),
+        SUN_TIMES_TTL_SECONDS,
+        lambda: fetch_sun_times(lat, lon, date_str),
+    )
+
+
+def openmeteo_key(lat: float, lon: float, tz_name: str) -> str:
+    return cache_key("openmeteo_forecast", lat=float(lat), lon=float(lon), tz=tz_name)
+
+
+def cached_openmeteo(db_path: str | Path, lat: float, lon: float, tz_name: str) -> dict | None:
+    return cached_json(
+        db_path,
+        openmeteo_key(lat, lon, tz_name),
+        FORECAST_TTL_SECONDS,
+        lambda: fetch_openmeteo_json(lat, lon, tz_name),
+        max_stale_seconds=FORECAST_MAX_STALE_SECONDS,
+    )
+
+
+def tempest_forecast_key(station_id, lat=None, lon=None) -> str:
+    if lat is None or lon is None:
+        return cache_key("tempest_forecast", station_id=station_id)
+    return cache_key("tempest_forecast", station_id=station_id, lat=float(lat), lon=float(lon))
+
+
+def cached_tempest_forecast(db_path, token=None, station_id=None, lat=None, lon=None, api_key=None):
+    """(payload, status message) like the uncached fetch used to return."""
+    key = tempest_forecast_key(station_id, lat, lon)
+    payload = cached_json(
+        db_path,
+        key,
+        FORECAST_TTL_SECONDS,
+        lambda: fetch_tempest_forecast_json(token, station_id, lat, lon, api_key),
+        max_stale_seconds=FORECAST_MAX_STALE_SECONDS,
+    )
+    if payload is None:
+        return None, last_error(db_path, key) or "Request failed"
+    status = payload.get("status") or {}
+    return payload, status.get("status_message") or "OK"
+
+
+def nws_alerts_key(lat: float, lon: float, tz_name: str) -> str:
+    return cache_key("nws_alerts", lat=float(lat), lon=float(lon), tz=tz_name)
+
+
+def cached_nws_alerts(db_path: str | Path, lat: float, lon: float, tz_name: str) -> list[dict]:
+    alerts = cached_json(
+        db_path,
+        nws_alerts_key(lat, lon, tz_name),
+        NWS_ALERTS_TTL_SECONDS,
+        lambda: fetch_active_alerts(lat, lon, tz_name, get_client(db_path)),
+        max_stale_seconds=NWS_ALERTS_TTL_SECONDS * 5,
+    )
+    return alerts or []
+
+
+def nws_hwo_key(lat: float, lon: float) -> str:
+    return cache_key("nws_hwo", lat=float(lat), lon=float(lon))
+
+
+def cached_nws_hwo(db_path: str | Path, lat: float, lon: float) -> dict | None:
+    return cached_json(
+        db_path,
+        nws_hwo_key(lat, lon),
+        NWS_HWO_TTL_SECONDS,
+        lambda: fetch_hwo_text(lat, lon, get_client(db_path)),
+    )
@@ -0,0 +1,70 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable
+
+FAN_OUT_WORKERS = int(os.getenv("EXTERNAL_FETCH_WORKERS", "8"))
+
+_EXECUTOR: ThreadPoolExecutor | None = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def shared_executor() -> ThreadPoolExecutor:
+    """One pool per process, reused by every render and session."""
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=max(1, FAN_OUT_WORKERS), thread_name_prefix="fan-out")
+        return _EXECUTOR
+
+
+def _timed(task: Callable[[], Any]):
+    def run():
+        started = time.perf_counter()
+        try:
+            return task(), None, time.perf_counter() - started
+        except Exception as exc:
+            return None, exc, time.perf_counter() - started
+
+    return run
+
+
+def fan_out(
+    tasks: dict[str, Callable[[], Any]],
+    timeout: float,
+    fallbacks: dict[str, Any] | None = None,
+    executor: ThreadPoolExecutor | None = None,
+) -> tuple[dict[str, Any], dict[str, dict]]:
+    """
+    Run zero-argument tasks concurrently and wait at most timeout seconds.
+
+    Returns (results, timings). A task that raises or misses the deadline
+    gets its fallback value (None without one); late tasks keep running in
+    the pool so their results still land in whatever cache they write to.
+    timings maps each name to {"seconds", "status"} with status one of
+    "ok", "error: ..." or "timeout".
+    """
+    fallbacks = fallbacks or {}
+    pool = executor or shared_executor()
+    started = time.perf_counter()
+    futures = {name: pool.submit(_timed(task)) for name, task in tasks.items()}
+    wait(futures.values(), timeout=max(0.0, timeout))
+    waited = time.perf_counter() - started
+
+    results: dict[str, Any] = {}
+    timings: dict[str, dict] = {}
+    for name, future in futures.items():
+        if future.done():
+            value, error, seconds = future.result()
+            if error is None:
+                results[name] = value
+                timings[name] = {"seconds": seconds, "status": "ok"}
+                continue
+            status = f"error: {str(error) or error.__class__.__name__}"
+        else:
+            seconds = waited
+            status = "timeout"
+        results[name] = fallbacks.get(name)
+        timings[name] = {"seconds": seconds, "status": status}
+    return results, timings
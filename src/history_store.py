@@ -0,0 +1,297 @@
+"""
+Optional columnar history store for long-range reads.
+
+    python -m src.history_store --export [--rebuild]
+    python -m src.history_store --status
+
+Closed UTC days of obs_st and airlink_current_obs are exported to Parquet
+files partitioned by month, one file per table and month:
+
+    HISTORY_STORE_DIR/<table>/year=YYYY/month=MM/data.parquet
+
+Only the numeric columns are kept (obs_raw_json, the AirLink did and
+aqi_category are dropped). Each export rewrites the month files from the
+last exported day up to today's UTC midnight, so rows that reach SQLite
+late (backfills) are picked up while their month is still open.
+_manifest.json in each table directory records how far the export got.
+
+read_history() loads only the requested columns of the month partitions a
+time range touches. It returns None when pyarrow is missing or the range is
+not fully exported, and callers then fall back to SQLite. Needs pyarrow
+(`pip install pyarrow`); without it the store is simply unused.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except Exception:
+    pyarrow = None
+    pq = None
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+HISTORY_STORE_ENABLED = os.getenv("HISTORY_STORE_ENABLED", "").lower() in ("1", "true", "yes", "on")
+HISTORY_STORE_COMPRESSION = os.getenv("HISTORY_STORE_COMPRESSION", "zstd")
+MANIFEST_NAME = "_manifest.json"
+PARTITION_FILE = "data.parquet"
+
+# Exported tables: the time column and the key columns kept as integers.
+HISTORY_TABLES = {
+    "obs_st": {"time_col": "obs_epoch", "keys": ("obs_epoch", "device_id")},
+    "airlink_current_obs": {"time_col": "ts", "keys": ("ts",)},
+}
+NUMERIC_TYPES = ("INT", "REAL", "FLOA", "DOUB", "NUM")
+
+
+def available() -> bool:
+    return pq is not None
+
+
+def resolve_db_path() -> Path:
+    raw_path = os.getenv("TEMPEST_DB_PATH")
+    if raw_path:
+        path = Path(raw_path)
+        return path if path.is_absolute() else PROJECT_ROOT / path
+    return PROJECT_ROOT / "data" / "tempest.db"
+
+
+def resolve_history_dir(db_path: str | Path | None = None) -> Path:
+    """HISTORY_STORE_DIR, or a history/ directory next to the database."""
+    raw_dir = os.getenv("HISTORY_STORE_DIR")
+    if raw_dir:
+        path = Path(raw_dir)
+        return path if path.is_absolute() else PROJECT_ROOT / path
+    return Path(db_path or resolve_db_path()).parent / "history"
+
+
+def numeric_columns(conn: sqlite3.Connection, table: str) -> list[str]:
+    columns = []
+    for _, name, col_type, *_ in conn.execute(f"PRAGMA table_info({table})").fetchall():
+        if any(token in (col_type or "").upper() for token in NUMERIC_TYPES):
+            columns.append(name)
+    return columns
+
+
+def month_start(epoch: int) -> datetime:
+    day = datetime.fromtimestamp(epoch, timezone.utc)
+    return datetime(day.year, day.month, 1, tzinfo=timezone.utc)
+
+
+def next_month(start: datetime) -> datetime:
+    return datetime(start.year + start.month // 12, start.month % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_path(history_dir: Path, table: str, start: datetime) -> Path:
+    return history_dir / table / f"year={start.year:04d}" / f"month={start.month:02d}" / PARTITION_FILE
+
+
+def load_manifest(history_dir: Path, table: str) -> dict | None:
+    try:
+        return json.loads((history_dir / table / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except Exception:
+        return None
+
+
+def save_manifest(history_dir: Path, table: str, manifest: dict) -> None:
+    path = history_dir / table / MANIFEST_NAME
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    tmp.replace(path)
+
+
+def _frame_for_parquet(df: pd.DataFrame, keys: tuple[str, ...]) -> pd.DataFrame:
+    # A fixed dtype per column keeps the month files' schemas identical even
+    # when a month has no NULLs in an INTEGER column.
+    return df.astype({column: ("int64" if column in keys else "float64") for column in df.columns})
+
+
+def write_partition(path: Path, df: pd.DataFrame) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    table = pyarrow.Table.from_pandas(df, preserve_index=False)
+    pq.write_table(table, tmp, compression=HISTORY_STORE_COMPRESSION)
+    tmp.replace(path)
+
+
+def export_table(
+    conn: sqlite3.Connection,
+    table: str,
+    history_dir: Path,
+    cutoff: int,
+    rebuild: bool = False,
+    log=print,
+) -> int:
+    """Export table rows before cutoff (a UTC midnight); returns the rows written."""
+    spec = HISTORY_TABLES[table]
+    time_col = spec["time_col"]
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone():
+        return 0
+    manifest = None if rebuild else load_manifest(history_dir, table)
+    if rebuild:
+        shutil.rmtree(history_dir / table, ignore_errors=True)
+    columns = numeric_columns(conn, table)
+    if manifest and manifest.get("columns") != columns:
+        log(f"{table}: columns changed; re-exporting every month")
+        manifest = None
+    if manifest:
+        start_epoch = manifest["through_epoch"]
+    else:
+        start_epoch = conn.execute(f"SELECT MIN({time_col}) FROM {table}").fetchone()[0]
+    if start_epoch is None or start_epoch >= cutoff:
+        return 0
+
+    started = time.time()
+    written = 0
+    months = 0
+    select = ", ".join(columns)
+    start = month_start(start_epoch)
+    while start.timestamp() < cutoff:
+        end = next_month(start)
+        df = pd.read_sql_query(
+            f"SELECT {select} FROM {table} WHERE {time_col} >= ? AND {time_col} < ? ORDER BY {time_col}",
+            conn,
+            params=(int(start.timestamp()), min(int(end.timestamp()), cutoff)),
+        )
+        if not df.empty:
+            write_partition(partition_path(history_dir, table, start), _frame_for_parquet(df, spec["keys"]))
+            written += len(df)
+            months += 1
+        start = end
+    first_epoch = (manifest or {}).get("first_epoch", start_epoch)
+    save_manifest(
+        history_dir,
+        table,
+        {
+            "table": table,
+            "time_col": time_col,
+            "columns": columns,
+            "first_epoch": first_epoch,
+            "through_epoch": cutoff,
+            "updated_at": int(time.time()),
+        },
+    )
+    log(f"History store: {table} {written} rows in {months} month file(s) in {time.time() - started:.1f}s")
+    return written
+
+
+def run_export(
+    db_path: str | Path,
+    history_dir: Path | None = None,
+    now: float | None = None,
+    rebuild: bool = False,
+    log=print,
+) -> dict[str, int]:
+    """Export every closed UTC day not yet in the store; a no-op without pyarrow."""
+    if not available():
+        log("History store: pyarrow is not installed; skipping export")
+        return {}
+    history_dir = history_dir or resolve_history_dir(db_path)
+    now = time.time() if now is None else now
+    cutoff = int(now // 86400 * 86400)
+    written = {}
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        conn.execute("PRAGMA busy_timeout=30000")
+        for table in HISTORY_TABLES:
+            written[table] = export_table(conn, table, history_dir, cutoff, rebuild=rebuild, log=log)
+    finally:
+        conn.close()
+    return written
+
+
+def read_history(
+    table: str,
+    columns: list[str],
+    start_epoch: int,
+    end_epoch: int,
+    history_dir: Path | None = None,
+) -> pd.DataFrame | None:
+    """
+    Rows with start_epoch <= time < end_epoch, time column first, sorted by time.
+
+    Returns None when the store cannot answer the whole range, so the caller
+    queries SQLite instead.
+    """
+    if not available() or table not in HISTORY_TABLES:
+        return None
+    history_dir = history_dir or resolve_history_dir()
+    manifest = load_manifest(history_dir, table)
+    if not manifest or end_epoch > manifest["through_epoch"]:
+        return None
+    time_col = HISTORY_TABLES[table]["time_col"]
+    wanted = [time_col] + [column for column in columns if column != time_col]
+    unknown = [column for column in wanted if column not in manifest["columns"]]
+    if unknown:
+        raise ValueError(f"{table} history has no column(s) {', '.join(unknown)}")
+
+    frames = []
+    start = month_start(start_epoch)
+    while start.timestamp() < end_epoch:
+        path = partition_path(history_dir, table, start)
+        if path.exists():
+            frames.append(
+                pq.read_table(
+                    path,
+                    columns=wanted,
+                    filters=[(time_col, ">=", start_epoch), (time_col, "<", end_epoch)],
+                )
+            )
+        start = next_month(start)
+    if not frames:
+        return pd.DataFrame(columns=wanted)
+    return pyarrow.concat_tables(frames).to_pandas().sort_values(time_col, ignore_index=True)
+
+
+def history_status(history_dir: Path) -> dict[str, dict]:
+    status = {}
+    for table in HISTORY_TABLES:
+        manifest = load_manifest(history_dir, table)
+        files = sorted((history_dir / table).glob(f"year=*/month=*/{PARTITION_FILE}"))
+        status[table] = {
+            "through_epoch": (manifest or {}).get("through_epoch"),
+            "files": len(files),
+            "bytes": sum(path.stat().st_size for path in files),
+        }
+    return status
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export closed days to the Parquet history store.")
+    parser.add_argument("--export", action="store_true", help="export closed days not yet in the store")
+    parser.add_argument("--rebuild", action="store_true", help="with --export, rewrite every month")
+    parser.add_argument("--status", action="store_true", help="show how far each table is exported")
+    args = parser.parse_args()
+
+    db_path = resolve_db_path()
+    if not db_path.exists():
+        print(f"DB not found: {db_path}")
+        return 1
+    if not available():
+        print("pyarrow is not installed (pip install pyarrow)")
+        return 1
+    history_dir = resolve_history_dir(db_path)
+    if args.export:
+        run_export(db_path, history_dir, rebuild=args.rebuild)
+    if args.status or not args.export:
+        for table, entry in history_status(history_dir).items():
+            through = entry["through_epoch"]
+            day = datetime.fromtimestamp(through, timezone.utc).strftime("%Y-%m-%d") if through else "never"
+            print(f"{table:20s} through {day}  {entry['files']} file(s)  {entry['bytes'] / 2**20:.1f} MiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+import json
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Callable
+
+import requests
+
+from src.config_store import connect
+from src.schema import ensure_schema
+
+HTTP_CACHE_TABLE = "http_cache"
+
+# Keys with a background revalidation in flight (per process).
+_REFRESHING: set[str] = set()
+_REFRESHING_LOCK = threading.Lock()
+
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+
+def http_session() -> requests.Session:
+    """Process-wide requests session so every fetch reuses pooled keep-alive connections."""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            _SESSION = requests.Session()
+        return _SESSION
+
+
+def cache_key(name: str, **params: Any) -> str:
+    """Stable key: coordinates are rounded so callers agree on the same entry."""
+    parts = []
+    for field in sorted(params):
+        value = params[field]
+        if isinstance(value, float):
+            value = f"{value:.4f}"
+        parts.append(f"{field}={value}")
+    return f"{name}?{'&'.join(parts)}" if parts else name
+
+
+def read_entry(db_path: str | Path, key: str) -> dict | None:
+    try:
+        with closing(connect(db_path)) as conn:
+            ensure_schema(conn)
+            row = conn.execute(
+                f"""
+                SELECT payload_json, fetched_at, expires_at, last_attempt_at, last_error
+                FROM {HTTP_CACHE_TABLE}
+                WHERE key = ?
+                """,
+                (key,),
+            ).fetchone()
+    except sqlite3.Error:
+        return None
+    if row is None:
+        return None
+    payload_json, fetched_at, expires_at, last_attempt_at, last_error = row
+    return {
+        "payload": json.loads(payload_json) if payload_json is not None else None,
+        "has_payload": payload_json is not None,
+        "fetched_at": fetched_at,
+        "expires_at": expires_at or 0.0,
+        "last_attempt_at": last_attempt_at,
+        "last_error": last_error,
+    }
+
+
+def refresh(db_path: str | Path, key: str, ttl_seconds: float, fetch: Callable[[], Any]) -> Any:
+    """
+    Run fetch() and store its result under key.
+
+    A fetch that raises or returns None counts as a failure: the error is
+    recorded and any earlier payload is kept so readers keep serving it.
+    """
+    now = time.time()
+    try:
+        payload = fetch()
+        error = None if payload is not None else "no data"
+    except Exception as exc:
+        payload = None
+        error = (str(exc) or exc.__class__.__name__)[:500]
+    try:
+        with closing(connect(db_path)) as conn:
+            ensure_schema(conn)
+            if payload is not None:
+                conn.execute(
+                    f"""
+                    INSERT INTO {HTTP_CACHE_TABLE} (key, payload_json, fetched_at, expires_at, last_attempt_at, last_error)
+                    VALUES (?, ?, ?, ?, ?, NULL)
+                    ON CONFLICT(key) DO UPDATE SET
+                      payload_json=excluded.payload_json,
+                      fetched_at=excluded.fetched_at,
+                      expires_at=excluded.expires_at,
+                      last_attempt_at=excluded.last_attempt_at,
+                      last_error=NULL
+                    """,
+                    (key, json.dumps(payload, default=str), now, now + ttl_seconds, now),
+                )
+            else:
+                conn.execute(
+                    f"""
+                    INSERT INTO {HTTP_CACHE_TABLE} (key, last_attempt_at, last_error)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                      last_attempt_at=excluded.last_attempt_at,
+                      last_error=excluded.last_error
+                    """,
+                    (key, now, error),
+                )
+            conn.commit()
+    except sqlite3.Error:
+        # Cache unavailable (locked or read-only database): still serve the result.
+        pass
+    return payload
+
+
+def _refresh_in_background(db_path, key, ttl_seconds, fetch) -> None:
+    with _REFRESHING_LOCK:
+        if key in _REFRESHING:
+            return
+        _REFRESHING.add(key)
+
+    def run():
+        try:
+            refresh(db_path, key, ttl_seconds, fetch)
+        except Exception:
+            pass
+        finally:
+            with _REFRESHING_LOCK:
+                _REFRESHING.discard(key)
+
+    threading.Thread(target=run, name=f"http-cache:{key}", daemon=True).start()
+
+
+def cached_json(
+    db_path: str | Path,
+    key: str,
+    ttl_seconds: float,
+    fetch: Callable[[], Any],
+    max_stale_seconds: float | None = None,
+    retry_seconds: float = 60,
+) -> Any:
+    """
+    Stale-while-revalidate read of an external JSON payload.
+
+    Fresh entries are returned as stored. Expired entries (up to
+    max_stale_seconds past expiry, unbounded when None) are returned
+    immediately while a background thread refetches them; the prefetch
+    worker normally refreshes them before that happens. Only a missing or
+    too-stale entry blocks on fetch(). Failed fetches are not retried for
+    retry_seconds.
+    """
+    entry = read_entry(db_path, key)
+    now = time.time()
+    if entry and entry["has_payload"]:
+        if now < entry["expires_at"]:
+            return entry["payload"]
+        if max_stale_seconds is None or now - entry["expires_at"] <= max_stale_seconds:
+            if now - (entry["last_attempt_at"] or 0) >= retry_seconds:
+                _refresh_in_background(db_path, key, ttl_seconds, fetch)
+            return entry["payload"]
+    elif entry and entry["last_error"] and now - (entry["last_attempt_at"] or 0) < retry_seconds:
+        return None
+    return refresh(db_path, key, ttl_seconds, fetch)
+
+
+def last_error(db_path: str | Path, key: str) -> str | None:
+    entry = read_entry(db_path, key)
+    return entry["last_error"] if entry else None
@@ -0,0 +1,81 @@
+"""
+Station location lookup shared by the background workers.
+
+Precedence: an enabled UI override, then the caller's env fallback, then a
+saved (disabled) override, then the Tempest station record. Answers are
+memoized per process for LOCATION_CACHE_SECONDS, so jobs hosted by
+src/scheduler.py resolve the location once instead of on every run.
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+
+from src.config_store import connect as config_connect
+from src.config_store import get_bool, get_float
+from src.external_data import cached_station_location
+
+LOCATION_CACHE_SECONDS = float(os.getenv("LOCATION_CACHE_SECONDS", "300"))
+TEMPEST_API_TOKEN = os.getenv("TEMPEST_API_TOKEN")
+TEMPEST_STATION_ID = int(os.getenv("TEMPEST_STATION_ID", "475329"))
+
+_CACHE: dict[tuple, tuple[float, tuple[float, float]]] = {}
+_LOCK = threading.Lock()
+
+
+def _overrides(db_path: str | Path) -> tuple[bool, float | None, float | None]:
+    try:
+        with config_connect(db_path) as conn:
+            enabled = bool(get_bool(conn, "override_location_enabled") or False)
+            return enabled, get_float(conn, "station_lat_override"), get_float(conn, "station_lon_override")
+    except Exception:
+        return False, None, None
+
+
+def _lookup(db_path, fallback, saved_override) -> tuple[float | None, float | None]:
+    enabled, lat_override, lon_override = _overrides(db_path)
+    has_override = lat_override is not None and lon_override is not None
+    if enabled and has_override:
+        return lat_override, lon_override
+    if fallback and fallback[0] and fallback[1]:
+        try:
+            return float(fallback[0]), float(fallback[1])
+        except (TypeError, ValueError):
+            pass
+    if saved_override and has_override:
+        return lat_override, lon_override
+    station = cached_station_location(db_path, TEMPEST_API_TOKEN, TEMPEST_STATION_ID)
+    if station and station.get("lat") is not None and station.get("lon") is not None:
+        return float(station["lat"]), float(station["lon"])
+    return None, None
+
+
+def resolve_location(
+    db_path: str | Path,
+    fallback: tuple[str | None, str | None] | None = None,
+    saved_override: bool = True,
+) -> tuple[float | None, float | None]:
+    """
+    (lat, lon) for the station, or (None, None).
+
+    fallback is a worker's raw env pair (e.g. DAILY_BRIEF_LAT/LON);
+    saved_override=False ignores overrides the UI has switched off, matching
+    the dashboard. Misses are not cached so a later run can retry.
+    """
+    key = (str(db_path), tuple(fallback or ()), saved_override)
+    now = time.monotonic()
+    with _LOCK:
+        cached = _CACHE.get(key)
+        if cached and now - cached[0] < LOCATION_CACHE_SECONDS:
+            return cached[1]
+    location = _lookup(db_path, fallback, saved_override)
+    if location[0] is not None:
+        with _LOCK:
+            _CACHE[key] = (now, location)
+    return location
+
+
+def clear_location_cache() -> None:
+    with _LOCK:
+        _CACHE.clear()
@@ -5,11 +5,32 @@ import re
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
-import requests
+from src.http_cache import http_session
+from src.nws_client import NWSClient, get_client, user_agent
 
+# Summaries keyed by product id, so an unchanged HWO/AFD is summarized once.
+_SUMMARY_CACHE: dict[tuple, object] = {}
+_SUMMARY_CACHE_LIMIT = 64
 
-def _user_agent() -> str:
-    return os.getenv("NWS_USER_AGENT", "TempestWeather/1.0 (contact: unknown)")
+
+def _summary_for(kind: str, product: dict, args: tuple, compute):
+    product_id = product.get("id")
+    if not product_id:
+        return compute()
+    key = (kind, product_id, args)
+    if key not in _SUMMARY_CACHE:
+        if len(_SUMMARY_CACHE) >= _SUMMARY_CACHE_LIMIT:
+            _SUMMARY_CACHE.pop(next(iter(_SUMMARY_CACHE)))
+        _SUMMARY_CACHE[key] = compute()
+    return _SUMMARY_CACHE[key]
+
+
+def _product_text(client: NWSClient, latest: dict) -> str | None:
+    try:
+        detail = client.product(latest["id"])
+    except Exception:
+        return None
+    return detail.get("productText") or ""
 
 
 def _fmt_time(value: str | None, tz_name: str) -> str | None:
@@ -109,49 +130,27 @@ def _split_sentences(text: str) -> list[str]:
     return [part.strip() for part in parts if part.strip()]
 
 
-def fetch_afd_text(lat: float, lon: float) -> dict | None:
-    headers = {"User-Agent": _user_agent(), "Accept": "application/geo+json"}
+def fetch_afd_text(lat: float, lon: float, client: NWSClient | None = None) -> dict | None:
+    client = client or get_client()
     try:
-        resp = requests.get(
-            f"https://api.weather.gov/points/{lat},{lon}",
-            headers=headers,
-            timeout=10,
-        )
-        resp.raise_for_status()
-        payload = resp.json()
+        props = client.point(lat, lon)
     except Exception:
         return None
-    props = payload.get("properties") if isinstance(payload, dict) else None
-    if not props:
-        return None
-    cwa = props.get("cwa")
+    cwa = props.get("cwa") if props else None
     if not cwa:
         return None
-    products_url = f"https://api.weather.gov/products/types/AFD/locations/{cwa}"
     try:
-        resp = requests.get(products_url, headers=headers, timeout=10)
-        resp.raise_for_status()
-        prod_payload = resp.json()
+        latest = client.latest_product("AFD", cwa)
     except Exception:
         return None
-    items = prod_payload.get("products") if isinstance(prod_payload, dict) else None
-    if not items:
+    if not latest or not latest.get("id"):
         return None
-    latest = items[0]
-    product_id = latest.get("id")
-    issued = latest.get("issuanceTime")
-    if not product_id:
+    raw_text = _product_text(client, latest)
+    if raw_text is None:
         return None
-    try:
-        detail = requests.get(f"https://api.weather.gov/products/{product_id}", headers=headers, timeout=10)
-        detail.raise_for_status()
-        detail_payload = detail.json()
-    except Exception:
-        return None
-    raw_text = detail_payload.get("productText") or ""
     return {
-        "id": product_id,
-        "issued": issued,
+        "id": latest["id"],
+        "issued": latest.get("issuanceTime"),
         "text": raw_text,
         "headline": latest.get("productName") or "Area Forecast Discussion",
         "cwa": cwa,
@@ -166,7 +165,16 @@ def summarize_afd(
 ) -> list[str] | None:
     if not afd:
         return None
-    text = _strip_html_preserve_lines(afd.get("text", ""))
+    return _summary_for(
+        "afd",
+        afd,
+        (max_items, max_chars, per_item_max),
+        lambda: _summarize_afd_text(afd.get("text", ""), max_items, max_chars, per_item_max),
+    )
+
+
+def _summarize_afd_text(raw_text: str, max_items: int, max_chars: int, per_item_max: int) -> list[str] | None:
+    text = _strip_html_preserve_lines(raw_text)
     if not text:
         return None
     cleaned = _strip_afd_header(text)
@@ -248,19 +256,11 @@ def summarize_afd(
     return trimmed
 
 
-def resolve_alert_zones(lat: float, lon: float) -> list[str]:
-    headers = {"User-Agent": _user_agent(), "Accept": "application/geo+json"}
+def resolve_alert_zones(lat: float, lon: float, client: NWSClient | None = None) -> list[str]:
     try:
-        resp = requests.get(
-            f"https://api.weather.gov/points/{lat},{lon}",
-            headers=headers,
-            timeout=10,
-        )
-        resp.raise_for_status()
-        payload = resp.json()
+        props = (client or get_client()).point(lat, lon)
     except Exception:
         return []
-    props = payload.get("properties") if isinstance(payload, dict) else None
     if not props:
         return []
     zones = []
@@ -275,16 +275,13 @@ def resolve_alert_zones(lat: float, lon: float) -> list[str]:
     return zones
 
 
-def _fetch_alerts_by_params(params: dict) -> list[dict]:
-    headers = {"User-Agent": _user_agent(), "Accept": "application/geo+json"}
-    try:
-        resp = requests.get("https://api.weather.gov/alerts/active", params=params, headers=headers, timeout=10)
-        resp.raise_for_status()
-        payload = resp.json()
-    except Exception:
-        return []
+def _fetch_alerts_by_params(params: dict, client: NWSClient | None = None) -> list[dict]:
+    # Errors propagate: an empty list would be cached as "no active alerts".
+    payload = (client or get_client()).active_alerts(params)
+    if not isinstance(payload, dict) or not isinstance(payload.get("features", []), list):
+        raise ValueError("unexpected NWS alerts payload")
     alerts = []
-    for feature in payload.get("features", []) if isinstance(payload, dict) else []:
+    for feature in payload.get("features", []):
         props = feature.get("properties") or {}
         alert_id = props.get("id") or feature.get("id") or props.get("@id")
         event = props.get("event") or "Weather Alert"
@@ -333,7 +330,7 @@ def _fetch_hwo_fallback(
     county_zone: str | None,
     cwa: str | None,
 ) -> dict | None:
-    headers = {"User-Agent": _user_agent(), "Accept": "text/html"}
+    headers = {"User-Agent": user_agent(), "Accept": "text/html"}
     params = {
         "warnzone": forecast_zone or "",
         "warncounty": county_zone or "",
@@ -344,7 +341,7 @@ def _fetch_hwo_fallback(
         "lon": f"{lon:.3f}",
     }
     try:
-        resp = requests.get(
+        resp = http_session().get(
             "https://forecast.weather.gov/showsigwx.php",
             headers=headers,
             params=params,
@@ -369,19 +366,12 @@ def _fetch_hwo_fallback(
     }
 
 
-def fetch_hwo_text(lat: float, lon: float) -> dict | None:
-    headers = {"User-Agent": _user_agent(), "Accept": "application/geo+json"}
+def fetch_hwo_text(lat: float, lon: float, client: NWSClient | None = None) -> dict | None:
+    client = client or get_client()
     try:
-        resp = requests.get(
-            f"https://api.weather.gov/points/{lat},{lon}",
-            headers=headers,
-            timeout=10,
-        )
-        resp.raise_for_status()
-        payload = resp.json()
+        props = client.point(lat, lon)
     except Exception:
         return None
-    props = payload.get("properties") if isinstance(payload, dict) else None
     if not props:
         return None
     cwa = props.get("cwa")
@@ -390,31 +380,20 @@ def fetch_hwo_text(lat: float, lon: float) -> dict | None:
     if not cwa:
         return None
 
-    products_url = f"https://api.weather.gov/products/types/HWO/locations/{cwa}"
     try:
-        resp = requests.get(products_url, headers=headers, timeout=10)
-        resp.raise_for_status()
-        prod_payload = resp.json()
+        latest = client.latest_product("HWO", cwa)
     except Exception:
         return None
-    items = prod_payload.get("products") if isinstance(prod_payload, dict) else None
-    if not items:
+    if not latest:
         return _fetch_hwo_fallback(lat, lon, forecast_zone, county_zone, cwa)
-    latest = items[0]
-    product_id = latest.get("id")
-    issued = latest.get("issuanceTime")
-    if not product_id:
+    if not latest.get("id"):
         return None
-    try:
-        detail = requests.get(f"https://api.weather.gov/products/{product_id}", headers=headers, timeout=10)
-        detail.raise_for_status()
-        detail_payload = detail.json()
-    except Exception:
+    raw_text = _product_text(client, latest)
+    if raw_text is None:
         return None
-    raw_text = detail_payload.get("productText") or ""
     return {
-        "id": product_id,
-        "issued": issued,
+        "id": latest["id"],
+        "issued": latest.get("issuanceTime"),
         "text": raw_text,
         "headline": latest.get("productName") or "Hazardous Weather Outlook",
         "cwa": cwa,
@@ -424,7 +403,11 @@ def fetch_hwo_text(lat: float, lon: float) -> dict | None:
 def summarize_hwo(hwo: dict | None, max_chars: int = 320) -> str | None:
     if not hwo:
         return None
-    text = _strip_html_preserve_lines(hwo.get("text", ""))
+    return _summary_for("hwo", hwo, (max_chars,), lambda: _summarize_hwo_text(hwo.get("text", ""), max_chars))
+
+
+def _summarize_hwo_text(raw_text: str, max_chars: int) -> str | None:
+    text = _strip_html_preserve_lines(raw_text)
     if not text:
         return None
     sections = _extract_hwo_sections(text)
@@ -507,24 +490,29 @@ def format_hwo_html(hwo: dict | None, tz_name: str) -> str | None:
     )
 
 
-def fetch_active_alerts(lat: float, lon: float, tz_name: str = "UTC") -> list[dict]:
+def fetch_active_alerts(lat: float, lon: float, tz_name: str = "UTC", client: NWSClient | None = None) -> list[dict]:
+    """
+    Active alerts for the location's zones. Raises on request and parse
+    errors so the HTTP cache keeps the last good list and records the error.
+    """
     if lat is None or lon is None:
         return []
+    client = client or get_client()
 
     zone_override = os.getenv("NWS_ZONE")
     if zone_override:
         zones = [z.strip() for z in re.split(r"[,\s]+", zone_override) if z.strip()]
         alerts = []
         for zone in zones:
-            alerts.extend(_fetch_alerts_by_params({"zone": zone, "timezone": tz_name}))
+            alerts.extend(_fetch_alerts_by_params({"zone": zone, "timezone": tz_name}, client))
         return alerts
 
-    zones = resolve_alert_zones(lat, lon)
+    zones = resolve_alert_zones(lat, lon, client)
     if zones:
         alerts = []
         seen = set()
         for zone_id in zones:
-            for alert in _fetch_alerts_by_params({"zone": zone_id, "timezone": tz_name}):
+            for alert in _fetch_alerts_by_params({"zone": zone_id, "timezone": tz_name}, client):
                 alert_id = alert.get("id")
                 if alert_id and alert_id in seen:
                     continue
@@ -533,7 +521,7 @@ def fetch_active_alerts(lat: float, lon: float, tz_name: str = "UTC") -> list[di
                 alerts.append(alert)
         return alerts
 
-    return _fetch_alerts_by_params({"point": f"{lat},{lon}", "timezone": tz_name})
+    return _fetch_alerts_by_params({"point": f"{lat},{lon}", "timezone": tz_name}, client)
 
 
 def summarize_alerts(alerts: list[dict], tz_name: str, max_items: int = 2) -> list[str]:
@@ -0,0 +1,216 @@
+"""
+Conditional-request client for api.weather.gov.
+
+Every response is kept per URL with its ETag/Last-Modified validators and a
+Cache-Control expiry. Fresh entries are served without touching the network;
+expired ones are revalidated and a 304 reuses the stored body. Points
+lookups (zones, CWA) and issued products, which never change once
+published, are kept much longer than the API asks for. With a db_path the
+store lives in SQLite so the dashboard and the workers share it.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import urlencode
+
+from src.config_store import connect
+from src.http_cache import http_session
+from src.schema import ensure_schema
+
+NWS_BASE_URL = os.getenv("NWS_BASE_URL", "https://api.weather.gov")
+NWS_RESPONSES_TABLE = "nws_responses"
+NWS_POINTS_TTL_SECONDS = int(os.getenv("NWS_POINTS_TTL_SECONDS", str(7 * 86400)))
+NWS_PRODUCT_TTL_SECONDS = 7 * 86400
+# Expired rows are dropped this long after expiry.
+NWS_RESPONSE_RETENTION_SECONDS = 86400
+
+
+def user_agent() -> str:
+    return os.getenv("NWS_USER_AGENT", "TempestWeather/1.0 (contact: unknown)")
+
+
+def response_ttl(headers, now: float | None = None) -> float:
+    """Seconds a response may be reused without revalidation (0 when unknown)."""
+    directives = {}
+    for part in (headers.get("Cache-Control") or "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"')
+    if "no-store" in directives or "no-cache" in directives:
+        return 0.0
+    if "max-age" in directives:
+        try:
+            return max(0.0, float(directives["max-age"]) - float(headers.get("Age") or 0))
+        except ValueError:
+            return 0.0
+    expires = headers.get("Expires")
+    if not expires:
+        return 0.0
+    try:
+        expires_at = parsedate_to_datetime(expires).timestamp()
+        date = headers.get("Date")
+        base = parsedate_to_datetime(date).timestamp() if date else (now or time.time())
+    except (TypeError, ValueError):
+        return 0.0
+    return max(0.0, expires_at - base)
+
+
+def _coord(value: float) -> str:
+    # The API redirects anything finer than 4 decimals (and trailing zeros).
+    return f"{float(value):.4f}".rstrip("0").rstrip(".")
+
+
+class NWSClient:
+    def __init__(self, db_path: str | Path | None = None, base_url: str | None = None, timeout: float = 10):
+        self.db_path = db_path
+        self.base_url = (base_url or NWS_BASE_URL).rstrip("/")
+        self.timeout = timeout
+        self.session = http_session()
+        self._memory: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "not_modified": 0, "cache_hits": 0}
+
+    def url(self, path: str, params: dict | None = None) -> str:
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        if params:
+            url += "?" + urlencode(sorted(params.items()))
+        return url
+
+    def _load(self, url: str) -> dict | None:
+        if self.db_path is None:
+            with self._lock:
+                return self._memory.get(url)
+        try:
+            with closing(connect(self.db_path)) as conn:
+                ensure_schema(conn)
+                row = conn.execute(
+                    f"""
+                    SELECT etag, last_modified, body_json, expires_at
+                    FROM {NWS_RESPONSES_TABLE}
+                    WHERE url = ?
+                    """,
+                    (url,),
+                ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        etag, last_modified, body_json, expires_at = row
+        return {
+            "etag": etag,
+            "last_modified": last_modified,
+            "body": json.loads(body_json),
+            "expires_at": expires_at or 0.0,
+        }
+
+    def _store(self, url: str, entry: dict, now: float) -> None:
+        if self.db_path is None:
+            with self._lock:
+                self._memory[url] = entry
+            return
+        try:
+            with closing(connect(self.db_path)) as conn:
+                ensure_schema(conn)
+                conn.execute(
+                    f"""
+                    INSERT INTO {NWS_RESPONSES_TABLE} (url, etag, last_modified, body_json, fetched_at, expires_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(url) DO UPDATE SET
+                      etag=excluded.etag,
+                      last_modified=excluded.last_modified,
+                      body_json=excluded.body_json,
+                      fetched_at=excluded.fetched_at,
+                      expires_at=excluded.expires_at
+                    """,
+                    (url, entry["etag"], entry["last_modified"], json.dumps(entry["body"]), now, entry["expires_at"]),
+                )
+                conn.execute(
+                    f"DELETE FROM {NWS_RESPONSES_TABLE} WHERE expires_at < ?",
+                    (now - NWS_RESPONSE_RETENTION_SECONDS,),
+                )
+                conn.commit()
+        except sqlite3.Error:
+            pass
+
+    def _extend(self, url: str, entry: dict, expires_at: float) -> None:
+        entry["expires_at"] = expires_at
+        if self.db_path is None:
+            return
+        try:
+            with closing(connect(self.db_path)) as conn:
+                conn.execute(
+                    f"UPDATE {NWS_RESPONSES_TABLE} SET expires_at = ? WHERE url = ?",
+                    (expires_at, url),
+                )
+                conn.commit()
+        except sqlite3.Error:
+            pass
+
+    def get_json(self, path: str, params: dict | None = None, min_ttl: float = 0) -> dict:
+        """
+        GET a JSON document, revalidating the stored copy when it has expired.
+        Raises on network and HTTP errors like requests does.
+        """
+        url = self.url(path, params)
+        now = time.time()
+        entry = self._load(url)
+        if entry and now < entry["expires_at"]:
+            self.stats["cache_hits"] += 1
+            return entry["body"]
+        headers = {"User-Agent": user_agent(), "Accept": "application/geo+json"}
+        if entry and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        resp = self.session.get(url, headers=headers, timeout=self.timeout)
+        self.stats["requests"] += 1
+        expires_at = now + max(min_ttl, response_ttl(resp.headers, now))
+        if resp.status_code == 304 and entry:
+            self.stats["not_modified"] += 1
+            self._extend(url, entry, expires_at)
+            return entry["body"]
+        resp.raise_for_status()
+        body = resp.json()
+        entry = {
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "body": body,
+            "expires_at": expires_at,
+        }
+        self._store(url, entry, now)
+        return body
+
+    def point(self, lat: float, lon: float) -> dict | None:
+        """/points properties (cwa, forecastZone, county); cached for NWS_POINTS_TTL_SECONDS."""
+        payload = self.get_json(f"/points/{_coord(lat)},{_coord(lon)}", min_ttl=NWS_POINTS_TTL_SECONDS)
+        props = payload.get("properties") if isinstance(payload, dict) else None
+        return props or None
+
+    def active_alerts(self, params: dict) -> dict:
+        return self.get_json("/alerts/active", params)
+
+    def latest_product(self, product_type: str, cwa: str) -> dict | None:
+        payload = self.get_json(f"/products/types/{product_type}/locations/{cwa}")
+        items = payload.get("products") if isinstance(payload, dict) else None
+        return items[0] if items else None
+
+    def product(self, product_id: str) -> dict:
+        """Issued products never change, so a known id is never downloaded twice."""
+        return self.get_json(f"/products/{product_id}", min_ttl=NWS_PRODUCT_TTL_SECONDS)
+
+
+@lru_cache(maxsize=None)
+def _client_for(db_path: str | None) -> NWSClient:
+    return NWSClient(db_path)
+
+
+def get_client(db_path: str | Path | None = None) -> NWSClient:
+    """One client per database (or one in-memory client) per process."""
+    return _client_for(str(db_path) if db_path is not None else None)
@@ -0,0 +1,189 @@
+"""
+Opt-in clustered layout for the observation tables.
+
+    python -m src.obs_layout --status
+    python -m src.obs_layout --migrate [--tables obs_st,airlink_current_obs]
+
+The default tables are rowid tables keyed by (obs_epoch, device_id) /
+(did, ts), with a separate time index. --migrate rebuilds them as
+WITHOUT ROWID tables clustered on (device_id, obs_epoch) / (did, ts). A
+station's rows for a time range then sit on contiguous pages, and the time
+index is dropped. obs_st.obs_raw_json moves to obs_st_raw so range scans do
+not page through the JSON text. Time-only filters still use the primary key:
+the table is ANALYZEd so SQLite skip-scans the handful of device ids.
+
+Each table is rebuilt in one transaction. Stop the collectors first; the
+rebuild holds the write lock and needs free disk space about the size of the
+table. The migration cannot be undone in place; restore a backup to go back.
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+OBS_ST_RAW_TABLE = "obs_st_raw"
+LAYOUTS = {
+    "obs_st": {
+        "key": ("device_id", "obs_epoch"),
+        "time_index": ("idx_obs_st_epoch", "obs_epoch"),
+        "side_column": ("obs_raw_json", OBS_ST_RAW_TABLE),
+    },
+    "airlink_current_obs": {
+        "key": ("did", "ts"),
+        "time_index": ("idx_airlink_current_obs_ts", "ts"),
+    },
+}
+
+
+def resolve_db_path() -> Path:
+    raw_path = os.getenv("TEMPEST_DB_PATH")
+    if raw_path:
+        path = Path(raw_path)
+        return path if path.is_absolute() else PROJECT_ROOT / path
+    return PROJECT_ROOT / "data" / "tempest.db"
+
+
+def table_sql(conn: sqlite3.Connection, table: str) -> str | None:
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone()
+    return row[0] if row else None
+
+
+def is_clustered(conn: sqlite3.Connection, table: str) -> bool:
+    sql = table_sql(conn, table)
+    return bool(sql) and "WITHOUT ROWID" in sql.upper()
+
+
+def ensure_time_index(conn: sqlite3.Connection, table: str) -> None:
+    """Create the table's time index unless it uses the clustered layout."""
+    if table_sql(conn, table) is None or is_clustered(conn, table):
+        return
+    name, column = LAYOUTS[table]["time_index"]
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({column})")
+
+
+def ensure_obs_st_raw_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {OBS_ST_RAW_TABLE} (
+            device_id INTEGER NOT NULL,
+            obs_epoch INTEGER NOT NULL,
+            obs_raw_json TEXT NOT NULL,
+            PRIMARY KEY (device_id, obs_epoch)
+        ) WITHOUT ROWID
+        """
+    )
+
+
+def column_defs(conn: sqlite3.Connection, table: str, skip: set[str]) -> list[tuple[str, str]]:
+    """(name, definition) for each column, preserving types, NOT NULL and defaults."""
+    defs = []
+    for _, name, col_type, notnull, default, _pk in conn.execute(f"PRAGMA table_info({table})").fetchall():
+        if name in skip:
+            continue
+        definition = f"{name} {col_type}".rstrip()
+        if notnull:
+            definition += " NOT NULL"
+        if default is not None:
+            definition += f" DEFAULT {default}"
+        defs.append((name, definition))
+    return defs
+
+
+def cluster_table(conn: sqlite3.Connection, table: str, log=print) -> bool:
+    """Rebuild table in the clustered layout; returns False if there is nothing to do."""
+    layout = LAYOUTS[table]
+    if table_sql(conn, table) is None or is_clustered(conn, table):
+        return False
+    started = time.time()
+    key = ", ".join(layout["key"])
+    side_column, side_table = layout.get("side_column", (None, None))
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+    defs = column_defs(conn, table, {side_column})
+    columns = ", ".join(name for name, _ in defs)
+    staging = f"{table}__clustered"
+
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(f"DROP TABLE IF EXISTS {staging}")
+        conn.execute(
+            f"CREATE TABLE {staging} ({', '.join(d for _, d in defs)}, PRIMARY KEY ({key})) WITHOUT ROWID"
+        )
+        conn.execute(f"INSERT OR IGNORE INTO {staging} ({columns}) SELECT {columns} FROM {table} ORDER BY {key}")
+        moved = 0
+        if side_column in existing:
+            ensure_obs_st_raw_table(conn)
+            moved = conn.execute(
+                f"""
+                INSERT OR IGNORE INTO {side_table} ({key}, {side_column})
+                SELECT {key}, {side_column} FROM {table}
+                WHERE {side_column} IS NOT NULL
+                ORDER BY {key}
+                """
+            ).rowcount
+        # Dropping the table drops its indexes, including the time index.
+        conn.execute(f"DROP TABLE {table}")
+        conn.execute(f"ALTER TABLE {staging} RENAME TO {table}")
+        conn.execute(f"ANALYZE {table}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    rows = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    log(
+        f"Clustered {table} on ({key}): {rows} rows"
+        + (f", {moved} {side_column} values moved to {side_table}" if side_column in existing else "")
+        + f" in {time.time() - started:.1f}s"
+    )
+    return True
+
+
+def layout_status(conn: sqlite3.Connection) -> dict[str, str]:
+    status = {}
+    for table in LAYOUTS:
+        if table_sql(conn, table) is None:
+            status[table] = "missing"
+        else:
+            status[table] = "clustered" if is_clustered(conn, table) else "rowid"
+    return status
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Migrate observation tables to the clustered layout.")
+    parser.add_argument("--migrate", action="store_true", help="rebuild the tables (stop the collectors first)")
+    parser.add_argument("--status", action="store_true", help="show the current layout")
+    parser.add_argument("--tables", default=",".join(LAYOUTS), help="comma-separated tables to migrate")
+    args = parser.parse_args()
+
+    tables = [name.strip() for name in args.tables.split(",") if name.strip()]
+    unknown = [name for name in tables if name not in LAYOUTS]
+    if unknown:
+        parser.error(f"unknown table(s) {', '.join(unknown)} (choose from {', '.join(LAYOUTS)})")
+
+    db_path = resolve_db_path()
+    if not db_path.exists():
+        print(f"DB not found: {db_path}")
+        return 1
+    # isolation_level=None so cluster_table controls the transaction.
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    try:
+        conn.execute("PRAGMA busy_timeout=30000")
+        if args.migrate:
+            for table in tables:
+                if not cluster_table(conn, table):
+                    print(f"{table}: already clustered or missing")
+        for table, layout in layout_status(conn).items():
+            print(f"{table}: {layout}")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+import time
+
+
+class LazyContext:
+    """
+    Read-only page context whose entries may be deferred.
+
+    Plain values are stored as-is; entries registered with `lazy()` are
+    zero-argument callables evaluated on first read, memoized and timed, so a
+    page only pays for the data it actually renders.
+    """
+
+    def __init__(self, values=None):
+        self._values = dict(values or {})
+        self._thunks = {}
+        self._timings = {}
+
+    def lazy(self, key, thunk) -> None:
+        self._values.pop(key, None)
+        self._thunks[key] = thunk
+
+    def __getitem__(self, key):
+        if key in self._values:
+            return self._values[key]
+        thunk = self._thunks[key]
+        started = time.perf_counter()
+        value = thunk()
+        self._timings[key] = time.perf_counter() - started
+        self._values[key] = value
+        # Dropped only once stored, so a thunk that raises is retried on the next read.
+        self._thunks.pop(key, None)
+        return value
+
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        return self[key]
+
+    def __contains__(self, key) -> bool:
+        return key in self._values or key in self._thunks
+
+    def keys(self):
+        return [*self._values, *self._thunks]
+
+    def pending(self) -> list:
+        """Lazy entries that have not been read yet."""
+        return list(self._thunks)
+
+    def timings(self) -> dict:
+        """Seconds spent evaluating each lazy entry read so far."""
+        return dict(self._timings)
@@ -90,6 +90,12 @@ def render(ctx):
         prev_date = (pd.Timestamp(latest_date) - pd.DateOffset(years=1)).date()
         current = _build_day_series(source_df, value_col, tz_name, latest_date, "This year")
         last_year = _build_day_series(source_df, value_col, tz_name, prev_date, "Last year")
+        history_day = ctx.get("history_day")
+        if last_year is None and history_day is not None:
+            # The window rarely reaches back a year; load that one day on its own.
+            history_df = history_day(source_name, prev_date)
+            if history_df is not None and not history_df.empty and value_col in history_df:
+                last_year = _build_day_series(history_df, value_col, tz_name, prev_date, "Last year")
         labels = ("This year", "Last year")
         compare_df = pd.concat([current, last_year]) if current is not None or last_year is not None else None
 
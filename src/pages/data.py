@@ -69,3 +69,73 @@ def render(ctx):
     if afd_updated:
         status_items.append(("AFD highlights", afd_updated))
     status_card("Status", status_items)
+
+    storage = ctx.get("storage_stats") or {}
+    fmt = ctx.get("format_bytes") or (lambda size: f"{size} B")
+    storage_items = []
+    if storage.get("db_size"):
+        storage_items.append(("Database", fmt(storage["db_size"])))
+    raw_bytes = storage.get("raw_bytes") or {}
+    if raw_bytes:
+        storage_items.append(("raw_events", fmt(raw_bytes.get("raw_events", 0))))
+        if raw_bytes.get("raw_payloads"):
+            storage_items.append(("raw_payloads", fmt(raw_bytes["raw_payloads"])))
+    if storage.get("archive_bytes"):
+        storage_items.append(("Raw archive shards", fmt(storage["archive_bytes"])))
+    last_run = storage.get("raw_compact_last_run") or {}
+    before = last_run.get("before") or {}
+    after = last_run.get("after") or {}
+    if before and after:
+        before_total = before.get("raw_events", 0) + before.get("raw_payloads", 0)
+        after_total = after.get("raw_events", 0) + after.get("raw_payloads", 0)
+        storage_items.append(("Raw compaction", f"{fmt(before_total)} -> {fmt(after_total)}"))
+    if storage_items:
+        status_card("Storage", storage_items)
+
+    pool = ctx.get("db_pool_stats") or {}
+    if pool:
+        status_card(
+            "Connections",
+            [
+                ("Readers open", str(pool.get("readers_open", 0))),
+                ("Readers opened", str(pool.get("readers_opened", 0))),
+                ("Reader checkouts", str(pool.get("reader_checkouts", 0))),
+                ("Writer", "open" if pool.get("writer_open") else "idle"),
+                ("Writer checkouts", str(pool.get("writer_checkouts", 0))),
+            ],
+        )
+
+    window_cache = ctx.get("window_cache_stats") or {}
+    if window_cache:
+        status_card(
+            "Window cache",
+            [
+                ("Windows", str(window_cache.get("windows", 0))),
+                ("Rows cached", str(window_cache.get("rows_cached", 0))),
+                ("Full loads", str(window_cache.get("full_loads", 0))),
+                ("Tail refreshes", str(window_cache.get("tail_loads", 0))),
+                ("Rows appended", str(window_cache.get("rows_appended", 0))),
+            ],
+        )
+
+    external = ctx.get("external_fetches") or {}
+    if external:
+        status_card(
+            "External fetches",
+            [
+                (
+                    name,
+                    f"{entry['seconds'] * 1000:.0f} ms"
+                    + ("" if entry["status"] == "ok" else f" ({entry['status']})"),
+                )
+                for name, entry in external.items()
+            ],
+        )
+
+    timings = ctx.timings() if hasattr(ctx, "timings") else {}
+    if timings:
+        items = [(key, f"{seconds * 1000:.1f} ms") for key, seconds in timings.items()]
+        pending = ctx.pending()
+        if pending:
+            items.append(("Not built", ", ".join(pending)))
+        status_card("Page context", items)
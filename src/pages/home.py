@@ -6,8 +6,8 @@ import pandas as pd
 import streamlit as st
 import streamlit.components.v1 as components
 
-from src.config_store import connect as config_connect
 from src.config_store import get_bool, get_config, set_bool, set_config
+from src.db_pool import get_pool
 from src.ui.components.cards import chart_card
 
 DB_PATH = os.getenv("TEMPEST_DB_PATH", "data/tempest.db")
@@ -97,8 +97,7 @@ RADAR_OVERLAY_CATALOG = [
 
 def load_radar_layer_prefs(valid_ids: list[str]) -> list[str] | None:
     try:
-        with config_connect(DB_PATH) as conn:
-            raw = get_config(conn, RADAR_LAYER_PREF_KEY)
+        raw = get_config(get_pool(DB_PATH).reader(), RADAR_LAYER_PREF_KEY)
     except Exception:
         return None
     if raw is None:
@@ -114,7 +113,7 @@ def load_radar_layer_prefs(valid_ids: list[str]) -> list[str] | None:
 
 def save_radar_layer_prefs(selected: list[str]) -> None:
     try:
-        with config_connect(DB_PATH) as conn:
+        with get_pool(DB_PATH).writer() as conn:
             set_config(conn, RADAR_LAYER_PREF_KEY, json.dumps(selected))
     except Exception:
         return
@@ -122,15 +121,14 @@ def save_radar_layer_prefs(selected: list[str]) -> None:
 
 def load_radar_show_pref() -> bool | None:
     try:
-        with config_connect(DB_PATH) as conn:
-            return get_bool(conn, RADAR_SHOW_PREF_KEY)
+        return get_bool(get_pool(DB_PATH).reader(), RADAR_SHOW_PREF_KEY)
     except Exception:
         return None
 
 
 def save_radar_show_pref(value: bool) -> None:
     try:
-        with config_connect(DB_PATH) as conn:
+        with get_pool(DB_PATH).writer() as conn:
             set_bool(conn, RADAR_SHOW_PREF_KEY, value)
     except Exception:
         return
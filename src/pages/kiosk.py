@@ -0,0 +1,71 @@
+"""
+Kiosk view (?view=kiosk): current conditions only.
+
+Reads the collector-maintained current_conditions rows, so the page renders
+without loading a time series, forecasts or external data.
+"""
+
+import pandas as pd
+import streamlit as st
+
+from src.current_conditions import read_current
+from src.ui.components.cards import metric_card
+
+
+def _fmt(value, spec: str, suffix: str = "") -> str:
+    if value is None or pd.isna(value):
+        return "--"
+    return f"{value:{spec}}{suffix}"
+
+
+def kiosk_metrics(tempest: dict | None, airlink: dict | None) -> list[dict]:
+    tempest = tempest or {}
+    airlink = airlink or {}
+    metrics = [
+        {
+            "icon": "T",
+            "label": "Temperature",
+            "value": _fmt(tempest.get("temp_f"), ".1f", " F"),
+            "subvalue": f"Feels like {_fmt(tempest.get('heat_index_f'), '.1f', ' F')}",
+        },
+        {
+            "icon": "W",
+            "label": "Wind",
+            "value": _fmt(tempest.get("wind_avg_mph"), ".1f", " mph"),
+            "subvalue": f"Gust {_fmt(tempest.get('wind_gust_mph'), '.1f', ' mph')}",
+        },
+        {"icon": "H", "label": "Humidity", "value": _fmt(tempest.get("humidity"), ".0f", "%")},
+        {"icon": "P", "label": "Pressure", "value": _fmt(tempest.get("pressure_inhg"), ".2f", " inHg")},
+    ]
+    if airlink:
+        metrics.append(
+            {
+                "icon": "AQ",
+                "label": "Air Quality",
+                "value": _fmt(airlink.get("aqi"), ".0f", " AQI"),
+                "subvalue": airlink.get("aqi_category"),
+            }
+        )
+    return metrics
+
+
+def render(reader, fragment, tz_name: str):
+    """reader() returns a sqlite3 connection; fragment is the dashboard's live_fragment."""
+
+    @fragment
+    def live():
+        conn = reader()
+        tempest = read_current(conn, "tempest")
+        airlink = read_current(conn, "airlink")
+        if tempest is None and airlink is None:
+            st.info("No current conditions yet. Start the collectors.")
+            return
+        st.markdown("<div class='cards-grid'>", unsafe_allow_html=True)
+        for metric in kiosk_metrics(tempest, airlink):
+            metric_card(metric["icon"], metric["label"], metric["value"], metric.get("subvalue"))
+        st.markdown("</div>", unsafe_allow_html=True)
+        newest = max(row["obs_epoch"] for row in (tempest, airlink) if row)
+        updated = pd.Timestamp(newest, unit="s", tz="UTC").tz_convert(tz_name)
+        st.caption(f"Updated {updated.strftime('%Y-%m-%d %H:%M:%S')}")
+
+    live()
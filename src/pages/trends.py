@@ -4,8 +4,8 @@ import os
 import altair as alt
 import streamlit as st
 
-from src.config_store import connect as config_connect
 from src.config_store import get_config, set_config
+from src.db_pool import get_pool
 
 from src.ui.components.cards import chart_card
 
@@ -15,8 +15,7 @@ PREF_KEY = "trends_selected_metrics"
 
 def load_metric_prefs(all_metrics: list[str]) -> list[str] | None:
     try:
-        with config_connect(DB_PATH) as conn:
-            raw = get_config(conn, PREF_KEY)
+        raw = get_config(get_pool(DB_PATH).reader(), PREF_KEY)
     except Exception:
         return None
     if not raw:
@@ -32,7 +31,7 @@ def load_metric_prefs(all_metrics: list[str]) -> list[str] | None:
 
 def save_metric_prefs(selected: list[str]) -> None:
     try:
-        with config_connect(DB_PATH) as conn:
+        with get_pool(DB_PATH).writer() as conn:
             set_config(conn, PREF_KEY, json.dumps(selected))
     except Exception:
         return
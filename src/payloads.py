@@ -0,0 +1,73 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
+
+# Column-oriented chart payloads for the grid dashboard:
+#   line series   {"t": [epoch_ms, ...], "v": [float, ...]}
+#   scatter       {"x": [float, ...],    "y": [float, ...]}
+EMPTY_SERIES = {"t": [], "v": []}
+EMPTY_POINTS = {"x": [], "y": []}
+
+
+def epoch_ms(times: pd.Series) -> np.ndarray:
+    """Datetime (naive UTC or tz-aware) or epoch-second column -> int64 epoch milliseconds."""
+    if pd.api.types.is_datetime64_any_dtype(times):
+        return times.dt.as_unit("ms").astype("int64").to_numpy()
+    return (pd.to_numeric(times, errors="coerce").to_numpy(dtype="float64") * 1000).astype("int64")
+
+
+def column_series(df, time_col: str, value_col: str) -> dict:
+    """Drop NaN rows and return {"t": epoch ms int64, "v": float32} arrays."""
+    if df is None or df.empty or time_col not in df or value_col not in df:
+        return dict(EMPTY_SERIES)
+    values = pd.to_numeric(df[value_col], errors="coerce").to_numpy(dtype="float64")
+    times = df[time_col]
+    keep = ~np.isnan(values) & times.notna().to_numpy()
+    if not keep.any():
+        return dict(EMPTY_SERIES)
+    return {
+        "t": epoch_ms(times[keep]),
+        "v": values[keep].astype("float32"),
+    }
+
+
+def column_points(df, x_col: str, y_col: str) -> dict:
+    """Scatter points as {"x": float32, "y": float32}, skipping rows with a missing value."""
+    if df is None or df.empty or x_col not in df or y_col not in df:
+        return dict(EMPTY_POINTS)
+    x = pd.to_numeric(df[x_col], errors="coerce").to_numpy(dtype="float64")
+    y = pd.to_numeric(df[y_col], errors="coerce").to_numpy(dtype="float64")
+    keep = ~(np.isnan(x) | np.isnan(y))
+    return {"x": x[keep].astype("float32"), "y": y[keep].astype("float32")}
+
+
+def format_column(values, decimals: int) -> list:
+    """Fixed-decimal strings for a numeric column, None where the value is missing."""
+    arr = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype="float64")
+    text = np.char.mod(f"%.{decimals}f", np.nan_to_num(arr)).astype(object)
+    text[np.isnan(arr)] = None
+    return text.tolist()
+
+
+def _json_default(value):
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind == "f":
+            # float32 -> float64 widening adds noise digits; trim back to float32 precision.
+            return np.round(value.astype("float64"), 4).tolist()
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_payload(payload) -> str:
+    """Serialize a chart payload; numpy arrays are encoded in bulk (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY).decode("utf-8")
+    return json.dumps(payload, default=_json_default, separators=(",", ":"))
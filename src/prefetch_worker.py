@@ -0,0 +1,141 @@
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from src import external_data
+from src.http_cache import read_entry, refresh
+from src.location import resolve_location as shared_resolve_location
+from src.nws_client import get_client as get_nws_client
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+LOG_PATH = PROJECT_ROOT / "logs" / "prefetch_worker.log"
+
+LOCAL_TZ = os.getenv("LOCAL_TZ", "America/New_York")
+PREFETCH_INTERVAL_SECONDS = int(os.getenv("PREFETCH_INTERVAL_SECONDS", "30"))
+# Refresh entries this long before they expire so readers never see them stale.
+PREFETCH_LEAD_SECONDS = int(os.getenv("PREFETCH_LEAD_SECONDS", "60"))
+PREFETCH_RETRY_SECONDS = int(os.getenv("PREFETCH_RETRY_SECONDS", "120"))
+TEMPEST_API_TOKEN = os.getenv("TEMPEST_API_TOKEN")
+TEMPEST_API_KEY = os.getenv("TEMPEST_API_KEY")
+TEMPEST_STATION_ID = int(os.getenv("TEMPEST_STATION_ID", "475329"))
+
+
+def resolve_db_path() -> Path:
+    raw_path = os.getenv("TEMPEST_DB_PATH")
+    if raw_path:
+        path = Path(raw_path)
+        return path if path.is_absolute() else PROJECT_ROOT / path
+    return PROJECT_ROOT / "data" / "tempest.db"
+
+
+def log(message: str) -> None:
+    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    line = f"{ts} | {message}"
+    print(line, flush=True)
+    LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with LOG_PATH.open("a", encoding="utf-8") as file:
+        file.write(line + "\n")
+
+
+def refresh_due(db_path: Path, key: str, now: float) -> bool:
+    entry = read_entry(db_path, key)
+    if entry is None:
+        return True
+    if entry["last_error"] and now - (entry["last_attempt_at"] or 0) < PREFETCH_RETRY_SECONDS:
+        return False
+    return not entry["has_payload"] or now >= entry["expires_at"] - PREFETCH_LEAD_SECONDS
+
+
+def resolve_location(db_path: Path) -> tuple[float | None, float | None]:
+    """Same precedence as the dashboard: enabled override, else the Tempest station."""
+    return shared_resolve_location(db_path, saved_override=False)
+
+
+def prefetch_jobs(db_path: Path) -> list[tuple[str, int, object]]:
+    """(cache key, ttl seconds, fetch) for every endpoint the dashboard and workers read."""
+    jobs = []
+    if TEMPEST_API_TOKEN:
+        jobs.append(
+            (
+                external_data.station_location_key(TEMPEST_STATION_ID),
+                external_data.STATION_LOCATION_TTL_SECONDS,
+                lambda: external_data.fetch_station_location(TEMPEST_API_TOKEN, TEMPEST_STATION_ID),
+            )
+        )
+    lat, lon = resolve_location(db_path)
+    if lat is None or lon is None:
+        return jobs
+    today = datetime.now(timezone.utc).astimezone(ZoneInfo(LOCAL_TZ)).date().isoformat()
+    jobs.extend(
+        [
+            (
+                external_data.sun_times_key(lat, lon, today),
+                external_data.SUN_TIMES_TTL_SECONDS,
+                lambda: external_data.fetch_sun_times(lat, lon, today),
+            ),
+            (
+                external_data.openmeteo_key(lat, lon, LOCAL_TZ),
+                external_data.FORECAST_TTL_SECONDS,
+                lambda: external_data.fetch_openmeteo_json(lat, lon, LOCAL_TZ),
+            ),
+            (
+                external_data.nws_alerts_key(lat, lon, LOCAL_TZ),
+                external_data.NWS_ALERTS_TTL_SECONDS,
+                lambda: external_data.fetch_active_alerts(lat, lon, LOCAL_TZ, get_nws_client(db_path)),
+            ),
+            (
+                external_data.nws_hwo_key(lat, lon),
+                external_data.NWS_HWO_TTL_SECONDS,
+                lambda: external_data.fetch_hwo_text(lat, lon, get_nws_client(db_path)),
+            ),
+        ]
+    )
+    return jobs
+
+
+def run_once(db_path: Path) -> int:
+    refreshed = 0
+    now = time.time()
+    for key, ttl_seconds, fetch in prefetch_jobs(db_path):
+        if not refresh_due(db_path, key, now):
+            continue
+        started = time.monotonic()
+        payload = refresh(db_path, key, ttl_seconds, fetch)
+        elapsed = time.monotonic() - started
+        if payload is None:
+            log(f"WARN: {key} refresh failed after {elapsed:.1f}s; keeping cached copy.")
+            if key.startswith("openmeteo_forecast") and (TEMPEST_API_TOKEN or TEMPEST_API_KEY):
+                # The dashboard falls back to Tempest when Open-Meteo is down; warm that too.
+                lat, lon = resolve_location(db_path)
+                refresh(
+                    db_path,
+                    external_data.tempest_forecast_key(TEMPEST_STATION_ID, lat, lon),
+                    external_data.FORECAST_TTL_SECONDS,
+                    lambda: external_data.fetch_tempest_forecast_json(
+                        TEMPEST_API_TOKEN, TEMPEST_STATION_ID, lat, lon, TEMPEST_API_KEY
+                    ),
+                )
+            continue
+        refreshed += 1
+    return refreshed
+
+
+def main() -> int:
+    db_path = resolve_db_path()
+    if "--once" in sys.argv:
+        log(f"Prefetched {run_once(db_path)} endpoint(s).")
+        return 0
+    log(f"Starting prefetch worker (interval={PREFETCH_INTERVAL_SECONDS}s).")
+    while True:
+        try:
+            run_once(db_path)
+        except Exception as exc:
+            log(f"ERROR: prefetch exception ({exc}).")
+        time.sleep(max(5, PREFETCH_INTERVAL_SECONDS))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+import math
+
+import numpy as np
+
+from src.rollups import RESOLUTIONS, ROLLUP_SOURCES, rollup_table
+
+DEFAULT_TARGET_POINTS = 1500
+
+# Bucket sizes the planner snaps to, so consecutive reruns reuse the same
+# boundaries (and the same cached query results).
+NICE_BUCKETS = [
+    60, 120, 180, 300, 600, 900, 1200, 1800,
+    3600, 7200, 10800, 21600, 43200,
+    86400, 2 * 86400, 7 * 86400, 14 * 86400, 30 * 86400,
+]
+
+# Native sample interval of each raw table (seconds)
+RAW_INTERVALS = {
+    "obs_st": 60,
+    "airlink": 15,
+}
+
+AGGREGATES = ("mean", "min", "max", "last", "sum")
+
+
+def nice_bucket(seconds: float) -> int:
+    for bucket in NICE_BUCKETS:
+        if bucket >= seconds:
+            return bucket
+    return NICE_BUCKETS[-1]
+
+
+def plan_window(
+    source: str,
+    span_seconds: float,
+    target_points: int = DEFAULT_TARGET_POINTS,
+    available_resolutions=None,
+) -> dict:
+    """
+    Decide how to read a time window so each series has about target_points rows.
+
+    Returns {"mode": "raw" | "bucket", "bucket_seconds": int, "resolution": str | None}.
+    "bucket" reads GROUP BY time / bucket from the coarsest rollup whose
+    resolution fits inside the bucket (or the raw table when none does).
+    """
+    span_seconds = max(0.0, float(span_seconds))
+    ideal = span_seconds / max(1, target_points)
+    raw_interval = RAW_INTERVALS.get(source, 60)
+    if ideal <= raw_interval:
+        return {"mode": "raw", "bucket_seconds": raw_interval, "resolution": None}
+
+    bucket = nice_bucket(ideal)
+    if available_resolutions is None:
+        available_resolutions = list(RESOLUTIONS)
+    resolution = None
+    for name in sorted(available_resolutions, key=lambda key: RESOLUTIONS[key]):
+        if RESOLUTIONS[name] <= bucket and bucket % RESOLUTIONS[name] == 0:
+            resolution = name
+    return {"mode": "bucket", "bucket_seconds": bucket, "resolution": resolution}
+
+
+def _bucket_exprs(fields: dict, from_rollup: bool) -> tuple[list, list]:
+    agg_exprs = []
+    last_fields = []
+    for alias, agg in fields.items():
+        if agg not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate {agg!r} for {alias}")
+        if agg == "last":
+            last_fields.append(alias)
+            continue
+        if not from_rollup:
+            sql_fn = {"mean": "AVG", "min": "MIN", "max": "MAX", "sum": "SUM"}[agg]
+            agg_exprs.append(f"{sql_fn}({alias}) AS {alias}")
+        elif agg == "mean":
+            # Weight bucket means by their sample counts
+            agg_exprs.append(
+                f"SUM({alias}_mean * sample_count) / NULLIF(SUM(CASE WHEN {alias}_mean IS NOT NULL "
+                f"THEN sample_count END), 0) AS {alias}"
+            )
+        else:
+            sql_fn = {"min": "MIN", "max": "MAX", "sum": "SUM"}[agg]
+            agg_exprs.append(f"{sql_fn}({alias}_{agg}) AS {alias}")
+    return agg_exprs, last_fields
+
+
+def window_query_sql(source: str, plan: dict, fields: dict, until: bool = False) -> str:
+    """
+    SQL for a planned window. Columns come back under their raw names so the
+    result feeds the same transforms as raw rows. Binds :since / :until.
+
+    `fields` maps raw column -> aggregate ("mean", "min", "max", "last", "sum").
+    In raw mode every field is selected as-is.
+    """
+    spec = ROLLUP_SOURCES[source]
+    time_col = spec["time_col"]
+    raw_table = spec["table"]
+    until_clause = f"AND {time_col} <= :until" if until else ""
+
+    if plan["mode"] == "raw":
+        return f"""
+            SELECT {time_col}, {", ".join(fields)}
+            FROM {raw_table}
+            WHERE {time_col} >= :since
+            {until_clause}
+            ORDER BY {time_col}
+        """
+
+    bucket = int(plan["bucket_seconds"])
+    resolution = plan.get("resolution")
+    from_rollup = resolution is not None
+    if from_rollup:
+        table = rollup_table(source, resolution)
+        src_time = "bucket_epoch"
+        last_col = "{alias}_last"
+    else:
+        table = raw_table
+        src_time = time_col
+        last_col = "{alias}"
+    src_until = f"AND {src_time} <= :until" if until else ""
+
+    key_col = spec["key_col"]
+    # Rollup rows order by their newest sample, not by bucket start.
+    order_time = "last_epoch" if from_rollup else src_time
+    agg_exprs, last_fields = _bucket_exprs(fields, from_rollup)
+    in_bucket = (
+        f"{{t}}.{src_time} >= agg.{time_col} AND {{t}}.{src_time} < agg.{time_col} + {bucket} "
+        f"AND {{t}}.{src_time} >= :since"
+    ) + (f" AND {{t}}.{src_time} <= :until" if until else "")
+    # Every "last" value comes from one row: the newest sample in the bucket,
+    # from the lowest key when several devices report at that instant.
+    last_exprs = [
+        f"(SELECT {last_col.format(alias=alias)} FROM {table} AS l "
+        f"WHERE l.{key_col} = agg._last_key AND {in_bucket.format(t='l')} "
+        f"AND l.{order_time} = agg._last_time) AS {alias}"
+        for alias in last_fields
+    ]
+    inner = [f"({src_time} / {bucket}) * {bucket} AS {time_col}", f"MAX({order_time}) AS _last_time"] + agg_exprs
+    outer = [f"agg.{time_col}"] + [f"agg.{expr.rsplit(' AS ', 1)[1]}" for expr in agg_exprs] + last_exprs
+    grouped = f"""
+          SELECT {", ".join(inner)}
+          FROM {table}
+          WHERE {src_time} >= :since
+          {src_until}
+          GROUP BY 1
+    """
+    if last_fields:
+        grouped = f"""
+          SELECT agg.*, (
+            SELECT k.{key_col} FROM {table} AS k
+            WHERE {in_bucket.format(t='k')} AND k.{order_time} = agg._last_time
+            ORDER BY k.{key_col}
+            LIMIT 1
+          ) AS _last_key
+          FROM ({grouped}) AS agg
+        """
+    return f"""
+        SELECT {", ".join(outer)}
+        FROM ({grouped}) AS agg
+        ORDER BY agg.{time_col}
+    """
+
+
+def lttb_indices(x, y, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of n_out points that keep the
+    visual shape (peaks and troughs) of the series. NaN values are skipped.
+    """
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    valid = np.flatnonzero(~(np.isnan(x) | np.isnan(y)))
+    n = len(valid)
+    if n_out >= n or n_out < 3:
+        return valid
+    xv = x[valid]
+    yv = y[valid]
+
+    selected = np.empty(n_out, dtype="int64")
+    selected[0] = 0
+    selected[-1] = n - 1
+    every = (n - 2) / (n_out - 2)
+    a = 0
+    for i in range(n_out - 2):
+        start = int(math.floor(i * every)) + 1
+        end = int(math.floor((i + 1) * every)) + 1
+        next_end = min(int(math.floor((i + 2) * every)) + 1, n)
+        if end >= next_end:
+            avg_x, avg_y = xv[n - 1], yv[n - 1]
+        else:
+            avg_x = xv[end:next_end].mean()
+            avg_y = yv[end:next_end].mean()
+        bx = xv[start:end]
+        by = yv[start:end]
+        area = np.abs((xv[a] - avg_x) * (by - yv[a]) - (xv[a] - bx) * (avg_y - yv[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return valid[selected]
+
+
+def downsample_frame(df, time_col: str, value_col: str, target_points: int = DEFAULT_TARGET_POINTS):
+    """LTTB-downsample one series frame; frames already under target are returned as-is."""
+    if df is None or len(df) <= target_points:
+        return df
+    times = df[time_col]
+    if hasattr(times, "dt"):
+        x = (times - times.iloc[0]).dt.total_seconds().to_numpy(dtype="float64")
+    else:
+        x = times.to_numpy(dtype="float64")
+    idx = lttb_indices(x, df[value_col].to_numpy(dtype="float64"), target_points)
+    return df.iloc[idx]
@@ -0,0 +1,454 @@
+"""
+Monthly archive shards for the raw capture tables.
+
+    python -m src.raw_archive --run [--older-than-days 90]
+    python -m src.raw_archive --list
+    python -m src.raw_archive --export --since 2024-01-01 --until 2024-02-01 [--table airlink_raw_all]
+    python -m src.raw_archive --rebuild-obs --since 2024-01-01 --until 2024-02-01
+
+raw_events and airlink_raw_all rows older than RAW_ARCHIVE_AFTER_DAYS move
+into one SQLite file per UTC month under RAW_ARCHIVE_DIR
+(raw-YYYY-MM.db). Shards store each payload once, compressed, in a
+raw_payloads table like compact mode (src/raw_store.py). The
+raw_archive_manifest table in the hot database lists every shard with its
+row count and time range. read_raw_events() ATTACHes the shards a time
+range needs, one at a time, and merges them with the hot rows; --export and
+--rebuild-obs (re-parse obs_st from the raw messages) read through it.
+
+Each batch is written and committed to its shard before the hot rows are
+deleted. An interrupted run therefore leaves rows in both places, and the
+next run skips the copies by id. Freed pages in the hot database are reused
+by new rows, so its size stays bounded; run VACUUM once after the first
+archive to hand the backlog back to the filesystem.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from src.raw_store import (
+    RAW_PAYLOADS_SCHEMA_SQL,
+    RAW_PAYLOADS_TABLE,
+    decompress_payload,
+    payload_fingerprint,
+    payload_row,
+)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+RAW_ARCHIVE_AFTER_DAYS = int(os.getenv("RAW_ARCHIVE_AFTER_DAYS", "0"))
+RAW_ARCHIVE_BATCH_ROWS = int(os.getenv("RAW_ARCHIVE_BATCH_ROWS", "5000"))
+MANIFEST_TABLE = "raw_archive_manifest"
+SHARD_ALIAS = "shard"
+
+# Archived tables: the columns copied as is, and the SQL that yields the payload
+# text, codec and blob in the hot table (compact raw_events rows keep theirs in
+# raw_payloads).
+ARCHIVE_TABLES = {
+    "raw_events": {
+        "columns": ("id", "received_at_epoch", "device_id", "message_type"),
+        "shard_sql": """
+            CREATE TABLE IF NOT EXISTS raw_events (
+              id INTEGER PRIMARY KEY,
+              received_at_epoch INTEGER NOT NULL,
+              device_id INTEGER,
+              message_type TEXT,
+              payload_hash TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_raw_events_received_at ON raw_events(received_at_epoch);
+        """,
+    },
+    "airlink_raw_all": {
+        "columns": ("id", "received_at_epoch", "host", "did", "ts", "lsid"),
+        "shard_sql": """
+            CREATE TABLE IF NOT EXISTS airlink_raw_all (
+              id INTEGER PRIMARY KEY,
+              received_at_epoch INTEGER NOT NULL,
+              host TEXT,
+              did TEXT,
+              ts INTEGER,
+              lsid INTEGER,
+              payload_hash TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_airlink_raw_all_received ON airlink_raw_all(received_at_epoch);
+        """,
+    },
+}
+
+
+def resolve_db_path() -> Path:
+    raw_path = os.getenv("TEMPEST_DB_PATH")
+    if raw_path:
+        path = Path(raw_path)
+        return path if path.is_absolute() else PROJECT_ROOT / path
+    return PROJECT_ROOT / "data" / "tempest.db"
+
+
+def resolve_archive_dir(db_path: str | Path | None = None) -> Path:
+    """RAW_ARCHIVE_DIR, or an archive/ directory next to the database."""
+    raw_dir = os.getenv("RAW_ARCHIVE_DIR")
+    if raw_dir:
+        path = Path(raw_dir)
+        return path if path.is_absolute() else PROJECT_ROOT / path
+    return Path(db_path or resolve_db_path()).parent / "archive"
+
+
+def month_key(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m")
+
+
+def shard_name(month: str) -> str:
+    return f"raw-{month}.db"
+
+
+def table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)).fetchone()
+    return row is not None
+
+
+def ensure_manifest_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {MANIFEST_TABLE} (
+            month TEXT NOT NULL,
+            table_name TEXT NOT NULL,
+            shard TEXT NOT NULL,
+            row_count INTEGER NOT NULL,
+            min_epoch INTEGER,
+            max_epoch INTEGER,
+            file_bytes INTEGER,
+            updated_at REAL,
+            PRIMARY KEY (month, table_name)
+        )
+        """
+    )
+
+
+def load_manifest(conn: sqlite3.Connection, table: str | None = None) -> list[dict]:
+    if not table_exists(conn, MANIFEST_TABLE):
+        return []
+    sql = f"SELECT month, table_name, shard, row_count, min_epoch, max_epoch, file_bytes FROM {MANIFEST_TABLE}"
+    params: tuple = ()
+    if table:
+        sql += " WHERE table_name = ?"
+        params = (table,)
+    keys = ("month", "table_name", "shard", "row_count", "min_epoch", "max_epoch", "file_bytes")
+    return [dict(zip(keys, row)) for row in conn.execute(sql + " ORDER BY month, table_name", params)]
+
+
+def archive_bytes(conn: sqlite3.Connection) -> int:
+    """Total size of the shard files listed in the manifest."""
+    shards = {entry["shard"]: entry["file_bytes"] or 0 for entry in load_manifest(conn)}
+    return sum(shards.values())
+
+
+def _hot_select(conn: sqlite3.Connection, table: str) -> str:
+    columns = ", ".join(f"t.{column}" for column in ARCHIVE_TABLES[table]["columns"])
+    if table == "raw_events":
+        if table_exists(conn, RAW_PAYLOADS_TABLE):
+            return f"""
+                SELECT {columns}, t.payload_text, t.payload_json, t.payload_hash, p.codec, p.payload_blob, p.raw_size
+                FROM raw_events t
+                LEFT JOIN {RAW_PAYLOADS_TABLE} p ON t.payload_text IS NULL AND p.payload_hash = t.payload_hash
+            """
+        return f"""
+            SELECT {columns}, t.payload_text, t.payload_json, t.payload_hash, NULL, NULL, NULL
+            FROM raw_events t
+        """
+    return f"SELECT {columns}, t.payload_json, NULL, NULL, NULL, NULL, NULL FROM {table} t"
+
+
+def _shard_rows(table: str, rows: list[tuple]) -> tuple[list[tuple], dict[str, tuple]]:
+    """Split hot rows into shard table rows and content-addressed payload rows."""
+    width = len(ARCHIVE_TABLES[table]["columns"])
+    table_rows = []
+    payloads = {}
+    for row in rows:
+        text, payload_json, payload_hash, codec, blob, raw_size = row[width:]
+        if blob is not None:
+            # Compact row: copy the stored blob without recompressing.
+            payloads.setdefault(payload_hash, (payload_hash, codec, blob, raw_size))
+        else:
+            text = text if text else (payload_json or "")
+            payload_hash = payload_fingerprint(text)
+            if payload_hash not in payloads:
+                payloads[payload_hash] = payload_row(payload_hash, text)
+        table_rows.append((*row[:width], payload_hash))
+    return table_rows, payloads
+
+
+def write_shard(path: Path, table: str, table_rows: list[tuple], payloads) -> tuple[int, int, int]:
+    """Insert rows into the shard (skipping ids already there); returns (rows, min_epoch, max_epoch)."""
+    columns = ARCHIVE_TABLES[table]["columns"] + ("payload_hash",)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with sqlite3.connect(path) as shard:
+        shard.executescript(RAW_PAYLOADS_SCHEMA_SQL + ARCHIVE_TABLES[table]["shard_sql"])
+        shard.executemany(
+            f"INSERT OR IGNORE INTO {RAW_PAYLOADS_TABLE}(payload_hash, codec, payload_blob, raw_size) VALUES (?,?,?,?)",
+            payloads,
+        )
+        shard.executemany(
+            f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+            table_rows,
+        )
+        shard.commit()
+        count, low, high = shard.execute(
+            f"SELECT COUNT(*), MIN(received_at_epoch), MAX(received_at_epoch) FROM {table}"
+        ).fetchone()
+    shard.close()
+    return count, low, high
+
+
+def _record_shard(conn: sqlite3.Connection, month: str, table: str, path: Path, stats: tuple[int, int, int]) -> None:
+    conn.execute(
+        f"""
+        INSERT INTO {MANIFEST_TABLE} (month, table_name, shard, row_count, min_epoch, max_epoch, file_bytes, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(month, table_name) DO UPDATE SET
+          shard=excluded.shard, row_count=excluded.row_count, min_epoch=excluded.min_epoch,
+          max_epoch=excluded.max_epoch, file_bytes=excluded.file_bytes, updated_at=excluded.updated_at
+        """,
+        (month, table, path.name, *stats, path.stat().st_size, time.time()),
+    )
+
+
+def _drop_orphan_payloads(conn: sqlite3.Connection, hashes) -> None:
+    """Delete hot raw_payloads rows that no remaining raw_events row references."""
+    if not table_exists(conn, RAW_PAYLOADS_TABLE):
+        return
+    conn.executemany(
+        f"""
+        DELETE FROM {RAW_PAYLOADS_TABLE}
+        WHERE payload_hash = ? AND NOT EXISTS (SELECT 1 FROM raw_events WHERE payload_hash = ?)
+        """,
+        [(payload_hash, payload_hash) for payload_hash in hashes],
+    )
+
+
+def archive_table(
+    conn: sqlite3.Connection,
+    table: str,
+    cutoff_epoch: int,
+    archive_dir: Path,
+    batch_rows: int = RAW_ARCHIVE_BATCH_ROWS,
+    log=print,
+) -> int:
+    """Move rows received before cutoff_epoch into monthly shards; returns rows moved."""
+    if not table_exists(conn, table):
+        return 0
+    ensure_manifest_table(conn)
+    select = _hot_select(conn, table)
+    moved = 0
+    while True:
+        rows = conn.execute(
+            f"{select} WHERE t.received_at_epoch < ? ORDER BY t.received_at_epoch, t.id LIMIT ?",
+            (cutoff_epoch, batch_rows),
+        ).fetchall()
+        if not rows:
+            break
+        by_month: dict[str, list[tuple]] = {}
+        for row in rows:
+            by_month.setdefault(month_key(int(row[1])), []).append(row)
+        for month, month_rows in by_month.items():
+            table_rows, payloads = _shard_rows(table, month_rows)
+            path = archive_dir / shard_name(month)
+            stats = write_shard(path, table, table_rows, payloads.values())
+            _record_shard(conn, month, table, path, stats)
+        conn.executemany(f"DELETE FROM {table} WHERE id = ?", [(row[0],) for row in rows])
+        if table == "raw_events":
+            _drop_orphan_payloads(conn, {row[-4] for row in rows if row[-4]})
+        conn.commit()
+        moved += len(rows)
+        log(f"Raw archive: {moved} {table} rows moved (through {month_key(int(rows[-1][1]))})")
+    return moved
+
+
+def run_archive(
+    db_path: str | Path,
+    older_than_days: int = RAW_ARCHIVE_AFTER_DAYS,
+    archive_dir: Path | None = None,
+    now: float | None = None,
+    log=print,
+) -> dict[str, int]:
+    """Archive both raw tables; a no-op when older_than_days is 0 (the default)."""
+    if older_than_days <= 0:
+        return {}
+    archive_dir = archive_dir or resolve_archive_dir(db_path)
+    cutoff = int((time.time() if now is None else now) - older_than_days * 86400)
+    moved = {}
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        conn.execute("PRAGMA busy_timeout=30000")
+        for table in ARCHIVE_TABLES:
+            moved[table] = archive_table(conn, table, cutoff, archive_dir, log=log)
+        if any(moved.values()):
+            # Shrink the WAL the deletes grew.
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+    return moved
+
+
+def _shard_query(table: str, where: str, order: str) -> str:
+    columns = ", ".join(f"t.{column}" for column in ARCHIVE_TABLES[table]["columns"])
+    return f"""
+        SELECT {columns}, p.codec, p.payload_blob
+        FROM {SHARD_ALIAS}.{table} t
+        LEFT JOIN {SHARD_ALIAS}.{RAW_PAYLOADS_TABLE} p ON p.payload_hash = t.payload_hash
+        WHERE {where}
+        ORDER BY t.received_at_epoch {order}, t.id {order}
+    """
+
+
+def _hot_rows(conn, table, start_epoch, end_epoch, order, limit) -> list[dict]:
+    columns = ARCHIVE_TABLES[table]["columns"]
+    rows = conn.execute(
+        f"""
+        {_hot_select(conn, table)}
+        WHERE t.received_at_epoch >= ? AND t.received_at_epoch < ?
+        ORDER BY t.received_at_epoch {order}, t.id {order}
+        {"LIMIT ?" if limit else ""}
+        """,
+        (start_epoch, end_epoch, *([limit] if limit else [])),
+    ).fetchall()
+    result = []
+    for row in rows:
+        text, payload_json, _, codec, blob, _ = row[len(columns):]
+        if blob is not None:
+            text = decompress_payload(codec, blob)
+        result.append({**dict(zip(columns, row)), "payload_text": text or payload_json})
+    return result
+
+
+def read_raw_events(
+    conn: sqlite3.Connection,
+    table: str,
+    start_epoch: int,
+    end_epoch: int,
+    limit: int | None = None,
+    newest_first: bool = False,
+    archive_dir: Path | None = None,
+) -> list[dict]:
+    """
+    Raw rows received in [start_epoch, end_epoch) from the hot table and any
+    shards covering the range, with the payload text decoded. Shards are
+    ATTACHed one at a time and DETACHed before returning.
+    """
+    if table not in ARCHIVE_TABLES:
+        raise ValueError(f"unknown raw table {table!r}")
+    order = "DESC" if newest_first else "ASC"
+    archive_dir = archive_dir or resolve_archive_dir(conn.execute("PRAGMA database_list").fetchone()[2] or None)
+    shards = [
+        entry
+        for entry in load_manifest(conn, table)
+        if entry["min_epoch"] is not None and entry["min_epoch"] < end_epoch and entry["max_epoch"] >= start_epoch
+    ]
+    shards.sort(key=lambda entry: entry["month"], reverse=newest_first)
+
+    columns = ARCHIVE_TABLES[table]["columns"]
+    results: list[dict] = []
+    hot = _hot_rows(conn, table, start_epoch, end_epoch, order, limit) if table_exists(conn, table) else []
+    if newest_first:
+        results.extend(hot)
+    for entry in shards:
+        if limit and newest_first and len(results) >= limit:
+            break
+        path = archive_dir / entry["shard"]
+        if not path.exists():
+            continue
+        conn.execute(f"ATTACH DATABASE ? AS {SHARD_ALIAS}", (str(path),))
+        try:
+            rows = conn.execute(
+                _shard_query(table, "t.received_at_epoch >= ? AND t.received_at_epoch < ?", order)
+                + ("LIMIT ?" if limit else ""),
+                (start_epoch, end_epoch, *([limit] if limit else [])),
+            ).fetchall()
+        finally:
+            conn.execute(f"DETACH DATABASE {SHARD_ALIAS}")
+        for row in rows:
+            codec, blob = row[len(columns):]
+            text = decompress_payload(codec, blob) if blob is not None else None
+            results.append({**dict(zip(columns, row)), "payload_text": text})
+        if limit and not newest_first and len(results) >= limit:
+            break
+    if not newest_first:
+        results.extend(hot)
+    # Rows archived by an interrupted run can be in the hot table and a shard.
+    unique = {row["id"]: row for row in results}
+    merged = sorted(unique.values(), key=lambda row: (row["received_at_epoch"], row["id"]), reverse=newest_first)
+    return merged[:limit] if limit else merged
+
+
+def rebuild_obs_st(conn: sqlite3.Connection, start_epoch: int, end_epoch: int, log=print) -> int:
+    """Re-insert obs_st rows parsed from the raw obs_st messages (hot and archived) in a range."""
+    # The collector module reads its env (TEMPEST_API_TOKEN) on import.
+    from src import collector
+    from src.rollups import refresh_rollups
+
+    rows = []
+    for event in read_raw_events(conn, "raw_events", start_epoch, end_epoch):
+        if event["message_type"] != "obs_st":
+            continue
+        try:
+            data = json.loads(event["payload_text"] or "")
+        except ValueError:
+            continue
+        for obs in data.get("obs") or []:
+            row = collector.obs_st_row(data.get("device_id"), obs)
+            if row is not None:
+                rows.append(row)
+    if rows:
+        collector.write_obs_rows(conn, rows)
+        refresh_rollups(conn, "obs_st", min(row[0] for row in rows), max(row[0] for row in rows))
+        conn.commit()
+    log(f"Rebuilt obs_st from {len(rows)} raw observations")
+    return len(rows)
+
+
+def _parse_day(value: str) -> int:
+    return int(datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Archive old raw rows into monthly shard files.")
+    parser.add_argument("--run", action="store_true", help="move old rows into shards")
+    parser.add_argument("--older-than-days", type=int, default=RAW_ARCHIVE_AFTER_DAYS or 90)
+    parser.add_argument("--list", action="store_true", help="list archived shards")
+    parser.add_argument("--export", action="store_true", help="print raw rows as JSON lines")
+    parser.add_argument("--rebuild-obs", action="store_true", help="re-insert obs_st rows from raw messages in the range")
+    parser.add_argument("--table", default="raw_events", choices=sorted(ARCHIVE_TABLES))
+    parser.add_argument("--since", help="export start (YYYY-MM-DD, UTC)")
+    parser.add_argument("--until", help="export end, exclusive (YYYY-MM-DD, UTC)")
+    args = parser.parse_args()
+
+    db_path = resolve_db_path()
+    if not db_path.exists():
+        print(f"DB not found: {db_path}")
+        return 1
+    if args.run:
+        moved = run_archive(db_path, args.older_than_days)
+        print(", ".join(f"{table}: {count} rows" for table, count in moved.items()) or "nothing to archive")
+    with sqlite3.connect(db_path) as conn:
+        if args.list:
+            for entry in load_manifest(conn):
+                print(
+                    f"{entry['month']}  {entry['table_name']:16s} {entry['row_count']:>9,d} rows  "
+                    f"{(entry['file_bytes'] or 0) / 2**20:8.1f} MiB  {entry['shard']}"
+                )
+        start = _parse_day(args.since) if args.since else 0
+        end = _parse_day(args.until) if args.until else int(time.time()) + 1
+        if args.export:
+            for row in read_raw_events(conn, args.table, start, end):
+                print(json.dumps(row, separators=(",", ":")))
+        if args.rebuild_obs:
+            rebuild_obs_st(conn, start, end)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,320 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+
+try:
+    import zstandard
+except Exception:
+    zstandard = None
+
+from src.config_store import get_config, set_config
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+DB_PATH = Path(os.getenv("TEMPEST_DB_PATH", str(PROJECT_ROOT / "data" / "tempest.db")))
+if not DB_PATH.is_absolute():
+    DB_PATH = PROJECT_ROOT / DB_PATH
+
+RAW_PAYLOADS_TABLE = "raw_payloads"
+COMPACT_CHUNK_ROWS = 5000
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 9
+# app_config keys holding how far earlier runs got, so a restart only looks at newer rows.
+COMPACT_RAW_EVENTS_MARK = "raw_compact_raw_events_id"
+COMPACT_OBS_ST_MARK = "raw_compact_obs_st_rowid"
+
+# raw_events rows written in compact mode keep payload_json NOT NULL with this
+# marker; the text lives once in raw_payloads, keyed by payload_hash.
+COMPACT_PAYLOAD_JSON = ""
+
+RAW_PAYLOADS_SCHEMA_SQL = f"""
+CREATE TABLE IF NOT EXISTS {RAW_PAYLOADS_TABLE} (
+  payload_hash TEXT PRIMARY KEY,
+  codec TEXT NOT NULL,
+  payload_blob BLOB NOT NULL,
+  raw_size INTEGER NOT NULL
+);
+"""
+
+
+def payload_fingerprint(payload_text: str) -> str:
+    return hashlib.sha256(payload_text.encode("utf-8", errors="replace")).hexdigest()
+
+
+def compact_enabled() -> bool:
+    return os.getenv("TEMPEST_RAW_COMPACT", "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+def default_codec() -> str:
+    return "zstd" if zstandard is not None else "zlib"
+
+
+def compress_payload(payload_text: str, codec: str | None = None) -> tuple[str, bytes]:
+    codec = codec or default_codec()
+    raw = payload_text.encode("utf-8", errors="replace")
+    if codec == "zstd" and zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    return "zlib", zlib.compress(raw, ZLIB_LEVEL)
+
+
+def decompress_payload(codec: str, payload_blob: bytes) -> str:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed payloads")
+        raw = zstandard.ZstdDecompressor().decompress(payload_blob)
+    else:
+        raw = zlib.decompress(payload_blob)
+    return raw.decode("utf-8", errors="replace")
+
+
+def derive_payload_json(payload_text: str | None) -> str:
+    """Rebuild the normalized payload_json the collector used to store."""
+    if not payload_text:
+        return "{}"
+    try:
+        return json.dumps(json.loads(payload_text), separators=(",", ":"))
+    except Exception:
+        return "{}"
+
+
+def ensure_raw_payloads_table(conn: sqlite3.Connection) -> None:
+    # Plain execute: executescript() would commit the caller's open transaction.
+    conn.execute(RAW_PAYLOADS_SCHEMA_SQL)
+
+
+def payload_row(payload_hash: str, payload_text: str) -> tuple:
+    codec, blob = compress_payload(payload_text)
+    return (payload_hash, codec, blob, len(payload_text))
+
+
+def store_payload_rows(conn: sqlite3.Connection, rows) -> None:
+    conn.executemany(
+        f"""
+        INSERT OR IGNORE INTO {RAW_PAYLOADS_TABLE}(payload_hash, codec, payload_blob, raw_size)
+        VALUES (?,?,?,?)
+        """,
+        rows,
+    )
+
+
+def load_payload_text(conn: sqlite3.Connection, payload_hash: str) -> str | None:
+    row = conn.execute(
+        f"SELECT codec, payload_blob FROM {RAW_PAYLOADS_TABLE} WHERE payload_hash = ?",
+        (payload_hash,),
+    ).fetchone()
+    if not row:
+        return None
+    return decompress_payload(row[0], row[1])
+
+
+def raw_event_text(conn: sqlite3.Connection, payload_text, payload_json, payload_hash) -> str | None:
+    """Return the original text for a raw_events row in either storage mode."""
+    if payload_text:
+        return payload_text
+    if payload_hash:
+        text = load_payload_text(conn, payload_hash)
+        if text is not None:
+            return text
+    return payload_json or None
+
+
+def table_bytes(conn: sqlite3.Connection) -> dict:
+    """Per-table (and per-index) on-disk bytes via dbstat; empty if unavailable."""
+    try:
+        rows = conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").fetchall()
+    except sqlite3.Error:
+        return {}
+    return {name: int(size or 0) for name, size in rows}
+
+
+def raw_storage_bytes(conn: sqlite3.Connection) -> dict:
+    sizes = table_bytes(conn)
+    if not sizes:
+        return {}
+
+    def total(names):
+        return sum(size for name, size in sizes.items() if name in names)
+
+    raw_indexes = {
+        name
+        for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='index' AND tbl_name IN ('raw_events', ?)",
+            (RAW_PAYLOADS_TABLE,),
+        ).fetchall()
+    }
+    return {
+        "raw_events": total({"raw_events"}),
+        "raw_payloads": total({RAW_PAYLOADS_TABLE}),
+        "raw_indexes": total(raw_indexes),
+        "obs_st": total({"obs_st", "obs_st_raw"}),
+    }
+
+
+def _compact_mark(conn: sqlite3.Connection, key: str) -> int:
+    try:
+        return int(get_config(conn, key) or 0)
+    except (ValueError, sqlite3.Error):
+        return 0
+
+
+def compact_existing_rows(
+    conn: sqlite3.Connection,
+    chunk_rows: int = COMPACT_CHUNK_ROWS,
+    log=print,
+    full: bool = False,
+) -> dict:
+    """
+    Move raw text for existing raw_events rows into raw_payloads, chunk by chunk.
+
+    Each chunk commits on its own so readers are never blocked for long and an
+    interrupted run simply resumes where it stopped. Freed pages are reused by
+    new inserts; run VACUUM to hand them back to the filesystem.
+
+    The last raw_events id and obs_st rowid examined are kept in app_config,
+    so the collector's run at every start only reads rows added since; full
+    re-examines every row (python -m src.raw_store). The dbstat size walk
+    only runs when there is something to move.
+    """
+    ensure_raw_payloads_table(conn)
+    before = None
+    started = time.time()
+    moved = 0
+    last_id = 0 if full else _compact_mark(conn, COMPACT_RAW_EVENTS_MARK)
+    end_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM raw_events").fetchone()[0]
+
+    while True:
+        rows = conn.execute(
+            """
+            SELECT id, payload_text, payload_json, payload_hash
+            FROM raw_events
+            WHERE id > ? AND id <= ? AND payload_json <> ?
+            ORDER BY id
+            LIMIT ?
+            """,
+            (last_id, end_id, COMPACT_PAYLOAD_JSON, chunk_rows),
+        ).fetchall()
+        if not rows:
+            break
+        if before is None:
+            before = raw_storage_bytes(conn)
+
+        payload_rows = {}
+        updates = []
+        for row_id, payload_text, payload_json, payload_hash in rows:
+            text = payload_text if payload_text is not None else payload_json
+            if not payload_hash:
+                payload_hash = payload_fingerprint(text)
+            if payload_hash not in payload_rows:
+                payload_rows[payload_hash] = payload_row(payload_hash, text)
+            updates.append((COMPACT_PAYLOAD_JSON, payload_hash, row_id))
+            last_id = row_id
+
+        store_payload_rows(conn, payload_rows.values())
+        conn.executemany(
+            "UPDATE raw_events SET payload_text = NULL, payload_json = ?, payload_hash = ? WHERE id = ?",
+            updates,
+        )
+        conn.commit()
+        moved += len(updates)
+        log(f"Raw compaction: {moved} rows moved to {RAW_PAYLOADS_TABLE}")
+
+    if end_id:
+        set_config(conn, COMPACT_RAW_EVENTS_MARK, end_id)
+
+    cleared = 0
+    obs_columns = [r[1] for r in conn.execute("PRAGMA table_info(obs_st)").fetchall()]
+    if "obs_raw_json" in obs_columns:
+        last_rowid = 0 if full else _compact_mark(conn, COMPACT_OBS_ST_MARK)
+        end_rowid = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM obs_st").fetchone()[0]
+        while True:
+            rowids = [
+                r[0]
+                for r in conn.execute(
+                    """
+                    SELECT rowid FROM obs_st
+                    WHERE rowid > ? AND rowid <= ? AND obs_raw_json IS NOT NULL
+                    ORDER BY rowid
+                    LIMIT ?
+                    """,
+                    (last_rowid, end_rowid, chunk_rows),
+                ).fetchall()
+            ]
+            if not rowids:
+                break
+            if before is None:
+                before = raw_storage_bytes(conn)
+            conn.executemany(
+                "UPDATE obs_st SET obs_raw_json = NULL WHERE rowid = ?",
+                [(rowid,) for rowid in rowids],
+            )
+            conn.commit()
+            cleared += len(rowids)
+            last_rowid = rowids[-1]
+        if end_rowid:
+            set_config(conn, COMPACT_OBS_ST_MARK, end_rowid)
+    elif conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='obs_st_raw'").fetchone():
+        # Clustered layout (src/obs_layout.py) keeps obs_raw_json in a side table.
+        if before is None and conn.execute("SELECT 1 FROM obs_st_raw LIMIT 1").fetchone():
+            before = raw_storage_bytes(conn)
+        while True:
+            deleted = conn.execute(
+                """
+                DELETE FROM obs_st_raw WHERE (device_id, obs_epoch) IN (
+                    SELECT device_id, obs_epoch FROM obs_st_raw ORDER BY device_id, obs_epoch LIMIT ?
+                )
+                """,
+                (chunk_rows,),
+            ).rowcount
+            conn.commit()
+            if not deleted:
+                break
+            cleared += deleted
+
+    after = raw_storage_bytes(conn) if before is not None else {}
+    summary = {
+        "rows_moved": moved,
+        "obs_raw_json_cleared": cleared,
+        "before": before or {},
+        "after": after,
+        "seconds": round(time.time() - started, 1),
+    }
+    if moved or cleared:
+        try:
+            set_config(conn, "raw_compact_last_run", json.dumps(summary, separators=(",", ":")))
+        except Exception:
+            pass
+        log(
+            "Raw compaction done: "
+            f"{moved} raw rows, {cleared} obs_raw_json cleared in {summary['seconds']}s "
+            f"(before={before}, after={after})"
+        )
+    return summary
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compact raw_events payloads into raw_payloads.")
+    parser.add_argument("--db", default=str(DB_PATH))
+    parser.add_argument("--chunk", type=int, default=COMPACT_CHUNK_ROWS)
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM afterwards to shrink the file")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db, timeout=15)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    conn.execute("PRAGMA busy_timeout=5000;")
+    try:
+        compact_existing_rows(conn, chunk_rows=max(100, args.chunk), full=True)
+        if args.vacuum:
+            print("Running VACUUM...")
+            conn.execute("VACUUM")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,270 @@
+import argparse
+import os
+import sqlite3
+import time
+from functools import lru_cache
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+DB_PATH = Path(os.getenv("TEMPEST_DB_PATH", str(PROJECT_ROOT / "data" / "tempest.db")))
+if not DB_PATH.is_absolute():
+    DB_PATH = PROJECT_ROOT / DB_PATH
+
+# Bucket sizes (seconds). Daily buckets are UTC days.
+RESOLUTIONS = {
+    "5m": 300,
+    "1h": 3600,
+    "1d": 86400,
+}
+
+# Per source: raw table, time/key columns, gauge metrics (min/max/mean/last)
+# and counter metrics summed per bucket (rain delta, strike totals).
+ROLLUP_SOURCES = {
+    "obs_st": {
+        "table": "obs_st",
+        "time_col": "obs_epoch",
+        "key_col": "device_id",
+        "key_type": "INTEGER",
+        "metrics": [
+            "air_temperature",
+            "relative_humidity",
+            "station_pressure",
+            "wind_lull",
+            "wind_avg",
+            "wind_gust",
+            "wind_dir",
+            "illuminance",
+            "uv",
+            "solar_radiation",
+            "rain_accumulated",
+            "lightning_avg_dist",
+            "battery",
+        ],
+        "sums": ["rain_accumulated", "lightning_strike_count"],
+    },
+    "airlink": {
+        "table": "airlink_current_obs",
+        "time_col": "ts",
+        "key_col": "did",
+        "key_type": "TEXT",
+        "metrics": [
+            "temp_f",
+            "hum",
+            "dew_point_f",
+            "heat_index_f",
+            "pm_1",
+            "pm_2p5",
+            "pm_10",
+            "pm_2p5_last_1_hour",
+            "pm_2p5_nowcast",
+        ],
+        "sums": [],
+    },
+}
+
+BACKFILL_CHUNK_SECONDS = 7 * 86400
+
+
+def rollup_table(source: str, resolution: str) -> str:
+    return f"{ROLLUP_SOURCES[source]['table']}_{resolution}"
+
+
+def rollup_columns(source: str) -> list[tuple[str, str]]:
+    spec = ROLLUP_SOURCES[source]
+    columns = [
+        ("bucket_epoch", "INTEGER NOT NULL"),
+        (spec["key_col"], f"{spec['key_type']} NOT NULL"),
+        ("sample_count", "INTEGER NOT NULL"),
+        ("first_epoch", "INTEGER"),
+        ("last_epoch", "INTEGER"),
+    ]
+    for metric in spec["metrics"]:
+        for agg in ("min", "max", "mean", "last"):
+            columns.append((f"{metric}_{agg}", "REAL"))
+    for metric in spec["sums"]:
+        columns.append((f"{metric}_sum", "REAL"))
+    return columns
+
+
+def ensure_rollup_tables(conn: sqlite3.Connection, sources=None) -> None:
+    """
+    Create rollup tables and add any columns introduced since they were created.
+
+    Does not commit, so it can run inside a schema migration step.
+    """
+    for source in sources or ROLLUP_SOURCES:
+        spec = ROLLUP_SOURCES[source]
+        columns = rollup_columns(source)
+        for resolution in RESOLUTIONS:
+            table = rollup_table(source, resolution)
+            column_sql = ",\n  ".join(f"{name} {col_type}" for name, col_type in columns)
+            conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                  {column_sql},
+                  PRIMARY KEY (bucket_epoch, {spec['key_col']})
+                )
+                """
+            )
+            existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+            for name, col_type in columns:
+                if name not in existing:
+                    # ALTER cannot add NOT NULL columns without defaults; new ones are metrics.
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} REAL")
+
+
+@lru_cache(maxsize=None)
+def _refresh_sql(source: str, resolution: str) -> str:
+    spec = ROLLUP_SOURCES[source]
+    t, k = spec["time_col"], spec["key_col"]
+    insert_cols = ["bucket_epoch", k, "sample_count", "first_epoch", "last_epoch"]
+    agg_exprs = [
+        f"({t} / :res) * :res AS bucket_epoch",
+        k,
+        "COUNT(*) AS sample_count",
+        f"MIN({t}) AS first_epoch",
+        f"MAX({t}) AS last_epoch",
+    ]
+    for metric in spec["metrics"]:
+        insert_cols += [f"{metric}_min", f"{metric}_max", f"{metric}_mean"]
+        agg_exprs += [f"MIN({metric})", f"MAX({metric})", f"AVG({metric})"]
+    for metric in spec["sums"]:
+        insert_cols.append(f"{metric}_sum")
+        agg_exprs.append(f"SUM({metric})")
+    last_cols = [f"{metric}_last" for metric in spec["metrics"]]
+    last_exprs = [f"latest.{metric}" for metric in spec["metrics"]]
+
+    return f"""
+        INSERT OR REPLACE INTO {rollup_table(source, resolution)} (
+          {", ".join(insert_cols + last_cols)}
+        )
+        SELECT agg.*, {", ".join(last_exprs)}
+        FROM (
+          SELECT {", ".join(agg_exprs)}
+          FROM {spec['table']}
+          WHERE {t} >= :start AND {t} < :end
+          GROUP BY bucket_epoch, {k}
+        ) AS agg
+        JOIN {spec['table']} AS latest
+          ON latest.{k} = agg.{k} AND latest.{t} = agg.last_epoch
+    """
+
+
+def refresh_rollups(conn: sqlite3.Connection, source: str, start_epoch: int, end_epoch: int) -> None:
+    """
+    Recompute every bucket touching [start_epoch, end_epoch] at all resolutions.
+
+    Buckets are rebuilt from the raw table rather than merged, so repeated or
+    out-of-order refreshes are idempotent. Does not commit.
+    """
+    for resolution, res in RESOLUTIONS.items():
+        bucket_start = (int(start_epoch) // res) * res
+        bucket_end = (int(end_epoch) // res) * res + res
+        conn.execute(
+            _refresh_sql(source, resolution),
+            {"res": res, "start": bucket_start, "end": bucket_end},
+        )
+
+
+def choose_resolution(span_seconds: float, target_points: int) -> str | None:
+    """
+    Coarsest rollup that still yields at least target_points buckets for the span.
+
+    Returns None when raw rows are already close to the target (short windows).
+    """
+    chosen = None
+    for name, res in sorted(RESOLUTIONS.items(), key=lambda item: item[1]):
+        if span_seconds / res >= target_points:
+            chosen = name
+    return chosen
+
+
+def rollup_select_sql(source: str, resolution: str, fields: dict, until: bool = False) -> str:
+    """
+    SELECT over a rollup table that aliases aggregates back to raw column names.
+
+    `fields` maps raw column -> rollup column (e.g. {"wind_gust": "wind_gust_max"}),
+    so frames built from rollups go through the same transforms as raw rows.
+    Binds :since (and :until when requested).
+    """
+    spec = ROLLUP_SOURCES[source]
+    select_cols = [f"bucket_epoch AS {spec['time_col']}", spec["key_col"]]
+    select_cols += [f"{column} AS {alias}" for alias, column in fields.items()]
+    until_clause = "AND bucket_epoch <= :until" if until else ""
+    return f"""
+        SELECT {", ".join(select_cols)}
+        FROM {rollup_table(source, resolution)}
+        WHERE bucket_epoch >= :since
+        {until_clause}
+        ORDER BY bucket_epoch
+    """
+
+
+def backfill(
+    conn: sqlite3.Connection,
+    source: str,
+    since_epoch: int | None = None,
+    chunk_seconds: int = BACKFILL_CHUNK_SECONDS,
+    log=print,
+) -> int:
+    """Rebuild rollups for historical rows, one committed chunk at a time."""
+    spec = ROLLUP_SOURCES[source]
+    ensure_rollup_tables(conn, [source])
+    conn.commit()
+    row = conn.execute(f"SELECT MIN({spec['time_col']}), MAX({spec['time_col']}) FROM {spec['table']}").fetchone()
+    if not row or row[0] is None:
+        log(f"Rollup backfill {source}: no rows")
+        return 0
+    start = max(int(row[0]), int(since_epoch)) if since_epoch is not None else int(row[0])
+    end = int(row[1])
+    day = RESOLUTIONS["1d"]
+    cursor = (start // day) * day
+    chunks = 0
+    while cursor <= end:
+        chunk_end = cursor + chunk_seconds - 1
+        refresh_rollups(conn, source, cursor, min(chunk_end, end))
+        conn.commit()
+        chunks += 1
+        log(f"Rollup backfill {source}: through {time.strftime('%Y-%m-%d', time.gmtime(min(chunk_end, end)))}")
+        cursor += chunk_seconds
+    return chunks
+
+
+def table_exists(conn: sqlite3.Connection, table: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?",
+        (table,),
+    ).fetchone()
+    return row is not None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Maintain obs_st / AirLink rollup tables.")
+    parser.add_argument("--backfill", action="store_true", help="Rebuild rollups from raw rows")
+    parser.add_argument("--source", choices=["all", *ROLLUP_SOURCES], default="all")
+    parser.add_argument("--days", type=int, default=None, help="Only backfill the last N days")
+    parser.add_argument("--db", default=str(DB_PATH))
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db, timeout=15)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    conn.execute("PRAGMA busy_timeout=5000;")
+    try:
+        sources = list(ROLLUP_SOURCES) if args.source == "all" else [args.source]
+        sources = [s for s in sources if table_exists(conn, ROLLUP_SOURCES[s]["table"])]
+        ensure_rollup_tables(conn, sources)
+        conn.commit()
+        if not args.backfill:
+            print(f"Rollup tables ready for: {', '.join(sources) or 'none'}")
+            return 0
+        since = int(time.time()) - args.days * 86400 if args.days else None
+        for source in sources:
+            backfill(conn, source, since_epoch=since)
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,296 @@
+"""
+One host process for the background workers.
+
+    python -m src.scheduler                       # every job in SCHEDULER_JOBS
+    python -m src.scheduler --jobs alerts,prefetch
+    python -m src.scheduler --once daily_brief    # run one job once and exit
+    python -m src.scheduler --list
+
+Jobs share one interpreter, so pandas and requests load once, and every job
+reuses the pooled HTTP session (http_cache.http_session), the per-database
+NWS client and the station location cache (src/location.py). The alerts
+loop keeps its own thread because it waits on the change feed; the other
+jobs run on an interval or at a daily local time in a small thread pool.
+A job is never started while its previous run is still going. A run past
+its timeout is logged, and the job is skipped until that run returns.
+Python threads cannot be killed, so the timeout does not stop the run.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+LOG_PATH = PROJECT_ROOT / "logs" / "scheduler.log"
+
+LOCAL_TZ = os.getenv("LOCAL_TZ", "America/New_York")
+SCHEDULER_JOBS = os.getenv("SCHEDULER_JOBS", "alerts,prefetch,daily_brief,daily_email,watchdog,raw_archive,history_export,column_cache")
+SCHEDULER_TICK_SECONDS = float(os.getenv("SCHEDULER_TICK_SECONDS", "1"))
+WATCHDOG_INTERVAL_SECONDS = int(os.getenv("WATCHDOG_INTERVAL_SECONDS", "300"))
+PREFETCH_INTERVAL_SECONDS = int(os.getenv("PREFETCH_INTERVAL_SECONDS", "30"))
+COLUMN_CACHE_INTERVAL_SECONDS = int(os.getenv("COLUMN_CACHE_INTERVAL_SECONDS", "300"))
+DAILY_BRIEF_INTERVAL_MINUTES = int(os.getenv("DAILY_BRIEF_INTERVAL_MINUTES", "180"))
+DAILY_EMAIL_HOUR = int(os.getenv("DAILY_EMAIL_HOUR", "7"))
+DAILY_EMAIL_MINUTE = int(os.getenv("DAILY_EMAIL_MINUTE", "0"))
+RAW_ARCHIVE_HOUR = int(os.getenv("RAW_ARCHIVE_HOUR", "3"))
+HISTORY_EXPORT_HOUR = int(os.getenv("HISTORY_EXPORT_HOUR", "2"))
+SERVICE_RESTART_SECONDS = 5
+
+
+def resolve_db_path() -> Path:
+    raw_path = os.getenv("TEMPEST_DB_PATH")
+    if raw_path:
+        path = Path(raw_path)
+        return path if path.is_absolute() else PROJECT_ROOT / path
+    return PROJECT_ROOT / "data" / "tempest.db"
+
+
+def log(message: str) -> None:
+    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    line = f"{ts} | {message}"
+    print(line, flush=True)
+    LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with LOG_PATH.open("a", encoding="utf-8") as file:
+        file.write(line + "\n")
+
+
+# Job bodies import their worker on first use so `--once watchdog` does not
+# pay for pandas and the rest of the alerting stack.
+def _alerts_service(db_path: Path, stop: threading.Event) -> None:
+    from src import alerts_worker
+
+    alerts_worker.serve(db_path, stop)
+
+
+def _alerts_once(db_path: Path):
+    from src import alerts_worker
+
+    return alerts_worker.run_once(db_path)
+
+
+def _prefetch(db_path: Path):
+    from src import prefetch_worker
+
+    return prefetch_worker.run_once(db_path)
+
+
+def _daily_brief(db_path: Path):
+    from src import daily_brief_worker
+
+    return daily_brief_worker.run_once()
+
+
+def _daily_email(db_path: Path):
+    from src import daily_email_worker
+
+    return daily_email_worker.send_if_due()
+
+
+def _watchdog(db_path: Path):
+    from src import collector_watchdog
+
+    return collector_watchdog.run_once(db_path)
+
+
+def _raw_archive(db_path: Path):
+    from src import raw_archive
+
+    # No-op unless RAW_ARCHIVE_AFTER_DAYS is set.
+    return raw_archive.run_archive(db_path, log=log)
+
+
+def _history_export(db_path: Path):
+    from src import history_store
+
+    # No-op unless HISTORY_STORE_ENABLED is set (and pyarrow is installed).
+    if not history_store.HISTORY_STORE_ENABLED:
+        return {}
+    return history_store.run_export(db_path, log=log)
+
+
+def _column_cache(db_path: Path):
+    from src import column_cache
+
+    # No-op unless COLUMN_CACHE_ENABLED is set.
+    if not column_cache.COLUMN_CACHE_ENABLED:
+        return {}
+    return column_cache.run_sync(db_path, log=log)
+
+
+def default_jobs() -> dict[str, dict]:
+    """
+    Job table. Keys: run(db_path) for scheduled jobs, serve(db_path, stop) for
+    long-running loops, every (seconds) or daily_at ((hour, minute) local),
+    and timeout (seconds).
+    """
+    return {
+        "alerts": {"serve": _alerts_service, "run": _alerts_once, "timeout": 120},
+        "prefetch": {"run": _prefetch, "every": max(5, PREFETCH_INTERVAL_SECONDS), "timeout": 120},
+        "daily_brief": {"run": _daily_brief, "every": max(300, DAILY_BRIEF_INTERVAL_MINUTES * 60), "timeout": 900},
+        # send_if_due is idempotent, so the startup run also catches up a missed send.
+        "daily_email": {"run": _daily_email, "daily_at": (DAILY_EMAIL_HOUR, DAILY_EMAIL_MINUTE), "timeout": 600},
+        "watchdog": {"run": _watchdog, "every": max(30, WATCHDOG_INTERVAL_SECONDS), "timeout": 60},
+        "raw_archive": {"run": _raw_archive, "daily_at": (RAW_ARCHIVE_HOUR, 30), "timeout": 3600},
+        "history_export": {"run": _history_export, "daily_at": (HISTORY_EXPORT_HOUR, 30), "timeout": 3600},
+        "column_cache": {"run": _column_cache, "every": max(30, COLUMN_CACHE_INTERVAL_SECONDS), "timeout": 1800},
+    }
+
+
+def next_run_after(job: dict, now: float, tz: ZoneInfo) -> float:
+    if job.get("daily_at"):
+        hour, minute = job["daily_at"]
+        now_local = datetime.fromtimestamp(now, tz)
+        target = now_local.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if target <= now_local:
+            target += timedelta(days=1)
+        return target.timestamp()
+    return now + job["every"]
+
+
+def describe(job: dict) -> str:
+    if job.get("serve"):
+        return "continuous"
+    if job.get("daily_at"):
+        return "daily at {:02d}:{:02d}".format(*job["daily_at"])
+    return f"every {job['every']}s"
+
+
+class Scheduler:
+    def __init__(self, db_path: Path, jobs: dict[str, dict], tz_name: str = LOCAL_TZ):
+        self.db_path = db_path
+        self.jobs = jobs
+        try:
+            self.tz = ZoneInfo(tz_name)
+        except Exception:
+            self.tz = ZoneInfo("UTC")
+        self.stop = threading.Event()
+        scheduled = [name for name, job in jobs.items() if not job.get("serve")]
+        self.executor = ThreadPoolExecutor(max_workers=max(1, len(scheduled)), thread_name_prefix="job")
+        # Every scheduled job runs once at startup, like the standalone workers.
+        self.next_run = {name: 0.0 for name in scheduled}
+        self.running: dict[str, tuple[Future, float]] = {}
+        self._overrun_logged: dict[str, float] = {}
+        self.stats = {
+            name: {"runs": 0, "failures": 0, "overruns": 0, "skipped": 0, "last_seconds": None} for name in jobs
+        }
+        self.threads: list[threading.Thread] = []
+
+    def _serve(self, name: str, job: dict) -> None:
+        while not self.stop.is_set():
+            try:
+                job["serve"](self.db_path, self.stop)
+            except Exception as exc:
+                self.stats[name]["failures"] += 1
+                log(f"ERROR: {name} stopped ({exc}); restarting in {SERVICE_RESTART_SECONDS}s.")
+            self.stop.wait(SERVICE_RESTART_SECONDS)
+
+    def _reap(self, name: str, now: float) -> bool:
+        """Account for a finished run; returns True while the job is still running."""
+        future, started = self.running[name]
+        stats = self.stats[name]
+        if not future.done():
+            if now - started > self.jobs[name]["timeout"] and self._overrun_logged.get(name) != started:
+                stats["overruns"] += 1
+                self._overrun_logged[name] = started
+                log(f"WARN: {name} has run {now - started:.0f}s (timeout {self.jobs[name]['timeout']}s); skipping new runs.")
+            return True
+        del self.running[name]
+        stats["runs"] += 1
+        stats["last_seconds"] = now - started
+        exc = future.exception()
+        if exc is not None:
+            stats["failures"] += 1
+            log(f"ERROR: {name} failed ({exc}).")
+        return False
+
+    def tick(self, now: float | None = None) -> float:
+        """Reap finished runs and start due jobs; returns seconds until the next due job."""
+        now = time.time() if now is None else now
+        for name, due in self.next_run.items():
+            busy = name in self.running and self._reap(name, now)
+            if now < due:
+                continue
+            self.next_run[name] = next_run_after(self.jobs[name], now, self.tz)
+            if busy:
+                self.stats[name]["skipped"] += 1
+                continue
+            self.running[name] = (self.executor.submit(self.jobs[name]["run"], self.db_path), now)
+        if not self.next_run:
+            return SCHEDULER_TICK_SECONDS
+        return max(0.0, min(self.next_run.values()) - now)
+
+    def start(self) -> None:
+        for name, job in self.jobs.items():
+            if job.get("serve"):
+                thread = threading.Thread(target=self._serve, args=(name, job), name=name, daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def run_forever(self) -> None:
+        self.start()
+        while not self.stop.is_set():
+            # Tick at least every SCHEDULER_TICK_SECONDS so finished runs and overruns are noticed.
+            self.stop.wait(min(self.tick(), SCHEDULER_TICK_SECONDS))
+
+    def shutdown(self) -> None:
+        self.stop.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def select_jobs(names: str, jobs: dict[str, dict]) -> dict[str, dict]:
+    selected = {}
+    for name in (part.strip() for part in names.split(",")):
+        if not name:
+            continue
+        if name not in jobs:
+            raise ValueError(f"unknown job {name!r} (choose from {', '.join(jobs)})")
+        selected[name] = jobs[name]
+    return selected
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the Tempest background jobs in one process.")
+    parser.add_argument("--jobs", default=SCHEDULER_JOBS, help="comma-separated jobs to host")
+    parser.add_argument("--once", metavar="JOB", help="run the given job(s) once in the foreground and exit")
+    parser.add_argument("--list", action="store_true", help="list jobs and schedules")
+    args = parser.parse_args()
+
+    jobs = default_jobs()
+    try:
+        selected = select_jobs(args.once or args.jobs, jobs)
+    except ValueError as exc:
+        parser.error(str(exc))
+    if args.list:
+        for name, job in jobs.items():
+            marker = "*" if name in selected else " "
+            print(f"{marker} {name:12s} {describe(job):20s} timeout {job['timeout']}s")
+        return 0
+
+    db_path = resolve_db_path()
+    if args.once:
+        status = 0
+        for name, job in selected.items():
+            result = job["run"](db_path)
+            if isinstance(result, int) and not isinstance(result, bool):
+                status = status or result
+        return status
+
+    log(f"Starting scheduler: {', '.join(f'{name} ({describe(job)})' for name, job in selected.items())}.")
+    scheduler = Scheduler(db_path, selected)
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,495 @@
+"""
+Versioned schema migrations for the shared SQLite database.
+
+    python -m src.schema [--status]
+    python -m src.schema --migrate [--airlink]
+
+Every table the collectors, workers and dashboard share is created here, in
+numbered steps per component. The schema_version table records the last step
+applied to each component, so ensure_schema() reads one row per component and
+returns without any DDL once the database is current. The result is also
+remembered per process and database file: after the first call, the check is
+a set lookup, and hot paths (config reads, the HTTP and NWS caches, alert
+state) can call it on every connection.
+
+Components:
+  core     collector tables, rollups, current_conditions, change feed, and
+           the application state tables (config, alerts, caches, briefs)
+  airlink  AirLink capture tables; only the AirLink collector and
+           src.db_migrate_airlink apply it (with core), so Tempest-only
+           installs do not get empty AirLink tables
+
+To change the schema, append a step to its component in MIGRATIONS with the
+next version number; never edit a step that has shipped. Steps must be
+idempotent (IF NOT EXISTS, add_column), because a database created before
+this registry, or two processes starting together, may run a step against
+tables that already have it.
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+SCHEMA_VERSION_TABLE = "schema_version"
+
+BASE_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS raw_events (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  received_at_epoch INTEGER NOT NULL,
+  device_id INTEGER,
+  message_type TEXT,
+  payload_json TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_raw_events_received_at
+  ON raw_events(received_at_epoch);
+
+CREATE INDEX IF NOT EXISTS idx_raw_events_device_type
+  ON raw_events(device_id, message_type);
+
+CREATE TABLE IF NOT EXISTS obs_st (
+  obs_epoch INTEGER NOT NULL,
+  device_id INTEGER NOT NULL,
+
+  wind_lull REAL,
+  wind_avg REAL,
+  wind_gust REAL,
+  wind_dir INTEGER,
+
+  wind_interval INTEGER,
+  station_pressure REAL,
+  air_temperature REAL,
+  relative_humidity INTEGER,
+  illuminance REAL,
+  uv REAL,
+  solar_radiation REAL,
+  rain_accumulated REAL,
+  precip_type INTEGER,
+  lightning_avg_dist REAL,
+  lightning_strike_count INTEGER,
+  battery REAL,
+  report_interval INTEGER,
+
+  obs_raw_json TEXT,
+
+  PRIMARY KEY (obs_epoch, device_id)
+);
+
+CREATE TABLE IF NOT EXISTS collector_heartbeat (
+  name TEXT PRIMARY KEY,
+  last_ok_epoch INTEGER,
+  last_error_epoch INTEGER,
+  last_ok_message TEXT,
+  last_error TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_collector_heartbeat_last_ok
+  ON collector_heartbeat(last_ok_epoch);
+"""
+
+# Tables the workers and the dashboard used to create on every call.
+APP_STATE_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS app_config (
+  key TEXT PRIMARY KEY,
+  value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS alert_state (
+  key TEXT PRIMARY KEY,
+  value TEXT NOT NULL,
+  updated_at INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS alert_config (
+  key TEXT PRIMARY KEY,
+  value TEXT NOT NULL,
+  updated_at INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS alert_outbox (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  channel TEXT NOT NULL,
+  to_address TEXT NOT NULL,
+  subject TEXT NOT NULL,
+  body TEXT NOT NULL,
+  dedupe_key TEXT UNIQUE,
+  status TEXT NOT NULL DEFAULT 'pending',
+  attempts INTEGER NOT NULL DEFAULT 0,
+  created_at REAL NOT NULL,
+  next_attempt_at REAL NOT NULL,
+  sent_at REAL,
+  latency_seconds REAL,
+  last_error TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_alert_outbox_due
+  ON alert_outbox(status, next_attempt_at);
+
+CREATE TABLE IF NOT EXISTS nws_alert_log (
+  alert_id TEXT PRIMARY KEY,
+  sent_at INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS nws_hwo_log (
+  product_id TEXT PRIMARY KEY,
+  sent_at INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS daily_email_log (
+  date TEXT PRIMARY KEY,
+  sent_at TEXT,
+  status TEXT,
+  error TEXT
+);
+
+CREATE TABLE IF NOT EXISTS daily_briefs (
+  date TEXT PRIMARY KEY,
+  generated_at TEXT,
+  tz TEXT,
+  headline TEXT,
+  bullets_json TEXT,
+  tomorrow_text TEXT,
+  model TEXT,
+  version TEXT
+);
+
+CREATE TABLE IF NOT EXISTS nws_afd_highlights (
+  product_id TEXT PRIMARY KEY,
+  issued TEXT,
+  cwa TEXT,
+  headline TEXT,
+  highlights_json TEXT,
+  text TEXT,
+  created_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS http_cache (
+  key TEXT PRIMARY KEY,
+  payload_json TEXT,
+  fetched_at REAL,
+  expires_at REAL,
+  last_attempt_at REAL,
+  last_error TEXT
+);
+
+CREATE TABLE IF NOT EXISTS nws_responses (
+  url TEXT PRIMARY KEY,
+  etag TEXT,
+  last_modified TEXT,
+  body_json TEXT NOT NULL,
+  fetched_at REAL,
+  expires_at REAL
+);
+"""
+
+AIRLINK_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS airlink_raw (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  received_at_epoch INTEGER NOT NULL,
+  host TEXT NOT NULL,
+  did TEXT,
+  ts INTEGER,
+  lsid INTEGER,
+  payload_json TEXT NOT NULL,
+  payload_hash TEXT NOT NULL UNIQUE
+);
+
+CREATE INDEX IF NOT EXISTS idx_airlink_raw_received
+  ON airlink_raw(received_at_epoch);
+
+CREATE INDEX IF NOT EXISTS idx_airlink_raw_ts
+  ON airlink_raw(ts);
+
+CREATE TABLE IF NOT EXISTS airlink_raw_all (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  received_at_epoch INTEGER NOT NULL,
+  host TEXT NOT NULL,
+  did TEXT,
+  ts INTEGER,
+  lsid INTEGER,
+  payload_json TEXT NOT NULL,
+  payload_hash TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_airlink_raw_all_received
+  ON airlink_raw_all(received_at_epoch);
+
+CREATE INDEX IF NOT EXISTS idx_airlink_raw_all_ts
+  ON airlink_raw_all(ts);
+
+CREATE TABLE IF NOT EXISTS airlink_current_obs (
+  did TEXT NOT NULL,
+  ts INTEGER NOT NULL,
+
+  lsid INTEGER,
+  data_structure_type INTEGER,
+  last_report_time INTEGER,
+
+  temp_f REAL,
+  hum REAL,
+  dew_point_f REAL,
+  wet_bulb_f REAL,
+  heat_index_f REAL,
+
+  pm_1 REAL,
+  pm_2p5 REAL,
+  pm_10 REAL,
+
+  pm_1_last REAL,
+  pm_2p5_last REAL,
+  pm_10_last REAL,
+
+  pm_1_last_1_hour REAL,
+  pm_2p5_last_1_hour REAL,
+  pm_10_last_1_hour REAL,
+
+  pm_1_last_3_hours REAL,
+  pm_2p5_last_3_hours REAL,
+  pm_10_last_3_hours REAL,
+
+  pm_1_last_24_hours REAL,
+  pm_2p5_last_24_hours REAL,
+  pm_10_last_24_hours REAL,
+
+  pm_1_nowcast REAL,
+  pm_2p5_nowcast REAL,
+  pm_10_nowcast REAL,
+
+  pct_pm_data_nowcast REAL,
+  pct_pm_data_last_1_hour REAL,
+  pct_pm_data_last_3_hours REAL,
+  pct_pm_data_last_24_hours REAL,
+
+  PRIMARY KEY (did, ts)
+);
+"""
+
+# (database file, component) pairs known to be current in this process.
+_CURRENT: set[tuple[str, str]] = set()
+_CURRENT_LOCK = threading.Lock()
+
+
+def resolve_db_path() -> Path:
+    raw_path = os.getenv("TEMPEST_DB_PATH")
+    if raw_path:
+        path = Path(raw_path)
+        return path if path.is_absolute() else PROJECT_ROOT / path
+    return PROJECT_ROOT / "data" / "tempest.db"
+
+
+def table_columns(conn: sqlite3.Connection, table: str) -> set[str]:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+
+
+def add_column(conn: sqlite3.Connection, table: str, column: str, col_type: str, log=print) -> None:
+    if column in table_columns(conn, table):
+        return
+    try:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {col_type}")
+    except sqlite3.OperationalError as exc:
+        # Another process migrating the same database got there first.
+        if "duplicate column" not in str(exc).lower():
+            raise
+        return
+    log(f"Migration: added {table}.{column}")
+
+
+def execute_script(conn: sqlite3.Connection, sql: str) -> None:
+    # executescript() would commit whatever the caller has pending first.
+    for statement in sql.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+
+
+# =====================
+# Migration steps
+# =====================
+def _core_collector_tables(conn: sqlite3.Connection, log) -> None:
+    from src.change_feed import ensure_change_feed_table
+    from src.current_conditions import ensure_current_conditions_table
+    from src.obs_layout import ensure_time_index
+    from src.raw_store import ensure_raw_payloads_table
+    from src.rollups import ensure_rollup_tables
+
+    execute_script(conn, BASE_SCHEMA_SQL)
+    # Raw text preservation and payload hash (idempotency / dedupe). Old
+    # databases declared payload_json NOT NULL; writers store '{}' for
+    # malformed messages rather than rebuilding the table.
+    add_column(conn, "raw_events", "payload_text", "TEXT", log=log)
+    add_column(conn, "raw_events", "payload_hash", "TEXT", log=log)
+    # Ingest queue health on the heartbeat row
+    for column, col_type in (
+        ("queue_depth", "INTEGER"),
+        ("queue_dropped", "INTEGER"),
+        ("writer_lag_sec", "REAL"),
+    ):
+        add_column(conn, "collector_heartbeat", column, col_type, log=log)
+    # Allow duplicate payloads with different epochs; old databases had a
+    # UNIQUE index here, so replace it with a plain one for lookups.
+    unique = {row[1]: row[2] for row in conn.execute("PRAGMA index_list(raw_events)").fetchall()}
+    if unique.get("idx_raw_events_payload_hash"):
+        conn.execute("DROP INDEX idx_raw_events_payload_hash")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_raw_events_payload_hash ON raw_events(payload_hash)")
+    # Content-addressed payload store (used when TEMPEST_RAW_COMPACT=1)
+    ensure_raw_payloads_table(conn)
+    ensure_rollup_tables(conn, ["obs_st"])
+    ensure_change_feed_table(conn)
+    # Skipped once `python -m src.obs_layout --migrate` has clustered the table.
+    ensure_time_index(conn, "obs_st")
+    ensure_current_conditions_table(conn)
+
+
+def _core_app_state_tables(conn: sqlite3.Connection, log) -> None:
+    from src.raw_archive import ensure_manifest_table
+
+    execute_script(conn, APP_STATE_SCHEMA_SQL)
+    ensure_manifest_table(conn)
+
+
+def _airlink_tables(conn: sqlite3.Connection, log) -> None:
+    from src.airlink_collector import backfill_airlink_raw_all, ensure_aqi_columns, migrate_legacy_airlink_obs
+    from src.current_conditions import ensure_current_conditions_table
+    from src.obs_layout import ensure_time_index
+    from src.rollups import ensure_rollup_tables
+
+    migrate_legacy_airlink_obs(conn)
+    execute_script(conn, AIRLINK_SCHEMA_SQL)
+    backfill_airlink_raw_all(conn)
+    ensure_aqi_columns(conn)
+    ensure_time_index(conn, "airlink_current_obs")
+    ensure_rollup_tables(conn, ["airlink"])
+    ensure_current_conditions_table(conn)
+
+
+# component -> [(version, description, step)], in order. Append only.
+MIGRATIONS = {
+    "core": [
+        (1, "collector tables, rollups, change feed, current conditions", _core_collector_tables),
+        (2, "application state tables", _core_app_state_tables),
+    ],
+    "airlink": [
+        (1, "AirLink capture tables, AQI columns, rollups", _airlink_tables),
+    ],
+}
+
+
+def latest_version(component: str) -> int:
+    return MIGRATIONS[component][-1][0]
+
+
+def database_file(conn: sqlite3.Connection) -> str:
+    """Path of the connection's main database; empty for in-memory databases."""
+    for _, name, path in conn.execute("PRAGMA database_list").fetchall():
+        if name == "main":
+            return path or ""
+    return ""
+
+
+def schema_versions(conn: sqlite3.Connection) -> dict[str, int]:
+    try:
+        rows = conn.execute(f"SELECT component, version FROM {SCHEMA_VERSION_TABLE}").fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    return {component: int(version) for component, version in rows}
+
+
+def _record_version(conn: sqlite3.Connection, component: str, version: int) -> None:
+    conn.execute(
+        f"""
+        INSERT INTO {SCHEMA_VERSION_TABLE} (component, version, updated_at) VALUES (?, ?, ?)
+        ON CONFLICT(component) DO UPDATE SET
+          version = MAX(version, excluded.version),
+          updated_at = excluded.updated_at
+        """,
+        (component, version, int(time.time())),
+    )
+
+
+def ensure_schema(conn: sqlite3.Connection, components=("core",), log=print) -> list[str]:
+    """
+    Apply pending migration steps for components; returns the steps applied.
+
+    Each step is committed together with its version, so an interrupted
+    migration resumes at the step that failed.
+    """
+    db_file = database_file(conn)
+    with _CURRENT_LOCK:
+        if db_file and all((db_file, component) in _CURRENT for component in components):
+            return []
+    versions = schema_versions(conn)
+    applied = []
+    for component in components:
+        current = versions.get(component, 0)
+        for version, description, step in MIGRATIONS[component]:
+            if version <= current:
+                continue
+            if not applied:
+                conn.execute(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {SCHEMA_VERSION_TABLE} (
+                        component TEXT PRIMARY KEY,
+                        version INTEGER NOT NULL,
+                        updated_at INTEGER NOT NULL
+                    )
+                    """
+                )
+            # sqlite3 only opens transactions implicitly for DML, so begin one
+            # here to keep the step's DDL and its version in one commit.
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            try:
+                step(conn, log)
+                _record_version(conn, component, version)
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+            applied.append(f"{component} v{version}")
+            log(f"Migration: {component} v{version} ({description})")
+    if db_file:
+        with _CURRENT_LOCK:
+            _CURRENT.update((db_file, component) for component in components)
+    return applied
+
+
+def schema_status(conn: sqlite3.Connection) -> dict[str, tuple[int, int]]:
+    """component -> (applied version, latest version)."""
+    versions = schema_versions(conn)
+    return {component: (versions.get(component, 0), latest_version(component)) for component in MIGRATIONS}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Show or apply schema migrations.")
+    parser.add_argument("--status", action="store_true", help="Show applied and latest versions (default)")
+    parser.add_argument("--migrate", action="store_true", help="Apply pending core migrations")
+    parser.add_argument("--airlink", action="store_true", help="With --migrate, also apply the AirLink tables")
+    args = parser.parse_args()
+
+    db_path = resolve_db_path()
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=15)
+    try:
+        conn.execute("PRAGMA busy_timeout=5000;")
+        if args.migrate:
+            components = ("core", "airlink") if args.airlink else ("core",)
+            applied = ensure_schema(conn, components)
+            print(f"{db_path}: {', '.join(applied) if applied else 'already current'}")
+        for component, (applied_version, latest) in schema_status(conn).items():
+            if applied_version >= latest:
+                state = "current"
+            else:
+                state = "not applied" if applied_version == 0 else "pending"
+            print(f"{component:8s} v{applied_version} of v{latest} ({state})")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
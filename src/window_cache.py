@@ -0,0 +1,80 @@
+import threading
+
+import pandas as pd
+
+# Raw-mode refreshes re-read this much history so late or replaced rows are picked up.
+TAIL_OVERLAP_SECONDS = 300
+
+
+class TailCache:
+    """
+    Transformed live-window frames, refreshed by appending only new rows.
+
+    A refresh re-queries from just before the newest cached row (the whole
+    last bucket for bucketed windows), replaces that tail, and drops rows
+    that fell out of the front of the window. A full reload happens on the
+    first request, when the plan changes or when the window moves backwards.
+    """
+
+    def __init__(self, overlap_seconds: int = TAIL_OVERLAP_SECONDS):
+        self.overlap_seconds = overlap_seconds
+        self._lock = threading.Lock()
+        self._key_locks: dict = {}
+        self._entries: dict = {}
+        self._stats = {"full_loads": 0, "tail_loads": 0, "rows_appended": 0}
+
+    def _key_lock(self, key) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get(self, key, since: int, fetch, transform, time_col: str, bucket_seconds: int = 1, plan=None):
+        """
+        Frame for `key` covering time_col >= since.
+
+        fetch(start_epoch) returns untransformed rows from start_epoch onwards;
+        transform(df) must only add per-row columns so tails can be transformed
+        on their own. Returns a copy callers may modify.
+        """
+        bucket = max(1, int(bucket_seconds))
+        with self._key_lock(key):
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is None or entry["plan"] != plan or since < entry["since"] or entry["frame"].empty:
+                frame = fetch(since)
+                if not frame.empty:
+                    frame = transform(frame)
+                with self._lock:
+                    self._stats["full_loads"] += 1
+            else:
+                frame = entry["frame"]
+                last_epoch = int(frame[time_col].iloc[-1])
+                start = max(since, (last_epoch - self.overlap_seconds) // bucket * bucket)
+                tail = fetch(start)
+                kept = frame[frame[time_col] < start]
+                if not tail.empty:
+                    tail = transform(tail)
+                    frame = pd.concat([kept, tail], ignore_index=True)
+                    appended = len(frame) - len(entry["frame"])
+                else:
+                    frame = kept
+                    appended = 0
+                with self._lock:
+                    self._stats["tail_loads"] += 1
+                    self._stats["rows_appended"] += max(0, appended)
+
+            if not frame.empty:
+                head = since // bucket * bucket
+                if int(frame[time_col].iloc[0]) < head:
+                    frame = frame[frame[time_col] >= head].reset_index(drop=True)
+            with self._lock:
+                self._entries[key] = {"frame": frame, "since": since, "plan": plan}
+            return frame.copy()
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = sum(len(entry["frame"]) for entry in self._entries.values())
+            return {**self._stats, "windows": len(self._entries), "rows_cached": rows}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,48 @@
+"""Fixtures shared by the collector-database tests."""
+
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+os.environ.setdefault("TEMPEST_API_TOKEN", "test-token")
+
+from src import collector  # noqa: E402
+
+DEVICE_ID = 475329
+
+
+def obs_values(epoch: int, temp_c: float | None = 21.4) -> list:
+    """One obs_st observation array in Tempest field order."""
+    return [epoch, 0.1, 1.2, 2.3, 180, 3, 1012.5, temp_c, 55, 1000, 1.5, 120, 0.0, 0, 0, 0, 2.7, 1]
+
+
+def obs_row(epoch: int, temp_c: float | None = 21.4, device_id: int = DEVICE_ID) -> tuple:
+    return collector.obs_st_row(device_id, obs_values(epoch, temp_c))
+
+
+def obs_message(epoch: int, device_id: int = DEVICE_ID) -> str:
+    return json.dumps({"type": "obs_st", "device_id": device_id, "obs": [obs_values(epoch)]})
+
+
+class CollectorDBTestCase(unittest.TestCase):
+    """Temp directory with a migrated tempest.db path and the collector log redirected into it."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        patcher = mock.patch.object(collector, "LOG_PATH", self.path("collector.log"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.db_path = self.path("tempest.db")
+
+    def path(self, name: str) -> Path:
+        return Path(self.tmpdir.name) / name
+
+    def open_db(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        collector.migrate(conn)
+        return conn
@@ -0,0 +1,74 @@
+import sqlite3
+import tempfile
+import unittest
+from contextlib import closing
+from pathlib import Path
+from unittest import mock
+
+from src import airlink_collector
+from src.aqi import pm25_aqi
+from src.config_store import get_config
+
+
+class AirlinkAqiTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        tmp = Path(self.tmpdir.name)
+        for name, value in (("DB_PATH", tmp / "tempest.db"), ("LOG_PATH", tmp / "airlink.log")):
+            patcher = mock.patch.object(airlink_collector, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_aqi_values_match_scalar(self):
+        self.assertEqual(
+            airlink_collector.aqi_values(12.05, None, 40.0),
+            (pm25_aqi(12.05), None, pm25_aqi(40.0), "Moderate"),
+        )
+        self.assertEqual(airlink_collector.aqi_values(None, None, None), (None, None, None, None))
+
+    def test_backfill_fills_legacy_rows_in_chunks_and_is_idempotent(self):
+        # Legacy table created before the AQI columns existed
+        with closing(sqlite3.connect(airlink_collector.DB_PATH)) as conn:
+            conn.execute(
+                """
+                CREATE TABLE airlink_current_obs (
+                  did TEXT NOT NULL, ts INTEGER NOT NULL,
+                  pm_2p5 REAL, pm_2p5_last_1_hour REAL, pm_2p5_nowcast REAL,
+                  PRIMARY KEY (did, ts)
+                )
+                """
+            )
+            conn.executemany(
+                "INSERT INTO airlink_current_obs VALUES (?, ?, ?, ?, ?)",
+                [
+                    ("001D0A", 1700000000, 8.0, 9.0, 10.0),
+                    ("001D0A", 1700000015, 60.0, None, 55.45),
+                    ("001D0A", 1700000030, None, None, None),
+                    ("001D0B", 1700000000, 250.45, 12.0, 12.0),
+                    ("001D0B", 1700000015, 600.0, 0.0, 0.0),
+                ],
+            )
+            conn.commit()
+        airlink_collector.ensure_schema()
+
+        with closing(airlink_collector.db()) as conn:
+            filled = airlink_collector.backfill_aqi(conn, chunk_rows=2, log=lambda msg: None)
+            self.assertEqual(filled, 4)
+            rows = conn.execute(
+                """
+                SELECT pm_2p5, pm_2p5_last_1_hour, pm_2p5_nowcast,
+                       aqi_pm25, aqi_pm25_last_1_hour, aqi_pm25_nowcast, aqi_category
+                FROM airlink_current_obs
+                ORDER BY did, ts
+                """
+            ).fetchall()
+            for pm, pm_1h, pm_nowcast, *stored in rows:
+                self.assertEqual(tuple(stored), airlink_collector.aqi_values(pm, pm_1h, pm_nowcast))
+            self.assertEqual(airlink_collector.backfill_aqi(conn, log=lambda msg: None), 0)
+            # Startup skips the scan once a backfill has finished.
+            self.assertIsNotNone(get_config(conn, airlink_collector.AQI_BACKFILL_DONE_KEY))
+
+
+if __name__ == "__main__":
+    unittest.main()
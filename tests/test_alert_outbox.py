@@ -0,0 +1,164 @@
+import socketserver
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src import alert_outbox
+
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept messages without TLS or AUTH."""
+
+    connections = 0
+    messages: list[str] = []
+    # Hang up without replying once this many messages have arrived.
+    drop_after: int | None = None
+
+    def reply(self, line: str) -> None:
+        self.wfile.write((line + "\r\n").encode("ascii"))
+
+    def handle(self):
+        type(self).connections += 1
+        self.reply("220 stub ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("ascii", "replace").strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.reply("250 stub")
+            elif command == "DATA":
+                self.reply("354 end with .")
+                lines = []
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data in (b".\r\n", b".\n"):
+                        break
+                    lines.append(data.decode("utf-8", "replace"))
+                self.messages.append("".join(lines))
+                if len(self.messages) == self.drop_after:
+                    return
+                self.reply("250 queued")
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+
+class AlertOutboxTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), StubSMTPHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.db_path = Path(self.tmpdir.name) / "tempest.db"
+        StubSMTPHandler.connections = 0
+        StubSMTPHandler.messages = []
+        StubSMTPHandler.drop_after = None
+
+    def config(self, port=None):
+        return {
+            "host": "127.0.0.1",
+            "port": port or self.server.server_address[1],
+            "username": "",
+            "password": "",
+            "from_address": "station@example.com",
+            "use_tls": False,
+            "use_ssl": False,
+        }
+
+    def rows(self):
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute(
+                "SELECT channel, status, attempts, next_attempt_at, latency_seconds FROM alert_outbox ORDER BY id"
+            ).fetchall()
+
+    def test_batch_is_delivered_over_one_connection(self):
+        for index in range(5):
+            alert_outbox.enqueue_alert(self.db_path, f"Alert {index}", "body", email_to="me@example.com")
+        queued = alert_outbox.enqueue_alert(
+            self.db_path, "Freeze", "Freeze warning", email_to="me@example.com", sms_to="555-123-4567"
+        )
+        self.assertEqual(queued, 2)
+
+        result = alert_outbox.deliver_pending(self.db_path, self.config())
+
+        self.assertEqual(result["sent"], 7)
+        self.assertEqual(StubSMTPHandler.connections, 1)
+        self.assertEqual(len(StubSMTPHandler.messages), 7)
+        self.assertIn("5551234567@vtext.com", StubSMTPHandler.messages[-1])
+        self.assertTrue(all(row[1] == "sent" and row[4] is not None for row in self.rows()))
+        self.assertIsNone(alert_outbox.next_attempt_at(self.db_path))
+
+    def test_dedupe_key_queues_once(self):
+        first = alert_outbox.enqueue_alert(self.db_path, "HWO", "text", email_to="me@example.com", dedupe_key="hwo:1")
+        second = alert_outbox.enqueue_alert(self.db_path, "HWO", "text", email_to="me@example.com", dedupe_key="hwo:1")
+        self.assertEqual((first, second), (1, 0))
+        self.assertEqual(len(self.rows()), 1)
+        self.assertTrue(alert_outbox.already_queued(self.db_path, "hwo:1"))
+        self.assertFalse(alert_outbox.already_queued(self.db_path, "hwo:2"))
+
+    def test_connection_failure_backs_off(self):
+        probe = socketserver.TCPServer(("127.0.0.1", 0), socketserver.BaseRequestHandler)
+        closed_port = probe.server_address[1]
+        probe.server_close()
+        alert_outbox.enqueue_alert(self.db_path, "Alert", "body", email_to="me@example.com")
+        now = time.time()
+
+        result = alert_outbox.deliver_pending(self.db_path, self.config(closed_port), now=now)
+
+        self.assertEqual(result["retry"], 1)
+        [(channel, status, attempts, next_attempt, latency)] = self.rows()
+        self.assertEqual((status, attempts), ("pending", 1))
+        self.assertAlmostEqual(next_attempt, now + alert_outbox.OUTBOX_RETRY_BASE_SECONDS, places=3)
+        self.assertIsNone(latency)
+        # Not due yet, then delivered once the backoff has elapsed.
+        self.assertEqual(alert_outbox.deliver_pending(self.db_path, self.config(), now=now)["sent"], 0)
+        self.assertEqual(alert_outbox.deliver_pending(self.db_path, self.config(), now=next_attempt)["sent"], 1)
+
+    def test_dropped_session_reconnects_once(self):
+        for index in range(5):
+            alert_outbox.enqueue_alert(self.db_path, f"Alert {index}", "body", email_to="me@example.com")
+        StubSMTPHandler.drop_after = 2
+
+        result = alert_outbox.deliver_pending(self.db_path, self.config())
+
+        self.assertEqual((result["sent"], result["retry"]), (4, 1))
+        self.assertEqual(StubSMTPHandler.connections, 2)
+        self.assertEqual([(row[1], row[2]) for row in self.rows()], [("sent", 1), ("pending", 1)] + [("sent", 1)] * 3)
+
+    def test_failed_reconnect_leaves_rest_of_batch_untouched(self):
+        for index in range(3):
+            alert_outbox.enqueue_alert(self.db_path, f"Alert {index}", "body", email_to="me@example.com")
+        StubSMTPHandler.drop_after = 1
+        first = alert_outbox.open_smtp_session(self.config())
+
+        with mock.patch.object(alert_outbox, "open_smtp_session", side_effect=[first, OSError("refused")]):
+            result = alert_outbox.deliver_pending(self.db_path, self.config())
+
+        self.assertEqual((result["sent"], result["retry"]), (0, 1))
+        self.assertEqual([(row[1], row[2]) for row in self.rows()], [("pending", 1), ("pending", 0), ("pending", 0)])
+
+    def test_retry_delay_is_exponential_and_capped(self):
+        base = alert_outbox.OUTBOX_RETRY_BASE_SECONDS
+        self.assertEqual(alert_outbox.retry_delay(1), base)
+        self.assertEqual(alert_outbox.retry_delay(3), base * 4)
+        self.assertEqual(alert_outbox.retry_delay(50), alert_outbox.OUTBOX_RETRY_MAX_SECONDS)
+
+
+if __name__ == "__main__":
+    unittest.main()
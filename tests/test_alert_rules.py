@@ -0,0 +1,79 @@
+import unittest
+
+from src.alert_rules import RollingWindow, RuleEngine, obs_st_metrics, parse_rules
+
+
+def feed(engine, samples, metric, source="obs_st", start=1_700_000_000, step=60):
+    fired = []
+    for index, value in enumerate(samples):
+        fired.extend(engine.observe(source, start + index * step, {metric: value}))
+    return fired
+
+
+class AlertRulesTest(unittest.TestCase):
+    def test_parse_rules_reports_bad_entries(self):
+        rules, errors = parse_rules(
+            '[{"id": "gust", "metric": "wind_gust_mph", "above": 35},'
+            ' {"id": "gust", "metric": "wind_gust_mph", "above": 40},'
+            ' {"id": "rate", "type": "rate", "metric": "pressure_mb", "below": -3},'
+            ' {"id": "odd", "type": "nope"}]'
+        )
+        self.assertEqual([rule["id"] for rule in rules], ["gust"])
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(parse_rules("not json")[0], [])
+
+    def test_threshold_fires_once_until_cleared(self):
+        rules, _ = parse_rules([{"id": "gust", "metric": "wind_gust_mph", "above": 35, "clear": 25, "cooldown_minutes": 0}])
+        fired = feed(RuleEngine(rules), [30, 40, 38, 30, 41, 20, 36], "wind_gust_mph")
+        self.assertEqual([alert["value"] for alert in fired], [40, 36])
+
+    def test_rate_rule_uses_window_delta(self):
+        rules, _ = parse_rules([{"id": "drop", "type": "rate", "metric": "pressure_mb", "window_minutes": 180, "below": -3}])
+        engine = RuleEngine(rules)
+        # Falling 1.5 mb/h crosses -3 after 2 h, but the rule waits for 90% of its 3 h window.
+        samples = [1015 - minute * 1.5 / 60 for minute in range(0, 240)]
+        fired = feed(engine, samples, "pressure_mb")
+        self.assertEqual(len(fired), 1)
+        self.assertEqual(fired[0]["epoch"], 1_700_000_000 + 162 * 60)
+        self.assertLessEqual(len(engine.windows[("pressure_mb", 10800.0)].samples), 182)
+
+    def test_lightning_counts_only_close_strikes(self):
+        rules, _ = parse_rules([{"id": "close", "type": "lightning", "within_km": 10, "window_minutes": 30, "min_strikes": 3}])
+        engine = RuleEngine(rules)
+        fired = []
+        for minute, (count, dist) in enumerate([(2, 25), (2, 8), (0, 0), (1, 5), (0, 0)]):
+            fired.extend(
+                engine.observe("obs_st", 1_700_000_000 + minute * 60, {"lightning_strike_count": count, "lightning_avg_dist": dist})
+            )
+        self.assertEqual([alert["value"] for alert in fired], [3])
+
+    def test_change_rule_and_cooldown(self):
+        rules, _ = parse_rules([{"id": "aqi", "type": "change", "metric": "aqi_category", "cooldown_minutes": 5}])
+        fired = feed(RuleEngine(rules), ["Good", "Moderate", "Good", "Good", "Good", "Good", "Good", "Moderate"], "aqi_category", source="airlink")
+        self.assertEqual([alert["message"] for alert in fired], ["aqi_category changed from Good to Moderate", "aqi_category changed from Good to Moderate"])
+
+    def test_rules_share_windows_and_ignore_replayed_rows(self):
+        specs = [
+            {"id": f"drop_{n}", "type": "rate", "metric": "pressure_mb", "window_minutes": 180, "below": -n} for n in range(1, 51)
+        ]
+        engine = RuleEngine(parse_rules(specs)[0])
+        self.assertEqual(len(engine.windows), 1)
+        engine.observe("obs_st", 100, {"pressure_mb": 1000})
+        self.assertEqual(engine.observe("obs_st", 100, {"pressure_mb": 900}), [])
+        self.assertEqual(len(engine.windows[("pressure_mb", 10800.0)].samples), 1)
+
+    def test_rolling_window_sum_evicts(self):
+        window = RollingWindow(120)
+        for epoch in range(0, 600, 60):
+            window.push(epoch, 1.0)
+        self.assertEqual(window.total, 3.0)
+
+    def test_obs_st_metrics_units(self):
+        metrics = obs_st_metrics({"air_temperature": 0.0, "wind_gust": 10.0, "station_pressure": 1013.25})
+        self.assertAlmostEqual(metrics["temp_f"], 32.0)
+        self.assertAlmostEqual(metrics["wind_gust_mph"], 22.369, places=3)
+        self.assertAlmostEqual(metrics["pressure_inhg"], 29.92, places=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
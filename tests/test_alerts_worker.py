@@ -0,0 +1,54 @@
+import sqlite3
+import tempfile
+import unittest
+from contextlib import closing
+from pathlib import Path
+from unittest import mock
+
+from src import alerts_worker
+from src.alert_outbox import enqueue_alert
+
+ALERT = {"id": "urn:nws:alert:1", "event": "Wind Advisory", "headline": "Wind Advisory until 6 PM"}
+HWO = {"id": "hwo-1", "headline": "Hazardous Weather Outlook", "text": "Gusty winds expected."}
+
+
+class CheckNwsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.db_path = Path(self.tmpdir.name) / "tempest.db"
+        patches = {
+            "LOG_PATH": Path(self.tmpdir.name) / "alerts_worker.log",
+            "NWS_ALERTS_ENABLED": True,
+            "NWS_HWO_NOTIFY": True,
+            "resolve_location": mock.Mock(return_value=(35.0, -80.0)),
+            "resolve_alert_recipients": mock.Mock(return_value=("me@example.com", None)),
+            "cached_nws_alerts": mock.Mock(return_value=[ALERT]),
+            "cached_nws_hwo": mock.Mock(return_value=HWO),
+        }
+        for name, value in patches.items():
+            patcher = mock.patch.object(alerts_worker, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def sent_ids(self):
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            return alerts_worker.load_sent_nws_alert_ids(conn), alerts_worker.load_sent_nws_hwo_ids(conn)
+
+    def test_queued_alerts_are_recorded(self):
+        alerts_worker.check_nws(self.db_path)
+        self.assertEqual(self.sent_ids(), ({ALERT["id"]}, {HWO["id"]}))
+
+    def test_ids_queued_by_an_interrupted_pass_are_recorded(self):
+        # An earlier pass queued both messages but died before recording the ids.
+        enqueue_alert(self.db_path, "NWS Alerts (1)", "body", "me@example.com", dedupe_key=f"nws:{ALERT['id']}")
+        enqueue_alert(self.db_path, "NWS Outlook", "body", "me@example.com", dedupe_key=f"hwo:{HWO['id']}")
+
+        alerts_worker.check_nws(self.db_path)
+        self.assertEqual(self.sent_ids(), ({ALERT["id"]}, {HWO["id"]}))
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM alert_outbox").fetchone()[0], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
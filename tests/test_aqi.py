@@ -0,0 +1,80 @@
+import random
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.aqi import (
+    aqi_categories,
+    aqi_category,
+    aqi_color,
+    aqi_colors,
+    pm25_aqi,
+    pm25_aqi_array,
+    pm25_aqi_series,
+)
+
+
+def legacy_compute_pm25_aqi(pm_value):
+    # Verbatim copy of the scalar implementation dashboard.py shipped before src/aqi.py.
+    breakpoints = [
+        (0.0, 12.0, 0, 50),
+        (12.1, 35.4, 51, 100),
+        (35.5, 55.4, 101, 150),
+        (55.5, 150.4, 151, 200),
+        (150.5, 250.4, 201, 300),
+        (250.5, 350.4, 301, 400),
+        (350.5, 500.4, 401, 500),
+    ]
+    pm = float(pm_value) if pm_value is not None else None
+    if pm is None or pd.isna(pm):
+        return None
+    pm = round(pm, 1)
+    for c_low, c_high, a_low, a_high in breakpoints:
+        if c_low <= pm <= c_high:
+            return (a_high - a_low) / (c_high - c_low) * (pm - c_low) + a_low
+    return 500.0
+
+
+def pm_samples(count=20000, seed=20240101):
+    rng = random.Random(seed)
+    values = [None, float("nan"), -0.04, -0.05, -3.0, 0.0, 500.4, 500.44, 500.45, 500.5, 1e6]
+    for c_low, c_high, _, _ in [(0.0, 12.0, 0, 0), (12.1, 35.4, 0, 0), (35.5, 55.4, 0, 0), (55.5, 150.4, 0, 0)]:
+        values += [c_low, c_high, c_high + 0.05, c_high + 0.04999, c_low - 0.05]
+    # Hundredths land exactly on (or within one ulp of) the 0.1 rounding ties.
+    values += [rng.randrange(0, 60000) / 100 for _ in range(count // 2)]
+    values += [rng.uniform(-5, 600) for _ in range(count // 2)]
+    return values
+
+
+class AqiTest(unittest.TestCase):
+    def test_scalar_matches_legacy(self):
+        for pm in pm_samples(2000):
+            self.assertEqual(pm25_aqi(pm), legacy_compute_pm25_aqi(pm), pm)
+
+    def test_vectorized_is_bit_identical_to_scalar(self):
+        samples = pm_samples()
+        expected = np.array(
+            [np.nan if (v := legacy_compute_pm25_aqi(pm)) is None else v for pm in samples],
+            dtype="float64",
+        )
+        actual = pm25_aqi_array(samples)
+        np.testing.assert_array_equal(np.isnan(actual), np.isnan(expected))
+        self.assertEqual(actual.tobytes(), expected.tobytes())
+
+    def test_series_keeps_index_and_nan(self):
+        series = pd.Series([12.05, None, 35.45], index=[7, 8, 9])
+        result = pm25_aqi_series(series)
+        self.assertEqual(list(result.index), [7, 8, 9])
+        self.assertTrue(np.isnan(result.loc[8]))
+        self.assertEqual(result.loc[7], legacy_compute_pm25_aqi(12.05))
+
+    def test_categories_and_colors_match_scalar(self):
+        values = [None, float("nan"), 0, 50, 50.0001, 100, 150, 150.5, 200, 300, 301, 500]
+        values += [random.Random(3).uniform(0, 500) for _ in range(500)]
+        self.assertEqual(list(aqi_categories(values)), [aqi_category(v) for v in values])
+        self.assertEqual(list(aqi_colors(values)), [aqi_color(v) for v in values])
+
+
+if __name__ == "__main__":
+    unittest.main()
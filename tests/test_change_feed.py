@@ -0,0 +1,55 @@
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import closing
+from pathlib import Path
+
+from src import change_feed
+
+
+class ChangeFeedTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.db_path = Path(self.tmpdir.name) / "tempest.db"
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL;")
+            change_feed.ensure_change_feed_table(conn)
+            conn.commit()
+        self.reader = sqlite3.connect(self.db_path)
+        self.addCleanup(self.reader.close)
+
+    def commit_bump(self, topic="obs_st"):
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            change_feed.bump(conn, topic)
+            conn.commit()
+
+    def test_missing_table_reads_as_zero(self):
+        with closing(sqlite3.connect(":memory:")) as conn:
+            self.assertEqual(change_feed.current_seq(conn, "obs_st"), 0)
+
+    def test_times_out_without_new_data(self):
+        started = time.monotonic()
+        seq = change_feed.wait_for_change(self.reader, "obs_st", 0, timeout=0.2, poll_seconds=0.02)
+        self.assertEqual(seq, 0)
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+
+    def test_wakes_on_commit_from_another_connection(self):
+        timer = threading.Timer(0.1, self.commit_bump)
+        timer.start()
+        self.addCleanup(timer.cancel)
+        started = time.monotonic()
+        seq = change_feed.wait_for_change(self.reader, "obs_st", 0, timeout=5, poll_seconds=0.02)
+        self.assertEqual(seq, 1)
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_other_topics_do_not_wake_the_waiter(self):
+        self.commit_bump("airlink")
+        seq = change_feed.wait_for_change(self.reader, "obs_st", 0, timeout=0.1, poll_seconds=0.02)
+        self.assertEqual(seq, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import queue
+import sqlite3
+import unittest
+from contextlib import closing
+from unittest import mock
+
+from support import CollectorDBTestCase, obs_message  # sets TEMPEST_API_TOKEN for the src imports
+from src import collector
+from src.change_feed import current_seq
+from src.current_conditions import read_current
+from src.raw_store import raw_event_text
+
+
+class IngestBufferTest(CollectorDBTestCase):
+    def test_flush_bumps_obs_change_feed(self):
+        with closing(self.open_db()) as conn:
+            buffer = collector.IngestBuffer()
+            buffer.add_message(1700000000, obs_message(1700000000))
+            buffer.flush(conn)
+            buffer.add_message(1700000003, '{"type":"rapid_wind","device_id":475329,"ob":[1700000003,1.1,200]}')
+            buffer.flush(conn)
+            self.assertEqual(current_seq(conn, "obs_st"), 1)
+
+    def test_flush_keeps_newest_current_conditions(self):
+        with closing(self.open_db()) as conn:
+            buffer = collector.IngestBuffer()
+            buffer.add_message(1700000060, obs_message(1700000060))
+            buffer.add_message(1700000000, obs_message(1700000000))
+            buffer.flush(conn)
+            buffer.add_message(1699999000, obs_message(1699999000))
+            buffer.flush(conn)
+
+            current = read_current(conn, "tempest")
+            self.assertEqual((current["device_id"], current["obs_epoch"]), ("475329", 1700000060))
+            self.assertAlmostEqual(current["temp_f"], 21.4 * 9 / 5 + 32)
+
+    def test_flush_writes_raw_and_obs_rows(self):
+        with closing(self.open_db()) as conn:
+            buffer = collector.IngestBuffer()
+            buffer.add_message(1700000000, obs_message(1700000000))
+            buffer.add_message(1700000003, '{"type":"rapid_wind","device_id":475329,"ob":[1700000003,1.1,200]}')
+            buffer.add_message(1700000004, "not json at all")
+            self.assertEqual(len(buffer), 3)
+
+            self.assertEqual(buffer.flush(conn), 3)
+            self.assertEqual(len(buffer), 0)
+
+            raw = conn.execute(
+                "SELECT message_type, payload_json, payload_text, payload_hash FROM raw_events ORDER BY id"
+            ).fetchall()
+            self.assertEqual([r[0] for r in raw], ["obs_st", "rapid_wind", None])
+            self.assertEqual(raw[2][1], "{}")
+            self.assertEqual(raw[2][2], "not json at all")
+            self.assertEqual(raw[2][3], collector.payload_fingerprint("not json at all"))
+
+            obs = conn.execute("SELECT obs_epoch, device_id, air_temperature FROM obs_st").fetchall()
+            self.assertEqual(obs, [(1700000000, 475329, 21.4)])
+
+    def test_compact_mode_stores_each_payload_once(self):
+        with closing(self.open_db()) as conn:
+            buffer = collector.IngestBuffer(compact=True)
+            buffer.add_message(1700000000, obs_message(1700000000))
+            buffer.add_message(1700000001, '{"type":"hub_status"}')
+            buffer.add_message(1700000002, '{"type":"hub_status"}')
+            buffer.flush(conn)
+
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM raw_payloads").fetchone()[0], 2)
+            rows = conn.execute(
+                "SELECT payload_text, payload_json, payload_hash FROM raw_events ORDER BY id"
+            ).fetchall()
+            self.assertEqual(len(rows), 3)
+            self.assertTrue(all(r[0] is None and r[1] == "" for r in rows))
+            self.assertEqual(raw_event_text(conn, *rows[1]), '{"type":"hub_status"}')
+            self.assertIsNone(conn.execute("SELECT obs_raw_json FROM obs_st").fetchone()[0])
+
+    def test_failed_flush_keeps_rows_for_retry(self):
+        with closing(self.open_db()) as conn:
+            buffer = collector.IngestBuffer()
+            buffer.add_message(1700000000, obs_message(1700000000))
+            conn.execute("ALTER TABLE raw_events RENAME TO raw_events_hidden")
+
+            with self.assertRaises(sqlite3.OperationalError):
+                buffer.flush(conn)
+            self.assertEqual(len(buffer), 1)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM obs_st").fetchone()[0], 0)
+
+            conn.execute("ALTER TABLE raw_events_hidden RENAME TO raw_events")
+            self.assertEqual(buffer.flush(conn), 1)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM raw_events").fetchone()[0], 1)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM obs_st").fetchone()[0], 1)
+
+
+class IngestWriterTest(CollectorDBTestCase):
+    def connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=15)
+        conn.execute("PRAGMA journal_mode=WAL;")
+        collector.migrate(conn)
+        return conn
+
+    def test_writer_drains_queue_and_reports_queue_health(self):
+        frames = queue.Queue(maxsize=100)
+        stats = collector.IngestStats()
+        stats.connected = True
+        writer = collector.IngestWriter(frames, stats, connect=self.connect)
+        writer.start()
+
+        frames.put(("ok", 1700000000, "ws connected"))
+        for i in range(40):
+            collector.enqueue_frame(frames, stats, 1700000000 + i, obs_message(1700000000 + i * 60))
+        writer.stop(timeout=10)
+        self.assertFalse(writer.is_alive())
+
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM raw_events").fetchone()[0], 40)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM obs_st").fetchone()[0], 40)
+            row = conn.execute(
+                "SELECT last_ok_message, queue_depth, queue_dropped, writer_lag_sec "
+                "FROM collector_heartbeat WHERE name = ?",
+                (collector.HEARTBEAT_NAME,),
+            ).fetchone()
+        self.assertEqual(row[0], "ws connected")
+        self.assertEqual(row[2], 0)
+        self.assertIsNotNone(row[3])
+
+    def test_drop_policy_counts_frames_when_queue_is_full(self):
+        frames = queue.Queue(maxsize=2)
+        stats = collector.IngestStats()
+        with mock.patch.object(collector, "QUEUE_POLICY", "drop"):
+            results = [collector.enqueue_frame(frames, stats, 1700000000, "{}") for _ in range(5)]
+        self.assertEqual(results, [True, True, False, False, False])
+        self.assertEqual(stats.snapshot()[0], 3)
+        self.assertEqual(frames.qsize(), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
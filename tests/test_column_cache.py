@@ -0,0 +1,72 @@
+import math
+import unittest
+from datetime import datetime, timezone
+
+import numpy as np
+
+from support import CollectorDBTestCase, obs_row  # sets TEMPEST_API_TOKEN for the src imports
+from src import collector, column_cache
+
+JAN_31 = int(datetime(2024, 1, 31, 12, tzinfo=timezone.utc).timestamp())
+FEB_01 = int(datetime(2024, 2, 1, tzinfo=timezone.utc).timestamp())
+
+
+class ColumnCacheTest(CollectorDBTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = self.path("columns")
+        self.conn = self.open_db()
+        self.addCleanup(self.conn.close)
+
+    def insert(self, *rows):
+        self.conn.executemany(collector.OBS_ST_INSERT_SQL, rows)
+        self.conn.commit()
+
+    def sync(self):
+        return column_cache.sync_table(self.conn, "obs_st", self.cache_dir, log=lambda message: None)
+
+    def read(self, start, end):
+        return column_cache.read_frame(self.conn, "obs_st", ["air_temperature"], start, end, cache_dir=self.cache_dir)
+
+    def test_ranges_are_sliced_from_month_segments(self):
+        self.assertIsNone(self.read(0, FEB_01 + 86400))
+        self.insert(obs_row(JAN_31, 5.0), obs_row(JAN_31 + 60, None), obs_row(FEB_01 + 60, 6.5))
+        self.assertEqual(self.sync(), {"appended": 0, "rebuilt": 2})
+
+        df = self.read(JAN_31 + 60, FEB_01 + 120)
+        self.assertEqual(df["obs_epoch"].tolist(), [JAN_31 + 60, FEB_01 + 60])
+        self.assertTrue(math.isnan(df["air_temperature"].iloc[0]))
+        self.assertEqual(df["air_temperature"].iloc[1], np.float32(6.5))
+
+        january = column_cache.read_columns("obs_st", ["air_temperature"], JAN_31, FEB_01, self.cache_dir)
+        self.assertIsInstance(january["air_temperature"].base, np.memmap)
+
+    def test_new_rows_are_appended_and_unsynced_rows_read_from_sqlite(self):
+        self.insert(obs_row(FEB_01 + 60, 6.0))
+        self.sync()
+        self.insert(obs_row(FEB_01 + 120, 6.5))
+        # Not synced yet: the tail comes from SQLite.
+        self.assertEqual(self.read(FEB_01, FEB_01 + 3600)["air_temperature"].tolist(), [6.0, 6.5])
+
+        self.assertEqual(self.sync(), {"appended": 1, "rebuilt": 0})
+        meta = column_cache._read_json(column_cache.segment_dir(self.cache_dir, "obs_st", FEB_01) / "segment.json")
+        self.assertEqual((meta["rows"], meta["max_epoch"]), (2, FEB_01 + 120))
+        self.assertEqual(self.read(FEB_01, FEB_01 + 3600)["obs_epoch"].tolist(), [FEB_01 + 60, FEB_01 + 120])
+
+    def test_backfilled_rows_mark_the_segment_stale(self):
+        self.insert(obs_row(FEB_01 + 60, 6.0), obs_row(FEB_01 + 180, 7.0))
+        self.sync()
+        self.insert(obs_row(FEB_01 + 120, 6.5))
+
+        self.assertEqual(self.sync(), {"appended": 0, "rebuilt": 1})
+        self.assertEqual(self.read(FEB_01, FEB_01 + 3600)["air_temperature"].tolist(), [6.0, 6.5, 7.0])
+
+        self.conn.execute("DELETE FROM obs_st")
+        self.conn.commit()
+        self.insert(obs_row(JAN_31, 5.0))
+        self.sync()
+        self.assertFalse(column_cache.segment_dir(self.cache_dir, "obs_st", FEB_01).exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
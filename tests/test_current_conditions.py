@@ -0,0 +1,71 @@
+import sqlite3
+import unittest
+
+from src import current_conditions as cc
+
+
+def obs_st_row(epoch: int, temp_c: float) -> dict:
+    return {
+        "obs_epoch": epoch,
+        "device_id": 475329,
+        "air_temperature": temp_c,
+        "relative_humidity": 50.0,
+        "station_pressure": 1013.25,
+        "wind_avg": 4.4704,
+        "wind_gust": 8.9408,
+        "wind_dir": 270,
+        "lightning_strike_count": 2.0,
+    }
+
+
+class CurrentConditionsTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.addCleanup(self.conn.close)
+
+    def test_read_current_without_table_is_none(self):
+        self.assertIsNone(cc.read_current(self.conn, "tempest"))
+        self.assertIsNone(cc.current_or_latest(self.conn, "tempest"))
+
+    def test_tempest_values_are_derived(self):
+        values = cc.tempest_conditions(obs_st_row(1700000000, 20.0))
+        self.assertEqual(values["device_id"], "475329")
+        self.assertAlmostEqual(values["temp_f"], 68.0)
+        self.assertAlmostEqual(values["wind_avg_mph"], 10.0, places=3)
+        self.assertAlmostEqual(values["pressure_inhg"], 29.92, places=2)
+        self.assertAlmostEqual(values["dew_point_f"], 48.7, places=1)
+        self.assertEqual(values["lightning_strike_count"], 2)
+
+    def test_airlink_aqi_is_filled_in(self):
+        values = cc.airlink_conditions({"did": "001D0A", "ts": 1700000000, "temp_f": 50.0, "pm_2p5": 35.4})
+        self.assertAlmostEqual(values["temp_c"], 10.0)
+        self.assertEqual(round(values["aqi"]), 100)
+        self.assertEqual(values["aqi_category"], "Moderate")
+
+    def test_upsert_only_moves_forward(self):
+        cc.ensure_current_conditions_table(self.conn)
+        cc.upsert_current(self.conn, cc.tempest_conditions(obs_st_row(1700000060, 21.0)))
+        cc.upsert_current(self.conn, cc.tempest_conditions(obs_st_row(1700000000, 5.0)))
+        current = cc.read_current(self.conn, "tempest")
+        self.assertEqual((current["obs_epoch"], current["temp_c"]), (1700000060, 21.0))
+        cc.upsert_current(self.conn, cc.tempest_conditions(obs_st_row(1700000120, 22.0)))
+        self.assertEqual(cc.read_current(self.conn, "tempest")["temp_c"], 22.0)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM current_conditions").fetchone()[0], 1)
+
+    def test_seed_from_newest_raw_row(self):
+        self.conn.execute(
+            "CREATE TABLE obs_st (obs_epoch INTEGER, device_id INTEGER, air_temperature REAL, "
+            "relative_humidity REAL, station_pressure REAL, wind_avg REAL, wind_gust REAL, wind_dir REAL)"
+        )
+        self.conn.executemany(
+            "INSERT INTO obs_st VALUES (?, 475329, ?, 50, 1013, 1, 2, 90)", [(1700000000, 10.0), (1700000060, 11.0)]
+        )
+        cc.ensure_current_conditions_table(self.conn)
+        self.assertEqual(cc.current_or_latest(self.conn, "tempest")["temp_c"], 11.0)
+        self.assertTrue(cc.seed_current_conditions(self.conn, "tempest"))
+        self.assertFalse(cc.seed_current_conditions(self.conn, "tempest"))
+        self.assertEqual(cc.read_current(self.conn, "tempest")["obs_epoch"], 1700000060)
+
+
+if __name__ == "__main__":
+    unittest.main()
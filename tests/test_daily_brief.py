@@ -0,0 +1,35 @@
+import os
+import unittest
+from unittest import mock
+
+os.environ.setdefault("TEMPEST_API_TOKEN", "test-token")
+
+from src import daily_brief_worker  # noqa: E402
+
+
+def archive_response(high_f: float, low_f: float) -> mock.Mock:
+    resp = mock.Mock()
+    resp.json.return_value = {"daily": {"temperature_2m_max": [high_f], "temperature_2m_min": [low_f]}}
+    return resp
+
+
+class HistoryLineTest(unittest.TestCase):
+    def test_openmeteo_history_averages_past_years(self):
+        session = mock.Mock()
+        session.get.side_effect = [archive_response(80.0, 60.0), archive_response(70.0, 50.0)]
+        with mock.patch.object(daily_brief_worker, "http_session", return_value=session):
+            line = daily_brief_worker.compute_history_line_openmeteo(35.0, -80.0, "UTC", years_back=2)
+
+        self.assertEqual(line, "On this day in recent years, average highs are 75F with lows around 55F.")
+        self.assertEqual(session.get.call_count, 2)
+        self.assertEqual(session.get.call_args.kwargs["params"]["daily"], ["temperature_2m_max", "temperature_2m_min"])
+
+    def test_openmeteo_history_is_none_when_every_fetch_fails(self):
+        session = mock.Mock()
+        session.get.side_effect = OSError("offline")
+        with mock.patch.object(daily_brief_worker, "http_session", return_value=session):
+            self.assertIsNone(daily_brief_worker.compute_history_line_openmeteo(35.0, -80.0, "UTC", years_back=2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import sqlite3
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from src.db_pool import ConnectionPool
+
+
+class ConnectionPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.db_path = Path(self.tmpdir.name) / "tempest.db"
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("CREATE TABLE app_config (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.pool = ConnectionPool(self.db_path)
+        self.addCleanup(self.pool.close)
+
+    def test_reader_is_per_thread_and_read_only(self):
+        first = self.pool.reader()
+        self.assertIs(self.pool.reader(), first)
+        with self.assertRaises(sqlite3.OperationalError):
+            first.execute("INSERT INTO app_config VALUES ('a', '1')")
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(self.pool.reader()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], first)
+
+        stats = self.pool.stats()
+        self.assertEqual(stats["readers_opened"], 2)
+        self.assertEqual(stats["reader_checkouts"], 3)
+        # The finished thread's connection is closed on the next stats/checkout
+        self.assertEqual(stats["readers_open"], 1)
+        self.assertEqual(stats["readers_closed"], 1)
+
+    def test_writer_commits_and_rolls_back(self):
+        with self.pool.writer() as conn:
+            conn.execute("INSERT INTO app_config VALUES ('units', 'imperial')")
+        with self.assertRaises(RuntimeError):
+            with self.pool.writer() as conn:
+                conn.execute("INSERT INTO app_config VALUES ('theme', 'dark')")
+                raise RuntimeError("boom")
+
+        rows = self.pool.reader().execute("SELECT key FROM app_config").fetchall()
+        self.assertEqual(rows, [("units",)])
+        stats = self.pool.stats()
+        self.assertEqual((stats["writer_opened"], stats["writer_checkouts"]), (1, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
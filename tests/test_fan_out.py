@@ -0,0 +1,48 @@
+import threading
+import time
+import unittest
+
+from src.fan_out import fan_out
+
+
+class FanOutTest(unittest.TestCase):
+    def test_tasks_run_concurrently(self):
+        barrier = threading.Barrier(3, timeout=2)
+
+        def task(value):
+            def run():
+                barrier.wait()
+                return value
+
+            return run
+
+        results, timings = fan_out({"a": task(1), "b": task(2), "c": task(3)}, timeout=5)
+        self.assertEqual(results, {"a": 1, "b": 2, "c": 3})
+        self.assertEqual({entry["status"] for entry in timings.values()}, {"ok"})
+
+    def test_deadline_returns_fallback_and_task_finishes_later(self):
+        finished = threading.Event()
+
+        def slow():
+            time.sleep(0.3)
+            finished.set()
+            return "late"
+
+        started = time.perf_counter()
+        results, timings = fan_out({"slow": slow, "fast": lambda: "ok"}, timeout=0.05, fallbacks={"slow": []})
+        self.assertLess(time.perf_counter() - started, 0.25)
+        self.assertEqual(results, {"slow": [], "fast": "ok"})
+        self.assertEqual(timings["slow"]["status"], "timeout")
+        self.assertTrue(finished.wait(2))
+
+    def test_errors_are_recorded_not_raised(self):
+        def broken():
+            raise RuntimeError("HTTP 503")
+
+        results, timings = fan_out({"broken": broken}, timeout=1)
+        self.assertIsNone(results["broken"])
+        self.assertEqual(timings["broken"]["status"], "error: HTTP 503")
+
+
+if __name__ == "__main__":
+    unittest.main()
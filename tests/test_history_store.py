@@ -0,0 +1,72 @@
+import sqlite3
+import unittest
+from contextlib import closing
+from datetime import datetime, timezone
+from unittest import mock
+
+from support import CollectorDBTestCase, obs_row  # sets TEMPEST_API_TOKEN for the src imports
+from src import collector, history_store
+
+JAN_31 = int(datetime(2024, 1, 31, 12, tzinfo=timezone.utc).timestamp())
+FEB_01 = int(datetime(2024, 2, 1, tzinfo=timezone.utc).timestamp())
+FEB_02 = FEB_01 + 86400
+FEB_03 = FEB_02 + 86400
+
+
+@unittest.skipUnless(history_store.available(), "pyarrow is not installed")
+class HistoryStoreTest(CollectorDBTestCase):
+    def setUp(self):
+        super().setUp()
+        self.history_dir = self.path("history")
+        self.open_db().close()
+
+    def insert(self, *rows):
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            conn.executemany(collector.OBS_ST_INSERT_SQL, rows)
+            conn.commit()
+
+    def export(self, now):
+        return history_store.run_export(self.db_path, self.history_dir, now=now, log=lambda message: None)
+
+    def read(self, columns, start, end):
+        return history_store.read_history("obs_st", columns, start, end, history_dir=self.history_dir)
+
+    def test_closed_days_are_partitioned_by_month(self):
+        self.insert(obs_row(JAN_31, 5.0), obs_row(FEB_01 + 60, 6.0), obs_row(FEB_02 + 60, 7.0))
+        written = self.export(now=FEB_02 + 3600)
+
+        # The Feb 2 row belongs to a day that is still open.
+        self.assertEqual(written["obs_st"], 2)
+        january = history_store.month_start(JAN_31)
+        self.assertTrue(history_store.partition_path(self.history_dir, "obs_st", january).exists())
+        manifest = history_store.load_manifest(self.history_dir, "obs_st")
+        self.assertEqual(manifest["through_epoch"], FEB_02)
+        self.assertNotIn("obs_raw_json", manifest["columns"])
+
+        df = self.read(["air_temperature"], JAN_31 - 86400, FEB_02)
+        self.assertEqual(list(df.columns), ["obs_epoch", "air_temperature"])
+        self.assertEqual(df["obs_epoch"].tolist(), [JAN_31, FEB_01 + 60])
+        self.assertEqual(df["air_temperature"].tolist(), [5.0, 6.0])
+
+    def test_ranges_past_the_export_fall_back(self):
+        self.insert(obs_row(FEB_01 + 60, 6.0))
+        self.export(now=FEB_02 + 3600)
+        self.assertIsNone(self.read(["air_temperature"], FEB_01, FEB_03))
+        with self.assertRaises(ValueError):
+            self.read(["obs_raw_json"], FEB_01, FEB_02)
+        with mock.patch.object(history_store, "pq", None):
+            self.assertIsNone(self.read(["air_temperature"], FEB_01, FEB_02))
+
+    def test_next_run_rewrites_the_open_month_with_late_rows(self):
+        self.insert(obs_row(FEB_01 + 60, 6.0))
+        self.export(now=FEB_02 + 3600)
+        # Backfilled after the first export, plus the day that has since closed.
+        self.insert(obs_row(FEB_01 + 120, 6.5), obs_row(FEB_02 + 60, 7.0))
+        self.export(now=FEB_03 + 3600)
+
+        df = self.read(["air_temperature"], FEB_01, FEB_03)
+        self.assertEqual(df["obs_epoch"].tolist(), [FEB_01 + 60, FEB_01 + 120, FEB_02 + 60])
+
+
+if __name__ == "__main__":
+    unittest.main()
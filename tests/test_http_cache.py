@@ -0,0 +1,66 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src import http_cache
+
+
+class HttpCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.db_path = Path(self.tmpdir.name) / "tempest.db"
+        self.calls = 0
+
+    def fetch(self, value):
+        def run():
+            self.calls += 1
+            if isinstance(value, Exception):
+                raise value
+            return value
+
+        return run
+
+    def test_cache_key_rounds_coordinates(self):
+        self.assertEqual(
+            http_cache.cache_key("sun_times", lon=-71.123409, lat=42.0, date="2024-01-02"),
+            http_cache.cache_key("sun_times", date="2024-01-02", lat=42.00001, lon=-71.12341),
+        )
+
+    def test_miss_fetches_once_then_serves_fresh_copy(self):
+        payload = {"sunrise": "06:59", "values": [1, 2]}
+        self.assertEqual(http_cache.cached_json(self.db_path, "k", 60, self.fetch(payload)), payload)
+        self.assertEqual(http_cache.cached_json(self.db_path, "k", 60, self.fetch({"other": 1})), payload)
+        self.assertEqual(self.calls, 1)
+
+    def test_expired_entry_is_served_while_revalidating(self):
+        http_cache.refresh(self.db_path, "k", -1, self.fetch({"v": 1}))
+        with mock.patch("time.time", return_value=time.time() + 120):
+            with mock.patch.object(http_cache, "_refresh_in_background") as background:
+                self.assertEqual(http_cache.cached_json(self.db_path, "k", 60, self.fetch({"v": 2})), {"v": 1})
+        background.assert_called_once()
+        self.assertEqual(self.calls, 1)
+
+    def test_too_stale_entry_blocks_on_fetch(self):
+        http_cache.refresh(self.db_path, "k", -3600, self.fetch({"v": 1}))
+        result = http_cache.cached_json(self.db_path, "k", 60, self.fetch({"v": 2}), max_stale_seconds=60)
+        self.assertEqual(result, {"v": 2})
+
+    def test_failed_refresh_keeps_payload_and_records_error(self):
+        http_cache.refresh(self.db_path, "k", 60, self.fetch([{"id": "a"}]))
+        self.assertIsNone(http_cache.refresh(self.db_path, "k", 60, self.fetch(RuntimeError("HTTP 503"))))
+        entry = http_cache.read_entry(self.db_path, "k")
+        self.assertEqual(entry["payload"], [{"id": "a"}])
+        self.assertEqual(entry["last_error"], "HTTP 503")
+
+    def test_failed_miss_is_not_retried_immediately(self):
+        self.assertIsNone(http_cache.cached_json(self.db_path, "k", 60, self.fetch(None)))
+        self.assertIsNone(http_cache.cached_json(self.db_path, "k", 60, self.fetch(None)))
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(http_cache.last_error(self.db_path, "k"), "no data")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import json
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+from src import external_data, http_cache, nws_alerts
+from src.nws_client import NWSClient, response_ttl
+
+POINT = {"properties": {"cwa": "BOX", "forecastZone": "https://x/zones/forecast/MAZ015", "county": "https://x/zones/county/MAC025"}}
+HWO_LIST = {"products": [{"id": "hwo-1", "issuanceTime": "2024-01-02T10:00:00+00:00", "productName": "Hazardous Weather Outlook"}]}
+HWO_PRODUCT = {"productText": ".DAY ONE...\nNo hazardous weather is expected today.\n$$"}
+ALERTS = {"features": [{"properties": {"id": "a1", "event": "Wind Advisory", "severity": "Moderate"}}]}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    routes = {
+        "/points/42.36,-71.06": (POINT, "max-age=3600"),
+        "/products/types/HWO/locations/BOX": (HWO_LIST, "max-age=0"),
+        "/products/hwo-1": (HWO_PRODUCT, "max-age=0"),
+    }
+    hits: list[str] = []
+
+    def do_GET(self):
+        self.hits.append(self.path)
+        path = self.path.split("?", 1)[0]
+        if path == "/alerts/active":
+            body, cache_control = ALERTS, "max-age=0"
+        elif path in self.routes:
+            body, cache_control = self.routes[path]
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        etag = f'"{len(json.dumps(body))}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("Cache-Control", cache_control)
+            self.end_headers()
+            return
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/geo+json")
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", cache_control)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class NWSClientTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.db_path = Path(self.tmpdir.name) / "tempest.db"
+        StubHandler.hits.clear()
+        nws_alerts._SUMMARY_CACHE.clear()
+
+    def client(self):
+        return NWSClient(self.db_path, base_url=self.base_url)
+
+    def test_points_lookup_persists_across_clients(self):
+        self.assertEqual(nws_alerts.resolve_alert_zones(42.36, -71.06, self.client()), ["MAZ015", "MAC025"])
+        self.assertEqual(nws_alerts.resolve_alert_zones(42.36, -71.06, self.client()), ["MAZ015", "MAC025"])
+        self.assertEqual(StubHandler.hits, ["/points/42.36,-71.06"])
+
+    def test_unchanged_product_is_revalidated_not_downloaded(self):
+        client = self.client()
+        first = nws_alerts.fetch_hwo_text(42.36, -71.06, client)
+        second = nws_alerts.fetch_hwo_text(42.36, -71.06, client)
+        self.assertEqual(first, second)
+        self.assertEqual(first["id"], "hwo-1")
+        # Points and the product body come from the store; only the listing is revalidated.
+        self.assertEqual(StubHandler.hits.count("/products/hwo-1"), 1)
+        self.assertEqual(StubHandler.hits.count("/products/types/HWO/locations/BOX"), 2)
+        self.assertEqual(client.stats["not_modified"], 1)
+
+    def test_alerts_use_conditional_requests(self):
+        client = self.client()
+        first = nws_alerts.fetch_active_alerts(42.36, -71.06, "UTC", client)
+        second = nws_alerts.fetch_active_alerts(42.36, -71.06, "UTC", client)
+        self.assertEqual([alert["id"] for alert in second], ["a1"])
+        self.assertEqual(first, second)
+        self.assertEqual(client.stats["not_modified"], 2)
+
+    def test_failed_alert_fetch_keeps_the_cached_alerts(self):
+        client = self.client()
+        key = external_data.nws_alerts_key(42.36, -71.06, "UTC")
+
+        def cached_ids():
+            return [alert["id"] for alert in external_data.cached_nws_alerts(self.db_path, 42.36, -71.06, "UTC")]
+
+        with mock.patch.object(external_data, "get_client", return_value=client):
+            self.assertEqual(cached_ids(), ["a1"])
+            with mock.patch.object(client, "active_alerts", side_effect=OSError("NWS unavailable")):
+                fetch = lambda: nws_alerts.fetch_active_alerts(42.36, -71.06, "UTC", client)  # noqa: E731
+                self.assertIsNone(http_cache.refresh(self.db_path, key, 60, fetch))
+            self.assertEqual(cached_ids(), ["a1"])
+        self.assertEqual(http_cache.last_error(self.db_path, key), "NWS unavailable")
+
+    def test_summary_is_computed_once_per_product(self):
+        hwo = {"id": "hwo-1", "text": HWO_PRODUCT["productText"]}
+        with mock.patch.object(nws_alerts, "_summarize_hwo_text", return_value="Today: quiet") as summarize:
+            nws_alerts.summarize_hwo(hwo)
+            nws_alerts.summarize_hwo(dict(hwo))
+        summarize.assert_called_once()
+
+    def test_response_ttl(self):
+        self.assertEqual(response_ttl({"Cache-Control": "public, max-age=300", "Age": "60"}), 240)
+        self.assertEqual(response_ttl({"Cache-Control": "no-cache, max-age=300"}), 0)
+        self.assertEqual(
+            response_ttl({"Date": "Tue, 02 Jan 2024 10:00:00 GMT", "Expires": "Tue, 02 Jan 2024 10:05:00 GMT"}),
+            300,
+        )
+        self.assertEqual(response_ttl({}), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
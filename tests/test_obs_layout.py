@@ -0,0 +1,83 @@
+import json
+import sqlite3
+import unittest
+from contextlib import closing
+
+from support import CollectorDBTestCase, obs_message  # sets TEMPEST_API_TOKEN for the src imports
+from src import collector, obs_layout
+
+
+def index_names(conn, table):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index' AND tbl_name=?", (table,))}
+
+
+class ObsLayoutTest(CollectorDBTestCase):
+    def flush(self, conn, *epochs):
+        buffer = collector.IngestBuffer(compact=False)
+        for epoch in epochs:
+            buffer.add_message(epoch, obs_message(epoch))
+        buffer.flush(conn)
+
+    def test_obs_st_is_rebuilt_clustered_with_raw_json_moved(self):
+        with closing(self.open_db()) as conn:
+            self.flush(conn, 1700000000, 1700000060)
+            self.assertIn("idx_obs_st_epoch", index_names(conn, "obs_st"))
+
+            self.assertTrue(obs_layout.cluster_table(conn, "obs_st", log=lambda message: None))
+            self.assertFalse(obs_layout.cluster_table(conn, "obs_st", log=lambda message: None))
+
+            self.assertTrue(obs_layout.is_clustered(conn, "obs_st"))
+            self.assertFalse(collector.column_exists(conn, "obs_st", "obs_raw_json"))
+            self.assertNotIn("idx_obs_st_epoch", index_names(conn, "obs_st"))
+            rows = conn.execute("SELECT obs_epoch, air_temperature FROM obs_st ORDER BY obs_epoch").fetchall()
+            self.assertEqual(rows, [(1700000000, 21.4), (1700000060, 21.4)])
+            raw = conn.execute("SELECT obs_epoch, obs_raw_json FROM obs_st_raw ORDER BY obs_epoch").fetchall()
+            self.assertEqual([epoch for epoch, _ in raw], [1700000000, 1700000060])
+            self.assertEqual(json.loads(raw[0][1])[0], 1700000000)
+
+    def test_collector_writes_clustered_layout_and_keeps_it(self):
+        with closing(self.open_db()) as conn:
+            obs_layout.cluster_table(conn, "obs_st", log=lambda message: None)
+        with closing(self.open_db()) as conn:
+            self.flush(conn, 1700000120, 1700000120)
+            self.assertNotIn("idx_obs_st_epoch", index_names(conn, "obs_st"))
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM obs_st").fetchone()[0], 1)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM obs_st_raw").fetchone()[0], 1)
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM obs_st WHERE device_id = 475329 AND obs_epoch >= 0"
+            ).fetchall()
+            self.assertIn("PRIMARY KEY", plan[-1][-1])
+
+    def test_flushes_look_up_the_layout_once(self):
+        with closing(self.open_db()) as conn:
+            obs_layout.cluster_table(conn, "obs_st", log=lambda message: None)
+        with closing(self.open_db()) as conn:
+            buffer = collector.IngestBuffer(compact=False)
+            statements = []
+            conn.set_trace_callback(statements.append)
+            for epoch in (1700000120, 1700000180, 1700000240):
+                buffer.add_message(epoch, obs_message(epoch))
+                buffer.flush(conn)
+            conn.set_trace_callback(None)
+            self.assertTrue(buffer.clustered)
+            self.assertEqual(len([sql for sql in statements if "table_info(obs_st)" in sql]), 1)
+            self.assertFalse([sql for sql in statements if "CREATE" in sql])
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM obs_st_raw").fetchone()[0], 3)
+
+    def test_added_columns_survive_the_rebuild(self):
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            conn.execute("CREATE TABLE airlink_current_obs (did TEXT NOT NULL, ts INTEGER NOT NULL, pm_2p5 REAL, PRIMARY KEY (did, ts))")
+            conn.execute("ALTER TABLE airlink_current_obs ADD COLUMN aqi_category TEXT")
+            obs_layout.ensure_time_index(conn, "airlink_current_obs")
+            conn.execute("INSERT INTO airlink_current_obs VALUES ('a', 10, 5.0, 'Good')")
+            conn.commit()
+
+            obs_layout.cluster_table(conn, "airlink_current_obs", log=lambda message: None)
+
+            self.assertEqual(obs_layout.layout_status(conn)["airlink_current_obs"], "clustered")
+            self.assertEqual(conn.execute("SELECT * FROM airlink_current_obs").fetchall(), [("a", 10, 5.0, "Good")])
+            self.assertEqual(index_names(conn, "airlink_current_obs") & {"idx_airlink_current_obs_ts"}, set())
+
+
+if __name__ == "__main__":
+    unittest.main()
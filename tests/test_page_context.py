@@ -0,0 +1,48 @@
+import unittest
+
+from src.page_context import LazyContext
+
+
+class LazyContextTest(unittest.TestCase):
+    def test_thunks_run_once_and_only_when_read(self):
+        calls = []
+        ctx = LazyContext({"tz_name": "UTC"})
+        ctx.lazy("raw_tables", lambda: calls.append("raw") or ["table"])
+        ctx.lazy("trend_series", lambda: calls.append("trend") or {})
+
+        self.assertEqual(ctx.get("tz_name"), "UTC")
+        self.assertIn("raw_tables", ctx)
+        self.assertEqual(calls, [])
+
+        self.assertEqual(ctx.get("raw_tables"), ["table"])
+        self.assertEqual(ctx["raw_tables"], ["table"])
+        self.assertEqual(calls, ["raw"])
+        self.assertEqual(list(ctx.timings()), ["raw_tables"])
+        self.assertEqual(ctx.pending(), ["trend_series"])
+
+    def test_missing_keys_and_dependent_entries(self):
+        ctx = LazyContext()
+        ctx.lazy("brief", lambda: {"today": "sunny"})
+        ctx.lazy("brief_today", lambda: ctx["brief"]["today"])
+        self.assertEqual(ctx.get("brief_today"), "sunny")
+        self.assertEqual(ctx.get("missing", {}), {})
+        with self.assertRaises(KeyError):
+            ctx["missing"]
+
+
+    def test_failed_thunk_raises_its_own_error_again(self):
+        ctx = LazyContext()
+
+        def locked():
+            raise TimeoutError("database is locked")
+
+        ctx.lazy("raw_tables", locked)
+        for _ in range(2):
+            with self.assertRaises(TimeoutError):
+                ctx["raw_tables"]
+        self.assertIn("raw_tables", ctx)
+        self.assertEqual(ctx.pending(), ["raw_tables"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import json
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from src import payloads
+from src.payloads import column_points, column_series, dumps_payload, format_column
+
+
+class PayloadTest(unittest.TestCase):
+    def setUp(self):
+        times = pd.to_datetime([1_700_000_000, 1_700_000_060, 1_700_000_120], unit="s", utc=True)
+        self.df = pd.DataFrame(
+            {
+                "time": times.tz_convert("America/Chicago"),
+                "temp": [70.25, np.nan, 71.5],
+                "wind": [3.0, 4.0, None],
+            }
+        )
+
+    def test_column_series_uses_epoch_ms_and_drops_missing(self):
+        series = column_series(self.df, "time", "temp")
+        self.assertEqual(series["t"].tolist(), [1_700_000_000_000, 1_700_000_120_000])
+        self.assertEqual(series["v"].dtype, np.float32)
+        self.assertEqual(series["v"].tolist(), [70.25, 71.5])
+        self.assertEqual(column_series(self.df, "time", "missing"), {"t": [], "v": []})
+
+    def test_column_points_skip_incomplete_pairs(self):
+        points = column_points(self.df, "wind", "temp")
+        self.assertEqual(points["x"].tolist(), [3.0])
+        self.assertEqual(points["y"].tolist(), [70.25])
+
+    def test_format_column_matches_fixed_decimals(self):
+        self.assertEqual(format_column(self.df["temp"], 1), ["70.2", None, "71.5"])
+        self.assertEqual(format_column([29.9212, None], 2), ["29.92", None])
+
+    def test_dumps_payload_with_and_without_orjson(self):
+        payload = {"temp": column_series(self.df, "time", "temp"), "current_wind": None}
+        expected = {"temp": {"t": [1_700_000_000_000, 1_700_000_120_000], "v": [70.25, 71.5]}, "current_wind": None}
+        self.assertEqual(json.loads(dumps_payload(payload)), expected)
+        with mock.patch.object(payloads, "orjson", None):
+            self.assertEqual(json.loads(dumps_payload(payload)), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
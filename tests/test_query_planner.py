@@ -0,0 +1,113 @@
+import os
+import sqlite3
+import unittest
+
+import numpy as np
+import pandas as pd
+
+os.environ.setdefault("TEMPEST_API_TOKEN", "test-token")
+
+from src.collector import BASE_SCHEMA_SQL, OBS_ST_INSERT_SQL, obs_st_row  # noqa: E402
+from src.query_planner import downsample_frame, lttb_indices, plan_window, window_query_sql  # noqa: E402
+from src.rollups import backfill, ensure_rollup_tables  # noqa: E402
+
+DAY = 86400
+START = 1_700_006_400  # 2023-11-15 00:00:00 UTC
+FIELDS = {"air_temperature": "mean", "wind_gust": "max", "wind_dir": "last", "lightning_strike_count": "sum"}
+
+
+def insert_obs(conn, epoch, temp_c, gust, wind_dir, strikes, device_id=475329, battery=2.6):
+    obs = [epoch, 0.5, 1.5, gust, wind_dir, 3, 1010.0, temp_c, 60, 1000, 1, 100, 0.0, 0, 0, strikes, battery, 1]
+    conn.execute(OBS_ST_INSERT_SQL, obs_st_row(device_id, obs))
+
+
+class PlanWindowTest(unittest.TestCase):
+    def test_short_windows_read_raw_rows(self):
+        self.assertEqual(plan_window("obs_st", DAY)["mode"], "raw")
+        self.assertEqual(plan_window("airlink", 6 * 3600)["mode"], "raw")
+
+    def test_long_windows_bucket_from_coarsest_fitting_rollup(self):
+        week = plan_window("obs_st", 7 * DAY)
+        self.assertEqual((week["mode"], week["bucket_seconds"], week["resolution"]), ("bucket", 600, "5m"))
+        year = plan_window("obs_st", 365 * DAY)
+        self.assertEqual(year["resolution"], "1h")
+        self.assertLessEqual(365 * DAY / year["bucket_seconds"], 1500)
+
+    def test_missing_rollups_bucket_raw_table(self):
+        plan = plan_window("obs_st", 7 * DAY, available_resolutions=[])
+        self.assertEqual((plan["mode"], plan["resolution"]), ("bucket", None))
+
+
+class WindowQueryTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.addCleanup(self.conn.close)
+        self.conn.executescript(BASE_SCHEMA_SQL)
+        ensure_rollup_tables(self.conn, ["obs_st"])
+        for i in range(2 * DAY // 60):
+            insert_obs(self.conn, START + i * 60, float(i % 30), gust=float(i % 7), wind_dir=i % 360, strikes=1)
+        backfill(self.conn, "obs_st", log=lambda msg: None)
+
+    def query(self, plan):
+        return self.conn.execute(window_query_sql("obs_st", plan, FIELDS), {"since": START}).fetchall()
+
+    def test_raw_and_rollup_bucketing_agree(self):
+        raw = self.query({"mode": "bucket", "bucket_seconds": 3600, "resolution": None})
+        rolled = self.query({"mode": "bucket", "bucket_seconds": 3600, "resolution": "5m"})
+        self.assertEqual(len(raw), 48)
+        self.assertEqual(len(rolled), 48)
+        for raw_row, rolled_row in zip(raw, rolled):
+            self.assertEqual(raw_row[0], rolled_row[0])
+            self.assertAlmostEqual(raw_row[1], rolled_row[1])
+            self.assertEqual(raw_row[2:], rolled_row[2:])
+
+    def test_bucket_columns_use_raw_names_and_aggregates(self):
+        cursor = self.conn.execute(
+            window_query_sql("obs_st", {"mode": "bucket", "bucket_seconds": 3600, "resolution": "1h"}, FIELDS),
+            {"since": START},
+        )
+        names = [col[0] for col in cursor.description]
+        self.assertEqual(names, ["obs_epoch", "air_temperature", "wind_gust", "lightning_strike_count", "wind_dir"])
+        first = cursor.fetchone()
+        self.assertEqual(first[0], START)
+        self.assertEqual(first[2], 6.0)
+        self.assertEqual(first[3], 60)
+        self.assertEqual(first[4], 59)
+
+    def test_last_values_come_from_the_newest_row_of_one_device(self):
+        # A second station reports only in the first half of each hour.
+        for i in range(0, 2 * DAY // 60, 60):
+            for minute in range(30):
+                epoch = START + (i + minute) * 60
+                insert_obs(self.conn, epoch, 0.0, gust=0.0, wind_dir=180, strikes=0, device_id=1, battery=2.2)
+        backfill(self.conn, "obs_st", log=lambda msg: None)
+        fields = {"wind_gust": "max", "wind_dir": "last", "battery": "last"}
+        for resolution in (None, "5m", "1h"):
+            rows = self.conn.execute(
+                window_query_sql("obs_st", {"mode": "bucket", "bucket_seconds": 3600, "resolution": resolution}, fields),
+                {"since": START},
+            ).fetchall()
+            self.assertEqual(len(rows), 48)
+            self.assertEqual(rows[0][2:], (59, 2.6), resolution)
+
+
+class LttbTest(unittest.TestCase):
+    def test_keeps_endpoints_and_spike(self):
+        x = np.arange(10_000, dtype="float64")
+        y = np.sin(x / 500.0)
+        y[4321] = 50.0
+        idx = lttb_indices(x, y, 500)
+        self.assertEqual(len(idx), 500)
+        self.assertEqual((idx[0], idx[-1]), (0, 9999))
+        self.assertIn(4321, idx)
+        self.assertTrue(np.all(np.diff(idx) > 0))
+
+    def test_downsample_frame_passes_small_frames_through(self):
+        times = pd.date_range("2024-01-01", periods=3000, freq="min", tz="UTC")
+        df = pd.DataFrame({"time": times, "value": np.linspace(0, 1, 3000)})
+        self.assertEqual(len(downsample_frame(df.head(100), "time", "value", 1500)), 100)
+        self.assertEqual(len(downsample_frame(df, "time", "value", 1500)), 1500)
+
+
+if __name__ == "__main__":
+    unittest.main()
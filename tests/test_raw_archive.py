@@ -0,0 +1,89 @@
+import json
+import sqlite3
+import unittest
+from contextlib import closing
+from datetime import datetime, timezone
+
+from support import CollectorDBTestCase  # sets TEMPEST_API_TOKEN for the src imports
+from src import collector, raw_archive
+
+JAN = int(datetime(2024, 1, 15, tzinfo=timezone.utc).timestamp())
+FEB = int(datetime(2024, 2, 15, tzinfo=timezone.utc).timestamp())
+JUN = int(datetime(2024, 6, 15, tzinfo=timezone.utc).timestamp())
+
+
+def hub_message(epoch: int) -> str:
+    return json.dumps({"type": "hub_status", "serial_number": "HB-1", "timestamp": epoch})
+
+
+class RawArchiveTest(CollectorDBTestCase):
+    def setUp(self):
+        super().setUp()
+        self.archive_dir = self.path("archive")
+
+    def make_db(self, compact: bool) -> None:
+        with closing(self.open_db()) as conn:
+            buffer = collector.IngestBuffer(compact=compact)
+            for epoch in (JAN, JAN + 60, FEB, JUN):
+                buffer.add_message(epoch, hub_message(epoch))
+            buffer.flush(conn)
+
+    def archive(self, now=JUN + 86400, days=30):
+        return raw_archive.run_archive(self.db_path, days, self.archive_dir, now=now, log=lambda message: None)
+
+    def test_old_rows_move_to_monthly_shards(self):
+        self.make_db(compact=False)
+        moved = self.archive()
+
+        self.assertEqual(moved["raw_events"], 3)
+        self.assertTrue((self.archive_dir / "raw-2024-01.db").exists())
+        self.assertTrue((self.archive_dir / "raw-2024-02.db").exists())
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            hot = conn.execute("SELECT received_at_epoch FROM raw_events").fetchall()
+            self.assertEqual(hot, [(JUN,)])
+            manifest = {entry["month"]: entry for entry in raw_archive.load_manifest(conn, "raw_events")}
+            self.assertEqual(manifest["2024-01"]["row_count"], 2)
+            self.assertEqual((manifest["2024-02"]["min_epoch"], manifest["2024-02"]["max_epoch"]), (FEB, FEB))
+            self.assertGreater(raw_archive.archive_bytes(conn), 0)
+
+    def test_reads_merge_hot_rows_and_shards(self):
+        self.make_db(compact=True)
+        self.archive()
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            rows = raw_archive.read_raw_events(conn, "raw_events", JAN, JUN + 1, archive_dir=self.archive_dir)
+            self.assertEqual([row["received_at_epoch"] for row in rows], [JAN, JAN + 60, FEB, JUN])
+            self.assertEqual(json.loads(rows[0]["payload_text"])["timestamp"], JAN)
+
+            newest = raw_archive.read_raw_events(
+                conn, "raw_events", 0, JUN + 1, limit=2, newest_first=True, archive_dir=self.archive_dir
+            )
+            self.assertEqual([row["received_at_epoch"] for row in newest], [JUN, FEB])
+            # Compact payloads only referenced by archived rows leave the hot database.
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM raw_payloads").fetchone()[0], 1)
+            self.assertEqual(conn.execute("PRAGMA database_list").fetchall()[-1][1], "main")
+
+    def test_interrupted_run_is_finished_without_duplicates(self):
+        self.make_db(compact=False)
+        self.archive()
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            # As if the previous run stopped after writing the shard.
+            conn.execute(
+                "INSERT INTO raw_events (id, received_at_epoch, message_type, payload_json, payload_text) "
+                "VALUES (1, ?, 'hub_status', '{}', ?)",
+                (JAN, hub_message(JAN)),
+            )
+            conn.commit()
+            duplicated = raw_archive.read_raw_events(conn, "raw_events", JAN, FEB, archive_dir=self.archive_dir)
+            self.assertEqual(len(duplicated), 2)
+        self.archive()
+        with closing(sqlite3.connect(self.archive_dir / "raw-2024-01.db")) as shard:
+            self.assertEqual(shard.execute("SELECT COUNT(*) FROM raw_events").fetchone()[0], 2)
+
+    def test_disabled_by_default(self):
+        self.make_db(compact=False)
+        self.assertEqual(self.archive(days=0), {})
+        self.assertFalse(self.archive_dir.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
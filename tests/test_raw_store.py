@@ -0,0 +1,97 @@
+import json
+import sqlite3
+import unittest
+from contextlib import closing
+from unittest import mock
+
+from src.raw_store import (
+    COMPACT_PAYLOAD_JSON,
+    compact_existing_rows,
+    compress_payload,
+    decompress_payload,
+    derive_payload_json,
+    payload_fingerprint,
+    raw_event_text,
+)
+
+RAW_EVENTS_SQL = """
+CREATE TABLE raw_events (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  received_at_epoch INTEGER NOT NULL,
+  device_id INTEGER,
+  message_type TEXT,
+  payload_json TEXT NOT NULL,
+  payload_text TEXT,
+  payload_hash TEXT
+);
+CREATE TABLE obs_st (
+  obs_epoch INTEGER NOT NULL,
+  device_id INTEGER NOT NULL,
+  obs_raw_json TEXT,
+  PRIMARY KEY (obs_epoch, device_id)
+);
+"""
+
+
+class RawStoreTest(unittest.TestCase):
+    def test_compress_round_trip(self):
+        text = '{"type":"rapid_wind","device_id":475329,"ob":[1700000000,1.2,270]}'
+        codec, blob = compress_payload(text)
+        self.assertIsInstance(blob, bytes)
+        self.assertEqual(decompress_payload(codec, blob), text)
+        self.assertEqual(decompress_payload(*compress_payload(text, "zlib")), text)
+
+    def test_derive_payload_json_matches_collector_normalization(self):
+        self.assertEqual(derive_payload_json('{ "a": 1,  "b": [1, 2] }'), '{"a":1,"b":[1,2]}')
+        self.assertEqual(derive_payload_json("not json"), "{}")
+        self.assertEqual(derive_payload_json(None), "{}")
+
+    def test_compact_existing_rows_dedupes_and_preserves_text(self):
+        messages = [
+            '{"type":"hub_status","device_id":475327}',
+            '{"type":"hub_status","device_id":475327}',
+            "garbled frame",
+        ]
+        with closing(sqlite3.connect(":memory:")) as conn:
+            conn.executescript(RAW_EVENTS_SQL)
+            conn.execute("CREATE TABLE app_config (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            for idx, text in enumerate(messages):
+                conn.execute(
+                    "INSERT INTO raw_events(received_at_epoch, payload_json, payload_text, payload_hash) "
+                    "VALUES (?,?,?,?)",
+                    (1700000000 + idx, derive_payload_json(text), text, payload_fingerprint(text)),
+                )
+            # Legacy row from before payload_text/payload_hash existed
+            conn.execute(
+                "INSERT INTO raw_events(received_at_epoch, payload_json) VALUES (?, ?)",
+                (1700000010, '{"type":"obs_st"}'),
+            )
+            conn.execute("INSERT INTO obs_st VALUES (1700000000, 475329, '[1700000000]')")
+            conn.commit()
+
+            summary = compact_existing_rows(conn, chunk_rows=2, log=lambda msg: None)
+
+            self.assertEqual(summary["rows_moved"], 4)
+            self.assertEqual(summary["obs_raw_json_cleared"], 1)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM raw_payloads").fetchone()[0], 3)
+            rows = conn.execute(
+                "SELECT payload_text, payload_json, payload_hash FROM raw_events ORDER BY id"
+            ).fetchall()
+            self.assertTrue(all(r[0] is None and r[1] == COMPACT_PAYLOAD_JSON for r in rows))
+            restored = [raw_event_text(conn, *row) for row in rows]
+            self.assertEqual(restored, messages + ['{"type":"obs_st"}'])
+            self.assertIsNone(conn.execute("SELECT obs_raw_json FROM obs_st").fetchone()[0])
+            stored = conn.execute("SELECT value FROM app_config WHERE key='raw_compact_last_run'").fetchone()
+            self.assertEqual(json.loads(stored[0])["rows_moved"], 4)
+
+            # Second run only looks past the stored marks and skips the size walk.
+            conn.execute("UPDATE raw_events SET payload_text = 'older row', payload_json = '{}' WHERE id = 1")
+            conn.commit()
+            with mock.patch("src.raw_store.raw_storage_bytes") as sizes:
+                self.assertEqual(compact_existing_rows(conn, log=lambda msg: None)["rows_moved"], 0)
+            sizes.assert_not_called()
+            self.assertEqual(compact_existing_rows(conn, log=lambda msg: None, full=True)["rows_moved"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import sqlite3
+import unittest
+
+os.environ.setdefault("TEMPEST_API_TOKEN", "test-token")
+
+from src.collector import BASE_SCHEMA_SQL, OBS_ST_INSERT_SQL, obs_st_row  # noqa: E402
+from src.rollups import (  # noqa: E402
+    backfill,
+    choose_resolution,
+    ensure_rollup_tables,
+    refresh_rollups,
+    rollup_select_sql,
+)
+
+DAY = 86400
+START = 1_700_006_400  # 2023-11-15 00:00:00 UTC
+
+
+def insert_obs(conn, epoch, temp_c, gust=3.0, rain=0.0, strikes=0):
+    obs = [epoch, 0.5, 1.5, gust, 200, 3, 1010.0, temp_c, 60, 1000, 1, 100, rain, 0, 0, strikes, 2.6, 1]
+    conn.execute(OBS_ST_INSERT_SQL, obs_st_row(475329, obs))
+
+
+class RollupTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.addCleanup(self.conn.close)
+        self.conn.executescript(BASE_SCHEMA_SQL)
+        ensure_rollup_tables(self.conn, ["obs_st"])
+
+    def test_refresh_aggregates_min_max_mean_last_and_sums(self):
+        for i, temp in enumerate([10.0, 14.0, 12.0]):
+            insert_obs(self.conn, START + i * 60, temp, gust=2.0 + i, rain=0.1, strikes=i)
+        refresh_rollups(self.conn, "obs_st", START, START + 120)
+
+        row = self.conn.execute(
+            """
+            SELECT bucket_epoch, sample_count, air_temperature_min, air_temperature_max,
+                   air_temperature_mean, air_temperature_last, wind_gust_max,
+                   rain_accumulated_sum, lightning_strike_count_sum
+            FROM obs_st_5m
+            """
+        ).fetchone()
+        self.assertEqual(row[:6], (START, 3, 10.0, 14.0, 12.0, 12.0))
+        self.assertEqual(row[6], 4.0)
+        self.assertAlmostEqual(row[7], 0.3)
+        self.assertEqual(row[8], 3)
+
+    def test_incremental_refresh_rebuilds_touched_buckets_only(self):
+        insert_obs(self.conn, START, 10.0)
+        refresh_rollups(self.conn, "obs_st", START, START)
+        insert_obs(self.conn, START + 60, 20.0)
+        insert_obs(self.conn, START + 3600, 30.0)
+        refresh_rollups(self.conn, "obs_st", START + 60, START + 3600)
+
+        hourly = self.conn.execute(
+            "SELECT bucket_epoch, sample_count, air_temperature_mean FROM obs_st_1h ORDER BY bucket_epoch"
+        ).fetchall()
+        self.assertEqual(hourly, [(START, 2, 15.0), (START + 3600, 1, 30.0)])
+        daily = self.conn.execute("SELECT sample_count, air_temperature_last FROM obs_st_1d").fetchall()
+        self.assertEqual(daily, [(3, 30.0)])
+
+    def test_backfill_matches_incremental_and_select_aliases_raw_names(self):
+        for i in range(3 * 24 * 12):
+            insert_obs(self.conn, START + i * 300, float(i % 17))
+        backfill(self.conn, "obs_st", chunk_seconds=DAY, log=lambda msg: None)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM obs_st_1d").fetchone()[0], 3)
+
+        rows = self.conn.execute(
+            rollup_select_sql("obs_st", "1h", {"air_temperature": "air_temperature_mean"}, until=True),
+            {"since": START + DAY, "until": START + 2 * DAY - 1},
+        ).fetchall()
+        self.assertEqual(len(rows), 24)
+        self.assertEqual(rows[0][0], START + DAY)
+
+    def test_choose_resolution_picks_coarsest_that_fills_chart(self):
+        self.assertIsNone(choose_resolution(DAY, 1500))
+        self.assertEqual(choose_resolution(7 * DAY, 1500), "5m")
+        self.assertEqual(choose_resolution(365 * DAY, 1500), "1h")
+        self.assertEqual(choose_resolution(10 * 365 * DAY, 1500), "1d")
+
+
+if __name__ == "__main__":
+    unittest.main()
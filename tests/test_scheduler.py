@@ -0,0 +1,103 @@
+import threading
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+from zoneinfo import ZoneInfo
+
+from src import location, scheduler
+
+TZ = ZoneInfo("America/New_York")
+
+
+class SchedulerTest(unittest.TestCase):
+    def make(self, jobs):
+        sched = scheduler.Scheduler(Path("unused.db"), jobs, "America/New_York")
+        self.addCleanup(sched.shutdown)
+        return sched
+
+    def test_interval_job_runs_at_startup_then_every_interval(self):
+        calls = []
+        sched = self.make({"job": {"run": lambda db: calls.append(db), "every": 30, "timeout": 10}})
+        self.assertEqual(sched.tick(now=1000.0), 30.0)
+        sched.running["job"][0].result(timeout=5)
+        self.assertEqual(sched.tick(now=1010.0), 20.0)
+        sched.tick(now=1030.0)
+        sched.running["job"][0].result(timeout=5)
+        sched.tick(now=1031.0)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(sched.stats["job"]["runs"], 2)
+
+    def test_running_job_is_not_started_again(self):
+        release = threading.Event()
+        calls = []
+
+        def slow(db_path):
+            calls.append(db_path)
+            release.wait(5)
+
+        sched = self.make({"slow": {"run": slow, "every": 10, "timeout": 15}})
+        with mock.patch.object(scheduler, "log") as log:
+            sched.tick(now=0.0)
+            sched.tick(now=10.0)
+            sched.tick(now=20.0)
+            self.assertEqual(sched.stats["slow"]["skipped"], 2)
+            self.assertEqual(sched.stats["slow"]["overruns"], 1)
+            log.assert_called_once()
+        release.set()
+        sched.running["slow"][0].result(timeout=5)
+        sched.tick(now=30.0)
+        sched.running["slow"][0].result(timeout=5)
+        self.assertEqual(len(calls), 2)
+
+    def test_failures_are_counted_and_logged(self):
+        def broken(db_path):
+            raise RuntimeError("boom")
+
+        sched = self.make({"broken": {"run": broken, "every": 10, "timeout": 5}})
+        with mock.patch.object(scheduler, "log") as log:
+            sched.tick(now=0.0)
+            self.assertRaises(RuntimeError, sched.running["broken"][0].result, 5)
+            sched.tick(now=1.0)
+        self.assertEqual(sched.stats["broken"]["failures"], 1)
+        self.assertIn("boom", log.call_args[0][0])
+
+    def test_daily_job_targets_next_local_time(self):
+        job = {"daily_at": (7, 0)}
+        before = datetime(2024, 3, 9, 6, 30, tzinfo=TZ).timestamp()
+        after = datetime(2024, 3, 9, 7, 0, tzinfo=TZ).timestamp()
+        self.assertEqual(
+            scheduler.next_run_after(job, before, TZ), datetime(2024, 3, 9, 7, 0, tzinfo=TZ).timestamp()
+        )
+        # Across the spring-forward change the next run is still 07:00 local.
+        self.assertEqual(
+            scheduler.next_run_after(job, after, TZ), datetime(2024, 3, 10, 7, 0, tzinfo=TZ).timestamp()
+        )
+
+    def test_select_jobs_rejects_unknown_names(self):
+        jobs = scheduler.default_jobs()
+        self.assertEqual(list(scheduler.select_jobs("watchdog, alerts", jobs)), ["watchdog", "alerts"])
+        with self.assertRaises(ValueError):
+            scheduler.select_jobs("alerts,nope", jobs)
+
+
+class LocationCacheTest(unittest.TestCase):
+    def setUp(self):
+        location.clear_location_cache()
+        self.addCleanup(location.clear_location_cache)
+
+    def test_location_is_resolved_once_per_ttl(self):
+        with mock.patch.object(location, "_lookup", return_value=(42.0, -71.0)) as lookup:
+            self.assertEqual(location.resolve_location("a.db"), (42.0, -71.0))
+            self.assertEqual(location.resolve_location("a.db"), (42.0, -71.0))
+        lookup.assert_called_once()
+
+    def test_missing_location_is_not_cached(self):
+        with mock.patch.object(location, "_lookup", return_value=(None, None)) as lookup:
+            location.resolve_location("a.db")
+            location.resolve_location("a.db")
+        self.assertEqual(lookup.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src import schema
+
+
+def quiet(message):
+    pass
+
+
+class SchemaTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        patcher = mock.patch.object(schema, "_CURRENT", set())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.db_path = Path(self.tmpdir.name) / "tempest.db"
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_path)
+        self.addCleanup(conn.close)
+        return conn
+
+    def tables(self, conn):
+        return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+
+    def test_fresh_database_reaches_latest_core_version(self):
+        conn = self.connect()
+        self.assertEqual(schema.ensure_schema(conn, log=quiet), ["core v1", "core v2"])
+
+        self.assertEqual(schema.schema_status(conn)["core"], (2, 2))
+        self.assertEqual(schema.schema_status(conn)["airlink"][0], 0)
+        tables = self.tables(conn)
+        self.assertTrue({"raw_events", "obs_st_1h", "change_feed", "app_config", "http_cache"} <= tables)
+        self.assertNotIn("airlink_current_obs", tables)
+
+    def test_current_database_runs_no_ddl(self):
+        schema.ensure_schema(self.connect(), log=quiet)
+        schema._CURRENT.clear()
+
+        conn = self.connect()
+        statements = []
+        conn.set_trace_callback(statements.append)
+        self.assertEqual(schema.ensure_schema(conn, log=quiet), [])
+        self.assertFalse([sql for sql in statements if "CREATE" in sql or "table_info" in sql])
+
+        # Remembered for this process: the next check does not read schema_version.
+        statements.clear()
+        schema.ensure_schema(conn, log=quiet)
+        self.assertFalse([sql for sql in statements if schema.SCHEMA_VERSION_TABLE in sql])
+
+    def test_failed_step_leaves_nothing_behind(self):
+        conn = self.connect()
+        with mock.patch("src.change_feed.ensure_change_feed_table", side_effect=sqlite3.OperationalError("disk I/O error")):
+            with self.assertRaises(sqlite3.OperationalError):
+                schema.ensure_schema(conn, log=quiet)
+
+        # Tables created earlier in the step (raw payloads, rollups) roll back with it.
+        self.assertFalse({"raw_events", "raw_payloads", "obs_st_1h"} & self.tables(self.connect()))
+        self.assertEqual(schema.schema_status(conn)["core"][0], 0)
+        self.assertEqual(schema.ensure_schema(conn, log=quiet), ["core v1", "core v2"])
+
+    def test_legacy_database_is_upgraded_in_place(self):
+        conn = self.connect()
+        conn.executescript(
+            """
+            CREATE TABLE raw_events (
+              id INTEGER PRIMARY KEY AUTOINCREMENT,
+              received_at_epoch INTEGER NOT NULL,
+              device_id INTEGER,
+              message_type TEXT,
+              payload_json TEXT NOT NULL
+            );
+            CREATE TABLE collector_heartbeat (name TEXT PRIMARY KEY, last_ok_epoch INTEGER);
+            CREATE TABLE airlink_obs (did TEXT NOT NULL, ts INTEGER NOT NULL, pm_2p5 REAL, PRIMARY KEY (did, ts));
+            INSERT INTO raw_events (received_at_epoch, payload_json) VALUES (1700000000, '{}');
+            INSERT INTO airlink_obs VALUES ('001D0A', 1700000000, 12.0);
+            """
+        )
+        conn.execute("ALTER TABLE raw_events ADD COLUMN payload_hash TEXT")
+        conn.execute("CREATE UNIQUE INDEX idx_raw_events_payload_hash ON raw_events(payload_hash)")
+        conn.commit()
+
+        applied = schema.ensure_schema(conn, ("core", "airlink"), log=quiet)
+        self.assertEqual(applied, ["core v1", "core v2", "airlink v1"])
+        self.assertTrue({"payload_text", "payload_hash"} <= schema.table_columns(conn, "raw_events"))
+        self.assertIn("queue_depth", schema.table_columns(conn, "collector_heartbeat"))
+        indexes = {row[1]: row[2] for row in conn.execute("PRAGMA index_list(raw_events)")}
+        self.assertEqual(indexes["idx_raw_events_payload_hash"], 0)
+        # The legacy AirLink table is renamed with its rows and gains the AQI columns.
+        self.assertNotIn("airlink_obs", self.tables(conn))
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM airlink_current_obs").fetchone()[0], 1)
+        self.assertIn("aqi_pm25", schema.table_columns(conn, "airlink_current_obs"))
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM raw_events").fetchone()[0], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import sqlite3
+import unittest
+
+import pandas as pd
+
+from src.query_planner import window_query_sql
+from src.window_cache import TailCache
+
+START = 1_700_006_400
+
+
+class TailCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.addCleanup(self.conn.close)
+        self.conn.execute("CREATE TABLE obs_st (obs_epoch INTEGER PRIMARY KEY, air_temperature REAL)")
+        self.add_rows(0, 120)
+        self.queries = []
+
+    def add_rows(self, first, last):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO obs_st VALUES (?, ?)",
+            [(START + i * 60, float(i % 13)) for i in range(first, last)],
+        )
+
+    def fetch_raw(self, start):
+        self.queries.append(start)
+        return pd.read_sql_query(
+            "SELECT obs_epoch, air_temperature FROM obs_st WHERE obs_epoch >= ? ORDER BY obs_epoch",
+            self.conn,
+            params=(start,),
+        )
+
+    def fetch_buckets(self, start):
+        plan = {"mode": "bucket", "bucket_seconds": 600, "resolution": None}
+        sql = window_query_sql("obs_st", plan, {"air_temperature": "mean"})
+        return pd.read_sql_query(sql, self.conn, params={"since": start})
+
+    @staticmethod
+    def transform(df):
+        df["air_temperature_f"] = df["air_temperature"] * 9 / 5 + 32
+        return df
+
+    def test_raw_refresh_appends_tail_and_trims_head(self):
+        cache = TailCache(overlap_seconds=120)
+        first = cache.get("24h", START, self.fetch_raw, self.transform, "obs_epoch")
+        self.assertEqual(len(first), 120)
+
+        self.add_rows(120, 125)
+        since = START + 10 * 60
+        refreshed = cache.get("24h", since, self.fetch_raw, self.transform, "obs_epoch")
+        expected = self.transform(self.fetch_raw(since))
+        pd.testing.assert_frame_equal(refreshed, expected)
+        # Second query only re-read the overlap before the newest cached row
+        self.assertEqual(self.queries[1], START + 119 * 60 - 120)
+        stats = cache.stats()
+        self.assertEqual((stats["full_loads"], stats["tail_loads"], stats["rows_appended"]), (1, 1, 5))
+
+    def test_bucket_refresh_rebuilds_last_bucket(self):
+        cache = TailCache(overlap_seconds=0)
+        cache.get("7d", START, self.fetch_buckets, self.transform, "obs_epoch", bucket_seconds=600)
+        self.add_rows(120, 135)
+        refreshed = cache.get("7d", START, self.fetch_buckets, self.transform, "obs_epoch", bucket_seconds=600)
+        expected = self.transform(self.fetch_buckets(START))
+        pd.testing.assert_frame_equal(refreshed, expected)
+
+    def test_plan_change_or_earlier_since_reloads(self):
+        cache = TailCache()
+        cache.get("24h", START + 600, self.fetch_raw, self.transform, "obs_epoch", plan="raw")
+        cache.get("24h", START, self.fetch_raw, self.transform, "obs_epoch", plan="raw")
+        cache.get("24h", START, self.fetch_raw, self.transform, "obs_epoch", plan="bucket")
+        self.assertEqual(cache.stats()["full_loads"], 3)
+
+    def test_returned_frame_is_a_copy(self):
+        cache = TailCache()
+        frame = cache.get("24h", START, self.fetch_raw, self.transform, "obs_epoch")
+        frame["air_temperature_f"] = 0.0
+        again = cache.get("24h", START, self.fetch_raw, self.transform, "obs_epoch")
+        self.assertNotEqual(again["air_temperature_f"].iloc[0], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()